@@ -0,0 +1,203 @@
+import time
+from datetime import datetime, timezone
+
+from flask import abort, Blueprint, current_app, jsonify, request
+
+from data_managers.leaderboards import BOARDS
+from data_managers.projections import MOVIE_FIELDS, parse_fields
+from utils.omdb_api import fetch_movie_details, movie_fields
+
+MAX_BATCH_USERS = 100
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+DEFAULT_SUGGESTIONS = 10
+MAX_SUGGESTIONS = 50
+
+api_v1 = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+
+def _data_manager():
+    return current_app.extensions['data_manager']
+
+
+def parse_limit(args):
+    """Page size from ?limit=, clamped to 1..MAX_LIMIT."""
+    return min(max(args.get('limit', DEFAULT_LIMIT, type=int), 1), MAX_LIMIT)
+
+
+def parse_suggestion_limit(args):
+    """Number of autocomplete suggestions from ?limit=, clamped to 1..MAX_SUGGESTIONS."""
+    return min(max(args.get('limit', DEFAULT_SUGGESTIONS, type=int), 1), MAX_SUGGESTIONS)
+
+
+def leaderboard_payload(board, snapshot, limit):
+    """JSON body of a leaderboard: its first `limit` entries and when it was last brought up to date."""
+    computed_at = snapshot['computed_at']
+    return {
+        'board': board,
+        'computed_at': datetime.fromtimestamp(computed_at, timezone.utc).isoformat() if computed_at else None,
+        'age_seconds': round(time.time() - computed_at, 1) if computed_at else None,
+        'entries': snapshot['entries'][:limit]
+    }
+
+
+def parse_user_ids(args):
+    """User IDs from ?user_ids=1,2,3. Raises ValueError if missing, malformed or too many."""
+    raw = [value for value in args.get('user_ids', '').split(',') if value.strip()]
+    if not raw:
+        raise ValueError("Pass user_ids as a comma-separated list.")
+    if len(raw) > MAX_BATCH_USERS:
+        raise ValueError(f"At most {MAX_BATCH_USERS} user_ids per request.")
+    try:
+        return [int(value) for value in raw]
+    except ValueError as e:
+        raise ValueError("user_ids must be integers.") from e
+
+
+def parse_title(payload):
+    """Movie title from a JSON body like {"title": "Heat"}. Raises ValueError if missing."""
+    title = payload.get('title') if isinstance(payload, dict) else None
+    if not isinstance(title, str) or not title.strip():
+        raise ValueError("Pass the movie title as {\"title\": \"...\"}.")
+    return title.strip()
+
+
+@api_v1.errorhandler(ValueError)
+def bad_request(error):
+    return jsonify(error=str(error)), 400
+
+
+@api_v1.errorhandler(404)
+def not_found(error):
+    return jsonify(error="Not found."), 404
+
+
+@api_v1.route('/users')
+def list_users():
+    """All users. ?fields= selects from user_id, name, movie_count."""
+    return jsonify(users=_data_manager().get_user_rows(fields=request.args.get('fields')))
+
+
+@api_v1.route('/users/<int:user_id>')
+def get_user(user_id):
+    """One user. ?fields= selects from user_id, name, movie_count."""
+    users = _data_manager().get_user_rows(fields=request.args.get('fields'), user_ids=[user_id])
+    if not users:
+        abort(404)
+    return jsonify(users[0])
+
+
+@api_v1.route('/users/<int:user_id>/movies')
+def user_movies(user_id):
+    """
+    One page of a user's movies with keyset pagination.
+    Accepts fields, sort, order=desc, after (the next_cursor of the previous
+    page) and limit.
+    """
+    data_manager = _data_manager()
+    if not data_manager.get_user_rows(fields=('user_id',), user_ids=[user_id]):
+        abort(404)
+    movies, next_cursor = data_manager.get_movie_rows_page(
+        user_id,
+        fields=request.args.get('fields'),
+        sort=request.args.get('sort', 'movie_id'),
+        descending=request.args.get('order') == 'desc',
+        after=request.args.get('after'),
+        limit=parse_limit(request.args)
+    )
+    return jsonify(movies=movies, next_cursor=next_cursor)
+
+
+@api_v1.route('/users/<int:user_id>/movies', methods=['POST'])
+def add_user_movie(user_id):
+    """
+    Look a title up in OMDb and add it to a user's collection: {"title": "Heat"}.
+    Answers 201 with the stored fields, 404 if the user or the title is
+    unknown and 409 if the user already owns the movie.
+    """
+    title = parse_title(request.get_json(silent=True))
+    data_manager = _data_manager()
+    if not data_manager.get_user_rows(fields=('user_id',), user_ids=[user_id]):
+        abort(404)
+    movie_data = fetch_movie_details(title)
+    if not movie_data:
+        return jsonify(error=f"'{title}' was not found in OMDb."), 404
+    fields = movie_fields(movie_data)
+    data_manager.save_omdb_titles([movie_data])
+    error = data_manager.add_movies(user_id, [fields]).get(fields['title'])
+    if error:
+        return jsonify(error=error), 409
+    return jsonify(fields), 201
+
+
+@api_v1.route('/users/<int:user_id>/recommendations')
+def user_recommendations(user_id):
+    """Titles a user may like, from the precomputed similar-title lists. Accepts limit."""
+    data_manager = _data_manager()
+    if not data_manager.get_user_rows(fields=('user_id',), user_ids=[user_id]):
+        abort(404)
+    return jsonify(recommendations=data_manager.get_recommendations(user_id, limit=parse_limit(request.args)))
+
+
+@api_v1.route('/movies')
+def movies_for_users():
+    """
+    The first movies of many users in one query: ?user_ids=1,2,3.
+    Returns {"movies": {"<user_id>": [...]}}, with `limit` movies per user at most.
+    """
+    movies = _data_manager().get_movie_rows_for_users(
+        parse_user_ids(request.args), fields=request.args.get('fields'), limit=parse_limit(request.args)
+    )
+    return jsonify(movies={str(user_id): rows for user_id, rows in movies.items()})
+
+
+@api_v1.route('/movies/<int:movie_id>')
+def get_movie(movie_id):
+    """One movie. ?fields= selects from movie_id, user_id, title, director, year, rating."""
+    fields = parse_fields(request.args.get('fields'), MOVIE_FIELDS)
+    movie = _data_manager().get_movie_by_id(movie_id)
+    if not movie:
+        abort(404)
+    return jsonify({name: getattr(movie, name) for name in fields})
+
+
+@api_v1.route('/autocomplete')
+def autocomplete_titles():
+    """
+    Titles starting with ?q=, ignoring case, from every title the app knows.
+    The titles most users own come first. Accepts limit (default 10).
+    """
+    autocomplete = current_app.extensions['autocomplete']
+    if autocomplete.due():
+        app = current_app._get_current_object()
+
+        def load(after_movie_id):
+            # Reloads run in a background thread, outside this request's app context.
+            with app.app_context():
+                return _data_manager().get_title_popularity(after_movie_id)
+
+        autocomplete.refresh(load)
+    return jsonify(titles=autocomplete.search(request.args.get('q', ''), parse_suggestion_limit(request.args)))
+
+
+@api_v1.route('/leaderboards/<board>')
+def get_leaderboard(board):
+    """
+    The most_collected or top_rated leaderboard, served from the in-memory
+    snapshot with the time it was last refreshed. Accepts limit.
+    """
+    if board not in BOARDS:
+        abort(404)
+    leaderboards = current_app.extensions['leaderboards']
+    if leaderboards.due():
+        leaderboards.refresh(_data_manager().get_leaderboards)
+    return jsonify(leaderboard_payload(board, leaderboards.get(board), parse_limit(request.args)))
+
+
+@api_v1.route('/titles/<imdb_id>')
+def get_title(imdb_id):
+    """The full OMDb payload stored for a title, shared by every user who owns it."""
+    payload = _data_manager().get_omdb_title(imdb_id)
+    if payload is None:
+        abort(404)
+    return jsonify(payload)
@@ -0,0 +1,158 @@
+import asyncio
+
+from quart import abort, Blueprint, current_app, jsonify, request
+
+from api.v1 import leaderboard_payload, parse_limit, parse_suggestion_limit, parse_title, parse_user_ids
+from data_managers.leaderboards import BOARDS
+from data_managers.projections import MOVIE_FIELDS, parse_fields
+from utils.omdb_api import movie_fields
+from utils.omdb_async import fetch_movie_details_async
+
+# The routes of api.v1 as coroutines, for the asyncio serving mode (async_app.py).
+api_v1_async = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+
+def _data_manager():
+    return current_app.extensions['data_manager']
+
+
+async def _user_exists(user_id):
+    return bool(await _data_manager().get_user_rows(fields=('user_id',), user_ids=[user_id]))
+
+
+@api_v1_async.errorhandler(ValueError)
+async def bad_request(error):
+    return jsonify(error=str(error)), 400
+
+
+@api_v1_async.errorhandler(404)
+async def not_found(error):
+    return jsonify(error="Not found."), 404
+
+
+@api_v1_async.route('/users')
+async def list_users():
+    """All users. ?fields= selects from user_id, name, movie_count."""
+    return jsonify(users=await _data_manager().get_user_rows(fields=request.args.get('fields')))
+
+
+@api_v1_async.route('/users/<int:user_id>')
+async def get_user(user_id):
+    """One user. ?fields= selects from user_id, name, movie_count."""
+    users = await _data_manager().get_user_rows(fields=request.args.get('fields'), user_ids=[user_id])
+    if not users:
+        abort(404)
+    return jsonify(users[0])
+
+
+@api_v1_async.route('/users/<int:user_id>/movies')
+async def user_movies(user_id):
+    """One page of a user's movies with keyset pagination, as in api.v1."""
+    if not await _user_exists(user_id):
+        abort(404)
+    movies, next_cursor = await _data_manager().get_movie_rows_page(
+        user_id,
+        fields=request.args.get('fields'),
+        sort=request.args.get('sort', 'movie_id'),
+        descending=request.args.get('order') == 'desc',
+        after=request.args.get('after'),
+        limit=parse_limit(request.args)
+    )
+    return jsonify(movies=movies, next_cursor=next_cursor)
+
+
+@api_v1_async.route('/users/<int:user_id>/movies', methods=['POST'])
+async def add_user_movie(user_id):
+    """
+    Look a title up in OMDb and add it to a user's collection: {"title": "Heat"}.
+    The request waits on OMDb without holding a thread.
+    """
+    title = parse_title(await request.get_json(silent=True))
+    data_manager = _data_manager()
+    if not await _user_exists(user_id):
+        abort(404)
+    movie_data = await fetch_movie_details_async(current_app.extensions['omdb_client'], title)
+    if not movie_data:
+        return jsonify(error=f"'{title}' was not found in OMDb."), 404
+    fields = movie_fields(movie_data)
+    await data_manager.save_omdb_titles([movie_data])
+    error = (await data_manager.add_movies(user_id, [fields])).get(fields['title'])
+    if error:
+        return jsonify(error=error), 409
+    return jsonify(fields), 201
+
+
+@api_v1_async.route('/users/<int:user_id>/recommendations')
+async def user_recommendations(user_id):
+    """Titles a user may like, from the precomputed similar-title lists. Accepts limit."""
+    if not await _user_exists(user_id):
+        abort(404)
+    recommendations = await _data_manager().get_recommendations(user_id, limit=parse_limit(request.args))
+    return jsonify(recommendations=recommendations)
+
+
+@api_v1_async.route('/movies')
+async def movies_for_users():
+    """The first movies of many users in one query: ?user_ids=1,2,3."""
+    movies = await _data_manager().get_movie_rows_for_users(
+        parse_user_ids(request.args), fields=request.args.get('fields'), limit=parse_limit(request.args)
+    )
+    return jsonify(movies={str(user_id): rows for user_id, rows in movies.items()})
+
+
+@api_v1_async.route('/movies/<int:movie_id>')
+async def get_movie(movie_id):
+    """One movie. ?fields= selects from movie_id, user_id, title, director, year, rating."""
+    fields = parse_fields(request.args.get('fields'), MOVIE_FIELDS)
+    movie = await _data_manager().get_movie_by_id(movie_id)
+    if not movie:
+        abort(404)
+    return jsonify({name: getattr(movie, name) for name in fields})
+
+
+@api_v1_async.route('/autocomplete')
+async def autocomplete_titles():
+    """
+    Titles starting with ?q=, ignoring case, from every title the app knows.
+    The titles most users own come first. Accepts limit (default 10).
+    """
+    autocomplete = current_app.extensions['autocomplete']
+    if autocomplete.due():
+        # The index is built in a worker thread, which runs its query on this loop.
+        loop = asyncio.get_running_loop()
+        data_manager = _data_manager()
+
+        def load(after_movie_id):
+            return asyncio.run_coroutine_threadsafe(data_manager.get_title_popularity(after_movie_id), loop).result()
+
+        await asyncio.to_thread(autocomplete.refresh, load)
+    return jsonify(titles=autocomplete.search(request.args.get('q', ''), parse_suggestion_limit(request.args)))
+
+
+@api_v1_async.route('/leaderboards/<board>')
+async def get_leaderboard(board):
+    """
+    The most_collected or top_rated leaderboard, served from the in-memory
+    snapshot with the time it was last refreshed. Accepts limit.
+    """
+    if board not in BOARDS:
+        abort(404)
+    leaderboards = current_app.extensions['leaderboards']
+    if leaderboards.due():
+        loop = asyncio.get_running_loop()
+        data_manager = _data_manager()
+
+        def load(versions):
+            return asyncio.run_coroutine_threadsafe(data_manager.get_leaderboards(versions), loop).result()
+
+        await asyncio.to_thread(leaderboards.refresh, load)
+    return jsonify(leaderboard_payload(board, leaderboards.get(board), parse_limit(request.args)))
+
+
+@api_v1_async.route('/titles/<imdb_id>')
+async def get_title(imdb_id):
+    """The full OMDb payload stored for a title, shared by every user who owns it."""
+    payload = await _data_manager().get_omdb_title(imdb_id)
+    if payload is None:
+        abort(404)
+    return jsonify(payload)
@@ -1,51 +1,313 @@
+import csv
+import functools
+import io
 import os
+import threading
 from datetime import datetime
 
+import click
 from dotenv import load_dotenv
-from flask import abort, Flask, flash, render_template, request, url_for, redirect
-
-from data_managers.data_manager_sqlite import SQLiteDataManager, Movie, User
+from flask import (
+    abort, current_app, Flask, flash, jsonify, render_template, request, send_from_directory, url_for, redirect
+)
+from flask.cli import with_appcontext
+from markupsafe import escape, Markup
+
+from data_managers.cached_data_manager import CachedDataManager
+from data_managers.leaderboards import LEADERBOARD_SIZE, MIN_RATINGS, MOST_COLLECTED, TOP_RATED
+from data_managers.registry import backend_for_uri, get_backend
+from models.movie import Movie
+from models.movie_search import HIGHLIGHT_CLOSE, HIGHLIGHT_OPEN
+from utils.autocomplete import TitleAutocomplete
+from utils.cache_backends import LRUCacheBackend, RedisCacheBackend
+from utils import metrics
+from utils.export import EXPORT_FORMATS, export_response
 from utils.extensions import db
-from utils.omdb_api import fetch_movie_details
+from utils.http_cache import conditional_page, make_etag
+from utils.json_provider import FastJSONProvider
+from utils.leaderboards import LeaderboardCache, LeaderboardRefresher
+from utils.lookup_queue import LookupQueue
+from utils.omdb_api import (
+    fetch_many_movie_details, fetch_movie_details, get_omdb_cache, get_omdb_quota, get_title_index, movie_fields
+)
+from utils.posters import PosterWorker, thumbnail_name
+from utils.recommendations import RecommendationRefresher
+from utils.replicas import init_replicas, ReplicaSyncer, sync_sqlite_replicas
+from utils.sqlite_tuning import apply_pragmas, engine_options, is_sqlite, optimize, PeriodicOptimizer
+from utils.title_index import build_title_index, DEFAULT_INDEX_PATH
 
 load_dotenv()
 
-
-def create_app(db_uri=None):
-    """Create and configure the Flask application."""
+PAGE_SIZE = 50
+POSTER_MAX_AGE = 365 * 24 * 3600
+MAX_PAGE_SIZE = 500
+RECOMMENDATION_LIMIT = 20
+LEADERBOARD_PAGE_SIZE = 50
+
+
+def create_app(db_uri=None, db_profile=None, replica_urls=None):
+    """
+    Create and configure the Flask application.
+    `db_uri` defaults to the DATABASE_URL environment variable, then to
+    sqlite:///moviwebapp.db. `db_profile` selects the SQLite tuning profile ('performance' or 'default'),
+    falling back to the DB_PROFILE environment variable. `replica_urls` lists read
+    replicas, falling back to the comma-separated DATABASE_REPLICA_URLS.
+    Building the app does not touch the database schema (see `flask init-db`)
+    and starts no threads; background workers start with the first request of
+    each process, so forked servers get their own.
+    """
     app = Flask(__name__)
-    app.config['SQLALCHEMY_DATABASE_URI'] = db_uri or 'sqlite:///moviwebapp.db'
+    app.json = FastJSONProvider(app)
+    app.secret_key = os.getenv('SECRET_KEY')
+    app.config['SQLALCHEMY_DATABASE_URI'] = db_uri or os.getenv('DATABASE_URL', 'sqlite:///moviwebapp.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['DB_PROFILE'] = db_profile or os.getenv('DB_PROFILE', 'performance')
+    app.config['DB_OPTIMIZE_INTERVAL'] = int(os.getenv('DB_OPTIMIZE_INTERVAL', 3600))
+    app.config['PROFILING_ENABLED'] = os.getenv('PROFILING_ENABLED') == '1'
+    app.config['BACKGROUND_WORKERS'] = os.getenv('BACKGROUND_WORKERS', '1') == '1'
+    app.config['POSTER_DIR'] = os.getenv('POSTER_DIR') or os.path.join(app.instance_path, 'posters')
+
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    app.config['DATA_BACKEND'] = os.getenv('DATA_BACKEND') or backend_for_uri(uri)
+    if is_sqlite(uri):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['DB_PROFILE'], uri)
+    elif backend_for_uri(uri) == 'postgresql':
+        from data_managers.data_manager_postgres import engine_options as postgres_engine_options
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = postgres_engine_options()
+
+    if replica_urls is None:
+        replica_urls = [url for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url]
+    router = init_replicas(app, replica_urls) if replica_urls else None
 
     db.init_app(app)
+    with app.app_context():
+        if is_sqlite(uri):
+            apply_pragmas(db.engine, app.config['DB_PROFILE'])
+        for key in (router.bind_keys if router else []):
+            # Replicas mirror the primary; keep create_all/drop_all away from them.
+            db.metadatas.pop(key, None)
+            apply_pragmas(db.engines[key], app.config['DB_PROFILE'])
+            router.watch(key, db.engines[key])
+
+    init_services(app)
+    register_routes(app)
+    register_commands(app)
+    init_metrics(app)
     return app
 
 
-app = create_app()
-app.secret_key = os.getenv('SECRET_KEY')
-
-with app.app_context():
+def create_data_manager(app):
+    """
+    Build the data manager for the configured backend (DATA_BACKEND, or the
+    database URI scheme), wrapped in a read cache unless CACHE_BACKEND=none.
+    """
+    manager = get_backend(app.config['DATA_BACKEND'])()
+    backend_name = os.getenv('CACHE_BACKEND', 'lru')
+    if backend_name == 'none':
+        return manager
+    if backend_name == 'redis':
+        backend = RedisCacheBackend.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    else:
+        backend = LRUCacheBackend(max_entries=int(os.getenv('CACHE_SIZE', 4096)))
+    return CachedDataManager(manager, backend, ttl=int(os.getenv('CACHE_TTL', 300)))
+
+
+def init_services(app):
+    """Create the data manager, page cache and background workers of an app, without starting them."""
+    data_manager = create_data_manager(app)
+    page_size = int(os.getenv('PAGE_CACHE_SIZE', 256))
+    app.extensions['data_manager'] = data_manager
+    app.extensions['page_cache'] = LRUCacheBackend(max_entries=page_size) if page_size > 0 else None
+    app.extensions['lookup_queue'] = LookupQueue(
+        data_manager,
+        fetch=functools.partial(fetch_movie_details, raise_errors=True),
+        workers=int(os.getenv('LOOKUP_WORKERS', 2)),
+        done_ttl=int(os.getenv('OMDB_CACHE_TTL', 86400))
+    )
+    app.extensions['autocomplete'] = TitleAutocomplete(
+        refresh_interval=float(os.getenv('AUTOCOMPLETE_REFRESH_INTERVAL', 1)),
+        rebuild_interval=float(os.getenv('AUTOCOMPLETE_REBUILD_INTERVAL', 300)),
+        cached_titles=lambda: get_omdb_cache().titles()
+    )
+    app.extensions['poster_worker'] = PosterWorker(
+        app.config['POSTER_DIR'], interval=float(os.getenv('POSTER_WORKER_INTERVAL', 5))
+    )
+    app.extensions['db_optimizer'] = PeriodicOptimizer(
+        app, lambda: db.engine, interval=app.config['DB_OPTIMIZE_INTERVAL']
+    )
+    app.extensions['recommendation_refresher'] = RecommendationRefresher(
+        app, data_manager, interval=float(os.getenv('RECOMMENDATION_REFRESH_INTERVAL', 10))
+    )
+    app.extensions['leaderboard_refresher'] = LeaderboardRefresher(
+        app, data_manager,
+        interval=float(os.getenv('LEADERBOARD_REFRESH_INTERVAL', 60)),
+        size=int(os.getenv('LEADERBOARD_SIZE', LEADERBOARD_SIZE)),
+        min_ratings=int(os.getenv('LEADERBOARD_MIN_RATINGS', MIN_RATINGS))
+    )
+    app.extensions['leaderboards'] = LeaderboardCache(
+        refresh_interval=float(os.getenv('LEADERBOARD_CACHE_INTERVAL', 5))
+    )
+    app.extensions['replica_syncer'] = ReplicaSyncer(
+        app, interval=float(os.getenv('REPLICA_SYNC_INTERVAL', 1))
+    )
+    app.extensions['workers_started'] = False
+    workers_lock = threading.Lock()
+
+    @app.before_request
+    def start_workers_once():
+        if app.extensions['workers_started'] or not app.config['BACKGROUND_WORKERS']:
+            return
+        with workers_lock:
+            if not app.extensions['workers_started']:
+                start_background_workers(app)
+                app.extensions['workers_started'] = True
+
+
+def start_background_workers(app):
+    """Start the lookup queue, poster, optimizer, recommendation, leaderboard and replica sync threads of an app."""
+    lookup_queue = app.extensions['lookup_queue']
+    if lookup_queue.workers:
+        lookup_queue.start(app)
+    app.extensions['poster_worker'].start(app)
+    app.extensions['db_optimizer'].start()
+    app.extensions['recommendation_refresher'].start()
+    app.extensions['leaderboard_refresher'].start()
+    if 'replica_router' in app.extensions and is_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+        sync_sqlite_replicas(app)
+        app.extensions['replica_syncer'].start()
+
+
+def init_db():
+    """Create missing tables, the search index and derived data. Runs inside an app context."""
+    data_manager = current_data_manager()
     db.create_all()
-
-data_manager = SQLiteDataManager()
+    data_manager.ensure_cascading_deletes()
+    data_manager.ensure_search_index()
+    data_manager.ensure_user_stats()
+    data_manager.ensure_omdb_titles()
+    data_manager.ensure_recommendations()
+    data_manager.ensure_leaderboards()
+
+
+def init_metrics(app):
+    """Instrument the app's engines and publish cache statistics at /metrics."""
+    data_manager = app.extensions['data_manager']
+    router = app.extensions.get('replica_router')
+    with app.app_context():
+        metrics.init_app(app, db.engine)
+        for key in (router.bind_keys if router else []):
+            metrics.instrument_engine(db.engines[key])
+
+    def data_cache_stats():
+        """Hit/miss counts of the data manager cache, labelled by method."""
+        if not isinstance(data_manager, CachedDataManager):
+            return []
+        samples = []
+        for method, stats in data_manager.stats().items():
+            samples.append(({'method': method, 'result': 'hit'}, stats['hits']))
+            samples.append(({'method': method, 'result': 'miss'}, stats['misses']))
+        return samples
+
+    metrics.registry.gauge(
+        'omdb_cache_events', 'OMDb cache hits, misses and evictions.',
+        lambda: [({'event': name}, value) for name, value in get_omdb_cache().stats().items() if name != 'size']
+    )
+    metrics.registry.gauge('data_cache_requests', 'Data manager cache lookups.', data_cache_stats)
+
+    def title_index_lookups():
+        """Titles answered from the offline title index, and misses that went on to OMDb."""
+        index = get_title_index()
+        if index is None:
+            return []
+        return [({'result': name}, value) for name, value in index.stats().items() if name != 'size']
+
+    metrics.registry.gauge(
+        'leaderboard_age_seconds', 'Seconds since each served leaderboard snapshot was refreshed.',
+        lambda: [({'board': board}, age) for board, age in app.extensions['leaderboards'].ages().items()]
+    )
+    metrics.registry.gauge('title_index_lookups', 'Offline title index lookups.', title_index_lookups)
+
+    def quota_remaining():
+        """Tokens in the shared OMDb bucket and calls left today."""
+        quota = get_omdb_quota()
+        if quota is None:
+            return []
+        return [({'limit': name}, value) for name, value in quota.remaining().items() if value is not None]
+
+    def quota_calls():
+        """OMDb calls this process was granted or denied by the quota, per priority class."""
+        quota = get_omdb_quota()
+        if quota is None:
+            return []
+        return [
+            ({'priority': priority, 'result': result}, count)
+            for result, counts in quota.stats().items() for priority, count in counts.items()
+        ]
+
+    metrics.registry.gauge('omdb_quota_remaining', 'OMDb calls left in the shared quota.', quota_remaining)
+    metrics.registry.gauge('omdb_quota_calls', 'OMDb calls granted or denied by the quota.', quota_calls)
+
+
+def register_routes(app):
+    """Attach the HTML views, the JSON API and the error pages to an app."""
+    from api.v1 import api_v1
+
+    for rule, view, methods in ROUTES:
+        app.add_url_rule(rule, view_func=view, methods=methods)
+    app.register_blueprint(api_v1)
+    app.add_template_filter(highlight_filter, 'highlight')
+    app.register_error_handler(404, not_found_error)
+    app.register_error_handler(500, internal_error)
+
+
+def register_commands(app):
+    """Add the maintenance commands to the app's `flask` CLI."""
+    for command in (
+        init_db_command, rebuild_search_index_command, verify_user_stats_command,
+        rebuild_recommendations_command, rebuild_leaderboards_command, optimize_db_command, build_title_index_command
+    ):
+        app.cli.add_command(command)
+
+
+def current_data_manager():
+    """The data manager of the app handling the current request or command."""
+    return current_app.extensions['data_manager']
+
+
+def page_data_manager():
+    """
+    The data manager to render cacheable pages from. Pages stored in the page
+    cache read around the data cache: its LRU is per process and only sees
+    this process's writes, so another worker could render stale rows and pin
+    them under the new version's ETag.
+    """
+    data_manager = current_data_manager()
+    if current_app.extensions['page_cache'] is not None and isinstance(data_manager, CachedDataManager):
+        return data_manager.inner
+    return data_manager
+
+
+def parse_import_titles(text, upload):
+    """Collect movie titles from a textarea (one per line) and an optional CSV upload."""
+    titles = [line.strip() for line in (text or "").splitlines()]
+    if upload and upload.filename:
+        reader = csv.reader(io.StringIO(upload.read().decode('utf-8-sig')))
+        rows = [row for row in reader if row]
+        if rows and rows[0][0].strip().lower() == 'title':
+            rows = rows[1:]
+        titles.extend(row[0].strip() for row in rows)
+    return list(dict.fromkeys(title for title in titles if title))
 
 
 def handle_add_movie_post(user_id):
-    """Process POST request to add a new movie for a user."""
+    """Process POST request to queue a movie lookup for a user."""
     try:
-        title = request.form.get('title')
-        movie_data = fetch_movie_details(title)
-        if not movie_data:
-            flash(f"Movie '{title}' not found in OMDb.")
+        title = (request.form.get('title') or "").strip()
+        if not title:
+            flash("Please enter a movie title.")
             return render_template('add_movie.html', user_id=user_id)
-        data_manager.add_movie(
-            title=movie_data.get('Title'),
-            user_id=user_id,
-            year=movie_data.get('Year') or "",
-            director=movie_data.get('Director') or "",
-            rating=movie_data.get('imdbRating')
-        )
-        flash(f"Movie '{title}' has been added!")
+        current_app.extensions['lookup_queue'].enqueue(user_id, title)
+        flash(f"Looking up '{title}'. It will appear in the list shortly.")
         return redirect(url_for('user_movies', user_id=user_id))
     except Exception as e:
         print(f"Error adding movie: {e}")
@@ -53,6 +315,40 @@ def handle_add_movie_post(user_id):
         return render_template('add_movie.html', user_id=user_id)
 
 
+def handle_import_movies_post(user_id):
+    """Process POST request to import a list of titles for a user."""
+    titles = parse_import_titles(request.form.get('titles'), request.files.get('file'))
+    if not titles:
+        flash("Please enter at least one title or upload a CSV file.")
+        return render_template('import_movies.html', user_id=user_id)
+
+    results = {title: "Movie not found in OMDb." for title in titles}
+    payloads = {title: movie_data for title, movie_data in fetch_many_movie_details(titles).items() if movie_data}
+    found = {title: movie_fields(movie_data) for title, movie_data in payloads.items()}
+    # Input titles can resolve to the same OMDb title; only the first of them adds the movie.
+    first_input = {}
+    for title, fields in found.items():
+        first_input.setdefault(fields['title'], title)
+
+    try:
+        data_manager = current_data_manager()
+        data_manager.save_omdb_titles(payloads.values())
+        imported = data_manager.add_movies(user_id, [found[title] for title in first_input.values()])
+        for title, fields in found.items():
+            if first_input[fields['title']] == title:
+                results[title] = imported.get(fields['title'])
+            else:
+                results[title] = "Movie already exists."
+    except Exception as e:
+        print(f"Error importing movies: {e}")
+        flash("An error occurred while importing the movies.")
+        return render_template('import_movies.html', user_id=user_id)
+
+    added = sum(1 for error in results.values() if error is None)
+    flash(f"{added} of {len(titles)} movies have been imported!")
+    return render_template('import_movies.html', user_id=user_id, results=results)
+
+
 def handle_movie_update_post(user_id, movie_id):
     """Process POST request to update a movie's data."""
     title = request.form.get('title')
@@ -76,7 +372,7 @@ def handle_movie_update_post(user_id, movie_id):
         if not (0 <= float(rating) <= 10):
             raise ValueError("Rating must be between 0 and 10.")
 
-        data_manager.update_movie(movie)
+        current_data_manager().update_movie(movie)
         flash(f"Movie '{title}' has been updated!")
         return redirect(url_for('user_movies', user_id=user_id))
 
@@ -87,46 +383,201 @@ def handle_movie_update_post(user_id, movie_id):
         print(f"Update Error: {e}")
 
 
-@app.route('/')
+def highlight_filter(value):
+    """Escape a search result field and turn match markers into <mark> tags."""
+    escaped = str(escape(value or ""))
+    return Markup(escaped.replace(HIGHLIGHT_OPEN, '<mark>').replace(HIGHLIGHT_CLOSE, '</mark>'))
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create the database tables, the search index and the stats tables."""
+    init_db()
+    print("Database initialized.")
+
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Rebuild the full-text search index from the movies table."""
+    current_data_manager().rebuild_search_index()
+    print("Search index rebuilt.")
+
+
+@click.command('verify-user-stats')
+@with_appcontext
+@click.option('--rebuild', is_flag=True, help="Recompute the stats tables after reporting drift.")
+def verify_user_stats_command(rebuild):
+    """Recount every user's stats from the movies table and report drift."""
+    drift = current_data_manager().verify_user_stats()
+    for table, key, expected, actual in drift:
+        print(f"{table} {key}: expected {expected}, found {actual}")
+    print(f"{len(drift)} stats rows differ from the movies table.")
+    if rebuild:
+        current_data_manager().rebuild_user_stats()
+        print("User stats rebuilt.")
+
+
+@click.command('rebuild-recommendations')
+@with_appcontext
+def rebuild_recommendations_command():
+    """Recompute every title's similar titles from the movies table."""
+    current_data_manager().rebuild_recommendations()
+    print("Recommendations rebuilt.")
+
+
+@click.command('rebuild-leaderboards')
+@with_appcontext
+def rebuild_leaderboards_command():
+    """Recompute the leaderboard totals and snapshots from the movies table."""
+    current_data_manager().rebuild_leaderboards(
+        size=int(os.getenv('LEADERBOARD_SIZE', LEADERBOARD_SIZE)),
+        min_ratings=int(os.getenv('LEADERBOARD_MIN_RATINGS', MIN_RATINGS))
+    )
+    print("Leaderboards rebuilt.")
+
+
+@click.command('optimize-db')
+@with_appcontext
+def optimize_db_command():
+    """Run PRAGMA optimize on the database."""
+    optimize(db.engine)
+    print("Database optimized.")
+
+
+@click.command('build-title-index')
+@click.option('--basics', required=True, type=click.Path(exists=True, dir_okay=False),
+              help="title.basics.tsv(.gz) from the IMDb datasets.")
+@click.option('--ratings', required=True, type=click.Path(exists=True, dir_okay=False),
+              help="title.ratings.tsv(.gz).")
+@click.option('--crew', required=True, type=click.Path(exists=True, dir_okay=False), help="title.crew.tsv(.gz).")
+@click.option('--names', type=click.Path(exists=True, dir_okay=False),
+              help="name.basics.tsv(.gz), to store director names.")
+@click.option('--output', default=lambda: os.getenv('TITLE_INDEX_PATH') or DEFAULT_INDEX_PATH,
+              help="Index file to write (default TITLE_INDEX_PATH or instance/title_index.bin).")
+@click.option('--chunk-size', default=50000, show_default=True, help="Rows staged per batch.")
+def build_title_index_command(basics, ratings, crew, names, output, chunk_size):
+    """Build the offline title index from the IMDb dataset dumps."""
+    count = build_title_index(basics, ratings, crew, names, output, chunk_size)
+    print(f"Indexed {count} titles in {output}. Restart the app to use it.")
+
+
 def home():
     """Render the home page."""
     return render_template('home.html')
 
 
-@app.route('/users')
 def list_users():
-    """List all users."""
-    users = data_manager.get_all_users()
-    return render_template('users.html', users=users)
+    """List all users, answering conditional GETs from the user list version."""
+    data_manager = current_data_manager()
+
+    def render():
+        return render_template('users.html', users=page_data_manager().get_all_users())
+
+    version = data_manager.get_collection_version()
+    if version is None:
+        return render()
+    etag = make_etag(request.full_path, *version)
+    return conditional_page(etag, version[1], render, current_app.extensions['page_cache'])
+
+
+def user_stats():
+    """Show collection statistics for every user."""
+    return render_template('user_stats.html', stats=current_data_manager().get_all_user_stats())
 
 
-@app.route('/users/<user_id>')
 def user_movies(user_id):
-    """Display all movies for a specific user."""
-    movies = data_manager.get_user_movies(user_id)
-    return render_template('movies.html', movies=movies, user_id=user_id)
+    """
+    Display one page of movies for a specific user.
+    The ETag covers the collection version, the query string and the state of
+    pending lookups, so unchanged pages are answered with 304.
+    """
+    sort = request.args.get('sort', 'movie_id')
+    descending = request.args.get('order') == 'desc'
+    after = request.args.get('after')
+    limit = min(request.args.get('limit', PAGE_SIZE, type=int), MAX_PAGE_SIZE)
+    data_manager = current_data_manager()
+    lookups = current_app.extensions['lookup_queue'].recent_for_user(user_id)
+
+    def render():
+        source = page_data_manager()
+        movies, next_cursor = source.get_user_movies_page(
+            user_id, sort=sort, descending=descending, after=after, limit=max(limit, 1)
+        )
+        return render_template(
+            'movies.html',
+            movies=movies,
+            user_id=user_id,
+            lookups=lookups,
+            total=source.count_user_movies(user_id),
+            sort=sort,
+            order='desc' if descending else 'asc',
+            next_cursor=next_cursor
+        )
+
+    try:
+        version = data_manager.get_collection_version(user_id)
+        if version is None:
+            return render()
+        lookup_state = [(lookup.request_id, lookup.status) for lookup in lookups]
+        updated_at = max([version[1] or 0] + [lookup.updated_at or 0 for lookup in lookups])
+        etag = make_etag(request.full_path, *version, lookup_state)
+        return conditional_page(etag, updated_at, render, current_app.extensions['page_cache'])
+    except ValueError as ve:
+        flash(str(ve))
+        return redirect(url_for('user_movies', user_id=user_id))
+
+
+def lookup_status(request_id):
+    """Report the status of a queued movie lookup as JSON."""
+    lookup = current_app.extensions['lookup_queue'].get_request(request_id)
+    if not lookup:
+        abort(404)
+    return jsonify(
+        request_id=lookup.request_id,
+        title=lookup.title,
+        status=lookup.status,
+        message=lookup.message
+    )
+
+
+def poster(imdb_id):
+    """Serve a stored poster thumbnail. Thumbnails never change, so browsers may keep them for a year."""
+    response = send_from_directory(current_app.config['POSTER_DIR'], thumbnail_name(imdb_id), max_age=POSTER_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def search():
+    """Search movie titles and directors, optionally within one user's movies."""
+    query = request.args.get('q', '').strip()
+    user_id = request.args.get('user_id', type=int)
+    results = current_data_manager().search_movies(query, user_id=user_id) if query else []
+    return render_template('search.html', query=query, user_id=user_id, results=results)
 
 
-@app.route('/add_user', methods=['GET', 'POST'])
 def add_user():
     """Handle user creation via form submission."""
     if request.method == 'POST':
         username = request.form.get('name')
         try:
-            data_manager.add_user(username)
+            if current_data_manager().add_user(username) is None:
+                flash(f"User '{username}' already exists!")
+                return redirect(url_for('add_user'))
             flash(f"User '{username}' has been added!")
             return redirect(url_for('list_users'))
         except Exception as e:
             print(f"Error adding user: {e}")
-            flash(f"User '{username}' already exists!")
+            flash(f"User '{username}' could not be added.")
             return redirect(url_for('add_user'))
     return render_template('add_user.html')
 
 
-@app.route('/users/<user_id>/add_movie', methods=['GET', 'POST'])
 def add_movie(user_id):
     """Handle GET or POST request to add a new movie for a user."""
-    user = db.session.get(User, user_id)
+    user = current_data_manager().get_user(user_id)
     if not user:
         abort(404)
 
@@ -136,13 +587,60 @@ def add_movie(user_id):
     return render_template('add_movie.html', user_id=user_id)
 
 
-@app.route('/users/<user_id>/update_movie/<movie_id>', methods=['GET', 'POST'])
+def import_movies(user_id):
+    """Handle GET or POST request to import many movies for a user."""
+    user = current_data_manager().get_user(user_id)
+    if not user:
+        abort(404)
+
+    if request.method == 'POST':
+        return handle_import_movies_post(user_id)
+
+    return render_template('import_movies.html', user_id=user_id)
+
+
+def export_movies(user_id, fmt):
+    """Stream a user's whole collection as CSV or NDJSON."""
+    data_manager = current_data_manager()
+    if fmt not in EXPORT_FORMATS or not data_manager.get_user(user_id):
+        abort(404)
+    return export_response(data_manager.iter_user_movies(user_id), fmt, f"movies-{user_id}")
+
+
+def recommendations(user_id):
+    """Show titles a user may like, read from the precomputed similar-title lists."""
+    data_manager = current_data_manager()
+    user = data_manager.get_user(user_id)
+    if not user:
+        abort(404)
+    return render_template(
+        'recommendations.html',
+        user=user,
+        recommendations=data_manager.get_recommendations(user_id, limit=RECOMMENDATION_LIMIT)
+    )
+
+
+def leaderboards():
+    """Show the most collected and the best rated titles, from the in-memory leaderboard snapshots."""
+    cache = current_app.extensions['leaderboards']
+    if cache.due():
+        cache.refresh(current_data_manager().get_leaderboards)
+    boards = {board: cache.get(board) for board in (MOST_COLLECTED, TOP_RATED)}
+    computed_at = [board['computed_at'] for board in boards.values() if board['computed_at']]
+    return render_template(
+        'leaderboards.html',
+        most_collected=boards[MOST_COLLECTED]['entries'][:LEADERBOARD_PAGE_SIZE],
+        top_rated=boards[TOP_RATED]['entries'][:LEADERBOARD_PAGE_SIZE],
+        computed_at=datetime.fromtimestamp(min(computed_at)) if computed_at else None
+    )
+
+
 def update_movie(user_id, movie_id):
     """Handle GET or POST request to update a movie."""
     if request.method == 'POST':
         return handle_movie_update_post(user_id, movie_id)
 
-    movie = data_manager.get_movie_by_id(movie_id)
+    movie = current_data_manager().get_movie_by_id(movie_id)
     if not movie:
         abort(404)
 
@@ -154,11 +652,10 @@ def update_movie(user_id, movie_id):
     )
 
 
-@app.route('/users/<user_id>/delete_movie/<movie_id>', methods=['POST'])
 def delete_movie(user_id, movie_id):
     """Delete a movie from a user's collection."""
     try:
-        data_manager.delete_movie(user_id=user_id, movie_id=movie_id)
+        current_data_manager().delete_movie(user_id=user_id, movie_id=movie_id)
         flash("Movie has been deleted!")
     except Exception as e:
         print(f"Error deleting movie: {e}")
@@ -166,17 +663,34 @@ def delete_movie(user_id, movie_id):
     return redirect(url_for('user_movies', user_id=user_id))
 
 
-@app.errorhandler(404)
 def not_found_error(error):
     """Render custom 404 error page."""
     return render_template('404.html'), 404
 
 
-@app.errorhandler(500)
 def internal_error(error):
     """Render custom 500 error page."""
     return render_template('500.html'), 500
 
 
+ROUTES = [
+    ('/', home, None),
+    ('/users', list_users, None),
+    ('/users/stats', user_stats, None),
+    ('/users/<user_id>', user_movies, None),
+    ('/lookups/<int:request_id>', lookup_status, None),
+    ('/posters/<imdb_id>.jpg', poster, None),
+    ('/search', search, None),
+    ('/leaderboards', leaderboards, None),
+    ('/add_user', add_user, ['GET', 'POST']),
+    ('/users/<user_id>/add_movie', add_movie, ['GET', 'POST']),
+    ('/users/<user_id>/import_movies', import_movies, ['GET', 'POST']),
+    ('/users/<user_id>/export.<fmt>', export_movies, None),
+    ('/users/<int:user_id>/recommendations', recommendations, None),
+    ('/users/<user_id>/update_movie/<movie_id>', update_movie, ['GET', 'POST']),
+    ('/users/<user_id>/delete_movie/<movie_id>', delete_movie, ['POST']),
+]
+
+
 if __name__ == '__main__':
-    app.run(debug=True, host='127.0.0.1', port=5000)
\ No newline at end of file
+    create_app().run(debug=True, host='127.0.0.1', port=5000)
@@ -0,0 +1,66 @@
+"""
+Asyncio serving mode: the JSON API as coroutines on Quart, for an ASGI server.
+
+    pip install -r requirements-async.txt
+    uvicorn --factory async_app:create_async_app
+
+Database calls go through AsyncDataManager and OMDb lookups through
+AsyncOMDbClient, so one process keeps many requests waiting on slow OMDb
+calls in flight, where the sync app (app.py) needs a worker thread for each.
+Both modes share the database, the OMDb cache and the OMDb quota; the HTML
+pages, CLI commands and background workers stay in the sync app, so create
+the schema with `flask --app app init-db` first.
+"""
+import os
+
+from dotenv import load_dotenv
+from quart import Quart
+
+from api.v1_async import api_v1_async
+from data_managers.data_manager_async import create_async_data_manager
+from utils.autocomplete import TitleAutocomplete
+from utils.leaderboards import LeaderboardCache
+from utils.omdb_api import get_omdb_cache, get_omdb_quota
+from utils.omdb_async import AsyncOMDbClient
+
+load_dotenv()
+
+
+def create_async_app(db_uri=None, db_profile=None):
+    """
+    Create the Quart application of the asyncio serving mode.
+    `db_uri` and `db_profile` default to DATABASE_URL and DB_PROFILE, as in
+    create_app. The OMDb client is opened when the server starts serving and
+    closed, with the database engine, when it stops.
+    """
+    app = Quart(__name__)
+    uri = db_uri or os.getenv('DATABASE_URL', 'sqlite:///moviwebapp.db')
+    app.config['DB_PROFILE'] = db_profile or os.getenv('DB_PROFILE', 'performance')
+    app.extensions['data_manager'] = create_async_data_manager(
+        uri, app.config['DB_PROFILE'], instance_path=app.instance_path
+    )
+    app.extensions['autocomplete'] = TitleAutocomplete(
+        refresh_interval=float(os.getenv('AUTOCOMPLETE_REFRESH_INTERVAL', 1)),
+        cached_titles=lambda: get_omdb_cache().titles()
+    )
+    app.extensions['leaderboards'] = LeaderboardCache(
+        refresh_interval=float(os.getenv('LEADERBOARD_CACHE_INTERVAL', 5))
+    )
+    app.register_blueprint(api_v1_async)
+
+    @app.before_serving
+    async def open_omdb_client():
+        app.extensions['omdb_client'] = AsyncOMDbClient(
+            api_key=os.getenv('API_KEY'),
+            base_url=os.getenv('OMDB_API_URL', 'http://www.omdbapi.com/'),
+            pool_size=int(os.getenv('OMDB_POOL_SIZE', 100)),
+            max_retries=int(os.getenv('OMDB_MAX_RETRIES', 2)),
+            governor=get_omdb_quota()
+        )
+
+    @app.after_serving
+    async def close_connections():
+        await app.extensions['omdb_client'].close()
+        await app.extensions['data_manager'].close()
+
+    return app
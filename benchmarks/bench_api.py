@@ -0,0 +1,78 @@
+"""
+Compare the JSON API with the HTML pages it replaces for scraping clients.
+
+Seeds users and movies into a temporary database, then measures latency and
+payload size of a movies page as HTML, as full JSON and with a field
+selection. It also compares one batch request for many users against one
+request per user, and ORM objects against column projections in the data
+manager.
+
+Usage: python -m benchmarks.bench_api [--users 100] [--movies-per-user 200] [--requests 300]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.suite import measure, seed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--movies-per-user', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            'LOOKUP_WORKERS': '0',
+            'DB_OPTIMIZE_INTERVAL': '0',
+            'CACHE_BACKEND': 'none',
+            'PAGE_CACHE_SIZE': '0',
+            'BACKGROUND_WORKERS': '0',
+        })
+        from app import create_app, init_db
+        from data_managers.data_manager_sqlite import SQLiteDataManager
+
+        app = create_app()
+        with app.app_context():
+            init_db()
+            user_ids = seed(args.users, args.movies_per_user)
+        client = app.test_client()
+        user_id = user_ids[0]
+
+        print(f"{'request':<55} {'p50 ms':>8} {'bytes':>8}")
+        for label, path in (
+            ('HTML page', f"/users/{user_id}"),
+            ('API page, all fields', f"/api/v1/users/{user_id}/movies"),
+            ('API page, title+year', f"/api/v1/users/{user_id}/movies?fields=title,year"),
+        ):
+            size = len(client.get(path).data)
+            stats = measure(lambda _: client.get(path), args.requests)
+            print(f"{label:<55} {stats['p50_ms']:>8.3f} {size:>8}")
+
+        batch = user_ids[:50]
+        batch_path = f"/api/v1/movies?user_ids={','.join(map(str, batch))}&fields=title"
+        stats = measure(lambda _: client.get(batch_path), max(args.requests // 10, 5))
+        print(f"{'API batch, 50 users, one request':<55} {stats['p50_ms']:>8.3f} {len(client.get(batch_path).data):>8}")
+        start = time.perf_counter()
+        for uid in batch:
+            client.get(f"/users/{uid}")
+        print(f"{'HTML, 50 users, one request each (total)':<55} {(time.perf_counter() - start) * 1000:>8.3f}")
+
+        data_manager = SQLiteDataManager()
+        with app.app_context():
+            orm = measure(lambda _: data_manager.get_user_movies_page(user_id, limit=200), args.requests)
+            rows = measure(lambda _: data_manager.get_movie_rows_page(user_id, limit=200), args.requests)
+            lean = measure(
+                lambda _: data_manager.get_movie_rows_page(user_id, fields='title,year', limit=200), args.requests
+            )
+        print(f"{'data manager, 200 movies as ORM objects':<55} {orm['p50_ms']:>8.3f}")
+        print(f"{'data manager, 200 movies as dicts':<55} {rows['p50_ms']:>8.3f}")
+        print(f"{'data manager, 200 movies, title+year dicts':<55} {lean['p50_ms']:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
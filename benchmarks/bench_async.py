@@ -0,0 +1,194 @@
+"""
+Load-test the sync and asyncio serving modes against a slow OMDb.
+
+Both modes run as one server process on the same seeded database: the sync
+app under gunicorn with a fixed number of gthread workers, the asyncio app
+(async_app.py) under uvicorn. A fake OMDb answers every lookup after
+--omdb-delay seconds, and --concurrency clients keep POSTing new titles to
+/api/v1/users/<id>/movies, so every request waits on OMDb. Throughput, p50
+and p99 latency and the peak memory of the server process tree are reported
+per mode; with --output they are written in the suite's JSON format.
+
+Requires gunicorn for the sync mode, and the packages of
+requirements-async.txt for the asyncio mode.
+
+Usage: python -m benchmarks.bench_async [--requests 2000] [--concurrency 200] [--omdb-delay 0.5] [--threads 8]
+"""
+import argparse
+import importlib.util
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.suite import summarize
+from tests.fake_omdb import FakeOMDbServer, generate_movies
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def server_command(mode, port, threads):
+    """Command line serving one mode from a single process on `port`."""
+    bind = f"127.0.0.1:{port}"
+    if mode == 'sync':
+        return [sys.executable, '-m', 'gunicorn', '--workers', '1', '--worker-class', 'gthread',
+                '--threads', str(threads), '--bind', bind, 'app:create_app()']
+    return [sys.executable, '-m', 'uvicorn', '--factory', 'async_app:create_async_app',
+            '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning']
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def tree_peak_rss(pid):
+    """Peak resident memory in MB of a process and its children, from /proc (Linux only)."""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as status:
+                total += next(int(line.split()[1]) for line in status if line.startswith('VmHWM:'))
+            with open(f"/proc/{current}/task/{current}/children") as children:
+                pending.extend(int(child) for child in children.read().split())
+        except (OSError, StopIteration):
+            continue
+    return total / 1024
+
+
+def wait_until_ready(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/api/v1/users/1", timeout=1).status_code == 200:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not start within {timeout} s.")
+
+
+def load(url, titles, users, concurrency):
+    """POST every title once from `concurrency` clients; returns per-request latencies, elapsed time and statuses."""
+    local = threading.local()
+    user_ids = itertools.cycle(range(1, users + 1))
+    jobs = [(next(user_ids), title) for title in titles]
+
+    def post(job):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        user_id, title = job
+        start = time.perf_counter()
+        try:
+            status = local.session.post(f"{url}/api/v1/users/{user_id}/movies", json={'title': title},
+                                        timeout=60).status_code
+        except requests.exceptions.RequestException:
+            status = None
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(post, jobs))
+    return [latency for latency, _ in results], time.perf_counter() - start, [status for _, status in results]
+
+
+def seed(uri, users):
+    """Create the schema of a fresh database and add `users` users without movies."""
+    from app import create_app, current_data_manager, init_db
+
+    with create_app(uri).app_context():
+        init_db()
+        for i in range(users):
+            current_data_manager().add_user(f"load-user-{i}")
+
+
+def run_mode(mode, args, env, titles):
+    """Serve one mode, load-test it and return its summary."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(server_command(mode, port, args.threads), cwd=ROOT, env=env)
+    try:
+        wait_until_ready(url)
+        latencies, elapsed, statuses = load(url, titles, args.users, args.concurrency)
+        peak_mb = tree_peak_rss(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    stats = summarize(latencies)
+    stats.update({
+        'throughput_rps': len(latencies) / elapsed,
+        'created': statuses.count(201),
+        'failed': sum(1 for status in statuses if status != 201),
+        'peak_rss_mb': peak_mb,
+    })
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--omdb-delay', type=float, default=0.5)
+    parser.add_argument('--threads', type=int, default=8, help="gthread threads of the sync worker")
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--modes', default='sync,async')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    modes = args.modes.split(',')
+    required = {'sync': ['gunicorn'], 'async': ['quart', 'greenlet', 'aiosqlite', 'httpx', 'uvicorn']}
+    missing = sorted({name for mode in modes for name in required[mode] if importlib.util.find_spec(name) is None})
+    if missing:
+        sys.exit(f"Missing packages for this benchmark: {', '.join(missing)}")
+
+    titles = [f"Movie {i:06d}" for i in range(args.requests)]
+    omdb = FakeOMDbServer(generate_movies(args.requests), delay=args.omdb_delay).start()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in modes:
+            env = dict(
+                os.environ,
+                DATABASE_URL=f"sqlite:///{os.path.join(tmp, f'{mode}.db')}",
+                OMDB_API_URL=omdb.url,
+                OMDB_CACHE_PATH=os.path.join(tmp, f'{mode}_omdb_cache.db'),
+                OMDB_RATE_LIMIT='0',
+                BACKGROUND_WORKERS='0',
+                CACHE_BACKEND='none',
+            )
+            seed(env['DATABASE_URL'], args.users)
+            results[mode] = stats = run_mode(mode, args, env, titles)
+            print(f"{mode:>5}: {stats['throughput_rps']:.1f} req/s, p50 {stats['p50_ms']:.0f} ms, "
+                  f"p99 {stats['p99_ms']:.0f} ms, {stats['failed']} failed, peak RSS {stats['peak_rss_mb']:.0f} MB")
+    omdb.stop()
+
+    if args.output:
+        report = {
+            'meta': {
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'requests': args.requests,
+                'concurrency': args.concurrency,
+                'omdb_delay': args.omdb_delay,
+                'threads': args.threads,
+            },
+            'results': {f"POST /api/v1/users/<id>/movies [{mode}]": stats for mode, stats in results.items()},
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Time title autocomplete on a large prefix index and report its memory footprint.
+
+Builds a PrefixIndex of --titles synthetic titles made of common words (so
+short prefixes match hundreds of thousands of them) with skewed popularity,
+reports the build time and the memory the index holds (its lists, arrays
+and strings), then times searches for random 1-6 character prefixes both on
+the index and through GET /api/v1/autocomplete, counting in new owners and
+new titles, and merging the new titles into the tree. Finally the endpoint is
+timed while a periodic reload of the whole index from the movies table runs,
+starting with the request that lands on it.
+
+Usage: python -m benchmarks.bench_autocomplete [--titles 1000000] [--requests 2000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import insert
+
+from app import create_app
+from benchmarks.suite import measure, summarize
+from models.movie import Movie
+from models.user import User
+from utils.autocomplete import PrefixIndex
+from utils.extensions import db
+
+WORDS = [
+    'the', 'a', 'of', 'love', 'night', 'man', 'last', 'dark', 'return', 'city', 'house', 'dead', 'story',
+    'girl', 'war', 'blood', 'life', 'king', 'day', 'star', 'heat', 'time', 'secret', 'black', 'lost',
+    'world', 'summer', 'island', 'road', 'dream', 'ghost', 'river', 'game', 'fire', 'moon', 'kill',
+]
+
+
+def synthetic_titles(count, rng):
+    """`count` distinct titles of two to four words, with Zipf-like popularity."""
+    titles = {}
+    while len(titles) < count:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(2, 4))]
+        title = ' '.join(words).title() + f" {len(titles)}"
+        titles[title] = int(1000 / (1 + rng.random() * 999) ** 1.2)
+    return titles
+
+
+def store_titles(titles, batch_size=50000):
+    """Insert one movie per title, so reloading the index reads every title from the database."""
+    db.create_all()
+    db.session.execute(insert(User), [{'name': 'bench-user'}])
+    titles = list(titles)
+    for start in range(0, len(titles), batch_size):
+        db.session.execute(insert(Movie), [
+            {'user_id': 1, 'title': title, 'director': '', 'year': 2000, 'rating': 5.0}
+            for title in titles[start:start + batch_size]
+        ])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--titles', type=int, default=1000000)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    titles = synthetic_titles(args.titles, rng)
+    keys = [title.lower() for title in titles]
+
+    start = time.perf_counter()
+    index = PrefixIndex(titles.items())
+    build = time.perf_counter() - start
+    size = index.nbytes()
+    print(f"build: {build:.1f} s for {len(index)} titles, index holds {size / 2 ** 20:.0f} MB "
+          f"({size / len(index):.0f} bytes per title)")
+
+    prefixes = [rng.choice(keys)[:rng.randint(1, 6)] for _ in range(args.requests)]
+    stats = measure(lambda i: index.search(prefixes[i], 10), args.requests)
+    print(f"index search: p50 {stats['p50_ms']:.3f} ms, p99 {stats['p99_ms']:.3f} ms")
+    stats = measure(lambda i: index.add(rng.choice(keys) if i % 2 else f"new title {i}"), args.requests)
+    print(f"add: p50 {stats['p50_ms']:.3f} ms, p99 {stats['p99_ms']:.3f} ms")
+    start = time.perf_counter()
+    index.merge_overflow()
+    print(f"merging {args.requests // 2} new titles (background thread in the app): "
+          f"{time.perf_counter() - start:.2f} s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        with app.app_context():
+            store_titles(titles)
+        autocomplete = app.extensions['autocomplete']
+        autocomplete.index = index
+        autocomplete.last_movie_id = len(titles)
+        autocomplete.refresh_interval = float('inf')
+        client = app.test_client()
+
+        def get(i):
+            client.get('/api/v1/autocomplete', query_string={'q': prefixes[i]})
+
+        stats = measure(get, args.requests)
+        print(f"GET /api/v1/autocomplete: p50 {stats['p50_ms']:.3f} ms, p99 {stats['p99_ms']:.3f} ms")
+
+        # The next request is due for a reload; the ones after it check for new movies every second, as by default.
+        autocomplete.refresh_interval = 0
+        autocomplete.rebuild_interval = 0
+        start = time.perf_counter()
+        get(0)
+        landing = time.perf_counter() - start
+        autocomplete.refresh_interval = 1.0
+        autocomplete.rebuild_interval = float('inf')
+        during = []
+        while autocomplete._rebuild is not None:
+            request_start = time.perf_counter()
+            get(len(during) % args.requests)
+            during.append(time.perf_counter() - request_start)
+        autocomplete.join()
+        reload_seconds = time.perf_counter() - start
+        stats = summarize(during) if during else None
+        print(f"request landing on a reload: {landing * 1000:.3f} ms; reload took {reload_seconds:.1f} s "
+              f"in the background" + (f", {len(during)} requests meanwhile: p50 {stats['p50_ms']:.3f} ms, "
+                                      f"p99 {stats['p99_ms']:.3f} ms" if stats else ""))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Compare importing titles one at a time against the bulk import path.
+
+Usage: python -m benchmarks.bench_bulk_import [--titles 500] [--latency 0.02]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app import create_app
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from models.user import User
+from tests.fake_omdb import FakeOMDbServer, generate_movies
+from utils import omdb_api
+from utils.extensions import db
+from utils.omdb_cache import OMDbCache
+from utils.omdb_client import OMDbClient
+
+
+def reset(data_manager):
+    """Recreate the schema and a single user, returning the user's id."""
+    db.drop_all()
+    db.create_all()
+    data_manager.add_user('Benchmark')
+    return db.session.scalars(db.select(User.user_id)).first()
+
+
+def one_at_a_time(data_manager, user_id, titles):
+    """Resolve and insert each title sequentially, committing every row."""
+    for title in titles:
+        movie_data = omdb_api.fetch_movie_details(title)
+        data_manager.add_movie(user_id=user_id, **omdb_api.movie_fields(movie_data))
+
+
+def bulk(data_manager, user_id, titles):
+    """Resolve titles concurrently and insert them in one transaction."""
+    found = omdb_api.fetch_many_movie_details(titles)
+    data_manager.add_movies(user_id, [omdb_api.movie_fields(movie_data) for movie_data in found.values()])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.02, help="fake OMDb latency in seconds")
+    args = parser.parse_args()
+
+    movies = generate_movies(args.titles)
+    titles = [movie['Title'] for movie in movies.values()]
+    server = FakeOMDbServer(movies, delay=args.latency).start()
+    omdb_api.omdb_client = OMDbClient(base_url=server.url)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        data_manager = SQLiteDataManager()
+        with app.app_context():
+            for name, run in (('one at a time', one_at_a_time), ('bulk import', bulk)):
+                user_id = reset(data_manager)
+                omdb_api.omdb_cache = OMDbCache(path=None)
+                start = time.perf_counter()
+                run(data_manager, user_id, titles)
+                elapsed = time.perf_counter() - start
+                print(f"{name:>14}: {args.titles} titles in {elapsed:.2f}s")
+
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Compare repeated page views with and without conditional GETs.
+
+Seeds users and movies into a temporary database, then requests the user list
+and a movies page through the Flask test client in three ways: a full render
+every time, a hit in the server-side HTML cache, and a 304 answer to a client
+sending If-None-Match.
+
+Usage: python -m benchmarks.bench_conditional_get [--users 200] [--movies 5000] [--requests 500]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.suite import seed, summarize
+from utils.cache_backends import LRUCacheBackend
+
+
+def timed_gets(client, path, count, headers=None, expected=200):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = client.get(path, headers=headers or {})
+        samples.append(time.perf_counter() - start)
+        if response.status_code != expected:
+            raise RuntimeError(f"{path} returned {response.status_code}, expected {expected}")
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--movies', type=int, default=5000, help="movies owned by the benchmarked user")
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            'LOOKUP_WORKERS': '0',
+            'DB_OPTIMIZE_INTERVAL': '0',
+            'CACHE_BACKEND': 'none',
+            'BACKGROUND_WORKERS': '0',
+        })
+        from app import create_app, init_db
+
+        app = create_app()
+        with app.app_context():
+            init_db()
+            seed(args.users, 20)
+            user_id = seed(1, args.movies, prefix='collector')[0]
+
+        client = app.test_client()
+        print(f"{'page':<40} {'mode':<12} {'p50 ms':>9} {'p95 ms':>9}")
+        for path in ('/users', f"/users/{user_id}", f"/users/{user_id}?sort=title&order=desc"):
+            etag = client.get(path).headers['ETag']
+            app.extensions['page_cache'] = None
+            results = {'render': timed_gets(client, path, args.requests)}
+            app.extensions['page_cache'] = LRUCacheBackend()
+            client.get(path)
+            results['html cache'] = timed_gets(client, path, args.requests)
+            results['304'] = timed_gets(client, path, args.requests, {'If-None-Match': etag}, expected=304)
+            for mode, stats in results.items():
+                print(f"{path:<40} {mode:<12} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
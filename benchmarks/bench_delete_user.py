@@ -0,0 +1,99 @@
+"""
+Time deleting a user with a large collection.
+
+Seeds one user owning --movies movies (and a second user rating some of the
+same titles, so the similarity bookkeeping has work to do), then deletes the
+first user with SQLiteDataManager.delete_user: one set-based pass over the
+user's ratings and a single DELETE that the database cascades to movies and
+stats. The same delete is timed through create_data_manager(), the cached
+wrapper the app uses, and for comparison the user is also deleted the way
+the ORM does it, loading every movie and deleting them one by one.
+
+Usage: python -m benchmarks.bench_delete_user [--movies 50000] [--runs 3]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import event
+
+from app import create_app, create_data_manager, init_db
+from data_managers.collection_versions import USERS_SCOPE, bump_versions, user_scope
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from data_managers.title_similarity import apply_rating_changes, rating_values
+from models.user import User
+from utils.extensions import db
+
+
+def seed(data_manager, movies):
+    """Add the user to delete, with `movies` movies, and a neighbour sharing a tenth of the titles."""
+    rows = [{'title': f"Title {i:06d}", 'director': f"Director {i % 500}", 'year': 1950 + i % 70,
+             'rating': 1 + i % 10} for i in range(movies)]
+    target = data_manager.add_user('target')
+    neighbour = data_manager.add_user('neighbour')
+    data_manager.add_movies(target, rows)
+    data_manager.add_movies(neighbour, rows[::10])
+    return target
+
+
+def orm_delete_user(user_id):
+    """Delete a user by loading them and their movies and letting the ORM delete each row."""
+    user = db.session.get(User, user_id)
+    apply_rating_changes(db.session, user_id, removed=[rating_values(movie) for movie in user.movies])
+    for movie in user.movies:
+        db.session.delete(movie)
+    db.session.delete(user)
+    bump_versions(db.session, USERS_SCOPE, user_scope(user_id))
+    db.session.commit()
+
+
+def timed_delete(delete, movies, make_data_manager):
+    """Seed a fresh database, run `delete` on the big user and return (seconds, statements)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        with app.app_context():
+            init_db()
+            data_manager = make_data_manager(app)
+            user_id = seed(data_manager, movies)
+            statements = []
+
+            def count(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            event.listen(db.engine, 'before_cursor_execute', count)
+            start = time.perf_counter()
+            delete(data_manager, user_id)
+            elapsed = time.perf_counter() - start
+            event.remove(db.engine, 'before_cursor_execute', count)
+            db.session.remove()
+            db.engine.dispose()
+    return elapsed, len(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--movies', type=int, default=50000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    def delete_user(data_manager, user_id):
+        data_manager.delete_user(user_id)
+
+    strategies = {
+        'set-based delete_user': (delete_user, lambda app: SQLiteDataManager()),
+        'set-based delete_user, cached (create_data_manager)': (delete_user, create_data_manager),
+        'ORM load-then-delete': (
+            lambda data_manager, user_id: orm_delete_user(user_id), lambda app: SQLiteDataManager()
+        ),
+    }
+    for name, (delete, make_data_manager) in strategies.items():
+        runs = [timed_delete(delete, args.movies, make_data_manager) for _ in range(args.runs)]
+        seconds = statistics.median(elapsed for elapsed, _ in runs)
+        print(f"{name}: {seconds * 1000:.0f} ms median over {args.runs} runs, "
+              f"{runs[0][1]} statements, {args.movies} movies")
+
+
+if __name__ == '__main__':
+    main()
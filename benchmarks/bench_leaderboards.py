@@ -0,0 +1,99 @@
+"""
+Compare serving the leaderboards from their snapshot with the live aggregate query.
+
+Seeds users rating titles from a shared catalogue (see bench_recommendations),
+times the full leaderboard rebuild, an incremental refresh after a bulk
+import and an idle refresh, then times GET /api/v1/leaderboards/<board> from
+the in-memory snapshot (with and without the per-request version check)
+against the GROUP BY over the movies table the page would otherwise run.
+
+Usage: python -m benchmarks.bench_leaderboards [--users 100000] [--ratings-per-user 50] [--titles 20000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import func, select
+
+from app import create_app
+from benchmarks.bench_recommendations import seed
+from benchmarks.suite import measure
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from data_managers.leaderboards import LEADERBOARD_SIZE, MIN_RATINGS
+from models.movie import Movie
+from utils.extensions import db
+
+
+def live_leaderboards(size=LEADERBOARD_SIZE, min_ratings=MIN_RATINGS):
+    """Both boards computed from the movies table, as the page would without snapshots."""
+    average = func.avg(Movie.rating)
+    most_collected = db.session.execute(
+        select(Movie.title, func.count(), average)
+        .group_by(Movie.title)
+        .order_by(func.count().desc(), func.count(Movie.rating).desc(), Movie.title)
+        .limit(size)
+    ).all()
+    top_rated = db.session.execute(
+        select(Movie.title, func.count(), average)
+        .group_by(Movie.title)
+        .having(func.count(Movie.rating) >= min_ratings)
+        .order_by(average.desc(), func.count(Movie.rating).desc(), Movie.title)
+        .limit(size)
+    ).all()
+    return most_collected, top_rated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--ratings-per-user', type=int, default=50)
+    parser.add_argument('--titles', type=int, default=20000)
+    parser.add_argument('--imported', type=int, default=1000, help="Movies imported before the incremental refresh.")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--live-requests', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        data_manager = SQLiteDataManager()
+        app.extensions['data_manager'] = data_manager
+        with app.app_context():
+            db.create_all()
+            start = time.perf_counter()
+            user_ids = seed(args.users, args.ratings_per_user, args.titles)
+            movies = db.session.scalar(select(func.count()).select_from(Movie))
+            print(f"seeded {len(user_ids)} users and {movies} movies in {time.perf_counter() - start:.1f} s")
+
+            start = time.perf_counter()
+            data_manager.rebuild_leaderboards()
+            print(f"full rebuild: {time.perf_counter() - start:.2f} s")
+
+            rng = random.Random(7)
+            data_manager.add_movies(user_ids[0], [
+                {'title': f"Imported {n}", 'director': 'Someone', 'year': 2000, 'rating': rng.randint(1, 10)}
+                for n in range(args.imported)
+            ])
+            start = time.perf_counter()
+            folded = data_manager.refresh_leaderboards()
+            print(f"incremental refresh: {(time.perf_counter() - start) * 1000:.1f} ms for {folded} changes")
+            start = time.perf_counter()
+            data_manager.refresh_leaderboards()
+            print(f"idle refresh: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+            stats = measure(lambda i: live_leaderboards(), args.live_requests)
+            print(f"live aggregate query: p50 {stats['p50_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms")
+
+        client = app.test_client()
+        for label, interval in (('snapshot from memory', float('inf')), ('snapshot, version checked', 0)):
+            app.extensions['leaderboards'].refresh_interval = interval
+            stats = measure(
+                lambda i: client.get(f"/api/v1/leaderboards/{('most_collected', 'top_rated')[i % 2]}"), args.requests
+            )
+            print(f"GET /api/v1/leaderboards ({label}): p50 {stats['p50_ms']:.3f} ms, "
+                  f"p99 {stats['p99_ms']:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
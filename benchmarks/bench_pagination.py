@@ -0,0 +1,87 @@
+"""
+Show that keyset page latency stays flat regardless of page depth.
+
+Seeds one user with many movies, then times fetching pages at increasing
+depths with keyset cursors and, for comparison, with LIMIT/OFFSET.
+
+Usage: python -m benchmarks.bench_pagination [--movies 100000] [--page-size 50]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import insert, select
+
+from app import create_app
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from data_managers.pagination import encode_cursor
+from models.movie import Movie
+from models.user import User
+from utils.extensions import db
+
+
+def seed(count, batch_size=10000):
+    """Create one user owning `count` movies and return the user id."""
+    db.session.add(User(name='Benchmark'))
+    db.session.commit()
+    user_id = db.session.scalars(select(User.user_id)).first()
+    for start in range(0, count, batch_size):
+        db.session.execute(insert(Movie), [
+            {'user_id': user_id, 'title': f"Movie {i:07d}", 'director': f"Director {i % 997}",
+             'year': 1900 + i % 125, 'rating': (i * 37 % 100) / 10}
+            for i in range(start, min(start + batch_size, count))
+        ])
+    db.session.commit()
+    return user_id
+
+
+def timed(func, repeat=5):
+    """Return the best wall time of `func` in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--movies', type=int, default=100000)
+    parser.add_argument('--page-size', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        data_manager = SQLiteDataManager()
+        with app.app_context():
+            db.create_all()
+            user_id = seed(args.movies)
+            pages = args.movies // args.page_size
+            print(f"{'page':>8} {'sort':>8} {'keyset ms':>10} {'offset ms':>10}")
+            for sort in ('movie_id', 'title', 'rating'):
+                column = getattr(Movie, sort)
+                for depth in (1, pages // 100, pages // 10, pages // 2, pages - 1):
+                    depth = max(depth, 1)
+                    offset = (depth - 1) * args.page_size
+                    anchor = db.session.scalars(
+                        select(Movie).where(Movie.user_id == user_id)
+                        .order_by(column, Movie.movie_id).offset(max(offset - 1, 0)).limit(1)
+                    ).first()
+                    cursor = encode_cursor(getattr(anchor, sort), anchor.movie_id) if offset else None
+
+                    keyset = timed(lambda: data_manager.get_user_movies_page(
+                        user_id, sort=sort, after=cursor, limit=args.page_size
+                    ))
+                    by_offset = timed(lambda: db.session.scalars(
+                        select(Movie).where(Movie.user_id == user_id)
+                        .order_by(column, Movie.movie_id).offset(offset).limit(args.page_size)
+                    ).all())
+                    print(f"{depth:>8} {sort:>8} {keyset:>10.2f} {by_offset:>10.2f}")
+            count = timed(lambda: data_manager.count_user_movies(user_id))
+            print(f"count_user_movies: {count:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
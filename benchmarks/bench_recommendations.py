@@ -0,0 +1,94 @@
+"""
+Time the title similarity rebuild, incremental refreshes and recommendation reads.
+
+Seeds users whose collections are drawn from a shared catalogue with a few
+popular titles and a long tail, then times the full rebuild of the neighbour
+lists, the refresh after one user adds a rating, and reading one user's
+recommendations from the precomputed table.
+
+Usage: python -m benchmarks.bench_recommendations [--users 100000] [--ratings-per-user 50] [--titles 20000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import func, insert, select
+
+from app import create_app
+from benchmarks.suite import measure
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from models.movie import Movie
+from models.title_similarity import TitleNeighbour
+from models.user import User
+from utils.extensions import db
+
+
+def seed(users, ratings_per_user, titles, batch_size=50000, rng=None):
+    """Insert users rating `ratings_per_user` catalogue titles each, popular titles more often."""
+    rng = rng or random.Random(42)
+    db.session.execute(insert(User), [{'name': f"rec-user-{i}"} for i in range(users)])
+    db.session.commit()
+    user_ids = db.session.scalars(select(User.user_id).order_by(User.user_id)).all()
+    batch = []
+    for user_id in user_ids:
+        picked = set()
+        while len(picked) < min(ratings_per_user, titles):
+            picked.add(int(titles * rng.random() ** 3))
+        batch.extend(
+            {'user_id': user_id, 'title': f"Title {n:06d}", 'director': 'Someone', 'year': 2000,
+             'rating': rng.randint(1, 10)}
+            for n in picked
+        )
+        if len(batch) >= batch_size:
+            db.session.execute(insert(Movie), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Movie), batch)
+    db.session.commit()
+    return user_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--ratings-per-user', type=int, default=50)
+    parser.add_argument('--titles', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        data_manager = SQLiteDataManager()
+        with app.app_context():
+            db.create_all()
+            start = time.perf_counter()
+            user_ids = seed(args.users, args.ratings_per_user, args.titles)
+            ratings = db.session.scalar(select(func.count()).select_from(Movie))
+            print(f"seeded {len(user_ids)} users and {ratings} ratings in {time.perf_counter() - start:.1f} s")
+
+            start = time.perf_counter()
+            data_manager.rebuild_recommendations()
+            rebuild = time.perf_counter() - start
+            pairs = db.session.scalar(select(func.count()).select_from(TitleNeighbour))
+            print(f"full rebuild: {rebuild:.1f} s, {pairs} neighbour rows")
+
+            user_id = user_ids[len(user_ids) // 2]
+            data_manager.add_movie(user_id, 'Benchmark Title', 'Someone', 2000, 7)
+            start = time.perf_counter()
+            refreshed = 0
+            while True:
+                count = data_manager.refresh_recommendations()
+                refreshed += count
+                if not count:
+                    break
+            print(f"refresh after one new rating: {(time.perf_counter() - start) * 1000:.1f} ms, "
+                  f"{refreshed} stale titles")
+
+            stats = measure(lambda i: data_manager.get_recommendations(user_ids[i % len(user_ids)]), args.requests)
+            print(f"get_recommendations: p50 {stats['p50_ms']:.2f} ms, p95 {stats['p95_ms']:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
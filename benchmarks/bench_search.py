@@ -0,0 +1,97 @@
+"""
+Compare FTS5 search against the LIKE '%...%' fallback.
+
+Usage: python -m benchmarks.bench_search [--movies 1000000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import insert
+
+from app import create_app
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from models.movie import Movie
+from models.user import User
+from utils.extensions import db
+
+WORDS = (
+    "dark night star war love city blood last return king lost storm dream iron "
+    "ghost river shadow fire ocean silent golden secret empire wild broken heart "
+    "stone glass winter summer hunter machine garden mirror"
+).split()
+SYLLABLES = "ka lo mi ra ven tor sul bel dri fan gos hel jun kri mar nol per qua sen tam".split()
+QUERIES = ['dark', 'shad', 'golden empire', 'kalomi', 'venbel tor', 'nolan', 'zzz']
+
+
+def vocabulary(rng, size=5000):
+    """Build a deterministic vocabulary of made-up words."""
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.sample(SYLLABLES, rng.randint(2, 3))))
+    return sorted(words)
+
+
+def random_title(rng, vocab, i):
+    """Build a title mixing a few common words into mostly rare ones."""
+    words = [rng.choice(WORDS) if rng.random() < 0.1 else rng.choice(vocab) for _ in range(3)]
+    return f"{' '.join(words).title()} {i}"
+
+
+def seed(count, users=1000, batch_size=20000):
+    """Insert `count` movies spread over `users` users."""
+    rng = random.Random(42)
+    vocab = vocabulary(rng)
+    db.session.execute(insert(User), [{'name': f"user{i}"} for i in range(users)])
+    for start in range(0, count, batch_size):
+        db.session.execute(insert(Movie), [
+            {
+                'user_id': 1 + i % users,
+                'title': random_title(rng, vocab, i),
+                'director': f"{rng.choice(['Nolan', 'Mann', 'Raimi', 'Scott', 'Lee'])} {i % 5003}",
+                'year': 1920 + i % 100,
+                'rating': (i * 37 % 100) / 10,
+            }
+            for i in range(start, min(start + batch_size, count))
+        ])
+    db.session.commit()
+
+
+def timed(func, repeat=5):
+    """Return the best wall time of `func` in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--movies', type=int, default=1000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        data_manager = SQLiteDataManager()
+        with app.app_context():
+            db.create_all()
+            start = time.perf_counter()
+            seed(args.movies)
+            print(f"seeded {args.movies} movies in {time.perf_counter() - start:.1f}s")
+            print(f"{'query':>14} {'scope':>6} {'fts hits':>9} {'fts ms':>9} {'like hits':>9} {'like ms':>9}")
+            for query in QUERIES:
+                for user_id in (None, 7):
+                    fts_hits = len(data_manager.search_movies(query, user_id=user_id))
+                    like_hits = len(data_manager.search_movies_like(query, user_id=user_id))
+                    fts = timed(lambda: data_manager.search_movies(query, user_id=user_id))
+                    like = timed(lambda: data_manager.search_movies_like(query, user_id=user_id), repeat=2)
+                    scope = 'user' if user_id else 'all'
+                    print(f"{query:>14} {scope:>6} {fts_hits:>9} {fts:>9.2f} {like_hits:>9} {like:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
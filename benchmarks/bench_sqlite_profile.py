@@ -0,0 +1,127 @@
+"""
+Multi-process write stress test comparing SQLite tuning profiles.
+
+Several processes add and update movies concurrently, each write in its own
+transaction, and list movies in between. Updates read the row before writing
+it, which is where rollback-journal mode hits lock-upgrade deadlocks. Reports
+throughput and the share of writes that failed with 'database is locked'.
+
+The default side is stock SQLite: rollback journal and busy_timeout=0, which
+pysqlite would otherwise raise to a 5 s wait on every connection.
+
+Usage: python -m benchmarks.bench_sqlite_profile [--processes 8] [--writes 300]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+
+def stock_busy_timeout(engine):
+    """Give every new connection of an engine SQLite's own busy_timeout of 0 instead of pysqlite's 5 s."""
+    @event.listens_for(engine, 'connect')
+    def no_busy_wait(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA busy_timeout=0")
+
+    engine.dispose()
+
+
+def writer(uri, profile, worker, writes, results):
+    """Add `writes` movies from one process and report (ok, locked, other)."""
+    from app import create_app
+    from data_managers.data_manager_sqlite import SQLiteDataManager
+    from models.movie import Movie
+    from utils.extensions import db
+
+    app = create_app(uri, db_profile=profile)
+    data_manager = SQLiteDataManager()
+    ok = locked = other = 0
+    movie_ids = []
+    with app.app_context():
+        if profile == 'default':
+            stock_busy_timeout(db.engine)
+        for i in range(writes):
+            try:
+                if i % 3 == 2 and movie_ids:
+                    data_manager.update_movie(Movie(
+                        movie_id=movie_ids[-1], title=f"Movie {worker}-{i}", director='Director',
+                        year=2001, rating=6.0
+                    ))
+                else:
+                    data_manager.add_movie(1, f"Movie {worker}-{i}", 'Director', 2000, 5.0)
+                    movie_ids.append(data_manager.get_user_movies_page(1, descending=True, limit=1)[0][0].movie_id)
+                if i % 10 == 0:
+                    data_manager.get_user_movies_page(1, limit=50)
+                ok += 1
+            except OperationalError as e:
+                if 'locked' in str(e):
+                    locked += 1
+                else:
+                    other += 1
+    results.put((ok, locked, other))
+
+
+def run(profile, processes, writes):
+    """Run the stress test for one profile and return a result summary."""
+    from app import create_app
+    from data_managers.data_manager_sqlite import SQLiteDataManager
+    from utils.extensions import db
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = f"sqlite:///{os.path.join(tmp, 'stress.db')}"
+        app = create_app(uri, db_profile=profile)
+        with app.app_context():
+            db.create_all()
+            SQLiteDataManager().add_user('Stress')
+            db.engine.dispose()
+
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=writer, args=(uri, profile, n, writes, results))
+            for n in range(processes)
+        ]
+        start = time.perf_counter()
+        for process in workers:
+            process.start()
+        totals = [0, 0, 0]
+        for _ in workers:
+            for index, value in enumerate(results.get()):
+                totals[index] += value
+        for process in workers:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+    ok, locked, other = totals
+    attempted = ok + locked + other
+    return {
+        'profile': profile,
+        'writes/s': ok / elapsed,
+        'locked %': 100 * locked / attempted,
+        'other errors': other,
+        'seconds': elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=300)
+    args = parser.parse_args()
+
+    os.environ.setdefault('LOOKUP_WORKERS', '0')
+    os.environ.setdefault('DB_OPTIMIZE_INTERVAL', '0')
+    for profile in ('default', 'performance'):
+        result = run(profile, args.processes, args.writes)
+        print(
+            f"{result['profile']:>12}: {result['writes/s']:8.1f} writes/s, "
+            f"{result['locked %']:5.1f}% locked, {result['other errors']} other errors, "
+            f"{result['seconds']:.1f}s"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Track cold-start time of the app.
+
+Each measurement runs in a fresh interpreter so nothing is already imported:
+importing `app` alone, building the app the way `gunicorn --preload
+"app:create_app()"` does in its master process, and collecting the test suite
+with pytest. The slowest modules of a `python -X importtime` run are listed
+to show where import time goes. With --output the timings are written in the
+suite's JSON format, so two runs can be checked with `benchmarks.suite compare`.
+
+Usage: python -m benchmarks.bench_startup [--runs 10] [--top 15] [--output startup.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.suite import summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    'import app': [sys.executable, '-c', 'import app'],
+    'gunicorn preload (create_app)': [sys.executable, '-c', 'import app; app.create_app()'],
+    'pytest collection': [sys.executable, '-m', 'pytest', '--collect-only', '-q', '-p', 'no:cacheprovider'],
+}
+
+
+def timed_run(command, env):
+    """Run `command` in a new process and return its wall-clock time in seconds."""
+    start = time.perf_counter()
+    subprocess.run(command, cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def slowest_imports(env, top):
+    """The `top` modules with the largest cumulative import time when importing `app`."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        modules.append((int(cumulative), name))
+    return sorted(modules, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            OMDB_CACHE_PATH=os.path.join(tmp, 'omdb_cache.db'),
+            BACKGROUND_WORKERS='0',
+        )
+        results = {
+            f"startup.{name}": summarize([timed_run(command, env) for _ in range(args.runs)])
+            for name, command in SCENARIOS.items()
+        }
+        imports = slowest_imports(env, args.top)
+
+    print(f"{'scenario':<45} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for name, stats in results.items():
+        print(f"{name:<45} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+    print(f"\n{'module (import app)':<45} {'cumulative ms':>13}")
+    for microseconds, name in imports:
+        print(f"{name:<45} {microseconds / 1000:>13.1f}")
+
+    if args.output:
+        report = {
+            'meta': {
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'runs': args.runs,
+            },
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
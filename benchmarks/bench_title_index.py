@@ -0,0 +1,110 @@
+"""
+Time building the offline title index and looking titles up in it.
+
+Writes synthetic IMDb dataset dumps of --rows title.basics rows (one in ten
+a movie, as in the real dump, which has about 10M rows), builds the index
+from them in a child process and reports its wall time and peak memory, then
+times point lookups of indexed and unknown titles in the memory-mapped file.
+The build streams the dumps in --chunk-size batches, so its peak memory
+should stay flat as --rows grows.
+
+Usage: python -m benchmarks.bench_title_index [--rows 10000000] [--lookups 100000] [--chunk-size 50000]
+"""
+import argparse
+import gzip
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from utils.title_index import TitleIndex
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def title(i):
+    return f"Synthetic Title {i:08d}"
+
+
+def write_dumps(directory, rows):
+    """Write gzipped title.basics, title.ratings, title.crew and name.basics dumps; returns their paths."""
+    paths = {name: os.path.join(directory, f"{name}.tsv.gz") for name in ('basics', 'ratings', 'crew', 'names')}
+    directors = max(rows // 50, 1)
+    with gzip.open(paths['basics'], 'wt', compresslevel=1) as basics, \
+            gzip.open(paths['ratings'], 'wt', compresslevel=1) as ratings, \
+            gzip.open(paths['crew'], 'wt', compresslevel=1) as crew:
+        basics.write("tconst\ttitleType\tprimaryTitle\toriginalTitle\tisAdult\tstartYear\tendYear\t"
+                     "runtimeMinutes\tgenres\n")
+        ratings.write("tconst\taverageRating\tnumVotes\n")
+        crew.write("tconst\tdirectors\twriters\n")
+        for i in range(rows):
+            kind = 'movie' if i % 10 == 0 else 'tvEpisode'
+            name = title(i) if kind == 'movie' else f"Episode #{i % 500}"
+            basics.write(f"tt{i:08d}\t{kind}\t{name}\t{name}\t0\t{1900 + i % 125}\t\\N\t90\tDrama\n")
+            if i % 3 == 0:
+                ratings.write(f"tt{i:08d}\t{1 + i % 90 / 10:.1f}\t{i % 10000}\n")
+            crew.write(f"tt{i:08d}\tnm{i % directors:08d}\t\\N\n")
+    with gzip.open(paths['names'], 'wt', compresslevel=1) as names:
+        names.write("nconst\tprimaryName\tbirthYear\tdeathYear\tprimaryProfession\tknownForTitles\n")
+        for i in range(rows // 5):
+            names.write(f"nm{i:08d}\tPerson {i}\t1950\t\\N\tdirector\t\\N\n")
+    return paths
+
+
+def build_in_child(paths, output, chunk_size):
+    """Build the index in a fresh interpreter; returns (seconds, peak RSS in MB of that process)."""
+    code = ("import sys; from utils.title_index import build_title_index; "
+            "build_title_index(*sys.argv[1:5], output=sys.argv[5], chunk_size=int(sys.argv[6]))")
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code, paths['basics'], paths['ratings'], paths['crew'], paths['names'],
+                    output, str(chunk_size)], cwd=ROOT, check=True)
+    elapsed = time.perf_counter() - start
+    return elapsed, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+
+def time_lookups(index, titles):
+    """Per-lookup latencies in microseconds."""
+    latencies = []
+    for name in titles:
+        start = time.perf_counter_ns()
+        index.get(name)
+        latencies.append((time.perf_counter_ns() - start) / 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000000)
+    parser.add_argument('--lookups', type=int, default=100000)
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        paths = write_dumps(tmp, args.rows)
+        print(f"wrote {args.rows} title.basics rows in {time.perf_counter() - start:.1f} s")
+
+        output = os.path.join(tmp, 'title_index.bin')
+        elapsed, peak_mb = build_in_child(paths, output, args.chunk_size)
+        print(f"build: {elapsed:.1f} s, peak RSS {peak_mb:.0f} MB, index {os.path.getsize(output) / 2 ** 20:.1f} MB")
+
+        index = TitleIndex(output)
+        movies = range(0, args.rows, 10)
+        for label, titles in (
+            ('hit', [title(rng.choice(movies)).lower() for _ in range(args.lookups)]),
+            ('miss', [f"Unknown Title {rng.randrange(args.rows):08d}" for _ in range(args.lookups)]),
+        ):
+            latencies = sorted(time_lookups(index, titles))
+            p99 = latencies[int(len(latencies) * 0.99) - 1]
+            print(f"{label:>4} lookups over {len(index)} titles: median {statistics.median(latencies):.1f} us, "
+                  f"p99 {p99:.1f} us")
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
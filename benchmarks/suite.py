@@ -0,0 +1,293 @@
+"""
+Benchmark and load-test suite for the data manager and the Flask routes.
+
+Seeds a throwaway database, microbenchmarks every SQLiteDataManager method,
+load-tests the real routes through the Flask test client with OMDb served by
+a local fake, and writes the timings as JSON. The compare command flags
+operations whose median got slower than a threshold between two runs.
+
+Usage:
+    python -m benchmarks.suite run [--users 50] [--movies-per-user 200] [--iterations 200] [--output results.json]
+    python -m benchmarks.suite compare baseline.json current.json [--threshold 0.10]
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from sqlalchemy import insert
+
+from tests.fake_omdb import FakeOMDbServer, generate_movies
+
+
+def summarize(samples):
+    """Reduce a list of durations in seconds to summary statistics in milliseconds."""
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        'n': len(ordered),
+        'mean_ms': sum(ordered) / len(ordered) * 1000,
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+def measure(func, iterations, setup=None):
+    """Time `func` `iterations` times. `setup` runs untimed before each call and its result is passed in."""
+    samples = []
+    for i in range(iterations):
+        arg = setup(i) if setup else i
+        start = time.perf_counter()
+        func(arg)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def seed(users, movies_per_user, batch_size=10000, prefix='seed-user'):
+    """Insert users and their movies in bulk. Returns the list of the new user ids."""
+    from data_managers.data_manager_sqlite import SQLiteDataManager
+    from models.movie import Movie
+    from models.user import User
+    from utils.extensions import db
+
+    db.session.execute(insert(User), [{'name': f"{prefix}-{i}"} for i in range(users)])
+    db.session.commit()
+    user_ids = list(db.session.scalars(
+        db.select(User.user_id).where(User.name.like(f"{prefix}-%")).order_by(User.user_id)
+    ))
+    rows = (
+        {'user_id': user_id, 'title': f"Seed Movie {n:06d}", 'director': f"Director {n % 97}",
+         'year': 1950 + n % 75, 'rating': (n % 100) / 10}
+        for user_id in user_ids for n in range(movies_per_user)
+    )
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        db.session.execute(insert(Movie), batch)
+    db.session.commit()
+    SQLiteDataManager().rebuild_user_stats()
+    return user_ids
+
+
+def bench_data_manager(data_manager, user_ids, iterations):
+    """Microbenchmark every SQLiteDataManager method."""
+    from models.movie import Movie
+    from utils.extensions import db
+
+    user_id = user_ids[len(user_ids) // 2]
+    movie_id = data_manager.get_user_movies_page(user_id, limit=1)[0][0].movie_id
+    _, cursor = data_manager.get_user_movies_page(user_id, sort='title', limit=50)
+    counter = itertools.count()
+
+    def scratch_user(_):
+        name = f"bench-user-{next(counter)}"
+        data_manager.add_user(name)
+        return data_manager.get_all_users()[-1].user_id
+
+    def scratch_movie(_):
+        data_manager.add_movie(user_id, f"Scratch {next(counter)}", 'Someone', 2000, 5.0)
+        return data_manager.get_user_movies_page(user_id, descending=True, limit=1)[0][0].movie_id
+
+    results = {
+        'get_all_users': measure(lambda _: data_manager.get_all_users(), max(iterations // 10, 5)),
+        'get_user': measure(lambda _: data_manager.get_user(user_id), iterations),
+        'get_user_movies': measure(lambda _: data_manager.get_user_movies(user_id), iterations),
+        'get_user_movies_page': measure(lambda _: data_manager.get_user_movies_page(user_id), iterations),
+        'get_user_movies_page_deep': measure(
+            lambda _: data_manager.get_user_movies_page(user_id, sort='title', after=cursor), iterations
+        ),
+        'count_user_movies': measure(lambda _: data_manager.count_user_movies(user_id), iterations),
+        'get_all_user_stats': measure(lambda _: data_manager.get_all_user_stats(), max(iterations // 10, 5)),
+        'get_movie_by_id': measure(lambda _: data_manager.get_movie_by_id(movie_id), iterations),
+        'search_movies': measure(lambda _: data_manager.search_movies('seed 0001', user_id=user_id), iterations),
+        'add_user': measure(lambda i: data_manager.add_user(f"new-user-{next(counter)}"), iterations),
+        'add_movie': measure(
+            lambda i: data_manager.add_movie(user_id, f"New Movie {next(counter)}", 'Someone', 2001, 6.0),
+            iterations
+        ),
+        'add_movies_50': measure(
+            lambda i: data_manager.add_movies(user_id, [
+                {'title': f"Batch {next(counter)}", 'director': 'Someone', 'year': 2002, 'rating': 7.0}
+                for _ in range(50)
+            ]),
+            max(iterations // 10, 5)
+        ),
+        'update_movie': measure(
+            lambda i: data_manager.update_movie(Movie(
+                movie_id=movie_id, title=f"Updated {i}", director='Someone', year=2003, rating=7.5
+            )),
+            iterations
+        ),
+        'delete_movie': measure(lambda mid: data_manager.delete_movie(mid, user_id), iterations, setup=scratch_movie),
+        'delete_user': measure(lambda uid: data_manager.delete_user(uid), iterations, setup=scratch_user),
+    }
+    db.session.remove()
+    return {f"data_manager.{name}": stats for name, stats in results.items()}
+
+
+def bench_routes(app, user_ids, iterations):
+    """Load-test the Flask routes through the test client."""
+    client = app.test_client()
+    data_manager = app.extensions['data_manager']
+    user_id = user_ids[len(user_ids) // 2]
+    with app.app_context():
+        movie_id = data_manager.get_user_movies_page(user_id, limit=1)[0][0].movie_id
+    counter = itertools.count()
+
+    def scratch_movie(_):
+        with app.app_context():
+            data_manager.add_movie(user_id, f"Route Scratch {next(counter)}", 'Someone', 2000, 5.0)
+            return data_manager.get_user_movies_page(user_id, descending=True, limit=1)[0][0].movie_id
+
+    def add_movie(i):
+        check(client.post(f"/users/{user_id}/add_movie", data={'title': f"Movie {i % 500:06d}"}))
+
+    def check(response):
+        if response.status_code >= 400:
+            raise RuntimeError(f"{response.request.path} returned {response.status_code}")
+        return response
+
+    results = {
+        'GET /users': measure(lambda _: check(client.get('/users')), iterations),
+        'GET /users/stats': measure(lambda _: check(client.get('/users/stats')), iterations),
+        'GET /users/<id>': measure(lambda _: check(client.get(f"/users/{user_id}")), iterations),
+        'GET /users/<id>?sort=title': measure(
+            lambda _: check(client.get(f"/users/{user_id}?sort=title&order=desc")), iterations
+        ),
+        'GET /users/<id>/update_movie/<id>': measure(
+            lambda _: check(client.get(f"/users/{user_id}/update_movie/{movie_id}")), iterations
+        ),
+        'POST /users/<id>/update_movie/<id>': measure(
+            lambda i: check(client.post(f"/users/{user_id}/update_movie/{movie_id}", data={
+                'title': f"Route Update {i}", 'year': '2000', 'director': 'Someone', 'rating': '5'
+            })),
+            iterations
+        ),
+        'POST /users/<id>/delete_movie/<id>': measure(
+            lambda mid: check(client.post(f"/users/{user_id}/delete_movie/{mid}")), iterations, setup=scratch_movie
+        ),
+        'POST /users/<id>/add_movie': measure(add_movie, iterations),
+        'POST /add_user': measure(
+            lambda i: check(client.post('/add_user', data={'name': f"route-user-{next(counter)}"})), iterations
+        ),
+        'GET /search': measure(lambda _: check(client.get('/search?q=seed+movie+0001')), iterations),
+    }
+    with app.app_context():
+        app.extensions['lookup_queue'].drain()
+    return {f"route.{name}": stats for name, stats in results.items()}
+
+
+def run(args):
+    """Seed a temporary database, run every benchmark and write the JSON report."""
+    server = FakeOMDbServer(generate_movies(500)).start()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            'OMDB_API_URL': server.url,
+            'OMDB_CACHE_PATH': os.path.join(tmp, 'omdb_cache.db'),
+            'OMDB_RATE_LIMIT': '0',
+            'LOOKUP_WORKERS': '0',
+            'DB_OPTIMIZE_INTERVAL': '0',
+            'CACHE_BACKEND': args.cache,
+            'BACKGROUND_WORKERS': '0',
+        })
+        from app import create_app, init_db
+        from data_managers.data_manager_sqlite import SQLiteDataManager
+
+        app = create_app()
+        with app.app_context():
+            init_db()
+            start = time.perf_counter()
+            user_ids = seed(args.users, args.movies_per_user)
+            seed_seconds = time.perf_counter() - start
+            results = bench_data_manager(SQLiteDataManager(), user_ids, args.iterations)
+        results.update(bench_routes(app, user_ids, args.iterations))
+
+    server.stop()
+    report = {
+        'meta': {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'users': args.users,
+            'movies_per_user': args.movies_per_user,
+            'iterations': args.iterations,
+            'cache': args.cache,
+            'seed_seconds': seed_seconds,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'benchmark':<45} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in results.items():
+        print(f"{name:<45} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} {stats['p99_ms']:>9.3f}")
+    print(f"Results written to {args.output}")
+    return 0
+
+
+def compare(args):
+    """Compare two reports and return a non-zero exit code on regressions."""
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    with open(args.current) as f:
+        current = json.load(f)['results']
+
+    regressions = []
+    metric = args.metric.replace('_ms', '')
+    print(f"{'benchmark':<45} {'base ' + metric:>9} {'curr ' + metric:>9} {'change':>8}")
+    for name in sorted(set(baseline) & set(current)):
+        before = baseline[name][args.metric]
+        after = current[name][args.metric]
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if change > args.threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<45} {before:>9.3f} {after:>9.3f} {change:>+7.1%}{flag}")
+    for name in sorted(set(baseline) ^ set(current)):
+        print(f"{name:<45} only in {'baseline' if name in baseline else 'current'}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}.")
+        return 1
+    print("No regressions.")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the benchmarks")
+    run_parser.add_argument('--users', type=int, default=50)
+    run_parser.add_argument('--movies-per-user', type=int, default=200)
+    run_parser.add_argument('--iterations', type=int, default=200)
+    run_parser.add_argument('--cache', choices=('lru', 'none'), default='lru')
+    run_parser.add_argument('--output', default='bench_results.json')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser('compare', help="compare two result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10)
+    compare_parser.add_argument('--metric', default='p50_ms', choices=('mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'))
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,226 @@
+import threading
+from collections import namedtuple
+
+from data_managers.data_manager_interface import DataManagerInterface
+
+UserRecord = namedtuple('UserRecord', 'user_id name movie_count')
+MovieRecord = namedtuple('MovieRecord', 'movie_id user_id title director year rating imdb_id', defaults=(None,))
+
+
+def user_to_dict(user):
+    return {'user_id': user.user_id, 'name': user.name, 'movie_count': user.movie_count}
+
+
+def movie_to_dict(movie):
+    return {
+        'movie_id': movie.movie_id,
+        'user_id': movie.user_id,
+        'title': movie.title,
+        'director': movie.director,
+        'year': movie.year,
+        'rating': movie.rating,
+        'imdb_id': movie.imdb_id
+    }
+
+
+class CachedDataManager(DataManagerInterface):
+    """
+    Read-through cache in front of another data manager.
+    Reads are memoized as plain data in a pluggable backend and returned as
+    read-only records. Keys carry a generation counter kept in the backend,
+    one for the user list and one per user's collection, so a hit never
+    touches the database. Writes through this class bump the counters they
+    affect, which retires every entry of that scope at once; entries of old
+    generations are never read again and age out by TTL or LRU eviction.
+    Counters are shared by all workers on the Redis backend and per process
+    on the LRU backend.
+    """
+
+    def __init__(self, inner, backend, ttl=300):
+        self.inner = inner
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = {}
+        self.misses = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def stats(self):
+        """Return hits, misses and hit rate per cached method."""
+        with self._lock:
+            methods = set(self.hits) | set(self.misses)
+            stats = {}
+            for method in sorted(methods):
+                hits = self.hits.get(method, 0)
+                misses = self.misses.get(method, 0)
+                stats[method] = {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses)}
+            return stats
+
+    def _count(self, method, hit):
+        with self._lock:
+            counter = self.hits if hit else self.misses
+            counter[method] = counter.get(method, 0) + 1
+
+    def _cached(self, method, key, load):
+        """Return the cached value for key, calling load() and storing it on a miss."""
+        value = self.backend.get(key)
+        if value is not None:
+            self._count(method, True)
+            return value
+        self._count(method, False)
+        value = load()
+        if value is not None:
+            self.backend.set(key, value, ttl=self.ttl)
+        return value
+
+    def _generation(self, user_id=None):
+        """Generation of the user list, or of one user's collection."""
+        return self.backend.get_counter('gen:users' if user_id is None else f"gen:user:{user_id}")
+
+    def _bump(self, user_id=None, users=True):
+        """Retire the cached entries of one user's collection and, with `users`, of the user list."""
+        if user_id is not None:
+            self.backend.incr(f"gen:user:{user_id}")
+        if users:
+            self.backend.incr('gen:users')
+
+    def _users_key(self, suffix):
+        return f"users:g{self._generation()}:{suffix}"
+
+    def _movies_key(self, user_id, suffix):
+        return f"user:{user_id}:g{self._generation(user_id)}:{suffix}"
+
+    def get_all_users(self):
+        users = self._cached(
+            'get_all_users', self._users_key('all'),
+            lambda: [user_to_dict(user) for user in self.inner.get_all_users()]
+        )
+        return [UserRecord(**user) for user in users]
+
+    def get_user(self, user_id):
+        def load():
+            user = self.inner.get_user(user_id)
+            return user_to_dict(user) if user else None
+        user = self._cached('get_user', self._movies_key(user_id, 'user'), load)
+        return UserRecord(**user) if user else None
+
+    def get_user_movies(self, user_id):
+        movies = self._cached(
+            'get_user_movies', self._movies_key(user_id, 'all'),
+            lambda: [movie_to_dict(movie) for movie in self.inner.get_user_movies(user_id)]
+        )
+        return [MovieRecord(**movie) for movie in movies]
+
+    def iter_user_movies(self, user_id, batch_size=1000):
+        return self.inner.iter_user_movies(user_id, batch_size=batch_size)
+
+    def get_user_movies_page(self, user_id, sort='movie_id', descending=False, after=None, limit=50):
+        def load():
+            movies, next_cursor = self.inner.get_user_movies_page(
+                user_id, sort=sort, descending=descending, after=after, limit=limit
+            )
+            return {'movies': [movie_to_dict(movie) for movie in movies], 'next': next_cursor}
+        key = self._movies_key(user_id, f"page:{sort}:{int(descending)}:{after}:{limit}")
+        page = self._cached('get_user_movies_page', key, load)
+        return [MovieRecord(**movie) for movie in page['movies']], page['next']
+
+    def get_movie_rows_page(self, user_id, fields=None, sort='movie_id', descending=False, after=None, limit=50):
+        return self.inner.get_movie_rows_page(
+            user_id, fields=fields, sort=sort, descending=descending, after=after, limit=limit
+        )
+
+    def get_movie_rows_for_users(self, user_ids, fields=None, limit=50):
+        return self.inner.get_movie_rows_for_users(user_ids, fields=fields, limit=limit)
+
+    def get_user_rows(self, fields=None, user_ids=None):
+        return self.inner.get_user_rows(fields=fields, user_ids=user_ids)
+
+    def count_user_movies(self, user_id):
+        return self._cached(
+            'count_user_movies', self._movies_key(user_id, 'count'),
+            lambda: self.inner.count_user_movies(user_id)
+        )
+
+    def get_movie_by_id(self, movie_id):
+        """
+        A movie is cached with its owner's generation, which is only known
+        once it is loaded; an entry from an older generation counts as a miss.
+        """
+        key = f"movie:{movie_id}"
+        cached = self.backend.get(key)
+        if cached is not None and cached['generation'] == self._generation(cached['movie']['user_id']):
+            self._count('get_movie_by_id', True)
+            return MovieRecord(**cached['movie'])
+        self._count('get_movie_by_id', False)
+        movie = self.inner.get_movie_by_id(movie_id)
+        if movie is None:
+            return None
+        movie = movie_to_dict(movie)
+        self.backend.set(key, {'movie': movie, 'generation': self._generation(movie['user_id'])}, ttl=self.ttl)
+        return MovieRecord(**movie)
+
+    def get_collection_version(self, user_id=None):
+        return self.inner.get_collection_version(user_id)
+
+    def get_all_user_stats(self):
+        return self.inner.get_all_user_stats()
+
+    def get_recommendations(self, user_id, limit=20):
+        return self.inner.get_recommendations(user_id, limit=limit)
+
+    def search_movies(self, query, user_id=None, limit=20):
+        return self.inner.search_movies(query, user_id=user_id, limit=limit)
+
+    def rebuild_user_stats(self):
+        try:
+            return self.inner.rebuild_user_stats()
+        finally:
+            for user in self.inner.get_all_users():
+                self._bump(user.user_id, users=False)
+            self._bump()
+
+    def add_user(self, name):
+        try:
+            return self.inner.add_user(name)
+        finally:
+            self._bump()
+
+    def delete_user(self, user_id):
+        try:
+            return self.inner.delete_user(user_id)
+        finally:
+            self._bump(user_id)
+
+    def add_movie(self, user_id, title, director, year, rating, imdb_id=None):
+        try:
+            return self.inner.add_movie(user_id, title, director, year, rating, imdb_id=imdb_id)
+        finally:
+            self._bump(user_id)
+
+    def add_movies(self, user_id, movies):
+        try:
+            return self.inner.add_movies(user_id, movies)
+        finally:
+            self._bump(user_id)
+
+    def save_omdb_titles(self, payloads):
+        return self.inner.save_omdb_titles(payloads)
+
+    def get_omdb_title(self, imdb_id):
+        return self.inner.get_omdb_title(imdb_id)
+
+    def update_movie(self, movie):
+        current = self.get_movie_by_id(movie.movie_id)
+        try:
+            return self.inner.update_movie(movie)
+        finally:
+            if current is not None:
+                self._bump(current.user_id, users=False)
+
+    def delete_movie(self, movie_id, user_id):
+        try:
+            return self.inner.delete_movie(movie_id, user_id)
+        finally:
+            self._bump(user_id)
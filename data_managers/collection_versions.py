@@ -0,0 +1,40 @@
+import time
+
+from sqlalchemy import select, update
+
+from data_managers.dialects import upsert_insert
+from models.collection_version import CollectionVersion
+
+USERS_SCOPE = 'users'
+
+
+def user_scope(user_id):
+    """Scope name of one user's movie collection."""
+    return f"user:{int(user_id)}"
+
+
+def bump_versions(session, *scopes):
+    """Increment the version of each scope in the current transaction."""
+    now = time.time()
+    stmt = upsert_insert(session, CollectionVersion)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['scope'],
+        set_={'version': CollectionVersion.version + 1, 'updated_at': stmt.excluded.updated_at}
+    )
+    session.execute(stmt, [{'scope': scope, 'version': 1, 'updated_at': now} for scope in dict.fromkeys(scopes)])
+
+
+def bump_all_versions(session):
+    """Increment every stored version, for writes that touch all collections at once."""
+    session.execute(update(CollectionVersion).values(
+        version=CollectionVersion.version + 1, updated_at=time.time()
+    ))
+    bump_versions(session, USERS_SCOPE)
+
+
+def get_version(session, scope):
+    """Return (version, updated_at) of a scope; (0, None) if it was never written."""
+    row = session.execute(
+        select(CollectionVersion.version, CollectionVersion.updated_at).where(CollectionVersion.scope == scope)
+    ).first()
+    return (row.version, row.updated_at) if row else (0, None)
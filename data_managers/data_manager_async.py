@@ -0,0 +1,189 @@
+import asyncio
+import os
+
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from data_managers.data_manager_interface import DataManagerInterface
+from data_managers.registry import backend_for_uri, get_backend
+from models.movie import Movie
+from utils.sqlite_tuning import apply_pragmas, engine_options, is_memory_db, is_sqlite
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+psycopg',
+}
+
+
+def async_database_uri(uri, instance_path=None):
+    """
+    The URI of a database for its asyncio driver, e.g. sqlite+aiosqlite:///...
+    for sqlite:///... URIs without an explicit driver. Relative SQLite paths
+    are resolved against `instance_path`, as Flask-SQLAlchemy does.
+    """
+    url = make_url(uri)
+    backend = backend_for_uri(uri)
+    if '+' not in url.drivername:
+        if backend not in ASYNC_DRIVERS:
+            raise ValueError(f"No asyncio driver known for '{backend}' databases.")
+        url = url.set(drivername=ASYNC_DRIVERS[backend])
+    if backend == 'sqlite' and instance_path and not is_memory_db(uri) and not os.path.isabs(url.database):
+        url = url.set(database=os.path.join(instance_path, url.database))
+    return url.render_as_string(hide_password=False)
+
+
+def create_async_data_manager(uri, profile='performance', instance_path=None):
+    """AsyncDataManager on an async engine for a database URI, with the SQLite profile's pragmas and pool."""
+    options = engine_options(profile, uri) if is_sqlite(uri) else {}
+    if backend_for_uri(uri) == 'postgresql':
+        from data_managers.data_manager_postgres import engine_options as postgres_engine_options
+        options = postgres_engine_options()
+    engine = create_async_engine(async_database_uri(uri, instance_path), **options)
+    if is_sqlite(uri):
+        apply_pragmas(engine.sync_engine, profile)
+    return AsyncDataManager(engine, backend_for_uri(uri))
+
+
+class AsyncDataManager(DataManagerInterface):
+    """
+    asyncio implementation of the DataManagerInterface on SQLAlchemy's asyncio extension.
+    Each call opens an AsyncSession and runs the backend's data manager on it
+    with run_sync, so the ORM code, the bookkeeping of denormalized tables and
+    the error handling are those of the sync mode, while every statement goes
+    through the async driver and waiting on the database never blocks the
+    event loop. Read replicas are not used in this mode.
+    On SQLite, writes of one process run one at a time: SQLite has a single
+    writer, and a WAL read transaction that turns into a write while another
+    one commits fails with 'database is locked' without waiting out busy_timeout.
+    """
+
+    def __init__(self, engine, backend='sqlite'):
+        self.engine = engine
+        self.sessions = async_sessionmaker(engine, expire_on_commit=False)
+        self.manager_class = get_backend(backend)
+        self._write_lock = asyncio.Lock() if backend == 'sqlite' else None
+
+    async def close(self):
+        await self.engine.dispose()
+
+    async def run(self, method, *args, **kwargs):
+        """Call a method of the backend's sync data manager on a fresh AsyncSession."""
+        def call(session):
+            return getattr(self.manager_class(session=session), method)(*args, **kwargs)
+
+        async with self.sessions() as session:
+            return await session.run_sync(call)
+
+    async def write(self, method, *args, **kwargs):
+        """Call a method of the sync data manager that writes, one at a time on SQLite."""
+        if self._write_lock is None:
+            return await self.run(method, *args, **kwargs)
+        async with self._write_lock:
+            return await self.run(method, *args, **kwargs)
+
+    async def get_all_users(self):
+        """Retrieve all users from the database."""
+        return await self.run('get_all_users')
+
+    async def get_user(self, user_id):
+        """Retrieve a single user by ID."""
+        return await self.run('get_user', user_id)
+
+    async def get_user_movies(self, user_id):
+        """Retrieve all movies for a specific user."""
+        return await self.run('get_user_movies', user_id)
+
+    async def iter_user_movies(self, user_id, batch_size=1000):
+        """Yield a user's movies as (movie_id, title, director, year, rating) tuples from a streaming cursor."""
+        stmt = (
+            select(Movie.movie_id, Movie.title, Movie.director, Movie.year, Movie.rating)
+            .where(Movie.user_id == user_id)
+            .order_by(Movie.movie_id)
+            .execution_options(yield_per=batch_size)
+        )
+        async with self.sessions() as session:
+            result = await session.stream(stmt)
+            async for row in result:
+                yield tuple(row)
+
+    async def get_user_movies_page(self, user_id, sort='movie_id', descending=False, after=None, limit=50):
+        """Retrieve one page of a user's movies and the cursor of the next page."""
+        return await self.run('get_user_movies_page', user_id, sort, descending, after, limit)
+
+    async def get_movie_rows_page(self, user_id, fields=None, sort='movie_id', descending=False, after=None,
+                                  limit=50):
+        """One page of a user's movies as dicts of the selected fields, and the next cursor."""
+        return await self.run('get_movie_rows_page', user_id, fields, sort, descending, after, limit)
+
+    async def get_movie_rows_for_users(self, user_ids, fields=None, limit=50):
+        """The first `limit` movies of each user, as {user_id: [row dicts]}."""
+        return await self.run('get_movie_rows_for_users', user_ids, fields, limit)
+
+    async def get_user_rows(self, fields=None, user_ids=None):
+        """Users as dicts of the selected fields."""
+        return await self.run('get_user_rows', fields, user_ids)
+
+    async def count_user_movies(self, user_id):
+        """Number of movies in a user's collection."""
+        return await self.run('count_user_movies', user_id)
+
+    async def get_collection_version(self, user_id=None):
+        """Version of one user's collection, or of the user list when user_id is None."""
+        return await self.run('get_collection_version', user_id)
+
+    async def get_all_user_stats(self):
+        """Per-user movie statistics."""
+        return await self.run('get_all_user_stats')
+
+    async def get_recommendations(self, user_id, limit=20):
+        """Titles a user may like, from the precomputed similar-title lists."""
+        return await self.run('get_recommendations', user_id, limit)
+
+    async def add_user(self, name):
+        """Add a new user; returns their ID, or None if the name is taken."""
+        return await self.write('add_user', name)
+
+    async def add_movie(self, user_id, title, director, year, rating, imdb_id=None):
+        """Add a new movie to a user's collection; returns its ID, or None if the user owns it already."""
+        return await self.write('add_movie', user_id, title, director, year, rating, imdb_id)
+
+    async def add_movies(self, user_id, movies):
+        """Add several movies in one transaction; returns {title: None or error message}."""
+        return await self.write('add_movies', user_id, movies)
+
+    async def save_omdb_titles(self, payloads):
+        """Store full OMDb payloads in the shared omdb_titles table."""
+        return await self.write('save_omdb_titles', payloads)
+
+    async def get_omdb_title(self, imdb_id):
+        """The stored OMDb payload of a title, or None."""
+        return await self.run('get_omdb_title', imdb_id)
+
+    async def get_title_popularity(self, after_movie_id=None):
+        """How many users own each title, and the highest movie ID counted."""
+        return await self.run('get_title_popularity', after_movie_id)
+
+    async def get_leaderboards(self, versions=None):
+        """The ranked leaderboard snapshots, with entries only for boards whose version changed."""
+        return await self.run('get_leaderboards', versions)
+
+    async def update_movie(self, movie):
+        """Update the details of a movie."""
+        return await self.write('update_movie', movie)
+
+    async def delete_user(self, user_id):
+        """Delete a user and their movies."""
+        return await self.write('delete_user', user_id)
+
+    async def delete_movie(self, movie_id, user_id):
+        """Delete a movie from a user's collection."""
+        return await self.write('delete_movie', movie_id, user_id)
+
+    async def get_movie_by_id(self, movie_id):
+        """Retrieve a movie by its ID."""
+        return await self.run('get_movie_by_id', movie_id)
+
+    async def search_movies(self, query, user_id=None, limit=20):
+        """Full-text search over titles and directors."""
+        return await self.run('search_movies', query, user_id, limit)
@@ -9,19 +9,84 @@ class DataManagerInterface(ABC):
         """Retrieve all users from the data source."""
         pass
 
+    @abstractmethod
+    def get_user(self, user_id):
+        """Retrieve a single user by ID."""
+        pass
+
     @abstractmethod
     def get_user_movies(self, user_id):
         """Retrieve all movies for a given user."""
         pass
 
+    @abstractmethod
+    def iter_user_movies(self, user_id, batch_size=1000):
+        """Yield all of a user's movies as tuples without loading them at once."""
+        pass
+
+    @abstractmethod
+    def get_user_movies_page(self, user_id, sort='movie_id', descending=False, after=None, limit=50):
+        """Retrieve one page of a user's movies and the cursor of the next page."""
+        pass
+
+    @abstractmethod
+    def get_movie_rows_page(self, user_id, fields=None, sort='movie_id', descending=False, after=None, limit=50):
+        """Retrieve one page of a user's movies as plain dicts with only the selected fields."""
+        pass
+
+    @abstractmethod
+    def get_movie_rows_for_users(self, user_ids, fields=None, limit=50):
+        """Retrieve the first movies of several users in one query, keyed by user ID."""
+        pass
+
+    @abstractmethod
+    def get_user_rows(self, fields=None, user_ids=None):
+        """Retrieve users as plain dicts with only the selected fields."""
+        pass
+
+    @abstractmethod
+    def count_user_movies(self, user_id):
+        """Count the movies in a user's collection."""
+        pass
+
+    @abstractmethod
+    def get_collection_version(self, user_id=None):
+        """Return (version, updated_at) of the user list or of one user's movies."""
+        pass
+
+    @abstractmethod
+    def get_all_user_stats(self):
+        """Retrieve collection statistics for every user."""
+        pass
+
+    @abstractmethod
+    def get_recommendations(self, user_id, limit=20):
+        """Recommend titles a user does not own, from titles similar to the ones they rated."""
+        pass
+
     @abstractmethod
     def add_user(self, name):
-        """Add a new user to the data source."""
+        """Add a new user to the data source; returns their ID, or None if the name is taken."""
+        pass
+
+    @abstractmethod
+    def add_movie(self, user_id, title, director, year, rating, imdb_id=None):
+        """Add a new movie to the specified user's collection; returns its ID, or None if the user owns it already."""
         pass
 
     @abstractmethod
-    def add_movie(self, user_id, title, director, year, rating):
-        """Add a new movie to the specified user's collection."""
+    def add_movies(self, user_id, movies):
+        """Add several movies to the specified user's collection at once."""
+        pass
+
+    @abstractmethod
+    def save_omdb_titles(self, payloads):
+        """Store full OMDb payloads in the shared title table."""
+        pass
+
+    @abstractmethod
+    def get_omdb_title(self, imdb_id):
+        """Retrieve the stored OMDb payload of a title."""
         pass
 
     @abstractmethod
@@ -42,4 +107,9 @@ class DataManagerInterface(ABC):
     @abstractmethod
     def get_movie_by_id(self, movie_id):
         """Retrieve a movie by its ID."""
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def search_movies(self, query, user_id=None, limit=20):
+        """Search movie titles and directors, optionally within one user's collection."""
+        pass
@@ -0,0 +1,120 @@
+import os
+import re
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from data_managers.data_manager_sql import SQLDataManager
+from models.movie_search import HIGHLIGHT_CLOSE, HIGHLIGHT_OPEN
+from utils.replicas import replica_read
+
+
+def search_vector(alias=''):
+    """Weighted tsvector of a movie row; the GIN index and the search query must use the same expression."""
+    prefix = f"{alias}." if alias else ''
+    return (
+        f"(setweight(to_tsvector('simple', {prefix}title), 'A') || "
+        f"setweight(to_tsvector('simple', coalesce({prefix}director, '')), 'B'))"
+    )
+
+
+SEARCH_INDEX = 'ix_movies_search'
+
+SEARCH_DDL = f"CREATE INDEX IF NOT EXISTS {SEARCH_INDEX} ON movies USING gin ({search_vector()})"
+
+SEARCH_SQL = f"""
+    SELECT m.movie_id, m.user_id, m.title, m.director, m.year, m.rating,
+           ts_headline('simple', m.title, q, :options) AS title_highlight,
+           ts_headline('simple', coalesce(m.director, ''), q, :options) AS director_highlight
+    FROM movies AS m, to_tsquery('simple', :query) AS q
+    WHERE {search_vector('m')} @@ q {{user_filter}}
+    ORDER BY ts_rank({search_vector('m')}, q) DESC, m.movie_id
+    LIMIT :limit
+"""
+
+HEADLINE_OPTIONS = f'StartSel="{HIGHLIGHT_OPEN}", StopSel="{HIGHLIGHT_CLOSE}", HighlightAll=true'
+
+
+def engine_options():
+    """SQLALCHEMY_ENGINE_OPTIONS for a pooled PostgreSQL engine, tunable from the environment."""
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': 30,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+    }
+
+
+def build_tsquery(query):
+    """Turn free text into a tsquery matching every word as a prefix."""
+    words = re.findall(r'\w+', query or '')
+    return ' & '.join(f"{word}:*" for word in words)
+
+
+class PostgresDataManager(SQLDataManager):
+    """
+    PostgreSQL implementation of the DataManagerInterface.
+    Adds search on a GIN-indexed tsvector to SQLDataManager.
+    """
+
+    @replica_read
+    def search_movies(self, query, user_id=None, limit=20):
+        """
+        Search titles and directors with PostgreSQL full-text search, best matches first.
+        Every word matches as a prefix and title matches outrank director
+        matches. Returns the same dicts as SQLDataManager.search_movies_like.
+        """
+        tsquery = build_tsquery(query)
+        if not tsquery:
+            return []
+        sql = SEARCH_SQL.format(user_filter='AND m.user_id = :user_id' if user_id is not None else '')
+        params = {
+            'query': tsquery,
+            'user_id': user_id,
+            'limit': limit,
+            'options': HEADLINE_OPTIONS
+        }
+        try:
+            return [dict(row) for row in self.session.execute(text(sql), params).mappings()]
+        except SQLAlchemyError as e:
+            print(f"Full-text search failed, falling back to ILIKE: {e}")
+            self.session.rollback()
+            return self.search_movies_like(query, user_id=user_id, limit=limit)
+
+    def ensure_cascading_deletes(self):
+        """Make movies.user_id cascade deletes on a database created before it did."""
+        try:
+            name = self.session.scalar(text(
+                "SELECT conname FROM pg_constraint WHERE contype = 'f' AND confdeltype <> 'c' "
+                "AND conrelid = 'movies'::regclass AND confrelid = 'users'::regclass"
+            ))
+            if name:
+                self.session.execute(text(
+                    f'ALTER TABLE movies DROP CONSTRAINT "{name}", ADD CONSTRAINT "{name}" '
+                    f'FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE CASCADE'
+                ))
+            self.session.commit()
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Error making movie deletes cascade: {e}")
+
+    def ensure_search_index(self):
+        """Create the GIN index backing search if it is missing."""
+        try:
+            self.session.execute(text(SEARCH_DDL))
+            self.session.commit()
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Error creating search index: {e}")
+
+    def rebuild_search_index(self):
+        """Rebuild the GIN index backing search."""
+        self.ensure_search_index()
+        try:
+            self.session.execute(text(f"REINDEX INDEX {SEARCH_INDEX}"))
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            print(f"Error rebuilding search index: {e}")
+            raise
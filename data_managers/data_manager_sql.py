@@ -0,0 +1,753 @@
+import json
+import re
+import time
+from abc import abstractmethod
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import case, delete, func, or_, select, text, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from data_managers.data_manager_interface import DataManagerInterface
+from data_managers.collection_versions import (
+    USERS_SCOPE, bump_all_versions, bump_versions, get_version, user_scope
+)
+from data_managers.pagination import SORT_FIELDS, decode_cursor, encode_cursor, keyset_filter, null_keyset_filter
+from data_managers.projections import MOVIE_FIELDS, USER_FIELDS, columns, parse_fields, rows_to_dicts
+from data_managers.title_similarity import (
+    all_titles, apply_rating_changes, compute_neighbours, drop_orphan_neighbours, rating_values,
+    rebuild_title_norms, recommendations_for_user, refresh_stale_titles, remove_user_ratings, sweep_titles
+)
+from data_managers.user_stats import (
+    YEAR_PREFIX, all_user_stats, apply_movie_stats, movie_values, rebuild_user_stats, verify_user_stats
+)
+from data_managers.dialects import upsert_insert
+from data_managers.leaderboards import (
+    LEADERBOARD_SIZE, MIN_RATINGS, leaderboards, log_movie_changes, log_user_removal, rebuild_leaderboards,
+    refresh_leaderboards
+)
+from models.leaderboard import LeaderboardTotal
+from models.movie import Movie
+from models.omdb_title import OMDbTitle
+from models.title_similarity import StaleTitle, TitleNorm
+from models.user import User
+from models.user_stats import UserStats
+from utils.extensions import db
+from utils.replicas import replica_read
+
+
+def release_year(year):
+    """
+    Value stored in movies.year for a release year: its leading four digits,
+    so OMDb series years like '2008–2013' store 2008, or None when it has none
+    ('', 'N/A').
+    """
+    if year is None:
+        return None
+    match = YEAR_PREFIX.match(str(year))
+    return int(match.group()) if match else None
+
+
+class SQLDataManager(DataManagerInterface):
+    """
+    DataManagerInterface on SQLAlchemy with only dialect-neutral SQL.
+    Works on Flask-SQLAlchemy's db.session unless given another session, e.g.
+    the synchronous facade of an AsyncSession (see AsyncDataManager).
+    Subclasses add search and the schema upgrades that need their database's
+    own SQL.
+    """
+
+    def __init__(self, session=None):
+        self._session = session
+
+    @property
+    def session(self):
+        return self._session if self._session is not None else db.session
+
+    def add_user(self, name):
+        """
+        Add a new user to the database and return their ID.
+        Adding a name that is already taken changes nothing and returns None.
+        """
+        stmt = (
+            upsert_insert(self.session, User)
+            .values(name=name)
+            .on_conflict_do_nothing(index_elements=['name'])
+            .returning(User.user_id)
+        )
+        try:
+            user_id = self.session.scalar(stmt)
+            if user_id is None:
+                self.session.rollback()
+                print(f"Username '{name}' already exists.")
+                return None
+            bump_versions(self.session, USERS_SCOPE)
+            self.session.commit()
+            return user_id
+        except Exception:
+            self.session.rollback()
+            print(f"User '{name}' could not be added.")
+            raise
+
+    def delete_user(self, user_id):
+        """
+        Delete a user by ID from the database.
+        One DELETE removes the user; the database cascades it to their movies
+        and stats rows (ON DELETE CASCADE), so the collection is never loaded.
+        """
+        try:
+            remove_user_ratings(self.session, user_id)
+            log_user_removal(self.session, user_id)
+            deleted = self.session.scalar(delete(User).where(User.user_id == user_id).returning(User.user_id))
+            if deleted is None:
+                self.session.rollback()
+                print(f"User with id '{user_id}' does not exist.")
+                return
+            bump_versions(self.session, USERS_SCOPE, user_scope(user_id))
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            print(f"User with id '{user_id}' could not be deleted.")
+            raise
+
+    @replica_read
+    def get_all_users(self):
+        """Retrieve all users from the database."""
+        try:
+            return self.session.scalars(select(User)).all()
+        except SQLAlchemyError as e:
+            print(f"Error retrieving users: {e}")
+            return []
+
+    @replica_read
+    def get_user(self, user_id):
+        """Retrieve a single user by ID."""
+        try:
+            return self.session.get(User, user_id)
+        except SQLAlchemyError as e:
+            print(f"Error retrieving user: {e}")
+            return None
+
+    def add_movie(self, user_id, title, director, year, rating, imdb_id=None):
+        """
+        Add a new movie to a user's collection, linked to its shared OMDb title
+        when imdb_id is given, and return its ID. Adding a title the user
+        already owns changes nothing and returns None.
+        """
+        year = release_year(year)
+        stmt = (
+            upsert_insert(self.session, Movie)
+            .values(user_id=user_id, title=title, director=director, year=year, rating=rating, imdb_id=imdb_id)
+            .on_conflict_do_nothing(index_elements=['title', 'user_id'])
+            .returning(Movie.movie_id)
+        )
+        try:
+            movie_id = self.session.scalar(stmt)
+            if movie_id is None:
+                self.session.rollback()
+                print(f"Movie '{title}' is already in the collection of user {user_id}.")
+                return None
+            apply_movie_stats(self.session, user_id, added=[(year, director, rating)])
+            apply_rating_changes(self.session, user_id, added=[(title, rating)])
+            log_movie_changes(self.session, added=[(title, rating)])
+            bump_versions(self.session, USERS_SCOPE, user_scope(user_id))
+            self.session.commit()
+            return movie_id
+        except Exception:
+            self.session.rollback()
+            print(f"Movie '{title}' could not be added to user {user_id}.")
+            raise
+
+    def add_movies(self, user_id, movies, batch_size=500):
+        """
+        Add several movies to a user's collection in a single transaction.
+        `movies` is a list of dicts with title, director, year, rating and
+        optionally imdb_id. Titles the user already owns, including ones added
+        by a concurrent request, are skipped by the database instead of failing
+        the batch. Returns a dict mapping each title to None on success or an error message.
+        """
+        rows = {}
+        for movie in movies:
+            title = movie.get('title')
+            if title and title not in rows:
+                rows[title] = {
+                    'user_id': user_id,
+                    'title': title,
+                    'director': movie.get('director'),
+                    'year': release_year(movie.get('year')),
+                    'rating': movie.get('rating'),
+                    'imdb_id': movie.get('imdb_id')
+                }
+        results = {title: "Movie already exists." for title in rows}
+        rows = list(rows.values())
+
+        try:
+            inserted = []
+            for start in range(0, len(rows), batch_size):
+                stmt = (
+                    upsert_insert(self.session, Movie)
+                    .values(rows[start:start + batch_size])
+                    .on_conflict_do_nothing(index_elements=['title', 'user_id'])
+                    .returning(Movie.title, Movie.year, Movie.director, Movie.rating)
+                )
+                inserted.extend(self.session.execute(stmt))
+            for row in inserted:
+                results[row.title] = None
+            apply_movie_stats(self.session, user_id, added=[movie_values(row) for row in inserted])
+            apply_rating_changes(self.session, user_id, added=[rating_values(row) for row in inserted])
+            log_movie_changes(self.session, added=[rating_values(row) for row in inserted])
+            bump_versions(self.session, USERS_SCOPE, user_scope(user_id))
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            print(f"Movies could not be imported for user {user_id}.")
+            raise
+        return results
+
+    @replica_read
+    def get_user_movies(self, user_id):
+        """Retrieve all movies for a specific user."""
+        user = self.session.get(User, user_id)
+        if not user:
+            print(f"User with id '{user_id}' does not exist.")
+            return []
+        try:
+            stmt = select(Movie).where(Movie.user_id == user_id)
+            return self.session.scalars(stmt).all()
+        except SQLAlchemyError as e:
+            print(f"Error retrieving user movies: {e}")
+            return []
+
+    @replica_read
+    def iter_user_movies(self, user_id, batch_size=1000):
+        """
+        Yield a user's movies as (movie_id, title, director, year, rating) tuples in movie_id order.
+        Rows come from a streaming cursor `batch_size` at a time, so memory use
+        does not grow with the size of the collection.
+        """
+        stmt = (
+            select(Movie.movie_id, Movie.title, Movie.director, Movie.year, Movie.rating)
+            .where(Movie.user_id == user_id)
+            .order_by(Movie.movie_id)
+            .execution_options(yield_per=batch_size)
+        )
+        try:
+            for partition in self.session.execute(stmt).partitions():
+                for row in partition:
+                    yield tuple(row)
+        except SQLAlchemyError as e:
+            print(f"Error exporting user movies: {e}")
+            raise
+
+    def _page_statements(self, stmt, sort, descending, after):
+        """
+        Apply keyset ordering and the cursor position to a movies query.
+        Movies whose sort value is NULL come last in both directions, so a
+        page is read as up to two index range scans: the movies with a value,
+        then the NULL ones by movie_id. Returns the statements in that order.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort movies by '{sort}'.")
+        column = getattr(Movie, sort)
+        sort_value, movie_id = decode_cursor(after) if after else (None, None)
+        id_order = Movie.movie_id.desc() if descending else Movie.movie_id
+        if column is Movie.movie_id:
+            if after:
+                stmt = stmt.where(keyset_filter(column, Movie.movie_id, sort_value, movie_id, descending))
+            return [stmt.order_by(id_order)]
+        if after and sort_value is None:
+            return [stmt.where(null_keyset_filter(column, Movie.movie_id, movie_id, descending)).order_by(id_order)]
+        valued = stmt.where(keyset_filter(column, Movie.movie_id, sort_value, movie_id, descending))
+        nulls = stmt.where(null_keyset_filter(column, Movie.movie_id))
+        return [valued.order_by(column.desc() if descending else column, id_order), nulls.order_by(id_order)]
+
+    def _page_rows(self, execute, statements, limit):
+        """
+        Run the statements of _page_statements in order until they return
+        `limit` + 1 rows, so the NULL movies are only read on the pages that
+        reach them.
+        """
+        rows = []
+        for stmt in statements:
+            rows.extend(execute(stmt.limit(limit + 1 - len(rows))))
+            if len(rows) > limit:
+                break
+        return rows
+
+    @replica_read
+    def get_user_movies_page(self, user_id, sort='movie_id', descending=False, after=None, limit=50):
+        """
+        Retrieve one page of a user's movies using keyset pagination.
+        Pages are ordered by `sort` (movie_id, title, year or rating) with
+        movie_id as tie-breaker and movies without a year or rating last, so
+        each page is an index range scan no matter how deep it is. Returns
+        (movies, next_cursor); next_cursor is None on the last page.
+        """
+        statements = self._page_statements(select(Movie).where(Movie.user_id == user_id), sort, descending, after)
+        try:
+            movies = self._page_rows(lambda stmt: self.session.scalars(stmt).all(), statements, limit)
+        except SQLAlchemyError as e:
+            print(f"Error retrieving user movies: {e}")
+            return [], None
+        if len(movies) <= limit:
+            return movies, None
+        movies = movies[:limit]
+        last = movies[-1]
+        return movies, encode_cursor(getattr(last, sort), last.movie_id)
+
+    @replica_read
+    def get_movie_rows_page(self, user_id, fields=MOVIE_FIELDS, sort='movie_id', descending=False,
+                            after=None, limit=50):
+        """
+        Like get_user_movies_page, but selects only `fields` and returns plain
+        dicts instead of Movie objects. Raises ValueError on unknown fields.
+        """
+        fields = parse_fields(fields, MOVIE_FIELDS)
+        sort_column = getattr(Movie, sort) if sort in SORT_FIELDS else Movie.movie_id
+        stmt = select(*columns('movie', fields), sort_column, Movie.movie_id)
+        statements = self._page_statements(stmt.where(Movie.user_id == user_id), sort, descending, after)
+        try:
+            rows = self._page_rows(lambda stmt: self.session.execute(stmt).all(), statements, limit)
+        except SQLAlchemyError as e:
+            print(f"Error retrieving user movies: {e}")
+            return [], None
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][-2], rows[-1][-1])
+        return rows_to_dicts(rows, fields), next_cursor
+
+    @replica_read
+    def get_movie_rows_for_users(self, user_ids, fields=MOVIE_FIELDS, limit=50):
+        """
+        Retrieve the first `limit` movies (by movie_id) of each of several users
+        in one query. Returns {user_id: [movie dict, ...]} with an entry for
+        every requested id, selecting only `fields`.
+        """
+        fields = parse_fields(fields, MOVIE_FIELDS)
+        user_ids = list(dict.fromkeys(int(user_id) for user_id in user_ids))
+        rank = func.row_number().over(partition_by=Movie.user_id, order_by=Movie.movie_id).label('rank')
+        ranked = (
+            select(*columns('movie', fields), Movie.user_id.label('owner_id'), rank)
+            .where(Movie.user_id.in_(user_ids))
+            .subquery()
+        )
+        stmt = (
+            select(*(ranked.c[name] for name in fields), ranked.c.owner_id)
+            .where(ranked.c.rank <= limit)
+            .order_by(ranked.c.owner_id, ranked.c.rank)
+        )
+        movies = {user_id: [] for user_id in user_ids}
+        try:
+            for row in self.session.execute(stmt):
+                movies[row[-1]].append(dict(zip(fields, row)))
+        except SQLAlchemyError as e:
+            print(f"Error retrieving movies for users: {e}")
+        return movies
+
+    @replica_read
+    def get_user_rows(self, fields=USER_FIELDS, user_ids=None):
+        """All users, or the given ones, as plain dicts with only `fields`."""
+        fields = parse_fields(fields, USER_FIELDS)
+        stmt = select(*columns('user', fields)).order_by(User.user_id)
+        if user_ids is not None:
+            stmt = stmt.where(User.user_id.in_([int(user_id) for user_id in user_ids]))
+        try:
+            return rows_to_dicts(self.session.execute(stmt), fields)
+        except SQLAlchemyError as e:
+            print(f"Error retrieving users: {e}")
+            return []
+
+    @replica_read
+    def count_user_movies(self, user_id):
+        """Count a user's movies without loading them."""
+        try:
+            stmt = select(func.count()).select_from(Movie).where(Movie.user_id == user_id)
+            return self.session.scalar(stmt)
+        except SQLAlchemyError as e:
+            print(f"Error counting user movies: {e}")
+            return 0
+
+    def delete_movie(self, movie_id, user_id):
+        """Delete a movie by ID for a specific user, in one DELETE ... RETURNING the values the stats need."""
+        stmt = (
+            delete(Movie)
+            .where(Movie.movie_id == movie_id, Movie.user_id == user_id)
+            .returning(Movie.title, Movie.director, Movie.year, Movie.rating)
+        )
+        try:
+            movie = self.session.execute(stmt).first()
+            if movie is None:
+                self.session.rollback()
+                return
+            apply_movie_stats(self.session, user_id, removed=[movie_values(movie)])
+            apply_rating_changes(self.session, user_id, removed=[rating_values(movie)])
+            log_movie_changes(self.session, removed=[rating_values(movie)])
+            bump_versions(self.session, USERS_SCOPE, user_scope(user_id))
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            print(f"Error deleting movie: {e}")
+            raise
+
+    def save_omdb_titles(self, payloads):
+        """
+        Store full OMDb payloads in the shared omdb_titles table, keyed by imdbID.
+        Each film is stored once however many users add it; fetching it again
+        refreshes the payload and poster URL; a changed poster URL queues a new
+        thumbnail. Payloads without an imdbID are skipped, and payloads without a
+        Poster field (from the offline title index) never replace a stored one.
+        """
+        now = time.time()
+        rows = {}
+        partial = {}
+        for payload in payloads:
+            imdb_id = payload.get('imdbID') if payload else None
+            if not imdb_id:
+                continue
+            poster = payload.get('Poster')
+            (rows if 'Poster' in payload else partial)[imdb_id] = {
+                'imdb_id': imdb_id,
+                'title': payload.get('Title') or imdb_id,
+                'poster_url': poster if poster and poster != 'N/A' else None,
+                'payload': json.dumps(payload),
+                'fetched_at': now,
+                'thumbnail_status': 'pending' if poster and poster != 'N/A' else 'none'
+            }
+        if not rows and not partial:
+            return
+        stmt = upsert_insert(self.session, OMDbTitle)
+        poster_changed = OMDbTitle.poster_url.is_distinct_from(stmt.excluded.poster_url)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['imdb_id'],
+            set_={
+                **{name: getattr(stmt.excluded, name) for name in ('title', 'poster_url', 'payload', 'fetched_at')},
+                'thumbnail_status': case(
+                    (poster_changed, stmt.excluded.thumbnail_status), else_=OMDbTitle.thumbnail_status
+                )
+            }
+        )
+        try:
+            if rows:
+                self.session.execute(stmt, list(rows.values()))
+            if partial:
+                self.session.execute(
+                    upsert_insert(self.session, OMDbTitle).on_conflict_do_nothing(index_elements=['imdb_id']),
+                    list(partial.values())
+                )
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            print("OMDb titles could not be saved.")
+            raise
+
+    @replica_read
+    def get_omdb_title(self, imdb_id):
+        """Retrieve the full stored OMDb payload of a title as a dict, or None."""
+        try:
+            payload = self.session.scalar(select(OMDbTitle.payload).where(OMDbTitle.imdb_id == imdb_id))
+        except SQLAlchemyError as e:
+            print(f"Error retrieving OMDb title: {e}")
+            return None
+        return json.loads(payload) if payload else None
+
+    @replica_read
+    def get_title_popularity(self, after_movie_id=None):
+        """
+        How many users own each title, as (title, count) pairs, and the highest
+        movie ID counted. With `after_movie_id`, only movies added after it are
+        counted; without it, titles in omdb_titles that nobody owns are
+        included with a count of 0.
+        """
+        try:
+            if after_movie_id is not None:
+                # Few movies are new; grouping in SQL would scan the title index instead of the primary key range.
+                rows = self.session.execute(
+                    select(Movie.title, Movie.movie_id).where(Movie.movie_id > after_movie_id)
+                ).all()
+                return list(Counter(title for title, _ in rows).items()), max(
+                    (movie_id for _, movie_id in rows), default=after_movie_id
+                )
+            rows = self.session.execute(
+                select(Movie.title, func.count(), func.max(Movie.movie_id)).group_by(Movie.title)
+            ).all()
+            titles = [(title, count) for title, count, _ in rows]
+            owned = select(Movie.movie_id).where(Movie.imdb_id == OMDbTitle.imdb_id).exists()
+            titles += [(title, 0) for title in self.session.scalars(select(OMDbTitle.title).where(~owned))]
+        except SQLAlchemyError as e:
+            print(f"Error retrieving title popularity: {e}")
+            return [], after_movie_id
+        return titles, max((last for _, _, last in rows), default=None)
+
+    def update_movie(self, movie):
+        """Update the information of an existing movie. The year is stored as add_movie stores it."""
+        movie.year = release_year(movie.year)
+        try:
+            if movie.year is not None and movie.year > datetime.now().year:
+                raise ValueError("Release year cannot be in the future.")
+            if movie.year is not None and movie.year < 1888:
+                raise ValueError("Release year cannot be older than 1888.")
+            if not (0 <= float(movie.rating) <= 10):
+                raise ValueError("Rating must be between 0 and 10.")
+
+            # The stats need the old values, which RETURNING cannot give, so they are read first.
+            old = self.session.execute(
+                select(Movie.user_id, Movie.title, Movie.director, Movie.year, Movie.rating)
+                .where(Movie.movie_id == movie.movie_id)
+            ).first()
+            if old is None:
+                raise ValueError("Movie not found.")
+            self.session.execute(
+                update(Movie)
+                .where(Movie.movie_id == movie.movie_id)
+                .values(title=movie.title, director=movie.director, year=movie.year, rating=movie.rating)
+                .execution_options(synchronize_session=False)
+            )
+            apply_movie_stats(self.session, old.user_id, added=[movie_values(movie)], removed=[movie_values(old)])
+            apply_rating_changes(
+                self.session, old.user_id, added=[rating_values(movie)], removed=[rating_values(old)]
+            )
+            log_movie_changes(self.session, added=[rating_values(movie)], removed=[rating_values(old)])
+            bump_versions(self.session, user_scope(old.user_id))
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            print(f"Error updating movie: {e}")
+            raise
+
+    @replica_read
+    def get_movie_by_id(self, movie_id):
+        """Retrieve a single movie by its ID."""
+        try:
+            stmt = select(Movie).where(Movie.movie_id == movie_id)
+            return self.session.scalars(stmt).first()
+        except SQLAlchemyError as e:
+            print(f"Error retrieving movie by ID: {e}")
+            return None
+
+    @replica_read
+    def get_collection_version(self, user_id=None):
+        """
+        Return (version, updated_at) of the user list, or of one user's movies
+        when user_id is given. Every write that changes what those pages show
+        bumps the version. Returns None if it cannot be read.
+        """
+        try:
+            scope = USERS_SCOPE if user_id is None else user_scope(user_id)
+            return get_version(self.session, scope)
+        except ValueError:
+            return None
+        except SQLAlchemyError as e:
+            print(f"Error retrieving collection version: {e}")
+            return None
+
+    @replica_read
+    def get_all_user_stats(self):
+        """Retrieve collection statistics for every user from the stats tables."""
+        try:
+            return all_user_stats(self.session)
+        except SQLAlchemyError as e:
+            print(f"Error retrieving user stats: {e}")
+            return []
+
+    def verify_user_stats(self):
+        """Compare the stats tables with a full recount. Returns the differences."""
+        return verify_user_stats(self.session)
+
+    def rebuild_user_stats(self):
+        """Recompute the stats tables from the movies table."""
+        try:
+            rebuild_user_stats(self.session)
+            bump_all_versions(self.session)
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            print(f"Error rebuilding user stats: {e}")
+            raise
+
+    def ensure_user_stats(self):
+        """Fill the stats tables once for a database created before they existed."""
+        try:
+            has_stats = self.session.scalar(select(UserStats.user_id).limit(1)) is not None
+            has_movies = self.session.scalar(select(Movie.movie_id).limit(1)) is not None
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Error checking user stats: {e}")
+            return
+        if has_movies and not has_stats:
+            self.rebuild_user_stats()
+
+    @replica_read
+    def get_recommendations(self, user_id, limit=20):
+        """Recommend titles a user does not own from the precomputed neighbour lists."""
+        try:
+            return recommendations_for_user(self.session, user_id, limit=limit)
+        except SQLAlchemyError as e:
+            print(f"Error retrieving recommendations: {e}")
+            return []
+
+    def refresh_recommendations(self, batch_size=100):
+        """Recompute the neighbours of one batch of stale titles. Returns how many were refreshed."""
+        try:
+            refreshed = refresh_stale_titles(self.session, batch_size=batch_size)
+            self.session.commit()
+            return refreshed
+        except Exception as e:
+            self.session.rollback()
+            print(f"Error refreshing recommendations: {e}")
+            raise
+
+    def sweep_recommendations(self, after=None, batch_size=100):
+        """
+        Recompute the neighbours of the next batch of titles after `after`.
+        Returns the last title refreshed, or None when the sweep is complete.
+        """
+        try:
+            last = sweep_titles(self.session, after=after, batch_size=batch_size)
+            self.session.commit()
+            return last
+        except Exception as e:
+            self.session.rollback()
+            print(f"Error sweeping recommendations: {e}")
+            raise
+
+    def rebuild_recommendations(self, batch_size=200):
+        """
+        Recompute the title norms and the neighbours of every title from the
+        movies table. Neighbours are written one batch of titles per
+        transaction, so readers keep the old lists of titles not reached yet.
+        """
+        try:
+            rebuild_title_norms(self.session)
+            self.session.execute(delete(StaleTitle))
+            self.session.commit()
+            titles = all_titles(self.session)
+            for start in range(0, len(titles), batch_size):
+                compute_neighbours(self.session, titles[start:start + batch_size])
+                self.session.commit()
+            drop_orphan_neighbours(self.session)
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            print(f"Error rebuilding recommendations: {e}")
+            raise
+
+    def ensure_recommendations(self):
+        """Add the title index and fill the neighbour lists once for a database created before them."""
+        try:
+            self.session.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_movies_title_user ON movies (title, user_id, rating)"
+            ))
+            self.session.commit()
+            has_norms = self.session.scalar(select(TitleNorm.title).limit(1)) is not None
+            has_ratings = self.session.scalar(
+                select(Movie.movie_id).where(Movie.rating.is_not(None)).limit(1)
+            ) is not None
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Error checking recommendations: {e}")
+            return
+        if has_ratings and not has_norms:
+            self.rebuild_recommendations()
+
+    @replica_read
+    def get_leaderboards(self, versions=None):
+        """
+        The ranked leaderboard snapshots as {board: {'version', 'computed_at', 'entries'}}.
+        Boards whose version matches the one in `versions` come back with entries None.
+        """
+        try:
+            return leaderboards(self.session, versions)
+        except SQLAlchemyError as e:
+            print(f"Error retrieving leaderboards: {e}")
+            return {}
+
+    def refresh_leaderboards(self, size=LEADERBOARD_SIZE, min_ratings=MIN_RATINGS):
+        """Fold the leaderboard change log into the totals and re-rank. Returns how many changes were folded."""
+        try:
+            folded = refresh_leaderboards(self.session, size=size, min_ratings=min_ratings)
+            self.session.commit()
+            return folded
+        except Exception as e:
+            self.session.rollback()
+            print(f"Error refreshing leaderboards: {e}")
+            raise
+
+    def rebuild_leaderboards(self, size=LEADERBOARD_SIZE, min_ratings=MIN_RATINGS):
+        """Recompute the leaderboard totals and snapshots from the movies table."""
+        try:
+            rebuild_leaderboards(self.session, size=size, min_ratings=min_ratings)
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            print(f"Error rebuilding leaderboards: {e}")
+            raise
+
+    def ensure_leaderboards(self):
+        """Fill the leaderboard totals once for a database created before them."""
+        try:
+            has_totals = self.session.scalar(select(LeaderboardTotal.title).limit(1)) is not None
+            has_movies = self.session.scalar(select(Movie.movie_id).limit(1)) is not None
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Error checking leaderboards: {e}")
+            return
+        if has_movies and not has_totals:
+            self.rebuild_leaderboards()
+
+    def ensure_omdb_titles(self):
+        """Add the movies.imdb_id column to a database created before omdb_titles existed."""
+        try:
+            columns = {column['name'] for column in db.inspect(db.engine).get_columns('movies')}
+            if 'imdb_id' not in columns:
+                self.session.execute(text(
+                    "ALTER TABLE movies ADD COLUMN imdb_id VARCHAR REFERENCES omdb_titles (imdb_id)"
+                ))
+                self.session.execute(text("CREATE INDEX IF NOT EXISTS ix_movies_imdb_id ON movies (imdb_id)"))
+                self.session.commit()
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Error adding the imdb_id column: {e}")
+
+    @replica_read
+    def search_movies_like(self, query, user_id=None, limit=20):
+        """Search titles and directors case-insensitively with LIKE '%...%'. Scans the whole table."""
+        pattern = '%' + re.sub(r'([\\%_])', r'\\\1', (query or '').strip()) + '%'
+        if pattern == '%%':
+            return []
+        stmt = select(Movie).where(or_(
+            Movie.title.ilike(pattern, escape='\\'),
+            Movie.director.ilike(pattern, escape='\\')
+        ))
+        if user_id is not None:
+            stmt = stmt.where(Movie.user_id == user_id)
+        try:
+            movies = self.session.scalars(stmt.limit(limit)).all()
+        except SQLAlchemyError as e:
+            print(f"Error searching movies: {e}")
+            return []
+        return [{
+            'movie_id': movie.movie_id,
+            'user_id': movie.user_id,
+            'title': movie.title,
+            'director': movie.director,
+            'year': movie.year,
+            'rating': movie.rating,
+            'title_highlight': movie.title,
+            'director_highlight': movie.director
+        } for movie in movies]
+
+    @abstractmethod
+    def ensure_cascading_deletes(self):
+        """Make movies.user_id cascade deletes on a database created before it did."""
+        pass
+
+    @abstractmethod
+    def ensure_search_index(self):
+        """Create the index backing search_movies if it is missing."""
+        pass
+
+    @abstractmethod
+    def rebuild_search_index(self):
+        """Recompute the index backing search_movies."""
+        pass
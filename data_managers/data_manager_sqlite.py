@@ -1,121 +1,146 @@
-from datetime import datetime
+import re
 
-from sqlalchemy import select
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import MetaData, text
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.schema import CreateIndex, CreateTable
 
-from data_managers.data_manager_interface import DataManagerInterface
+from data_managers.data_manager_sql import SQLDataManager
 from models.movie import Movie
+from models.movie_search import (
+    HIGHLIGHT_CLOSE, HIGHLIGHT_OPEN, REBUILD_SQL, SEARCH_DDL, SEARCH_TABLE
+)
+from models.omdb_title import OMDbTitle
 from models.user import User
 from utils.extensions import db
+from utils.replicas import replica_read
 
 
-class SQLiteDataManager(DataManagerInterface):
-    """SQLite implementation of the DataManagerInterface."""
+SEARCH_SQL = """
+    SELECT m.movie_id, m.user_id, m.title, m.director, m.year, m.rating,
+           highlight(movies_fts, 0, :open, :close) AS title_highlight,
+           highlight(movies_fts, 1, :open, :close) AS director_highlight
+    FROM movies_fts
+    JOIN movies AS m ON m.movie_id = movies_fts.rowid
+    WHERE movies_fts MATCH :query {user_filter}
+    ORDER BY bm25(movies_fts, 10.0, 1.0)
+    LIMIT :limit
+"""
 
-    def add_user(self, name):
-        """Add a new user to the database."""
-        try:
-            new_user = User(name=name)
-            db.session.add(new_user)
-            db.session.commit()
-        except SQLAlchemyError:
-            db.session.rollback()
-            print(f"Username '{name}' already exists.")
-            raise
 
-    def delete_user(self, user_id):
-        """Delete a user by ID from the database."""
-        try:
-            user = db.session.get(User, user_id)
-            if user:
-                db.session.delete(user)
-                db.session.commit()
-        except SQLAlchemyError:
-            db.session.rollback()
-            print(f"User with id '{user_id}' does not exist.")
-            raise
+def build_match_query(query):
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    words = re.findall(r'\w+', query or '')
+    return ' '.join(f'"{word}"*' for word in words)
 
-    def get_all_users(self):
-        """Retrieve all users from the database."""
+
+class SQLiteDataManager(SQLDataManager):
+    """
+    SQLite implementation of the DataManagerInterface.
+    Adds FTS5 search and the SQLite ways of upgrading an older schema to
+    SQLDataManager.
+    """
+
+    def ensure_cascading_deletes(self):
+        """
+        Rebuild the movies table of a database created before movies.user_id
+        had ON DELETE CASCADE. SQLite cannot change a foreign key in place, so
+        the rows are copied into a new table with the current schema, in one
+        transaction with foreign key checks off; the search triggers are then
+        put back.
+        """
         try:
-            return db.session.scalars(select(User)).all()
+            keys = self.session.execute(text("PRAGMA foreign_key_list(movies)")).mappings().all()
+            self.session.commit()
         except SQLAlchemyError as e:
-            print(f"Error retrieving users: {e}")
-            return []
+            self.session.rollback()
+            print(f"Error checking the movies foreign keys: {e}")
+            return
+        if not keys or any(key['table'] == 'users' and key['on_delete'] == 'CASCADE' for key in keys):
+            return
 
-    def add_movie(self, user_id, title, director, year, rating):
-        """Add a new movie to a user's collection."""
+        engine = self.session.get_bind()
+        metadata = MetaData()
+        for table in (User.__table__, OMDbTitle.__table__):
+            table.to_metadata(metadata)
+        rebuilt = Movie.__table__.to_metadata(metadata, name='movies_rebuilt')
+        existing = {row[1] for row in self.session.execute(text("PRAGMA table_info(movies)"))}
+        columns = ', '.join(column.name for column in Movie.__table__.columns if column.name in existing)
+        script = [
+            "BEGIN",
+            str(CreateTable(rebuilt).compile(dialect=engine.dialect)),
+            f"INSERT INTO movies_rebuilt ({columns}) SELECT {columns} FROM movies",
+            "DROP TABLE movies",
+            "ALTER TABLE movies_rebuilt RENAME TO movies",
+            *(str(CreateIndex(index).compile(dialect=engine.dialect)) for index in Movie.__table__.indexes),
+            "COMMIT",
+        ]
+        connection = engine.raw_connection()
         try:
-            new_movie = Movie(
-                user_id=user_id,
-                title=title,
-                director=director,
-                year=year,
-                rating=rating
-            )
-            db.session.add(new_movie)
-            db.session.commit()
-        except SQLAlchemyError:
-            db.session.rollback()
-            print(f"Movie '{title}' could not be added to user {user_id}.")
+            cursor = connection.cursor()
+            cursor.execute("PRAGMA foreign_keys=OFF")
+            cursor.executescript(';\n'.join(script) + ';')
+        except Exception as e:
+            connection.rollback()
+            print(f"Error rebuilding the movies table: {e}")
             raise
+        finally:
+            connection.cursor().execute("PRAGMA foreign_keys=ON")
+            connection.close()
+        self.ensure_search_index()
 
-    def get_user_movies(self, user_id):
-        """Retrieve all movies for a specific user."""
-        user = db.session.get(User, user_id)
-        if not user:
-            print(f"User with id '{user_id}' does not exist.")
+    @replica_read
+    def search_movies(self, query, user_id=None, limit=20):
+        """
+        Search titles and directors with the FTS5 index, best matches first.
+        Every word matches as a prefix. Returns dicts with the movie fields plus
+        title_highlight/director_highlight, where matches are wrapped in
+        HIGHLIGHT_OPEN/HIGHLIGHT_CLOSE markers.
+        """
+        match = build_match_query(query)
+        if not match:
             return []
+        sql = SEARCH_SQL.format(user_filter='AND m.user_id = :user_id' if user_id is not None else '')
+        params = {
+            'query': match,
+            'user_id': user_id,
+            'limit': limit,
+            'open': HIGHLIGHT_OPEN,
+            'close': HIGHLIGHT_CLOSE
+        }
         try:
-            stmt = select(Movie).where(Movie.user_id == user_id)
-            return db.session.scalars(stmt).all()
+            return [dict(row) for row in self.session.execute(text(sql), params).mappings()]
+        except OperationalError as e:
+            print(f"Full-text search unavailable, falling back to LIKE: {e}")
+            self.session.rollback()
+            return self.search_movies_like(query, user_id=user_id, limit=limit)
         except SQLAlchemyError as e:
-            print(f"Error retrieving user movies: {e}")
+            print(f"Error searching movies: {e}")
             return []
 
-    def delete_movie(self, movie_id, user_id):
-        """Delete a movie by ID for a specific user."""
+    def ensure_search_index(self):
+        """Create the search index and its triggers if missing, filling it from existing rows."""
+        if db.engine.dialect.name != 'sqlite':
+            return
         try:
-            stmt = select(Movie).where(Movie.movie_id == movie_id, Movie.user_id == user_id)
-            movie = db.session.scalars(stmt).first()
-            if movie:
-                db.session.delete(movie)
-                db.session.commit()
+            exists = self.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = :name"), {'name': SEARCH_TABLE}
+            ).first()
+            for statement in SEARCH_DDL:
+                self.session.execute(text(statement))
+            if not exists:
+                self.session.execute(text(REBUILD_SQL))
+            self.session.commit()
         except SQLAlchemyError as e:
-            db.session.rollback()
-            print(f"Error deleting movie: {e}")
-            raise
+            self.session.rollback()
+            print(f"Error creating search index: {e}")
 
-    def update_movie(self, movie):
-        """Update the information of an existing movie."""
+    def rebuild_search_index(self):
+        """Recompute the search index from the movies table."""
+        self.ensure_search_index()
         try:
-            if int(movie.year) > datetime.now().year:
-                raise ValueError("Release year cannot be in the future.")
-            if int(movie.year) < 1888:
-                raise ValueError("Release year cannot be older than 1888.")
-            if not (0 <= float(movie.rating) <= 10):
-                raise ValueError("Rating must be between 0 and 10.")
-
-            db_movie = db.session.get(Movie, movie.movie_id)
-            if db_movie:
-                db_movie.title = movie.title
-                db_movie.director = movie.director
-                db_movie.year = movie.year
-                db_movie.rating = movie.rating
-                db.session.commit()
-
-            else:
-                raise ValueError("Movie not found.")
-        except (SQLAlchemyError, ValueError) as e:
-            db.session.rollback()
-            print(f"Error updating movie: {e}")
+            self.session.execute(text(REBUILD_SQL))
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            print(f"Error rebuilding search index: {e}")
             raise
-
-    def get_movie_by_id(self, movie_id):
-        """Retrieve a single movie by its ID."""
-        try:
-            stmt = select(Movie).where(Movie.movie_id == movie_id)
-            return db.session.scalars(stmt).first()
-        except SQLAlchemyError as e:
-            print(f"Error retrieving movie by ID: {e}")
-            return None
\ No newline at end of file
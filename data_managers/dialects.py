@@ -0,0 +1,20 @@
+import importlib
+
+# Dialect modules are imported on first use, so a SQLite deployment never loads the PostgreSQL dialect.
+_INSERT_MODULES = {
+    'sqlite': 'sqlalchemy.dialects.sqlite',
+    'postgresql': 'sqlalchemy.dialects.postgresql',
+}
+
+
+def dialect_name(session):
+    """Name of the database dialect the session is bound to."""
+    return session.get_bind().dialect.name
+
+
+def upsert_insert(session, model):
+    """INSERT construct supporting on_conflict_do_update/do_nothing for the session's database."""
+    name = dialect_name(session)
+    if name not in _INSERT_MODULES:
+        raise NotImplementedError(f"Upserts are not supported on {name}.")
+    return importlib.import_module(_INSERT_MODULES[name]).insert(model)
@@ -0,0 +1,178 @@
+import time
+from collections import defaultdict
+
+from sqlalchemy import case, delete, func, insert, literal, select, true, update
+
+from data_managers.dialects import upsert_insert
+from models.leaderboard import LeaderboardChange, LeaderboardEntry, LeaderboardSnapshot, LeaderboardTotal
+from models.movie import Movie
+
+MOST_COLLECTED = 'most_collected'
+TOP_RATED = 'top_rated'
+BOARDS = (MOST_COLLECTED, TOP_RATED)
+LEADERBOARD_SIZE = 100
+MIN_RATINGS = 3
+
+
+def log_movie_changes(session, added=(), removed=()):
+    """
+    Append how added and removed movies change each title's owners and ratings
+    to leaderboard_changes, in the current transaction. `added` and `removed`
+    hold (title, rating) tuples, see rating_values. Titles whose totals do not
+    change, e.g. an update that keeps title and rating, are not logged.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    for movies, sign in ((added, 1), (removed, -1)):
+        for title, rating in movies:
+            delta = deltas[title]
+            delta[0] += sign
+            if rating is not None:
+                delta[1] += sign
+                delta[2] += sign * float(rating)
+    rows = [
+        {'title': title, 'owners': owners, 'rating_count': rating_count, 'rating_sum': rating_sum}
+        for title, (owners, rating_count, rating_sum) in deltas.items() if owners or rating_count or rating_sum
+    ]
+    if rows:
+        session.execute(insert(LeaderboardChange), rows)
+
+
+def log_user_removal(session, user_id):
+    """
+    log_movie_changes for removing every movie of a user, as one INSERT ...
+    SELECT over the user's rows. Call it before those rows are deleted.
+    """
+    session.execute(insert(LeaderboardChange).from_select(
+        ['title', 'owners', 'rating_count', 'rating_sum'],
+        select(
+            Movie.title,
+            literal(-1),
+            case((Movie.rating.is_(None), 0), else_=-1),
+            -func.coalesce(Movie.rating, 0.0)
+        ).where(Movie.user_id == user_id)
+    ))
+
+
+def refresh_leaderboards(session, size=LEADERBOARD_SIZE, min_ratings=MIN_RATINGS):
+    """
+    Fold the change log into leaderboard_totals and, if anything changed,
+    rewrite the ranked snapshots from the totals. Returns the number of
+    changes folded. The snapshot rows are written first, so a refresh holds
+    the write lock (row locks on PostgreSQL) before it reads the log, and two
+    refreshes never fold the same changes twice.
+    """
+    claim_snapshots(session, time.time())
+    last_change = session.scalar(select(func.max(LeaderboardChange.change_id)))
+    if last_change is None:
+        return 0
+
+    totals = (
+        select(
+            LeaderboardChange.title,
+            func.sum(LeaderboardChange.owners),
+            func.sum(LeaderboardChange.rating_count),
+            func.sum(LeaderboardChange.rating_sum)
+        )
+        .where(LeaderboardChange.change_id <= last_change)
+        .group_by(LeaderboardChange.title)
+    )
+    stmt = upsert_insert(session, LeaderboardTotal).from_select(
+        ['title', 'owners', 'rating_count', 'rating_sum'], totals
+    )
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=['title'],
+        set_={
+            'owners': LeaderboardTotal.owners + stmt.excluded.owners,
+            'rating_count': LeaderboardTotal.rating_count + stmt.excluded.rating_count,
+            'rating_sum': LeaderboardTotal.rating_sum + stmt.excluded.rating_sum
+        }
+    ))
+    session.execute(delete(LeaderboardTotal).where(LeaderboardTotal.owners <= 0))
+    folded = session.execute(delete(LeaderboardChange).where(LeaderboardChange.change_id <= last_change)).rowcount
+    write_snapshots(session, size=size, min_ratings=min_ratings)
+    return folded
+
+
+def rebuild_leaderboards(session, size=LEADERBOARD_SIZE, min_ratings=MIN_RATINGS):
+    """Replace the change log, the totals and the snapshots with ones recomputed from the movies table."""
+    claim_snapshots(session, time.time())
+    session.execute(delete(LeaderboardChange))
+    session.execute(delete(LeaderboardTotal))
+    session.execute(insert(LeaderboardTotal).from_select(
+        ['title', 'owners', 'rating_count', 'rating_sum'],
+        select(Movie.title, func.count(), func.count(Movie.rating), func.coalesce(func.sum(Movie.rating), 0.0))
+        .group_by(Movie.title)
+    ))
+    write_snapshots(session, size=size, min_ratings=min_ratings)
+
+
+def claim_snapshots(session, now):
+    """Mark every board as up to date at `now`, creating missing snapshot rows."""
+    stmt = upsert_insert(session, LeaderboardSnapshot)
+    session.execute(
+        stmt.on_conflict_do_update(index_elements=['board'], set_={'computed_at': stmt.excluded.computed_at}),
+        [{'board': board, 'version': 0, 'computed_at': now} for board in BOARDS]
+    )
+
+
+def write_snapshots(session, size=LEADERBOARD_SIZE, min_ratings=MIN_RATINGS):
+    """Rank the `size` titles most users own and the `size` best rated by at least `min_ratings` users."""
+    average = LeaderboardTotal.rating_sum / func.nullif(LeaderboardTotal.rating_count, 0)
+    boards = {
+        MOST_COLLECTED: (
+            true(),
+            (LeaderboardTotal.owners.desc(), LeaderboardTotal.rating_count.desc(), LeaderboardTotal.title)
+        ),
+        TOP_RATED: (
+            LeaderboardTotal.rating_count >= max(min_ratings, 1),
+            (average.desc(), LeaderboardTotal.rating_count.desc(), LeaderboardTotal.title)
+        ),
+    }
+    for board, (condition, order) in boards.items():
+        session.execute(delete(LeaderboardEntry).where(LeaderboardEntry.board == board))
+        session.execute(insert(LeaderboardEntry).from_select(
+            ['board', 'rank', 'title', 'owners', 'rating_count', 'average_rating'],
+            select(
+                literal(board), func.row_number().over(order_by=order), LeaderboardTotal.title,
+                LeaderboardTotal.owners, LeaderboardTotal.rating_count, average
+            ).where(condition).order_by(*order).limit(size)
+        ))
+    session.execute(
+        update(LeaderboardSnapshot)
+        .where(LeaderboardSnapshot.board.in_(boards))
+        .values(version=LeaderboardSnapshot.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def leaderboards(session, versions=None):
+    """
+    Every board as {board: {'version', 'computed_at', 'entries'}}. Entries are
+    only read for boards whose version differs from the one in `versions`
+    ({board: version}); the others come back with entries None.
+    """
+    versions = versions or {}
+    snapshots = {}
+    for board, version, computed_at in session.execute(
+        select(LeaderboardSnapshot.board, LeaderboardSnapshot.version, LeaderboardSnapshot.computed_at)
+    ):
+        snapshots[board] = {'version': version, 'computed_at': computed_at, 'entries': None}
+    changed = [board for board, snapshot in snapshots.items() if versions.get(board) != snapshot['version']]
+    if changed:
+        for board in changed:
+            snapshots[board]['entries'] = []
+        rows = session.execute(
+            select(
+                LeaderboardEntry.board, LeaderboardEntry.rank, LeaderboardEntry.title, LeaderboardEntry.owners,
+                LeaderboardEntry.rating_count, LeaderboardEntry.average_rating
+            ).where(LeaderboardEntry.board.in_(changed)).order_by(LeaderboardEntry.board, LeaderboardEntry.rank)
+        )
+        for board, rank, title, owners, rating_count, average_rating in rows:
+            snapshots[board]['entries'].append({
+                'rank': rank,
+                'title': title,
+                'owners': owners,
+                'ratings': rating_count,
+                'average_rating': None if average_rating is None else round(average_rating, 2)
+            })
+    return snapshots
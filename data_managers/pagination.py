@@ -0,0 +1,47 @@
+import base64
+import json
+
+from sqlalchemy import and_, literal, tuple_
+
+SORT_FIELDS = ('movie_id', 'title', 'year', 'rating')
+
+
+def encode_cursor(sort_value, row_id):
+    """Encode the position after a row as an opaque, URL-safe cursor."""
+    raw = json.dumps([sort_value, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return sort_value, int(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid page cursor.") from e
+
+
+def keyset_filter(column, id_column, sort_value, row_id, descending=False):
+    """
+    Build the WHERE clause selecting the rows with a non-NULL `column` after
+    (sort_value, row_id). Uses a row-value comparison so the database can seek
+    straight into the (user_id, column, id) index instead of scanning the
+    skipped rows. Rows whose `column` is NULL sort after all others in both
+    directions and are paged by null_keyset_filter.
+    """
+    if column is id_column:
+        return id_column < row_id if descending else id_column > row_id
+    if sort_value is None:
+        return column.is_not(None)
+    key = tuple_(column, id_column)
+    position = tuple_(literal(sort_value), literal(row_id))
+    return key < position if descending else key > position
+
+
+def null_keyset_filter(column, id_column, row_id=None, descending=False):
+    """WHERE clause selecting the rows with a NULL `column` after row_id, or all of them when row_id is None."""
+    condition = column.is_(None)
+    if row_id is None:
+        return condition
+    return and_(condition, id_column < row_id if descending else id_column > row_id)
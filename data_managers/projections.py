@@ -0,0 +1,36 @@
+from models.movie import Movie
+from models.user import User
+
+MOVIE_FIELDS = ('movie_id', 'user_id', 'title', 'director', 'year', 'rating')
+USER_FIELDS = ('user_id', 'name', 'movie_count')
+
+_COLUMNS = {
+    'movie': {name: getattr(Movie, name) for name in MOVIE_FIELDS},
+    'user': {name: getattr(User, name) for name in USER_FIELDS},
+}
+
+
+def parse_fields(fields, allowed):
+    """
+    Turn a field selection (comma-separated string or sequence) into a tuple.
+    None or empty selects every allowed field. Raises ValueError on unknown names.
+    """
+    if not fields:
+        return tuple(allowed)
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    selected = tuple(dict.fromkeys(name.strip() for name in fields if name.strip()))
+    unknown = [name for name in selected if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}.")
+    return selected or tuple(allowed)
+
+
+def columns(kind, fields):
+    """Column expressions for the selected fields of 'movie' or 'user'."""
+    return [_COLUMNS[kind][name] for name in fields]
+
+
+def rows_to_dicts(rows, fields):
+    """Plain dicts from result rows whose first columns are `fields`."""
+    return [dict(zip(fields, row)) for row in rows]
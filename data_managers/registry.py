@@ -0,0 +1,31 @@
+import importlib
+
+BACKENDS = {
+    'sqlite': 'data_managers.data_manager_sqlite:SQLiteDataManager',
+    'postgresql': 'data_managers.data_manager_postgres:PostgresDataManager',
+}
+
+SCHEME_ALIASES = {'postgres': 'postgresql'}
+
+
+def register_backend(name, target):
+    """Register a data manager class, or its 'module:Class' path, under a backend name."""
+    BACKENDS[name] = target
+
+
+def backend_for_uri(uri):
+    """Backend name for a database URI, e.g. 'postgresql' for postgresql+psycopg://..."""
+    scheme = uri.split(':', 1)[0].split('+', 1)[0]
+    return SCHEME_ALIASES.get(scheme, scheme)
+
+
+def get_backend(name):
+    """Return the data manager class registered under `name`, importing it on first use."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown data backend '{name}'. Known backends: {', '.join(sorted(BACKENDS))}.")
+    target = BACKENDS[name]
+    if isinstance(target, str):
+        module_name, class_name = target.split(':')
+        target = getattr(importlib.import_module(module_name), class_name)
+        BACKENDS[name] = target
+    return target
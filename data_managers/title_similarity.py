@@ -0,0 +1,220 @@
+import time
+from collections import Counter, defaultdict
+
+from sqlalchemy import bindparam, delete, func, insert, literal, select, text, true, tuple_, union, update
+
+from data_managers.dialects import upsert_insert
+from models.movie import Movie
+from models.title_similarity import StaleTitle, TitleNeighbour, TitleNorm
+
+NEIGHBOURS = 20
+MIN_SUPPORT = 2
+
+# Cosine similarity of a batch of titles against every title rated by one of
+# their raters, as a single set-based statement: the sparse user x title
+# matrix is the movies table, dot products come from a self-join on user_id
+# and the norms from title_norms. Only the best `k` neighbours of each title
+# are kept.
+NEIGHBOURS_SQL = text("""
+    INSERT INTO title_neighbours (title, neighbour, score, support)
+    SELECT title, neighbour, score, support FROM (
+        SELECT pairs.title, pairs.neighbour, pairs.support,
+               pairs.dot / sqrt(a.norm_sq * b.norm_sq) AS score,
+               ROW_NUMBER() OVER (
+                   PARTITION BY pairs.title
+                   ORDER BY pairs.dot / sqrt(a.norm_sq * b.norm_sq) DESC, pairs.neighbour
+               ) AS neighbour_rank
+        FROM (
+            SELECT seed.title, other.title AS neighbour,
+                   SUM(seed.rating * other.rating) AS dot, COUNT(*) AS support
+            FROM movies AS seed
+            JOIN movies AS other ON other.user_id = seed.user_id AND other.title <> seed.title
+            WHERE seed.title IN :titles AND seed.rating IS NOT NULL AND other.rating IS NOT NULL
+            GROUP BY seed.title, other.title
+            HAVING COUNT(*) >= :min_support
+        ) AS pairs
+        JOIN title_norms AS a ON a.title = pairs.title
+        JOIN title_norms AS b ON b.title = pairs.neighbour
+        WHERE a.norm_sq > 0 AND b.norm_sq > 0
+    ) AS ranked
+    WHERE neighbour_rank <= :k
+""").bindparams(bindparam('titles', expanding=True))
+
+
+def rating_values(movie):
+    """(title, rating) of a Movie or a movie dict."""
+    if isinstance(movie, dict):
+        return movie.get('title'), movie.get('rating')
+    return movie.title, movie.rating
+
+
+def apply_rating_changes(session, user_id, added=(), removed=()):
+    """
+    Fold a user's added and removed ratings into title_norms and mark the titles
+    whose neighbours changed as stale, in the current transaction.
+    `added` and `removed` hold (title, rating) tuples, see rating_values. A new
+    rating of title t changes its dot product with every title the user rated
+    and its norm, which every title listing t as a neighbour depends on, so
+    those titles are marked too. The user's other titles also gain a dot
+    product with t, but marking their whole collection on every write made
+    writes grow with it; sweep_titles catches up with them instead.
+    """
+    counts = Counter()
+    squares = Counter()
+    for ratings, sign in ((added, 1), (removed, -1)):
+        for title, rating in ratings:
+            if rating is None:
+                continue
+            counts[title] += sign
+            squares[title] += sign * float(rating) ** 2
+    changed = [title for title in counts if counts[title] or squares[title]]
+    if not changed:
+        return
+
+    stmt = upsert_insert(session, TitleNorm)
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=['title'],
+            set_={
+                'rating_count': TitleNorm.rating_count + stmt.excluded.rating_count,
+                'norm_sq': TitleNorm.norm_sq + stmt.excluded.norm_sq
+            }
+        ),
+        [{'title': title, 'rating_count': counts[title], 'norm_sq': squares[title]} for title in changed]
+    )
+    if any(count < 0 for count in counts.values()):
+        session.execute(delete(TitleNorm).where(TitleNorm.title.in_(changed), TitleNorm.rating_count <= 0))
+
+    listing = session.scalars(select(TitleNeighbour.title).where(TitleNeighbour.neighbour.in_(changed)))
+    mark_stale(session, set(changed).union(listing))
+
+
+def remove_user_ratings(session, user_id):
+    """
+    apply_rating_changes for removing every rating of a user, as set-based
+    statements over the user's rows in the movies table, so a large collection
+    is never loaded. Call it before those rows are deleted.
+    """
+    rated = (
+        select(Movie.title, Movie.rating)
+        .where(Movie.user_id == user_id, Movie.rating.is_not(None))
+        .subquery()
+    )
+    titles = select(rated.c.title)
+    listing = select(TitleNeighbour.title).where(TitleNeighbour.neighbour.in_(titles))
+    stale = union(titles, listing).subquery()
+    # SQLite needs a WHERE in INSERT ... SELECT ... ON CONFLICT to parse it.
+    stmt = upsert_insert(session, StaleTitle).from_select(
+        ['title', 'marked_at'], select(stale.c.title, literal(time.time())).where(true())
+    )
+    session.execute(stmt.on_conflict_do_update(index_elements=['title'], set_={'marked_at': stmt.excluded.marked_at}))
+
+    session.execute(
+        update(TitleNorm)
+        .where(TitleNorm.title == rated.c.title)
+        .values(rating_count=TitleNorm.rating_count - 1, norm_sq=TitleNorm.norm_sq - rated.c.rating * rated.c.rating)
+        .execution_options(synchronize_session=False)
+    )
+    session.execute(delete(TitleNorm).where(TitleNorm.title.in_(titles), TitleNorm.rating_count <= 0))
+
+
+def mark_stale(session, titles):
+    """Queue titles for a neighbour refresh; a title marked again keeps one entry."""
+    if not titles:
+        return
+    now = time.time()
+    stmt = upsert_insert(session, StaleTitle)
+    session.execute(
+        stmt.on_conflict_do_update(index_elements=['title'], set_={'marked_at': stmt.excluded.marked_at}),
+        [{'title': title, 'marked_at': now} for title in titles]
+    )
+
+
+def compute_neighbours(session, titles, k=NEIGHBOURS, min_support=MIN_SUPPORT):
+    """Replace the stored neighbours of `titles` with freshly computed ones."""
+    session.execute(delete(TitleNeighbour).where(TitleNeighbour.title.in_(titles)))
+    session.execute(NEIGHBOURS_SQL, {'titles': list(titles), 'k': k, 'min_support': min_support})
+
+
+def refresh_stale_titles(session, batch_size=100, k=NEIGHBOURS):
+    """
+    Recompute the neighbours of up to `batch_size` stale titles, oldest first.
+    A title marked again while it was being refreshed stays queued. Returns the
+    number of titles refreshed.
+    """
+    stale = session.execute(
+        select(StaleTitle.title, StaleTitle.marked_at).order_by(StaleTitle.marked_at).limit(batch_size)
+    ).all()
+    if not stale:
+        return 0
+    compute_neighbours(session, [title for title, _ in stale], k=k)
+    session.execute(delete(StaleTitle).where(
+        tuple_(StaleTitle.title, StaleTitle.marked_at).in_([tuple(row) for row in stale])
+    ))
+    return len(stale)
+
+
+def sweep_titles(session, after=None, batch_size=100, k=NEIGHBOURS):
+    """
+    Recompute the neighbours of the `batch_size` titles following `after` in
+    title order, so repeated calls walk every rated title. Returns the last
+    title refreshed, or None once the walk has passed the last title.
+    """
+    stmt = select(TitleNorm.title).order_by(TitleNorm.title).limit(batch_size)
+    if after is not None:
+        stmt = stmt.where(TitleNorm.title > after)
+    titles = session.scalars(stmt).all()
+    if not titles:
+        return None
+    compute_neighbours(session, titles, k=k)
+    return titles[-1]
+
+
+def rebuild_title_norms(session):
+    """Replace title_norms with totals recomputed from the movies table."""
+    session.execute(delete(TitleNorm))
+    session.execute(insert(TitleNorm).from_select(
+        ['title', 'rating_count', 'norm_sq'],
+        select(Movie.title, func.count(), func.sum(Movie.rating * Movie.rating))
+        .where(Movie.rating.is_not(None))
+        .group_by(Movie.title)
+    ))
+
+
+def all_titles(session):
+    """Every title with at least one rating, in order."""
+    return session.scalars(select(TitleNorm.title).order_by(TitleNorm.title)).all()
+
+
+def drop_orphan_neighbours(session):
+    """Remove neighbour lists of titles nobody rates any more."""
+    session.execute(delete(TitleNeighbour).where(TitleNeighbour.title.not_in(select(TitleNorm.title))))
+
+
+def recommendations_for_user(session, user_id, limit=20):
+    """
+    Titles a user does not own, ranked by the similarity of each to the titles
+    the user rated, weighted by those ratings. Reads the user's ratings and the
+    precomputed neighbour lists only.
+    Returns dicts with title, score and because (the owned title that
+    contributed most).
+    """
+    owned = dict(session.execute(select(Movie.title, Movie.rating).where(Movie.user_id == user_id)).all())
+    if not owned:
+        return []
+    rows = session.execute(
+        select(TitleNeighbour.title, TitleNeighbour.neighbour, TitleNeighbour.score)
+        .join(Movie, Movie.title == TitleNeighbour.title)
+        .where(Movie.user_id == user_id, Movie.rating.is_not(None))
+    )
+    scores = defaultdict(float)
+    best = {}
+    for seed, neighbour, score in rows:
+        if neighbour in owned:
+            continue
+        contribution = score * owned[seed]
+        scores[neighbour] += contribution
+        if contribution > best.get(neighbour, (None, -1.0))[1]:
+            best[neighbour] = (seed, contribution)
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    return [{'title': title, 'score': score, 'because': best[title][0]} for title, score in ranked]
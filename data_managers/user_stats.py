@@ -0,0 +1,214 @@
+import math
+import re
+from collections import Counter
+
+from sqlalchemy import cast, delete, func, insert, Integer, select, String, text
+
+from data_managers.dialects import dialect_name, upsert_insert
+from models.movie import Movie
+from models.user import User
+from models.user_stats import UserDecadeStats, UserDirectorStats, UserStats
+
+TOP_DIRECTORS = 3
+YEAR_PREFIX = re.compile(r'[0-9]{4}')
+
+TOP_DIRECTORS_SQL = {
+    'sqlite': """
+        SELECT d.user_id, d.director, d.movie_count
+        FROM users AS u
+        JOIN user_director_stats AS d ON d.rowid IN (
+            SELECT rowid FROM user_director_stats
+            WHERE user_id = u.user_id
+            ORDER BY movie_count DESC, director
+            LIMIT :limit
+        )
+    """,
+    'postgresql': """
+        SELECT u.user_id, d.director, d.movie_count
+        FROM users AS u
+        CROSS JOIN LATERAL (
+            SELECT director, movie_count FROM user_director_stats
+            WHERE user_id = u.user_id
+            ORDER BY movie_count DESC, director
+            LIMIT :limit
+        ) AS d
+    """,
+}
+
+
+def decade_of(year):
+    """
+    First year of the decade a release year falls in, from its leading four
+    digits, so OMDb series years like '2008–2013' count as 2000. None when the
+    year does not start with four digits ('', 'N/A').
+    """
+    match = YEAR_PREFIX.match(str(year))
+    return int(match.group()) // 10 * 10 if match else None
+
+
+def _upsert(session, model, keys, rows):
+    """Add each row's counts to the existing row with the same keys, creating it if missing."""
+    if not rows:
+        return
+    stmt = upsert_insert(session, model)
+    counts = [name for name in rows[0] if name not in keys]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={name: getattr(model, name) + getattr(stmt.excluded, name) for name in counts}
+    )
+    session.execute(stmt, rows)
+
+
+def apply_movie_stats(session, user_id, added=(), removed=()):
+    """
+    Fold added and removed movies into a user's stats in the current transaction.
+    `added` and `removed` hold (year, director, rating) tuples, see movie_values.
+    Each table gets one upsert adding deltas, so concurrent writers add to the
+    counts instead of overwriting each other.
+    """
+    totals = Counter()
+    decades = Counter()
+    directors = Counter()
+    for movies, sign in ((added, 1), (removed, -1)):
+        for year, director, rating in movies:
+            totals['movie_count'] += sign
+            if rating is not None:
+                totals['rating_sum'] += sign * float(rating)
+                totals['rating_count'] += sign
+            decade = decade_of(year) if year is not None else None
+            if decade is not None:
+                decades[decade] += sign
+            if director:
+                directors[director] += sign
+
+    if any(totals.values()):
+        _upsert(session, UserStats, ['user_id'], [{
+            'user_id': user_id,
+            'movie_count': totals['movie_count'],
+            'rating_sum': totals['rating_sum'],
+            'rating_count': totals['rating_count']
+        }])
+    _upsert(session, UserDecadeStats, ['user_id', 'decade'], [
+        {'user_id': user_id, 'decade': decade, 'movie_count': count}
+        for decade, count in decades.items() if count
+    ])
+    _upsert(session, UserDirectorStats, ['user_id', 'director'], [
+        {'user_id': user_id, 'director': director, 'movie_count': count}
+        for director, count in directors.items() if count
+    ])
+    if any(count < 0 for count in decades.values()):
+        session.execute(delete(UserDecadeStats).where(
+            UserDecadeStats.user_id == user_id, UserDecadeStats.movie_count <= 0
+        ))
+    if any(count < 0 for count in directors.values()):
+        session.execute(delete(UserDirectorStats).where(
+            UserDirectorStats.user_id == user_id, UserDirectorStats.movie_count <= 0
+        ))
+
+
+def movie_values(movie):
+    """(year, director, rating) of a Movie or a movie dict."""
+    if isinstance(movie, dict):
+        return movie.get('year'), movie.get('director'), movie.get('rating')
+    return movie.year, movie.director, movie.rating
+
+
+def _year_prefix(session):
+    """
+    The leading four characters of movies.year as text, and a condition that
+    they are all digits: decade_of in SQL.
+    """
+    prefix = func.substr(cast(Movie.year, String), 1, 4)
+    if dialect_name(session) == 'postgresql':
+        return prefix, prefix.op('~')('^[0-9]{4}$')
+    return prefix, prefix.op('GLOB')('[0-9][0-9][0-9][0-9]')
+
+
+def _expected_queries(session):
+    """SELECTs computing every stats table from scratch, matching each table's columns."""
+    prefix, has_year = _year_prefix(session)
+    decade = cast(prefix, Integer) // 10 * 10
+    return {
+        UserStats: select(
+            Movie.user_id, func.count(), func.coalesce(func.sum(Movie.rating), 0.0), func.count(Movie.rating)
+        ).group_by(Movie.user_id),
+        UserDecadeStats: select(Movie.user_id, decade, func.count())
+        .where(has_year).group_by(Movie.user_id, decade),
+        UserDirectorStats: select(Movie.user_id, Movie.director, func.count())
+        .where(Movie.director.is_not(None), Movie.director != '').group_by(Movie.user_id, Movie.director),
+    }
+
+
+def _columns(model):
+    return [column.name for column in model.__table__.columns]
+
+
+def verify_user_stats(session):
+    """
+    Recompute every user's stats from the movies table and compare.
+    Returns a list of (table, key, expected, actual) tuples, empty when the
+    stats are exact.
+    """
+    drift = []
+    for model, query in _expected_queries(session).items():
+        columns = _columns(model)
+        key_count = len(model.__table__.primary_key.columns)
+        expected = {tuple(row[:key_count]): tuple(row[key_count:]) for row in session.execute(query)}
+        stored = select(*(getattr(model, name) for name in columns))
+        actual = {tuple(row[:key_count]): tuple(row[key_count:]) for row in session.execute(stored)}
+        for key in sorted(set(expected) | set(actual), key=repr):
+            want = expected.get(key)
+            have = actual.get(key)
+            if want is None and have is not None and not any(have):
+                continue
+            if want is None or have is None or not all(
+                math.isclose(a, b, abs_tol=1e-6) for a, b in zip(want, have)
+            ):
+                drift.append((model.__tablename__, key, want, have))
+    return drift
+
+
+def rebuild_user_stats(session):
+    """Replace every stats table with totals recomputed from the movies table."""
+    for model, query in _expected_queries(session).items():
+        session.execute(delete(model))
+        session.execute(insert(model).from_select(_columns(model), query))
+
+
+def all_user_stats(session, top_directors=TOP_DIRECTORS):
+    """
+    Stats of every user for the stats page, read from the stats tables only.
+    Top directors come from one index probe per user rather than ranking
+    every director row.
+    Returns dicts with user_id, name, movie_count, average_rating,
+    top_directors and decades (lists of (value, count) pairs).
+    """
+    rows = session.execute(
+        select(User.user_id, User.name, UserStats.movie_count, UserStats.rating_sum, UserStats.rating_count)
+        .outerjoin(UserStats, UserStats.user_id == User.user_id)
+        .order_by(User.name)
+    )
+    users = {}
+    for user_id, name, movie_count, rating_sum, rating_count in rows:
+        users[user_id] = {
+            'user_id': user_id,
+            'name': name,
+            'movie_count': movie_count or 0,
+            'average_rating': rating_sum / rating_count if rating_count else None,
+            'top_directors': [],
+            'decades': []
+        }
+
+    for user_id, director, count in session.execute(
+        text(TOP_DIRECTORS_SQL[dialect_name(session)]), {'limit': top_directors}
+    ):
+        if user_id in users:
+            users[user_id]['top_directors'].append((director, count))
+
+    decades = select(UserDecadeStats.user_id, UserDecadeStats.decade, UserDecadeStats.movie_count)
+    for user_id, decade, count in session.execute(decades.order_by(UserDecadeStats.decade)):
+        if user_id in users:
+            users[user_id]['decades'].append((decade, count))
+    for user in users.values():
+        user['top_directors'].sort(key=lambda item: (-item[1], item[0]))
+    return list(users.values())
@@ -0,0 +1,13 @@
+from sqlalchemy.orm import Mapped, mapped_column
+
+from utils.extensions import db
+
+
+class CollectionVersion(db.Model):
+    """Version counter of a cached view ('users' or 'user:<id>'), bumped by every write that changes it."""
+
+    __tablename__ = 'collection_versions'
+
+    scope: Mapped[str] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(nullable=False, default=0)
+    updated_at: Mapped[float] = mapped_column(nullable=False)
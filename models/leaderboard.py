@@ -0,0 +1,54 @@
+from typing import Optional
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from utils.extensions import db
+
+
+class LeaderboardChange(db.Model):
+    """How one write changed a title's owners and ratings, waiting to be folded into leaderboard_totals."""
+
+    __tablename__ = 'leaderboard_changes'
+
+    change_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    title: Mapped[str] = mapped_column(nullable=False)
+    owners: Mapped[int] = mapped_column(nullable=False, default=0)
+    rating_count: Mapped[int] = mapped_column(nullable=False, default=0)
+    rating_sum: Mapped[float] = mapped_column(nullable=False, default=0.0)
+
+
+class LeaderboardTotal(db.Model):
+    """Number of users owning a title and the sum of their ratings, as of the last leaderboard refresh."""
+
+    __tablename__ = 'leaderboard_totals'
+
+    title: Mapped[str] = mapped_column(primary_key=True)
+    owners: Mapped[int] = mapped_column(nullable=False, default=0, index=True)
+    rating_count: Mapped[int] = mapped_column(nullable=False, default=0)
+    rating_sum: Mapped[float] = mapped_column(nullable=False, default=0.0)
+
+
+class LeaderboardEntry(db.Model):
+    """One ranked title of a leaderboard snapshot."""
+
+    __tablename__ = 'leaderboard_entries'
+
+    board: Mapped[str] = mapped_column(primary_key=True)
+    rank: Mapped[int] = mapped_column(primary_key=True)
+    title: Mapped[str] = mapped_column(nullable=False)
+    owners: Mapped[int] = mapped_column(nullable=False)
+    rating_count: Mapped[int] = mapped_column(nullable=False)
+    average_rating: Mapped[Optional[float]] = mapped_column()
+
+
+class LeaderboardSnapshot(db.Model):
+    """
+    State of a leaderboard: `version` grows whenever its entries are rewritten,
+    `computed_at` is when a refresh last brought it up to date.
+    """
+
+    __tablename__ = 'leaderboard_snapshots'
+
+    board: Mapped[str] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(nullable=False, default=0)
+    computed_at: Mapped[float] = mapped_column(nullable=False)
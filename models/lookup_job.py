@@ -0,0 +1,37 @@
+from typing import Optional
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from utils.extensions import db
+
+
+class LookupJob(db.Model):
+    """Database model for a queued OMDb lookup, shared by all users asking for the same title."""
+
+    __tablename__ = 'lookup_jobs'
+
+    job_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    title_key: Mapped[str] = mapped_column(nullable=False, unique=True)
+    title: Mapped[str] = mapped_column(nullable=False)
+    status: Mapped[str] = mapped_column(default='pending', index=True)
+    payload: Mapped[Optional[str]] = mapped_column()
+    error: Mapped[Optional[str]] = mapped_column()
+    updated_at: Mapped[float] = mapped_column()
+    requests = relationship('LookupRequest', back_populates='job')
+
+
+class LookupRequest(db.Model):
+    """Database model for a user's request to add the result of a lookup job."""
+
+    __tablename__ = 'lookup_requests'
+
+    request_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    job_id: Mapped[int] = mapped_column(ForeignKey('lookup_jobs.job_id'), index=True)
+    job = relationship('LookupJob', back_populates='requests')
+    user_id: Mapped[int] = mapped_column(index=True)
+    title: Mapped[str] = mapped_column(nullable=False)
+    status: Mapped[str] = mapped_column(default='pending', index=True)
+    message: Mapped[Optional[str]] = mapped_column()
+    created_at: Mapped[float] = mapped_column()
+    updated_at: Mapped[float] = mapped_column()
@@ -1,6 +1,9 @@
+from typing import Optional
+
 from sqlalchemy import ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from models.omdb_title import OMDbTitle
 from utils.extensions import db
 
 
@@ -8,12 +11,23 @@ class Movie(db.Model):
     """Database model for a movie associated with a user."""
 
     __tablename__ = 'movies'
-    __table_args__ = (db.UniqueConstraint('title', 'user_id'),)
+    __table_args__ = (
+        db.UniqueConstraint('title', 'user_id'),
+        db.Index('ix_movies_user_movie', 'user_id', 'movie_id'),
+        db.Index('ix_movies_user_title', 'user_id', 'title', 'movie_id'),
+        db.Index('ix_movies_user_year', 'user_id', 'year', 'movie_id'),
+        db.Index('ix_movies_user_rating', 'user_id', 'rating', 'movie_id'),
+        db.Index('ix_movies_title_user', 'title', 'user_id', 'rating'),
+        # Never reuse the ID of a deleted movie: readers count movies added after the last ID they saw.
+        {'sqlite_autoincrement': True},
+    )
 
     movie_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey('users.user_id'))
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.user_id', ondelete='CASCADE'))
     user = relationship('User', back_populates='movies')
-    title: Mapped[str] = mapped_column(nullable=False, unique=True)
-    year: Mapped[int] = mapped_column()
+    title: Mapped[str] = mapped_column(nullable=False)
+    year: Mapped[Optional[int]] = mapped_column()
     director: Mapped[str] = mapped_column()
-    rating: Mapped[float] = mapped_column()
+    rating: Mapped[Optional[float]] = mapped_column()
+    imdb_id: Mapped[Optional[str]] = mapped_column(ForeignKey('omdb_titles.imdb_id'), index=True)
+    omdb = relationship(OMDbTitle)
@@ -0,0 +1,36 @@
+from sqlalchemy import DDL, event
+
+from models.movie import Movie
+
+HIGHLIGHT_OPEN = '\x02'
+HIGHLIGHT_CLOSE = '\x03'
+
+SEARCH_TABLE = 'movies_fts'
+
+SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5("
+    "title, director, content='movies', content_rowid='movie_id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_insert AFTER INSERT ON movies BEGIN "
+    "INSERT INTO movies_fts (rowid, title, director) VALUES (new.movie_id, new.title, new.director); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_delete AFTER DELETE ON movies BEGIN "
+    "INSERT INTO movies_fts (movies_fts, rowid, title, director) "
+    "VALUES ('delete', old.movie_id, old.title, old.director); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_update AFTER UPDATE OF title, director ON movies BEGIN "
+    "INSERT INTO movies_fts (movies_fts, rowid, title, director) "
+    "VALUES ('delete', old.movie_id, old.title, old.director); "
+    "INSERT INTO movies_fts (rowid, title, director) VALUES (new.movie_id, new.title, new.director); "
+    "END",
+]
+
+REBUILD_SQL = "INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')"
+
+for statement in SEARCH_DDL:
+    event.listen(Movie.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(
+    Movie.__table__,
+    'before_drop',
+    DDL("DROP TABLE IF EXISTS movies_fts").execute_if(dialect='sqlite')
+)
@@ -0,0 +1,18 @@
+from typing import Optional
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from utils.extensions import db
+
+
+class OMDbTitle(db.Model):
+    """Full OMDb payload of a film, stored once and shared by every user who owns it."""
+
+    __tablename__ = 'omdb_titles'
+
+    imdb_id: Mapped[str] = mapped_column(primary_key=True)
+    title: Mapped[str] = mapped_column(nullable=False)
+    poster_url: Mapped[Optional[str]] = mapped_column()
+    payload: Mapped[str] = mapped_column(nullable=False, deferred=True)
+    fetched_at: Mapped[float] = mapped_column()
+    thumbnail_status: Mapped[str] = mapped_column(default='pending', index=True)
@@ -0,0 +1,33 @@
+from sqlalchemy.orm import Mapped, mapped_column
+
+from utils.extensions import db
+
+
+class TitleNorm(db.Model):
+    """Number of ratings and sum of squared ratings of a title, kept in step with the movies table."""
+
+    __tablename__ = 'title_norms'
+
+    title: Mapped[str] = mapped_column(primary_key=True)
+    rating_count: Mapped[int] = mapped_column(nullable=False, default=0)
+    norm_sq: Mapped[float] = mapped_column(nullable=False, default=0.0)
+
+
+class TitleNeighbour(db.Model):
+    """One of the titles most similar to a title, by cosine similarity of their ratings."""
+
+    __tablename__ = 'title_neighbours'
+
+    title: Mapped[str] = mapped_column(primary_key=True)
+    neighbour: Mapped[str] = mapped_column(primary_key=True)
+    score: Mapped[float] = mapped_column(nullable=False)
+    support: Mapped[int] = mapped_column(nullable=False)
+
+
+class StaleTitle(db.Model):
+    """A title whose neighbours must be recomputed because ratings involving it changed."""
+
+    __tablename__ = 'stale_titles'
+
+    title: Mapped[str] = mapped_column(primary_key=True)
+    marked_at: Mapped[float] = mapped_column(nullable=False)
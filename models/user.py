@@ -1,5 +1,7 @@
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import func, select
+from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
 
+from models.user_stats import UserStats
 from utils.extensions import db
 
 
@@ -13,5 +15,15 @@ class User(db.Model):
     movies = relationship(
         "Movie",
         back_populates="user",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+    movie_count = column_property(
+        func.coalesce(
+            select(UserStats.movie_count)
+            .where(UserStats.user_id == user_id)
+            .correlate_except(UserStats)
+            .scalar_subquery(),
+            0
+        )
     )
@@ -0,0 +1,38 @@
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from utils.extensions import db
+
+
+class UserStats(db.Model):
+    """Running totals of a user's collection, kept in step with the movies table."""
+
+    __tablename__ = 'user_stats'
+
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.user_id', ondelete='CASCADE'), primary_key=True)
+    movie_count: Mapped[int] = mapped_column(nullable=False, default=0)
+    rating_sum: Mapped[float] = mapped_column(nullable=False, default=0.0)
+    rating_count: Mapped[int] = mapped_column(nullable=False, default=0)
+
+
+class UserDecadeStats(db.Model):
+    """Number of a user's movies released in each decade."""
+
+    __tablename__ = 'user_decade_stats'
+
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.user_id', ondelete='CASCADE'), primary_key=True)
+    decade: Mapped[int] = mapped_column(primary_key=True)
+    movie_count: Mapped[int] = mapped_column(nullable=False, default=0)
+
+
+class UserDirectorStats(db.Model):
+    """Number of a user's movies by each director."""
+
+    __tablename__ = 'user_director_stats'
+    __table_args__ = (
+        db.Index('ix_user_director_stats_rank', 'user_id', db.text('movie_count DESC'), 'director'),
+    )
+
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.user_id', ondelete='CASCADE'), primary_key=True)
+    director: Mapped[str] = mapped_column(primary_key=True)
+    movie_count: Mapped[int] = mapped_column(nullable=False, default=0)
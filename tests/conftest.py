@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+# Test apps serve requests through the test client; keep them from starting worker threads.
+os.environ.setdefault('BACKGROUND_WORKERS', '0')
+# Lookups must reach the fake OMDb, not a title index built in instance/.
+os.environ.setdefault('TITLE_INDEX_PATH', '')
+
+from tests.fake_omdb import FakeOMDbServer
+from utils import omdb_api
+from utils.omdb_client import OMDbClient
+
+
+def pytest_addoption(parser):
+    parser.addoption('--run-slow', action='store_true', help="also run tests marked slow")
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', "slow: takes minutes; only runs with --run-slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--run-slow'):
+        return
+    skip_slow = pytest.mark.skip(reason="slow test, run with --run-slow")
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip_slow)
+
+
+@pytest.fixture
+def fake_omdb(monkeypatch):
+    """Run a fake OMDb server and point the OMDb helper at it."""
+    server = FakeOMDbServer().start()
+    client = OMDbClient(base_url=server.url, sleep=lambda seconds: None)
+    monkeypatch.setattr(omdb_api, 'omdb_client', client)
+    yield server
+    client.close()
+    server.stop()
@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_MOVIES = {
+    'titanic': {'Title': 'Titanic', 'Year': '1997', 'Director': 'James Cameron', 'imdbRating': '7.9'},
+    'inception': {'Title': 'Inception', 'Year': '2010', 'Director': 'Christopher Nolan', 'imdbRating': '8.8'},
+    'heat': {'Title': 'Heat', 'Year': '1995', 'Director': 'Michael Mann', 'imdbRating': '8.3'},
+}
+
+
+class FakeOMDbServer:
+    """
+    Local stand-in for the OMDb API that counts the requests it receives.
+    Like the real API it can enforce limits: more than `rate_limit` requests
+    in any second, or more than `daily_limit` in total, are refused with 401
+    'Request limit reached!' and counted in `rejected`.
+    """
+
+    def __init__(self, movies=None, delay=0, rate_limit=None, daily_limit=None):
+        self.movies = dict(DEFAULT_MOVIES if movies is None else movies)
+        self.delay = delay
+        self.rate_limit = rate_limit
+        self.daily_limit = daily_limit
+        self.requests = []
+        self.status_queue = []
+        self.rejected = 0
+        self._served = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True
+        )
+
+    @property
+    def url(self):
+        """Base URL to use in place of the OMDb endpoint."""
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/"
+
+    @property
+    def request_count(self):
+        return len(self.requests)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def over_limit(self):
+        """Count a request against the limits; True if it must be refused."""
+        now = time.monotonic()
+        with self._lock:
+            in_last_second = sum(1 for at in self._served if at > now - 1)
+            over_rate = self.rate_limit is not None and in_last_second >= self.rate_limit
+            over_day = self.daily_limit is not None and len(self._served) >= self.daily_limit
+            if over_rate or over_day:
+                self.rejected += 1
+                return True
+            self._served.append(now)
+            return False
+
+    def respond(self, params):
+        """Return (status, body) for a request with the given query parameters."""
+        if self.status_queue:
+            return self.status_queue.pop(0), {'Response': 'False', 'Error': 'Upstream error'}
+        title = params.get('t', [''])[0]
+        movie = self.movies.get(' '.join(title.split()).lower())
+        if movie is None:
+            return 200, {'Response': 'False', 'Error': 'Movie not found!'}
+        return 200, dict(movie, Response='True')
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = parse_qs(urlparse(self.path).query)
+                fake.requests.append(params)
+                if fake.delay:
+                    time.sleep(fake.delay)
+                if fake.over_limit():
+                    status, body = 401, {'Response': 'False', 'Error': 'Request limit reached!'}
+                else:
+                    status, body = fake.respond(params)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def generate_movies(count):
+    """Build a catalogue of `count` distinct fake movies keyed by normalized title."""
+    movies = {}
+    for i in range(count):
+        title = f"Movie {i:06d}"
+        movies[title.lower()] = {
+            'Title': title,
+            'Year': str(1950 + i % 75),
+            'Director': f"Director {i % 997}",
+            'imdbRating': str(round(1 + (i % 90) / 10, 1)),
+        }
+    return movies
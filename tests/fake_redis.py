@@ -0,0 +1,41 @@
+import time
+
+
+class FakeRedis:
+    """In-memory stand-in for the subset of the redis-py client used by the cache."""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    def _alive(self, key):
+        expires_at = self.expiry.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self.data.pop(key, None)
+            self.expiry.pop(key, None)
+        return key in self.data
+
+    def get(self, key):
+        return self.data[key] if self._alive(key) else None
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        if ex is None:
+            self.expiry.pop(key, None)
+        else:
+            self.expiry[key] = time.time() + ex
+        return True
+
+    def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                del self.data[key]
+                self.expiry.pop(key, None)
+                removed += 1
+        return removed
+
+    def incr(self, key):
+        value = int(self.get(key) or 0) + 1
+        self.data[key] = str(value).encode()
+        return value
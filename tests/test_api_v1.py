@@ -0,0 +1,104 @@
+import os
+
+import pytest
+
+from api import v1
+from app import create_app
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from utils.extensions import db
+
+TEST_DB = os.path.abspath("tests/test.db")
+TEST_DB_URI = f'sqlite:///{TEST_DB}'
+
+
+@pytest.fixture
+def client():
+    """Provide an API client for two users: Alice with three movies and Bob with one."""
+    app = create_app(TEST_DB_URI)
+    data_manager = SQLiteDataManager()
+    app.extensions['data_manager'] = data_manager
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        data_manager.add_user('Alice')
+        data_manager.add_user('Bob')
+        data_manager.add_movie(1, 'Heat', 'Michael Mann', 1995, 8.3)
+        data_manager.add_movie(1, 'Titanic', 'James Cameron', 1997, 7.9)
+        data_manager.add_movie(1, 'Alien', 'Ridley Scott', 1979, 8.5)
+        data_manager.add_movie(2, 'Memento', 'Christopher Nolan', 2000, 8.4)
+        yield app.test_client()
+
+
+def test_list_users_with_field_selection(client):
+    """Test listing users and selecting fields."""
+    assert client.get('/api/v1/users').json['users'] == [
+        {'user_id': 1, 'name': 'Alice', 'movie_count': 3},
+        {'user_id': 2, 'name': 'Bob', 'movie_count': 1},
+    ]
+    assert client.get('/api/v1/users?fields=name').json['users'] == [{'name': 'Alice'}, {'name': 'Bob'}]
+
+
+def test_get_user_and_missing_user(client):
+    """Test fetching one user and a 404 for an unknown one."""
+    assert client.get('/api/v1/users/2').json == {'user_id': 2, 'name': 'Bob', 'movie_count': 1}
+    response = client.get('/api/v1/users/99')
+    assert response.status_code == 404
+    assert response.json == {'error': 'Not found.'}
+
+
+def test_user_movies_pages_with_cursor(client):
+    """Test walking a user's movies sorted by title two at a time."""
+    first = client.get('/api/v1/users/1/movies?sort=title&limit=2&fields=title').json
+    second = client.get(f"/api/v1/users/1/movies?sort=title&limit=2&fields=title&after={first['next_cursor']}").json
+
+    assert first['movies'] == [{'title': 'Alien'}, {'title': 'Heat'}]
+    assert second == {'movies': [{'title': 'Titanic'}], 'next_cursor': None}
+
+
+def test_batch_movies_for_many_users(client):
+    """Test fetching movies for several users, including one without movies."""
+    response = client.get('/api/v1/movies?user_ids=1,2,3&fields=movie_id,title&limit=2')
+
+    assert response.json['movies'] == {
+        '1': [{'movie_id': 1, 'title': 'Heat'}, {'movie_id': 2, 'title': 'Titanic'}],
+        '2': [{'movie_id': 4, 'title': 'Memento'}],
+        '3': [],
+    }
+
+
+def test_get_movie(client):
+    """Test fetching a single movie with selected fields."""
+    assert client.get('/api/v1/movies/3?fields=title,year').json == {'title': 'Alien', 'year': 1979}
+    assert client.get('/api/v1/movies/99').status_code == 404
+
+
+def test_add_movie_looks_title_up(client, monkeypatch):
+    """Test adding a movie by title through OMDb, including unknown and already owned titles."""
+    payload = {'Title': 'Alien', 'Year': '1979', 'Director': 'Ridley Scott', 'imdbRating': '8.5',
+               'imdbID': 'tt0078748', 'Response': 'True'}
+    monkeypatch.setattr(v1, 'fetch_movie_details', lambda title: payload if title == 'alien' else None)
+
+    created = client.post('/api/v1/users/2/movies', json={'title': 'alien'})
+    assert created.status_code == 201
+    assert created.json['title'] == 'Alien'
+    assert client.get('/api/v1/users/2').json['movie_count'] == 2
+    assert client.post('/api/v1/users/2/movies', json={'title': 'alien'}).status_code == 409
+    assert client.post('/api/v1/users/2/movies', json={'title': 'Nothing'}).status_code == 404
+    assert client.post('/api/v1/users/99/movies', json={'title': 'alien'}).status_code == 404
+    assert client.post('/api/v1/users/2/movies', json={}).status_code == 400
+
+
+@pytest.mark.parametrize('path', [
+    '/api/v1/users?fields=password',
+    '/api/v1/users/1/movies?sort=director',
+    '/api/v1/users/1/movies?after=garbage',
+    '/api/v1/movies',
+    '/api/v1/movies?user_ids=1,x',
+    '/api/v1/movies?user_ids=' + ','.join(str(n) for n in range(101)),
+])
+def test_bad_requests_return_400(client, path):
+    """Test that invalid parameters produce a JSON 400."""
+    response = client.get(path)
+
+    assert response.status_code == 400
+    assert 'error' in response.json
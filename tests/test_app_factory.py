@@ -0,0 +1,27 @@
+from sqlalchemy import inspect
+
+from app import create_app
+from utils.extensions import db
+
+
+def table_names(app):
+    with app.app_context():
+        return set(inspect(db.engine).get_table_names())
+
+
+def test_create_app_leaves_schema_alone(tmp_path):
+    """Test that building the app creates no tables and starts no workers."""
+    app = create_app(f"sqlite:///{tmp_path / 'app.db'}")
+
+    assert table_names(app) == set()
+    assert not app.extensions['workers_started']
+
+
+def test_init_db_command_creates_schema(tmp_path):
+    """Test that `flask init-db` creates the tables, and that running it twice is harmless."""
+    app = create_app(f"sqlite:///{tmp_path / 'app.db'}")
+    runner = app.test_cli_runner()
+
+    assert runner.invoke(args=['init-db']).exit_code == 0
+    assert runner.invoke(args=['init-db']).exit_code == 0
+    assert {'users', 'movies', 'omdb_titles'} <= table_names(app)
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+pytest.importorskip('quart')
+pytest.importorskip('greenlet')
+pytest.importorskip('aiosqlite')
+pytest.importorskip('httpx')
+
+from app import create_app
+from async_app import create_async_app
+from data_managers.data_manager_async import async_database_uri, create_async_data_manager
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from tests.fake_omdb import FakeOMDbServer
+from utils import omdb_api
+from utils.extensions import db
+from utils.omdb_cache import OMDbCache
+
+TEST_DB = os.path.abspath("tests/test.db")
+TEST_DB_URI = f'sqlite:///{TEST_DB}'
+
+
+@pytest.fixture(autouse=True)
+def database():
+    """Create a fresh schema with the sync app, holding users Alice, Bob and Carol."""
+    app = create_app(TEST_DB_URI)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        data_manager = SQLiteDataManager()
+        for name in ('Alice', 'Bob', 'Carol'):
+            data_manager.add_user(name)
+        data_manager.add_movie(1, 'Alien', 'Ridley Scott', 1979, 8.5)
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def slow_omdb(tmp_path, monkeypatch):
+    """Fake OMDb answering after 0.3 s, with a fresh cache and no quota."""
+    server = FakeOMDbServer(delay=0.3).start()
+    monkeypatch.setenv('OMDB_API_URL', server.url)
+    monkeypatch.setattr(omdb_api, 'omdb_cache', OMDbCache(path=str(tmp_path / 'omdb_cache.db')))
+    monkeypatch.setattr(omdb_api, 'omdb_quota', None)
+    monkeypatch.setenv('OMDB_RATE_LIMIT', '0')
+    yield server
+    server.stop()
+
+
+def test_async_database_uri():
+    """Test that URIs get their asyncio driver and relative SQLite paths the instance folder."""
+    assert async_database_uri('sqlite:////data/app.db') == 'sqlite+aiosqlite:////data/app.db'
+    assert async_database_uri('sqlite:///app.db', '/srv/instance') == 'sqlite+aiosqlite:////srv/instance/app.db'
+    assert async_database_uri('postgresql://u:p@db/movies') == 'postgresql+psycopg://u:p@db/movies'
+
+
+def test_async_data_manager_shares_sync_logic():
+    """Test that async writes keep the counters and pages the sync data manager maintains."""
+    async def scenario():
+        data_manager = create_async_data_manager(TEST_DB_URI, 'default')
+        try:
+            results = await data_manager.add_movies(2, [
+                {'title': 'Heat', 'director': 'Michael Mann', 'year': 1995, 'rating': 8.3},
+                {'title': 'Memento', 'director': 'Christopher Nolan', 'year': 2000, 'rating': 8.4},
+            ])
+            assert results == {'Heat': None, 'Memento': None}
+            users = await data_manager.get_user_rows(fields=('name', 'movie_count'), user_ids=[2])
+            page, cursor = await data_manager.get_movie_rows_page(2, fields=('title',), sort='title', limit=1)
+            exported = [row async for row in data_manager.iter_user_movies(2)]
+            stats = await data_manager.get_all_user_stats()
+            return users, page, cursor, exported, stats
+        finally:
+            await data_manager.close()
+
+    users, page, cursor, exported, stats = asyncio.run(scenario())
+
+    assert users == [{'name': 'Bob', 'movie_count': 2}]
+    assert page == [{'title': 'Heat'}] and cursor is not None
+    assert [row[1] for row in exported] == ['Heat', 'Memento']
+    bob = next(row for row in stats if row['user_id'] == 2)
+    assert bob['movie_count'] == 2
+    assert bob['average_rating'] == pytest.approx(8.35)
+
+
+def test_concurrent_async_writes_do_not_lock_sqlite():
+    """Test that many concurrent writes on the performance profile all succeed instead of hitting 'database is locked'."""
+    async def scenario():
+        data_manager = create_async_data_manager(TEST_DB_URI, 'performance')
+        try:
+            return await asyncio.gather(*(
+                data_manager.add_movies(user_id, [{'title': f'Movie {user_id}-{i}', 'director': 'D', 'year': 2000,
+                                                   'rating': 7.0} for i in range(5)])
+                for user_id in (1, 2, 3) for _ in range(20)
+            ), return_exceptions=True)
+        finally:
+            await data_manager.close()
+
+    results = asyncio.run(scenario())
+
+    assert not [result for result in results if isinstance(result, BaseException)]
+    assert all(isinstance(result, dict) for result in results)
+
+
+def test_async_api_overlaps_slow_lookups(slow_omdb):
+    """Test that concurrent adds wait on OMDb together instead of one after another."""
+    async def scenario():
+        app = create_async_app(TEST_DB_URI, 'default')
+        async with app.test_app() as test_app:
+            client = test_app.test_client()
+            start = time.perf_counter()
+            responses = await asyncio.gather(*(
+                client.post(f'/api/v1/users/{user_id}/movies', json={'title': 'Heat'}) for user_id in (1, 2, 3)
+            ))
+            elapsed = time.perf_counter() - start
+            again = await client.post('/api/v1/users/1/movies', json={'title': 'Heat'})
+            missing = await client.post('/api/v1/users/1/movies', json={'title': 'No Such Movie'})
+            user = await (await client.get('/api/v1/users/1')).get_json()
+            return [response.status_code for response in responses], elapsed, again, missing, user
+
+    statuses, elapsed, again, missing, user = asyncio.run(scenario())
+
+    assert statuses == [201, 201, 201]
+    assert elapsed < 3 * slow_omdb.delay
+    assert again.status_code == 409
+    assert missing.status_code == 404
+    assert user == {'user_id': 1, 'name': 'Alice', 'movie_count': 2}
@@ -0,0 +1,209 @@
+import os
+import random
+import threading
+
+import pytest
+
+from app import create_app
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from models.movie import Movie
+from utils import autocomplete as autocomplete_module
+from utils import omdb_api
+from utils.autocomplete import PrefixIndex, TitleAutocomplete
+from utils.extensions import db
+from utils.omdb_cache import OMDbCache
+
+TEST_DB = os.path.abspath("tests/test.db")
+TEST_DB_URI = f'sqlite:///{TEST_DB}'
+
+
+def brute_force(titles, prefix, limit):
+    """Reference ranking: most popular first, then alphabetical."""
+    key = OMDbCache.normalize(prefix)
+    matches = [(count, OMDbCache.normalize(title), title) for title, count in titles.items()
+               if OMDbCache.normalize(title).startswith(key)]
+    matches.sort(key=lambda match: (-match[0], match[1]))
+    return [(title, count) for count, _, title in matches[:limit]]
+
+
+def test_prefix_index_ranks_by_popularity():
+    """Test that matches ignore case, merge title variants and rank popular titles first."""
+    index = PrefixIndex([('Heat', 2), ('Heathers', 5), ('HEAT', 1), ('Hear My Song', 3), ('Alien', 9)])
+
+    assert index.search('hea') == [('Heathers', 5), ('Hear My Song', 3), ('Heat', 3)]
+    assert index.search('  HEAT') == [('Heathers', 5), ('Heat', 3)]
+    assert index.search('hea', limit=1) == [('Heathers', 5)]
+    assert index.search('zzz') == []
+    assert index.search('') == []
+
+
+def test_prefix_index_counts_additions():
+    """Test that new owners of known titles and new titles are ranked in, before and after a merge."""
+    index = PrefixIndex([('Heat', 2), ('Heathers', 5)], overflow_limit=2)
+    index.add('heat', 4)
+    index.add('Heatwave', 7)
+    index.add('Heat Lightning', 1)
+
+    assert index.search('heat') == [('Heatwave', 7), ('Heat', 6), ('Heathers', 5), ('Heat Lightning', 1)]
+    assert not index.overflowing()
+
+    index.add('Heatstroke', 6)
+    assert index.overflowing()
+    index.merge_overflow()
+    index.add('heatwave')
+
+    assert not index.overflowing()
+    assert len(index) == 5
+    assert index.search('heat', limit=3) == [('Heatwave', 8), ('Heat', 6), ('Heatstroke', 6)]
+
+
+def test_prefix_index_matches_brute_force():
+    """Test random prefixes against a full scan while popularity changes."""
+    rng = random.Random(7)
+    titles = {''.join(rng.choice('abc') for _ in range(3)) + f" {i}": rng.randint(0, 5) for i in range(300)}
+    index = PrefixIndex(titles.items(), overflow_limit=20)
+    for step in range(200):
+        title = rng.choice(list(titles)) if step % 3 else f"{rng.choice('abc')}b new {step}"
+        titles[title] = titles.get(title, 0) + 1
+        index.add(title)
+        if index.overflowing():
+            index.merge_overflow()
+        prefix = ''.join(rng.choice('abc') for _ in range(rng.randint(1, 3)))
+        assert index.search(prefix, limit=5) == brute_force(titles, prefix, 5)
+
+
+def test_pausing_build_matches_plain_build(monkeypatch):
+    """Test that a background build, sorting short runs and pausing between steps, gives the same index."""
+    monkeypatch.setattr(autocomplete_module, 'SORT_RUN', 7)
+    monkeypatch.setattr(autocomplete_module, 'PAUSE_EVERY', 5)
+    pauses = []
+    rng = random.Random(11)
+    titles = {''.join(rng.choice('abc') for _ in range(3)) + f" {i}": rng.randint(0, 5) for i in range(100)}
+    plain = PrefixIndex(titles.items(), overflow_limit=0)
+    paused = PrefixIndex(titles.items(), overflow_limit=0, pause=lambda: pauses.append(1))
+    for index in (plain, paused):
+        index.add('ab new', 3)
+        index.add('zz new')
+    plain.merge_overflow()
+    paused.merge_overflow(pause=lambda: pauses.append(1))
+
+    assert pauses
+    for prefix in ('a', 'ab', 'abc', 'b', 'zz', ''):
+        assert paused.search(prefix, limit=8) == plain.search(prefix, limit=8)
+
+
+def test_reload_runs_in_background():
+    """Test that a due reload does not block the request that starts it and is swapped in when complete."""
+    release = threading.Event()
+    snapshot = {'titles': [('Heat', 2)], 'last': 1}
+
+    def load(after_movie_id):
+        if after_movie_id is not None:
+            return [], after_movie_id
+        if snapshot['last'] > 1:
+            assert release.wait(5)
+        return snapshot['titles'], snapshot['last']
+
+    autocomplete = TitleAutocomplete(refresh_interval=0, rebuild_interval=0)
+    autocomplete.refresh(load)
+    snapshot.update(titles=[('Heat', 1), ('Heathers', 1)], last=3)
+
+    autocomplete.refresh(load)
+    assert autocomplete.search('hea') == [{'title': 'Heat', 'popularity': 2}]
+
+    release.set()
+    autocomplete.join()
+    assert autocomplete.search('hea') == [
+        {'title': 'Heat', 'popularity': 1}, {'title': 'Heathers', 'popularity': 1},
+    ]
+    assert autocomplete.last_movie_id == 3
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """API client for Alice and Bob, a stored title nobody owns and one cached OMDb lookup."""
+    cache = OMDbCache(path=str(tmp_path / 'omdb_cache.db'))
+    cache.set('Heatwave', {'Title': 'Heatwave', 'imdbID': 'tt0085671'})
+    cache.set_not_found('Heathrow')
+    monkeypatch.setattr(omdb_api, 'omdb_cache', cache)
+    app = create_app(TEST_DB_URI)
+    data_manager = SQLiteDataManager()
+    app.extensions['data_manager'] = data_manager
+    app.extensions['autocomplete'].refresh_interval = 0
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        data_manager.add_user('Alice')
+        data_manager.add_user('Bob')
+        data_manager.save_omdb_titles([{'Title': 'Heathers', 'imdbID': 'tt0097493', 'Poster': 'N/A'}])
+        data_manager.add_movie(1, 'Heat', 'Michael Mann', 1995, 8.3)
+        data_manager.add_movie(2, 'Heat', 'Michael Mann', 1995, 9.0)
+        data_manager.add_movie(1, 'Hearts of Darkness', 'Fax Bahr', 1991, 7.9)
+        yield app.test_client(), data_manager
+
+
+def test_autocomplete_endpoint_ranks_known_titles(client):
+    """Test that suggestions come from movies, stored titles and the OMDb cache, owned titles first."""
+    client, _ = client
+
+    response = client.get('/api/v1/autocomplete?q=HEA')
+
+    assert response.status_code == 200
+    assert response.json['titles'] == [
+        {'title': 'Heat', 'popularity': 2},
+        {'title': 'Hearts of Darkness', 'popularity': 1},
+        {'title': 'Heathers', 'popularity': 0},
+        {'title': 'Heatwave', 'popularity': 0},
+    ]
+    assert client.get('/api/v1/autocomplete?q=hea&limit=1').json['titles'] == [{'title': 'Heat', 'popularity': 2}]
+
+
+def test_autocomplete_counts_movies_added_later(client):
+    """Test that movies added after the index was loaded show up with their new popularity."""
+    client, data_manager = client
+    client.get('/api/v1/autocomplete?q=hea')
+    client.application.extensions['autocomplete'].index.overflow_limit = 0
+
+    data_manager.add_movie(2, 'Heathers', 'Michael Lehmann', 1988, 7.1)
+    data_manager.add_movie(1, 'Heathers', 'Michael Lehmann', 1988, 7.1)
+    data_manager.add_movie(2, 'Heavy Metal', 'Gerald Potterton', 1981, 6.6)
+
+    titles = client.get('/api/v1/autocomplete?q=hea').json['titles']
+
+    assert [(row['title'], row['popularity']) for row in titles] == [
+        ('Heat', 2), ('Heathers', 2), ('Hearts of Darkness', 1), ('Heavy Metal', 1), ('Heatwave', 0),
+    ]
+
+
+def test_autocomplete_reload_drops_deleted_and_renamed_movies(client):
+    """Test that deleted users, deleted movies and renamed titles leave the counts when the index is reloaded."""
+    client, data_manager = client
+    autocomplete = client.application.extensions['autocomplete']
+    client.get('/api/v1/autocomplete?q=hea')
+
+    data_manager.delete_user(2)
+    data_manager.delete_movie(3, 1)
+    data_manager.update_movie(Movie(movie_id=1, title='Heat (1995)', director='Michael Mann', year=1995, rating=8.3))
+    stale = client.get('/api/v1/autocomplete?q=hea').json['titles']
+    autocomplete.rebuild_interval = 0
+    client.get('/api/v1/autocomplete?q=hea')
+    autocomplete.join()
+    autocomplete.rebuild_interval = float('inf')
+    fresh = client.get('/api/v1/autocomplete?q=hea').json['titles']
+
+    assert ('Heat', 2) in [(row['title'], row['popularity']) for row in stale]
+    assert [(row['title'], row['popularity']) for row in fresh] == [
+        ('Heat (1995)', 1), ('Heathers', 0), ('Heatwave', 0),
+    ]
+
+
+def test_deleted_movie_ids_are_not_reused(client):
+    """Test that a movie added after the newest one was deleted is still counted in."""
+    client, data_manager = client
+    client.get('/api/v1/autocomplete?q=hea')
+
+    data_manager.delete_movie(3, 1)
+    data_manager.add_movie(2, 'Heavy Metal', 'Gerald Potterton', 1981, 6.6)
+
+    titles = client.get('/api/v1/autocomplete?q=heav').json['titles']
+    assert titles == [{'title': 'Heavy Metal', 'popularity': 1}]
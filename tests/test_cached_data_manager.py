@@ -0,0 +1,218 @@
+import os
+
+import pytest
+from sqlalchemy import event, select
+
+from app import create_app
+from data_managers.cached_data_manager import CachedDataManager
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from models.movie import Movie
+from models.user import User
+from tests.fake_redis import FakeRedis
+from utils.cache_backends import LRUCacheBackend, RedisCacheBackend
+from utils.extensions import db
+
+TEST_DB = os.path.abspath("tests/test.db")
+TEST_DB_URI = f'sqlite:///{TEST_DB}'
+
+
+@pytest.fixture(autouse=True)
+def test_app_context():
+    """Provide a fresh app context and database for each test."""
+    app = create_app(TEST_DB_URI)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield
+
+
+@pytest.fixture(params=['lru', 'redis'])
+def data_manager(request):
+    """Provide a cached data manager for each backend."""
+    if request.param == 'lru':
+        backend = LRUCacheBackend()
+    else:
+        backend = RedisCacheBackend(FakeRedis())
+    return CachedDataManager(SQLiteDataManager(), backend)
+
+
+@pytest.fixture
+def query_counter():
+    """Count SQL statements sent to the database."""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+
+def _user_id(name):
+    return db.session.scalars(select(User.user_id).where(User.name == name)).first()
+
+
+def test_repeated_reads_hit_cache(data_manager, query_counter):
+    """Test that repeated reads are served without querying the database."""
+    data_manager.add_user('Alice')
+    user_id = _user_id('Alice')
+    data_manager.add_movie(user_id, 'Heat', 'Mann', 1995, 8.3)
+
+    data_manager.get_all_users()
+    data_manager.get_user_movies_page(user_id)
+    data_manager.get_movie_by_id(1)
+    query_counter.clear()
+
+    for _ in range(3):
+        assert [user.name for user in data_manager.get_all_users()] == ['Alice']
+        assert [movie.title for movie in data_manager.get_user_movies_page(user_id)[0]] == ['Heat']
+        assert data_manager.get_movie_by_id(1).title == 'Heat'
+
+    assert query_counter == []
+    assert data_manager.stats()['get_all_users']['hits'] == 3
+
+
+def test_add_user_invalidates_user_list(data_manager):
+    """Test that adding a user is visible in the next user list."""
+    data_manager.add_user('Alice')
+    assert [user.name for user in data_manager.get_all_users()] == ['Alice']
+
+    data_manager.add_user('Bob')
+    assert [user.name for user in data_manager.get_all_users()] == ['Alice', 'Bob']
+
+
+def test_add_movie_invalidates_listing_and_counts(data_manager):
+    """Test that adding a movie refreshes pages, counts and movie counts."""
+    data_manager.add_user('Alice')
+    user_id = _user_id('Alice')
+    assert data_manager.get_user_movies(user_id) == []
+    assert data_manager.count_user_movies(user_id) == 0
+    assert data_manager.get_all_users()[0].movie_count == 0
+
+    data_manager.add_movie(user_id, 'Heat', 'Mann', 1995, 8.3)
+
+    assert [movie.title for movie in data_manager.get_user_movies(user_id)] == ['Heat']
+    assert [movie.title for movie in data_manager.get_user_movies_page(user_id)[0]] == ['Heat']
+    assert data_manager.count_user_movies(user_id) == 1
+    assert data_manager.get_all_users()[0].movie_count == 1
+    assert data_manager.get_user(user_id).movie_count == 1
+
+
+def test_update_movie_invalidates_movie_and_pages(data_manager):
+    """Test that an update is visible through every read path."""
+    data_manager.add_user('Alice')
+    user_id = _user_id('Alice')
+    data_manager.add_movie(user_id, 'Heat', 'Mann', 1995, 8.3)
+    data_manager.get_movie_by_id(1)
+    data_manager.get_user_movies_page(user_id, sort='title')
+
+    data_manager.update_movie(Movie(movie_id=1, title='Heat (1995)', director='Mann', year=1995, rating=9.0))
+
+    assert data_manager.get_movie_by_id(1).rating == 9.0
+    assert data_manager.get_user_movies_page(user_id, sort='title')[0][0].title == 'Heat (1995)'
+
+
+def test_update_movie_leaves_other_users_cached(data_manager, query_counter):
+    """Test that a write only invalidates the affected user's entries."""
+    data_manager.add_user('Alice')
+    data_manager.add_user('Bob')
+    alice, bob = _user_id('Alice'), _user_id('Bob')
+    data_manager.add_movie(alice, 'Heat', 'Mann', 1995, 8.3)
+    data_manager.add_movie(bob, 'Memento', 'Nolan', 2000, 8.4)
+    data_manager.get_user_movies_page(bob)
+    data_manager.get_all_users()
+
+    data_manager.update_movie(Movie(movie_id=1, title='Heat', director='Mann', year=1995, rating=9.0))
+    query_counter.clear()
+
+    data_manager.get_user_movies_page(bob)
+    data_manager.get_all_users()
+    assert query_counter == []
+
+
+def test_delete_movie_invalidates(data_manager):
+    """Test that a deleted movie disappears from every read path."""
+    data_manager.add_user('Alice')
+    user_id = _user_id('Alice')
+    data_manager.add_movie(user_id, 'Heat', 'Mann', 1995, 8.3)
+    assert data_manager.get_movie_by_id(1) is not None
+    assert len(data_manager.get_user_movies(user_id)) == 1
+
+    data_manager.delete_movie(1, user_id)
+
+    assert data_manager.get_movie_by_id(1) is None
+    assert data_manager.get_user_movies(user_id) == []
+    assert data_manager.get_all_users()[0].movie_count == 0
+
+
+def test_delete_user_invalidates(data_manager):
+    """Test that a deleted user and their movies disappear from the cache."""
+    data_manager.add_user('Alice')
+    user_id = _user_id('Alice')
+    data_manager.add_movie(user_id, 'Heat', 'Mann', 1995, 8.3)
+    data_manager.get_all_users()
+    data_manager.get_user(user_id)
+    data_manager.get_movie_by_id(1)
+
+    data_manager.delete_user(user_id)
+
+    assert data_manager.get_all_users() == []
+    assert data_manager.get_user(user_id) is None
+    assert data_manager.get_movie_by_id(1) is None
+
+
+def test_delete_user_does_not_load_collection(data_manager, monkeypatch):
+    """Test that deleting a user retires their cached movies without reading the collection."""
+    data_manager.add_user('Alice')
+    user_id = _user_id('Alice')
+    data_manager.add_movies(user_id, [
+        {'title': f"Movie {i}", 'director': 'Someone', 'year': 2000, 'rating': 5} for i in range(3)
+    ])
+    cached = [data_manager.get_movie_by_id(movie_id) for movie_id in (1, 2, 3)]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the collection was loaded")
+
+    monkeypatch.setattr(data_manager.inner, 'get_user_movies', fail)
+    data_manager.delete_user(user_id)
+
+    assert all(cached) and [data_manager.get_movie_by_id(movie_id) for movie_id in (1, 2, 3)] == [None] * 3
+
+
+def test_writes_through_another_worker_invalidate():
+    """Test that workers sharing a Redis backend do not serve data another worker's write changed."""
+    redis = FakeRedis()
+    data_manager = CachedDataManager(SQLiteDataManager(), RedisCacheBackend(redis))
+    other = CachedDataManager(SQLiteDataManager(), RedisCacheBackend(redis))
+    data_manager.add_user('Alice')
+    user_id = _user_id('Alice')
+    data_manager.add_movie(user_id, 'Heat', 'Mann', 1995, 8.3)
+    assert data_manager.get_user(user_id).movie_count == 1
+    assert data_manager.get_movie_by_id(1).rating == 8.3
+    assert len(data_manager.get_user_movies_page(user_id)[0]) == 1
+
+    other.update_movie(Movie(movie_id=1, title='Heat', director='Mann', year=1995, rating=9.0))
+    other.add_movie(user_id, 'Memento', 'Nolan', 2000, 8.4)
+    other.add_user('Bob')
+
+    assert data_manager.get_movie_by_id(1).rating == 9.0
+    assert data_manager.get_user(user_id).movie_count == 2
+    assert [movie.title for movie in data_manager.get_user_movies_page(user_id)[0]] == ['Heat', 'Memento']
+    assert [user.name for user in data_manager.get_all_users()] == ['Alice', 'Bob']
+
+    other.delete_user(user_id)
+
+    assert data_manager.get_user(user_id) is None
+    assert data_manager.get_movie_by_id(1) is None
+
+
+def test_failed_write_still_invalidates(data_manager):
+    """Test that a write that raises does not leave stale entries behind."""
+    data_manager.add_user('Alice')
+    data_manager.get_all_users()
+
+    with pytest.raises(Exception):
+        data_manager.add_user(None)
+
+    assert [user.name for user in data_manager.get_all_users()] == ['Alice']
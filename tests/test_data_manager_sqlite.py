@@ -1,35 +1,99 @@
+import inspect
 import os
-from sqlalchemy import select
+import sqlite3
+from sqlalchemy import event, func, insert, select, text
 from datetime import datetime
 
 import pytest
 
 from app import create_app
-from data_managers.data_manager_sqlite import SQLiteDataManager
+from data_managers.registry import backend_for_uri, get_backend
 from models.movie import Movie
+from models.movie_search import HIGHLIGHT_CLOSE, HIGHLIGHT_OPEN
+from models.title_similarity import TitleNorm
 from models.user import User
 from utils.extensions import db
 
 TEST_DB = os.path.abspath("tests/test.db")
 TEST_DB_URI = f'sqlite:///{TEST_DB}'
 
+# Every test runs once per backend; PostgreSQL runs only when TEST_POSTGRES_URL is set.
+BACKENDS = {
+    'sqlite': TEST_DB_URI,
+    'postgresql': os.getenv('TEST_POSTGRES_URL'),
+}
 
-@pytest.fixture(scope='function', autouse=True)
-def test_app_context():
+
+@pytest.fixture(scope='function', autouse=True, params=list(BACKENDS))
+def test_app_context(request):
     """Provide a fresh app context and database for each test."""
-    app = create_app(TEST_DB_URI)
+    uri = BACKENDS[request.param]
+    if not uri:
+        pytest.skip(f"no database configured for the {request.param} backend")
+    app = create_app(uri)
 
     with app.app_context():
         db.drop_all()
         db.create_all()
-        yield
+        yield request.param
+
+
+@pytest.fixture
+def data_manager(test_app_context):
+    """Data manager for the backend under test."""
+    return get_backend(test_app_context)()
+
+
+@pytest.fixture
+def query_counter():
+    """Collect the SQL statements sent to the database."""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', count)
 
 
 def test_db_file_created(test_app_context):
     """Check that the test database file is created."""
+    if test_app_context != 'sqlite':
+        pytest.skip("only SQLite stores the database in a file")
     assert os.path.exists(TEST_DB)
 
 
+def test_backend_for_uri():
+    """Check that database URIs map to the registered backends."""
+    assert backend_for_uri('sqlite:///moviwebapp.db') == 'sqlite'
+    assert backend_for_uri('postgresql+psycopg://user@localhost/moviweb') == 'postgresql'
+    assert backend_for_uri('postgres://user@localhost/moviweb') == 'postgresql'
+    with pytest.raises(ValueError):
+        get_backend('oracle')
+
+
+def test_backends_share_write_bookkeeping():
+    """Check that every write the PostgreSQL backend overrides calls the same bookkeeping hooks as the base class."""
+    from data_managers.data_manager_postgres import PostgresDataManager
+    from data_managers.data_manager_sql import SQLDataManager
+    from data_managers.data_manager_sqlite import SQLiteDataManager
+
+    assert not issubclass(PostgresDataManager, SQLiteDataManager)
+    hooks = {
+        'apply_movie_stats', 'apply_rating_changes', 'remove_user_ratings', 'log_movie_changes',
+        'log_user_removal', 'bump_versions'
+    }
+    overridden = [
+        name for name, method in vars(PostgresDataManager).items()
+        if callable(method) and name in vars(SQLDataManager)
+    ]
+    for name in overridden:
+        base_hooks = hooks & set(inspect.unwrap(getattr(SQLDataManager, name)).__code__.co_names)
+        postgres_hooks = hooks & set(inspect.unwrap(getattr(PostgresDataManager, name)).__code__.co_names)
+        assert postgres_hooks == base_hooks, name
+
+
 def test_users_movies_table_exists(test_app_context):
     """Check that 'users' and 'movies' tables exist in the DB."""
     inspector = db.inspect(db.engine)
@@ -38,27 +102,23 @@ def test_users_movies_table_exists(test_app_context):
     assert "movies" in tables
 
 
-def test_add_user(test_app_context):
+def test_add_user(data_manager):
     """Test adding a user to the database."""
-    data_manager = SQLiteDataManager()
     data_manager.add_user('Frank')
 
     users = db.session.scalars(select(User)).all()
     assert any(user.name == 'Frank' for user in users)
 
-def test_add_duplicate_user_raises(test_app_context):
-    """Test adding a duplicate user raises an error."""
-    data_manager = SQLiteDataManager()
-    data_manager.add_user('Frank')
+def test_add_duplicate_user_is_ignored(data_manager):
+    """Test adding a taken name again returns None and leaves the existing user alone."""
+    user_id = data_manager.add_user('Frank')
 
-    with pytest.raises(Exception):
-        data_manager.add_user('Frank')
+    assert data_manager.add_user('Frank') is None
+    assert [(user.user_id, user.name) for user in data_manager.get_all_users()] == [(user_id, 'Frank')]
 
 
-def test_delete_user(test_app_context):
+def test_delete_user(data_manager):
     """Test deleting a user from the database."""
-    data_manager = SQLiteDataManager()
-
     data_manager.add_user('TestUser1')
     users = db.session.scalars(select(User)).all()
     assert any(user.name == 'TestUser1' for user in users)
@@ -70,20 +130,16 @@ def test_delete_user(test_app_context):
     assert all('TestUser1' != user.name for user in users)
 
 
-def test_delete_nonexistent_user_does_not_raise(test_app_context):
+def test_delete_nonexistent_user_does_not_raise(data_manager):
     """Test deleting a non-existent user does not raise an error."""
-    data_manager = SQLiteDataManager()
-
     try:
         data_manager.delete_user(999)
     except Exception:
         pytest.fail("Deleting a non-existent user should not raise an error.")
 
 
-def test_get_all_users(test_app_context):
+def test_get_all_users(data_manager):
     """Test retrieving all users."""
-    data_manager = SQLiteDataManager()
-
     data_manager.add_user('TestUser1')
     data_manager.add_user('TestUser2')
 
@@ -95,10 +151,8 @@ def test_get_all_users(test_app_context):
     assert any('TestUser2' == user.name for user in users)
 
 
-def test_add_movie(test_app_context):
+def test_add_movie(data_manager):
     """Test adding a movie to a user's collection."""
-    data_manager = SQLiteDataManager()
-
     data_manager.add_user('TestUser1')
     users = db.session.scalars(select(User)).all()
     user_id = users[0].user_id
@@ -114,10 +168,8 @@ def test_add_movie(test_app_context):
     assert movie.user_id == user_id
 
 
-def test_get_user_movies(test_app_context):
+def test_get_user_movies(data_manager):
     """Test retrieving all movies for a user."""
-    data_manager = SQLiteDataManager()
-
     data_manager.add_user('TestUser')
     users = db.session.scalars(select(User)).all()
     user_id = users[0].user_id
@@ -133,10 +185,8 @@ def test_get_user_movies(test_app_context):
     assert any('22 Jump Street' == movie.title for movie in movies)
 
 
-def test_delete_movie(test_app_context):
+def test_delete_movie(data_manager):
     """Test deleting a movie from a user's collection."""
-    data_manager = SQLiteDataManager()
-
     data_manager.add_user('TestUser1')
     users = db.session.scalars(select(User)).all()
     user_id = users[0].user_id
@@ -148,9 +198,8 @@ def test_delete_movie(test_app_context):
     assert all('Titanic' != movie.title for movie in movies)
 
 
-def test_delete_nonexistent_movie_does_not_raise(test_app_context):
+def test_delete_nonexistent_movie_does_not_raise(data_manager):
     """Test that deleting a non-existent movie does not raise an exception."""
-    data_manager = SQLiteDataManager()
     data_manager.add_user('TestUser')
     user_id = db.session.scalars(select(User)).first().user_id
 
@@ -160,10 +209,8 @@ def test_delete_nonexistent_movie_does_not_raise(test_app_context):
         pytest.fail("Deleting a non-existent movie should not raise an exception.")
 
 
-def test_update_movie(test_app_context):
+def test_update_movie(data_manager):
     """Test updating a movie's details."""
-    data_manager = SQLiteDataManager()
-
     data_manager.add_user('TestUser1')
     users = db.session.scalars(select(User)).all()
     user_id = users[0].user_id
@@ -187,10 +234,23 @@ def test_update_movie(test_app_context):
     assert updated_movie.rating == 0.5
 
 
-def test_update_nonexistent_movie_raises_value_error(test_app_context):
-    """Test that updating a non-existent movie raises a ValueError."""
-    data_manager = SQLiteDataManager()
+def test_update_movie_stores_release_year(data_manager):
+    """Test that update_movie stores OMDb-style years the way add_movie does."""
+    data_manager.add_user('TestUser1')
+    user_id = db.session.scalars(select(User)).first().user_id
+    movie_id = data_manager.add_movie(user_id, 'Breaking Bad', 'Vince Gilligan', 2008, 9.5)
+
+    for year, stored in (('2008–2013', 2008), ('N/A', None)):
+        data_manager.update_movie(
+            Movie(movie_id=movie_id, title='Breaking Bad', director='Vince Gilligan', year=year, rating=9.5)
+        )
+        db.session.expire_all()
+        assert db.session.get(Movie, movie_id).year == stored
+        assert data_manager.verify_user_stats() == []
 
+
+def test_update_nonexistent_movie_raises_value_error(data_manager):
+    """Test that updating a non-existent movie raises a ValueError."""
     non_existent_movie = Movie(
         movie_id=999,
         title='Ghost Movie',
@@ -203,10 +263,8 @@ def test_update_nonexistent_movie_raises_value_error(test_app_context):
         data_manager.update_movie(non_existent_movie)
 
 
-def test_update_movie_invalid_rating_raises(test_app_context):
+def test_update_movie_invalid_rating_raises(data_manager):
     """Test updating a movie with invalid rating raises ValueError."""
-    data_manager = SQLiteDataManager()
-
     data_manager.add_user('TestUser')
     user_id = db.session.scalars(select(User)).first().user_id
     data_manager.add_movie(user_id, 'Sample', 'Director', 2000, 5.0)
@@ -217,9 +275,8 @@ def test_update_movie_invalid_rating_raises(test_app_context):
         data_manager.update_movie(movie)
 
 
-def test_update_movie_year_in_future_raises(test_app_context):
+def test_update_movie_year_in_future_raises(data_manager):
     """Test that updating a movie with a year in the future raises ValueError."""
-    data_manager = SQLiteDataManager()
     data_manager.add_user('FutureTester')
     user_id = db.session.scalars(select(User)).first().user_id
 
@@ -238,9 +295,8 @@ def test_update_movie_year_in_future_raises(test_app_context):
         data_manager.update_movie(movie)
 
 
-def test_update_movie_year_too_old_raises(test_app_context):
+def test_update_movie_year_too_old_raises(data_manager):
     """Test that updating a movie with a year before 1888 raises ValueError."""
-    data_manager = SQLiteDataManager()
     data_manager.add_user('PastTester')
     user_id = db.session.scalars(select(User)).first().user_id
 
@@ -258,10 +314,8 @@ def test_update_movie_year_too_old_raises(test_app_context):
         data_manager.update_movie(movie)
 
 
-def test_get_movie_by_id(test_app_context):
+def test_get_movie_by_id(data_manager):
     """Test retrieving a movie by its ID."""
-    data_manager = SQLiteDataManager()
-
     data_manager.add_user('TestUser1')
     users = db.session.scalars(select(User)).all()
     user_id = users[0].user_id
@@ -272,4 +326,387 @@ def test_get_movie_by_id(test_app_context):
     assert movie is not None
     assert isinstance(movie, Movie)
     assert 'Titanic' == movie.title
-    assert 'Di Caprio' == movie.director
\ No newline at end of file
+    assert 'Di Caprio' == movie.director
+
+def test_add_movies(data_manager):
+    """Test importing several movies in one call."""
+    data_manager.add_user('Importer')
+    user_id = db.session.scalars(select(User)).first().user_id
+
+    results = data_manager.add_movies(user_id, [
+        {'title': 'Titanic', 'director': 'Cameron', 'year': 1997, 'rating': 7.9},
+        {'title': 'Heat', 'director': 'Mann', 'year': 1995, 'rating': 8.3},
+    ])
+
+    assert results == {'Titanic': None, 'Heat': None}
+    titles = {movie.title for movie in data_manager.get_user_movies(user_id)}
+    assert titles == {'Titanic', 'Heat'}
+
+
+def test_add_movies_reports_existing_titles(data_manager):
+    """Test that importing an existing title reports it and keeps the rest."""
+    data_manager.add_user('Importer')
+    user_id = db.session.scalars(select(User)).first().user_id
+    data_manager.add_movie(user_id, 'Titanic', 'Cameron', 1997, 7.9)
+
+    results = data_manager.add_movies(user_id, [
+        {'title': 'Titanic', 'director': 'Cameron', 'year': 1997, 'rating': 7.9},
+        {'title': 'Heat', 'director': 'Mann', 'year': 1995, 'rating': 8.3},
+    ])
+
+    assert results['Titanic'] == "Movie already exists."
+    assert results['Heat'] is None
+    assert len(data_manager.get_user_movies(user_id)) == 2
+
+
+def test_add_movies_reports_titles_added_concurrently(data_manager):
+    """Test that a title another request adds while the import runs is reported as existing, not failing the import."""
+    data_manager.add_user('Importer')
+    user_id = db.session.scalars(select(User)).first().user_id
+    engine = db.engine
+    added = []
+
+    def add_concurrently(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO movies') and not added:
+            added.append(True)
+            with engine.connect() as other:
+                other.execute(insert(Movie).values(
+                    user_id=user_id, title='Titanic', director='Cameron', year=1997, rating=7.9
+                ))
+                other.commit()
+
+    event.listen(engine, 'before_cursor_execute', add_concurrently)
+    try:
+        results = data_manager.add_movies(user_id, [
+            {'title': 'Titanic', 'director': 'Cameron', 'year': 1997, 'rating': 7.9},
+            {'title': 'Heat', 'director': 'Mann', 'year': 1995, 'rating': 8.3},
+        ])
+    finally:
+        event.remove(engine, 'before_cursor_execute', add_concurrently)
+
+    assert results == {'Titanic': "Movie already exists.", 'Heat': None}
+    assert sorted(movie.title for movie in data_manager.get_user_movies(user_id)) == ['Heat', 'Titanic']
+
+
+def _seed_movies(data_manager, count):
+    """Create a user with `count` movies and return the user id."""
+    data_manager.add_user('Collector')
+    user_id = db.session.scalars(select(User)).first().user_id
+    data_manager.add_movies(user_id, [
+        {'title': f"Movie {i:03d}", 'director': 'Someone', 'year': 1950 + i % 7, 'rating': (i * 7) % 10}
+        for i in range(count)
+    ])
+    return user_id
+
+
+def _walk_pages(data_manager, user_id, **kwargs):
+    """Follow next-page cursors and return every movie in order."""
+    movies, cursor = data_manager.get_user_movies_page(user_id, **kwargs)
+    while cursor:
+        page, cursor = data_manager.get_user_movies_page(user_id, after=cursor, **kwargs)
+        movies.extend(page)
+    return movies
+
+
+@pytest.mark.parametrize('sort', ['movie_id', 'title', 'year', 'rating'])
+@pytest.mark.parametrize('descending', [False, True])
+def test_get_user_movies_page_walks_every_movie_once(data_manager, sort, descending):
+    """Test that following cursors visits all movies in sorted order."""
+    user_id = _seed_movies(data_manager, 23)
+
+    movies = _walk_pages(data_manager, user_id, sort=sort, descending=descending, limit=5)
+
+    assert len({movie.movie_id for movie in movies}) == 23
+    keys = [(getattr(movie, sort), movie.movie_id) for movie in movies]
+    assert keys == sorted(keys, reverse=descending)
+
+
+@pytest.mark.parametrize('sort', ['year', 'rating'])
+@pytest.mark.parametrize('descending', [False, True])
+def test_get_user_movies_page_puts_null_values_last(data_manager, sort, descending):
+    """Test that movies without a year or rating are paged after the others in both directions."""
+    user_id = _seed_movies(data_manager, 13)
+    data_manager.add_movies(user_id, [
+        {'title': f"Unknown {i}", 'director': 'Someone', 'year': None, 'rating': None} for i in range(9)
+    ])
+
+    movies = _walk_pages(data_manager, user_id, sort=sort, descending=descending, limit=4)
+    rows, cursor = data_manager.get_movie_rows_page(user_id, ['title'], sort=sort, descending=descending, limit=15)
+    rows += data_manager.get_movie_rows_page(user_id, ['title'], sort=sort, descending=descending, after=cursor,
+                                             limit=15)[0]
+
+    assert len({movie.movie_id for movie in movies}) == 22
+    assert [row['title'] for row in rows] == [movie.title for movie in movies]
+    valued = [(getattr(movie, sort), movie.movie_id) for movie in movies[:13]]
+    assert valued == sorted(valued, reverse=descending)
+    nulls = [movie.movie_id for movie in movies[13:] if getattr(movie, sort) is None]
+    assert nulls == sorted(nulls, reverse=descending) and len(nulls) == 9
+
+
+def test_get_user_movies_page_last_page_has_no_cursor(data_manager):
+    """Test that the final page returns no next cursor."""
+    user_id = _seed_movies(data_manager, 3)
+
+    movies, cursor = data_manager.get_user_movies_page(user_id, limit=3)
+
+    assert len(movies) == 3
+    assert cursor is None
+
+
+def test_get_user_movies_page_rejects_bad_input(data_manager):
+    """Test that unknown sort fields and malformed cursors raise ValueError."""
+    with pytest.raises(ValueError):
+        data_manager.get_user_movies_page(1, sort='director')
+    with pytest.raises(ValueError):
+        data_manager.get_user_movies_page(1, after='not-a-cursor')
+
+
+def test_count_user_movies(data_manager):
+    """Test counting a user's movies."""
+    user_id = _seed_movies(data_manager, 12)
+
+    assert data_manager.count_user_movies(user_id) == 12
+    assert data_manager.count_user_movies(999) == 0
+
+
+def _seed_search(data_manager):
+    """Create two users with a few movies each and return their ids."""
+    data_manager.add_user('Alice')
+    data_manager.add_user('Bob')
+    alice, bob = db.session.scalars(select(User.user_id).order_by(User.user_id)).all()
+    data_manager.add_movie(alice, 'The Dark Knight', 'Christopher Nolan', 2008, 9.0)
+    data_manager.add_movie(alice, 'Darkman', 'Sam Raimi', 1990, 6.4)
+    data_manager.add_movie(bob, 'Dark City', 'Alex Proyas', 1998, 7.6)
+    data_manager.add_movie(bob, 'Memento', 'Christopher Nolan', 2000, 8.4)
+    return alice, bob
+
+
+def test_search_movies_prefix_and_ranking(data_manager):
+    """Test that words match as prefixes and title matches rank first."""
+    _seed_search(data_manager)
+
+    titles = [movie['title'] for movie in data_manager.search_movies('dark')]
+    assert sorted(titles) == ['Dark City', 'Darkman', 'The Dark Knight']
+
+    results = data_manager.search_movies('nol')
+    assert {movie['title'] for movie in results} == {'The Dark Knight', 'Memento'}
+
+    data_manager.add_movie(1, 'Sam', 'Nobody', 2001, 5.0)
+    results = data_manager.search_movies('sam')
+    assert [movie['title'] for movie in results] == ['Sam', 'Darkman']
+
+
+def test_search_movies_scoped_to_user(data_manager):
+    """Test that a user id limits results to that user's collection."""
+    alice, bob = _seed_search(data_manager)
+
+    results = data_manager.search_movies('christopher', user_id=bob)
+    assert [movie['title'] for movie in results] == ['Memento']
+
+
+def test_search_movies_highlights_matches(data_manager):
+    """Test that matching words are wrapped in highlight markers."""
+    _seed_search(data_manager)
+
+    result = data_manager.search_movies('memento')[0]
+    assert result['title_highlight'] == f"{HIGHLIGHT_OPEN}Memento{HIGHLIGHT_CLOSE}"
+
+
+def test_search_index_follows_updates_and_deletes(data_manager):
+    """Test that the index stays in sync with the movies table."""
+    alice, bob = _seed_search(data_manager)
+    memento = data_manager.search_movies('memento')[0]
+
+    data_manager.update_movie(Movie(
+        movie_id=memento['movie_id'], title='Inception', director='Christopher Nolan',
+        year=2010, rating=8.8
+    ))
+    assert data_manager.search_movies('memento') == []
+    assert [movie['title'] for movie in data_manager.search_movies('incep')] == ['Inception']
+
+    data_manager.delete_movie(memento['movie_id'], bob)
+    assert data_manager.search_movies('inception') == []
+
+
+def test_search_movies_like_fallback(data_manager):
+    """Test that the LIKE fallback finds substrings and escapes wildcards."""
+    _seed_search(data_manager)
+
+    assert {movie['title'] for movie in data_manager.search_movies_like('ark')} == {
+        'The Dark Knight', 'Darkman', 'Dark City'
+    }
+    assert data_manager.search_movies_like('%') == []
+
+
+def test_user_stats_follow_writes(data_manager):
+    """Test that the stats tables track adds, imports, updates and deletes."""
+    alice, bob = _seed_search(data_manager)
+    data_manager.add_movies(alice, [{'title': 'Inception', 'director': 'Christopher Nolan', 'year': 2010, 'rating': 8.8}])
+    movie = db.session.scalars(select(Movie).where(Movie.title == 'Darkman')).first()
+    data_manager.update_movie(Movie(
+        movie_id=movie.movie_id, title='Darkman', director='Sam Raimi', year=2001, rating=7.0
+    ))
+    memento = db.session.scalars(select(Movie).where(Movie.title == 'Memento')).first()
+    data_manager.delete_movie(memento.movie_id, bob)
+
+    stats = {user['name']: user for user in data_manager.get_all_user_stats()}
+    assert stats['Alice']['movie_count'] == 3
+    assert stats['Alice']['average_rating'] == pytest.approx((9.0 + 7.0 + 8.8) / 3)
+    assert stats['Alice']['top_directors'][0] == ('Christopher Nolan', 2)
+    assert stats['Alice']['decades'] == [(2000, 2), (2010, 1)]
+    assert stats['Bob']['movie_count'] == 1
+    assert stats['Bob']['top_directors'] == [('Alex Proyas', 1)]
+    assert db.session.get(User, alice).movie_count == 3
+    assert data_manager.verify_user_stats() == []
+
+
+def test_user_stats_accept_series_and_missing_years(data_manager):
+    """Test that series years count by their first year and empty or 'N/A' years skip the decades."""
+    data_manager.add_user('Alice')
+    alice = db.session.scalar(select(User.user_id))
+    data_manager.add_movie(alice, 'Breaking Bad', 'Vince Gilligan', '2008–2013', 9.5)
+    imported = data_manager.add_movies(alice, [
+        {'title': 'The Wire', 'director': 'David Simon', 'year': '2002–2008', 'rating': 9.3},
+        {'title': 'Undated', 'director': '', 'year': '', 'rating': 0.0},
+        {'title': 'Unknown', 'director': 'Someone', 'year': 'N/A', 'rating': 5.0},
+    ])
+
+    assert imported == {'The Wire': None, 'Undated': None, 'Unknown': None}
+    years = db.session.execute(select(Movie.title, Movie.year).order_by(Movie.movie_id)).all()
+    assert years == [('Breaking Bad', 2008), ('The Wire', 2002), ('Undated', None), ('Unknown', None)]
+    stats = data_manager.get_all_user_stats()[0]
+    assert stats['movie_count'] == 4
+    assert stats['decades'] == [(2000, 2)]
+    assert data_manager.verify_user_stats() == []
+    data_manager.rebuild_user_stats()
+    assert data_manager.get_all_user_stats()[0]['decades'] == [(2000, 2)]
+
+
+def test_user_stats_removed_with_user(data_manager):
+    """Test that deleting a user drops their stats."""
+    alice, bob = _seed_search(data_manager)
+    data_manager.delete_user(alice)
+
+    assert [user['name'] for user in data_manager.get_all_user_stats()] == ['Bob']
+    assert data_manager.verify_user_stats() == []
+
+
+def test_verify_user_stats_reports_drift_and_rebuild_fixes_it(data_manager):
+    """Test that rows written behind the data manager's back show up as drift."""
+    alice, _ = _seed_search(data_manager)
+    db.session.add(Movie(user_id=alice, title='Heat', director='Michael Mann', year=1995, rating=8.3))
+    db.session.commit()
+
+    drift = {(table, key): (expected, actual) for table, key, expected, actual in data_manager.verify_user_stats()}
+    expected, actual = drift[('user_stats', (alice,))]
+    assert expected == pytest.approx((3, 23.7, 3))
+    assert actual == pytest.approx((2, 15.4, 2))
+    assert drift[('user_director_stats', (alice, 'Michael Mann'))] == ((1,), None)
+
+    data_manager.rebuild_user_stats()
+    assert data_manager.verify_user_stats() == []
+    assert db.session.get(User, alice).movie_count == 3
+
+
+def test_collection_versions_bumped_by_writes(data_manager):
+    """Test that writes bump the versions of the pages they change."""
+    assert data_manager.get_collection_version() == (0, None)
+
+    data_manager.add_user('Alice')
+    user_id = db.session.scalars(select(User)).first().user_id
+    users_version = data_manager.get_collection_version()[0]
+    data_manager.add_movie(user_id, 'Heat', 'Michael Mann', 1995, 8.3)
+    assert data_manager.get_collection_version()[0] == users_version + 1
+    movies_version = data_manager.get_collection_version(user_id)[0]
+
+    movie = data_manager.get_user_movies(user_id)[0]
+    data_manager.update_movie(Movie(
+        movie_id=movie.movie_id, title='Heat', director='Michael Mann', year=1995, rating=9.0
+    ))
+    assert data_manager.get_collection_version(user_id)[0] == movies_version + 1
+    assert data_manager.get_collection_version()[0] == users_version + 1
+
+    data_manager.delete_movie(movie.movie_id, user_id)
+    assert data_manager.get_collection_version(user_id)[0] == movies_version + 2
+    assert data_manager.get_collection_version()[0] == users_version + 2
+    assert data_manager.get_collection_version('not-a-number') is None
+
+
+def _movies(count, prefix='Movie'):
+    return [{'title': f"{prefix} {i}", 'director': f"Director {i % 7}", 'year': 1950 + i % 70, 'rating': i % 10}
+            for i in range(count)]
+
+
+def test_delete_user_statements_do_not_grow_with_collection(data_manager, query_counter):
+    """Test that deleting a user takes the same statements for 2 or 300 movies, the database cascading the rest."""
+    small = data_manager.add_user('Small')
+    big = data_manager.add_user('Big')
+    data_manager.add_movies(small, _movies(2))
+    data_manager.add_movies(big, _movies(300))
+
+    query_counter.clear()
+    data_manager.delete_user(small)
+    small_statements = len(query_counter)
+    query_counter.clear()
+    data_manager.delete_user(big)
+
+    assert len(query_counter) == small_statements
+    assert db.session.scalar(select(func.count()).select_from(Movie)) == 0
+    assert db.session.scalar(select(func.count()).select_from(TitleNorm)) == 0
+    assert data_manager.get_all_user_stats() == []
+    assert data_manager.verify_user_stats() == []
+    assert data_manager.search_movies('Movie') == []
+
+
+def test_movie_writes_skip_loading_the_row(data_manager, query_counter):
+    """Test that a repeated add_movie is one statement and delete_movie deletes before reading anything."""
+    user_id = data_manager.add_user('Alice')
+    movie_id = data_manager.add_movie(user_id, 'Heat', 'Michael Mann', 1995, 8.3)
+
+    query_counter.clear()
+    assert data_manager.add_movie(user_id, 'Heat', 'Michael Mann', 1995, 8.3) is None
+    assert len(query_counter) == 1
+    assert data_manager.get_all_user_stats()[0]['movie_count'] == 1
+
+    query_counter.clear()
+    data_manager.delete_movie(movie_id, user_id)
+    assert query_counter[0].startswith('DELETE FROM movies')
+    assert 'RETURNING' in query_counter[0]
+    assert data_manager.get_all_user_stats()[0]['movie_count'] == 0
+
+
+LEGACY_MOVIES_DDL = """
+    CREATE TABLE movies (
+        movie_id INTEGER NOT NULL PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES users (user_id),
+        title VARCHAR NOT NULL, year INTEGER NOT NULL, director VARCHAR NOT NULL, rating FLOAT NOT NULL,
+        imdb_id VARCHAR REFERENCES omdb_titles (imdb_id), UNIQUE (title, user_id)
+    )
+"""
+
+
+def test_ensure_cascading_deletes_rebuilds_legacy_movies_table(test_app_context, data_manager):
+    """Test that a movies table without ON DELETE CASCADE is rebuilt with its rows, indexes and search triggers."""
+    if test_app_context != 'sqlite':
+        pytest.skip("only SQLite has to rebuild the table")
+    alice, bob = _seed_search(data_manager)
+    db.session.remove()
+    db.engine.dispose()
+    connection = sqlite3.connect(TEST_DB, isolation_level=None)
+    connection.executescript(
+        "PRAGMA foreign_keys=OFF; BEGIN; ALTER TABLE movies RENAME TO movies_new;"
+        f"{LEGACY_MOVIES_DDL}; INSERT INTO movies SELECT * FROM movies_new; DROP TABLE movies_new; COMMIT;"
+    )
+    connection.close()
+
+    data_manager.ensure_cascading_deletes()
+
+    keys = db.session.execute(text("PRAGMA foreign_key_list(movies)")).mappings().all()
+    assert {key['table']: key['on_delete'] for key in keys}['users'] == 'CASCADE'
+    indexes = {row[1] for row in db.session.execute(text("PRAGMA index_list(movies)"))}
+    assert {'ix_movies_user_title', 'ix_movies_imdb_id'} <= indexes
+    assert data_manager.count_user_movies(alice) == 2
+    data_manager.add_movie(bob, 'Dark Water', 'Walter Salles', 2005, 5.6)
+    assert [row['title'] for row in data_manager.search_movies('dark water')] == ['Dark Water']
+
+    data_manager.delete_user(alice)
+    assert db.session.scalar(select(func.count()).select_from(Movie)) == 3
@@ -0,0 +1,111 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tracemalloc
+
+import pytest
+from sqlalchemy import text
+
+from app import create_app
+from utils.extensions import db
+
+TEST_DB = os.path.abspath("tests/test.db")
+TEST_DB_URI = f'sqlite:///{TEST_DB}'
+LARGE_EXPORT_ROWS = 1000000
+MEMORY_CAP = 16 * 1024 * 1024
+
+SEED_SQL = """
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < :count)
+    INSERT INTO movies (user_id, title, director, year, rating)
+    SELECT :user_id, 'Movie ' || i, 'Director ' || (i % 997), 1950 + i % 75, (i % 100) / 10.0 FROM n
+"""
+
+
+def make_app(db_uri):
+    """Build an app and return it with its data manager, which serves /users/<id>/export.<fmt>."""
+    app = create_app(db_uri)
+    return app, app.extensions['data_manager']
+
+
+@pytest.fixture
+def client():
+    """Provide a client for an app whose user 1 owns three movies."""
+    app, data_manager = make_app(TEST_DB_URI)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        data_manager.add_user('Alice')
+        data_manager.add_movie(1, 'Heat', 'Michael Mann', 1995, 8.3)
+        data_manager.add_movie(1, 'Amélie, "the fabulous"', 'Jean-Pierre Jeunet', 2001, 8.3)
+        data_manager.add_movie(1, 'Titanic', 'James Cameron', 1997, 7.9)
+        yield app.test_client()
+
+
+def test_export_csv(client):
+    """Test that the CSV export has a header and every movie, quoting included."""
+    response = client.get('/users/1/export.csv')
+
+    assert response.mimetype == 'text/csv'
+    assert 'attachment; filename="movies-1.csv"' == response.headers['Content-Disposition']
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == ['movie_id', 'title', 'director', 'year', 'rating']
+    assert rows[2] == ['2', 'Amélie, "the fabulous"', 'Jean-Pierre Jeunet', '2001', '8.3']
+    assert len(rows) == 4
+
+
+def test_export_ndjson(client):
+    """Test that the NDJSON export has one object per movie."""
+    response = client.get('/users/1/export.ndjson')
+
+    movies = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [movie['title'] for movie in movies] == ['Heat', 'Amélie, "the fabulous"', 'Titanic']
+    assert movies[0] == {'movie_id': 1, 'title': 'Heat', 'director': 'Michael Mann', 'year': 1995, 'rating': 8.3}
+
+
+def test_export_gzip_when_accepted(client):
+    """Test that the export is gzip-encoded for clients accepting it, unless gzip=0."""
+    plain = client.get('/users/1/export.csv').get_data()
+    compressed = client.get('/users/1/export.csv', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.get_data()) == plain
+
+    opted_out = client.get('/users/1/export.csv?gzip=0', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in opted_out.headers
+    assert opted_out.get_data() == plain
+
+
+def test_export_unknown_format_or_user_is_404(client):
+    """Test that the export route answers 404 for formats it does not know and for missing users."""
+    assert client.get('/users/1/export.xml').status_code == 404
+    assert client.get('/users/99/export.csv').status_code == 404
+
+
+@pytest.mark.slow
+def test_large_export_memory_stays_bounded(tmp_path):
+    """Test that a 1M-row export is streamed in bounded memory, far below the size of the file."""
+    app, data_manager = make_app(f"sqlite:///{tmp_path / 'large.db'}")
+    with app.app_context():
+        db.create_all()
+        data_manager.add_user('Collector')
+        db.session.execute(text(SEED_SQL), {'count': LARGE_EXPORT_ROWS, 'user_id': 1})
+        db.session.commit()
+        db.session.remove()
+
+    client = app.test_client()
+    tracemalloc.start()
+    try:
+        response = client.get('/users/1/export.csv', buffered=False)
+        lines = 0
+        size = 0
+        for chunk in response.response:
+            lines += chunk.count(b'\n')
+            size += len(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert lines == LARGE_EXPORT_ROWS + 1
+    assert peak < MEMORY_CAP
+    assert peak < size
@@ -0,0 +1,126 @@
+import os
+
+import pytest
+from flask import flash
+
+from app import create_app
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from utils.cache_backends import LRUCacheBackend
+from utils.extensions import db
+from utils.http_cache import conditional_page, make_etag
+
+TEST_DB = os.path.abspath("tests/test.db")
+TEST_DB_URI = f'sqlite:///{TEST_DB}'
+
+
+@pytest.fixture
+def app_and_renders():
+    """Provide an app whose /page route renders through conditional_page and counts renders."""
+    app = create_app(TEST_DB_URI)
+    app.secret_key = 'test'
+    data_manager = SQLiteDataManager()
+    cache = LRUCacheBackend()
+    renders = []
+
+    def render():
+        renders.append(1)
+        return f"users: {len(data_manager.get_all_users())}"
+
+    @app.route('/page')
+    def page():
+        version = data_manager.get_collection_version()
+        return conditional_page(make_etag('page', *version), version[1], render, cache)
+
+    @app.route('/flash')
+    def flash_message():
+        flash('hello')
+        return 'ok'
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app, data_manager, cache, renders
+
+
+def test_if_none_match_returns_304_without_rendering(app_and_renders):
+    """Test that a matching ETag is answered with 304 and no render."""
+    app, data_manager, cache, renders = app_and_renders
+    client = app.test_client()
+    first = client.get('/page')
+    cache.clear()
+
+    second = client.get('/page', headers={'If-None-Match': first.headers['ETag']})
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert len(renders) == 1
+
+
+def test_writes_change_the_etag(app_and_renders):
+    """Test that a data manager write makes the old ETag stale."""
+    app, data_manager, cache, renders = app_and_renders
+    client = app.test_client()
+    first = client.get('/page')
+
+    data_manager.add_user('Alice')
+    second = client.get('/page', headers={'If-None-Match': first.headers['ETag']})
+
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert second.data == b'users: 1'
+
+
+def test_rendered_html_is_shared_from_cache(app_and_renders):
+    """Test that a second client gets the cached HTML without a render."""
+    app, data_manager, cache, renders = app_and_renders
+    data_manager.add_user('Alice')
+
+    first = app.test_client().get('/page')
+    second = app.test_client().get('/page')
+
+    assert first.data == second.data == b'users: 1'
+    assert len(renders) == 1
+
+
+def test_if_modified_since(app_and_renders):
+    """Test that Last-Modified is honoured when no ETag is sent."""
+    app, data_manager, cache, renders = app_and_renders
+    data_manager.add_user('Alice')
+    client = app.test_client()
+    first = client.get('/page')
+
+    second = client.get('/page', headers={'If-Modified-Since': first.headers['Last-Modified']})
+
+    assert second.status_code == 304
+
+
+def test_pending_flash_bypasses_cache(app_and_renders):
+    """Test that a page with a pending flash message is rendered fresh."""
+    app, data_manager, cache, renders = app_and_renders
+    client = app.test_client()
+    first = client.get('/page')
+    client.get('/flash')
+
+    second = client.get('/page', headers={'If-None-Match': first.headers['ETag']})
+
+    assert second.status_code == 200
+    assert 'ETag' not in second.headers
+    assert len(renders) == 2
+
+
+def test_pages_are_not_rendered_from_another_workers_stale_data_cache():
+    """Test that a page cached under a new version shows that version, even if this worker's data cache is stale."""
+    worker = create_app(TEST_DB_URI)
+    other_worker = create_app(TEST_DB_URI)
+    with worker.app_context():
+        db.drop_all()
+        db.create_all()
+        user_id = worker.extensions['data_manager'].add_user('Alice')
+    client = worker.test_client()
+    assert b'Heat' not in client.get(f'/users/{user_id}').data
+
+    with other_worker.app_context():
+        other_worker.extensions['data_manager'].add_movie(user_id, 'Heat', 'Michael Mann', 1995, 8.3)
+
+    assert b'Heat' in client.get(f'/users/{user_id}').data
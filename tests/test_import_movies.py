@@ -0,0 +1,43 @@
+import io
+
+import pytest
+
+from app import create_app
+from utils import omdb_api
+from utils.extensions import db
+from utils.omdb_cache import OMDbCache
+
+
+@pytest.fixture
+def app(fake_omdb, tmp_path, monkeypatch):
+    """Provide an app with one user, resolving titles against the fake OMDb server."""
+    monkeypatch.setattr(omdb_api, 'omdb_cache', OMDbCache(path=None))
+    app = create_app(f"sqlite:///{tmp_path / 'app.db'}")
+    with app.app_context():
+        db.create_all()
+        app.extensions['data_manager'].add_user('Alice')
+    return app
+
+
+def imported_titles(app):
+    with app.app_context():
+        return sorted(movie.title for movie in app.extensions['data_manager'].get_user_movies(1))
+
+
+def test_import_reports_titles_resolving_to_one_movie_once(app):
+    """Test that input titles resolving to the same OMDb title import one movie and report the rest as present."""
+    response = app.test_client().post('/users/1/import_movies', data={'titles': 'Titanic\ntitanic\nHeat'})
+
+    assert b'2 of 3 movies have been imported!' in response.data
+    assert b'Movie already exists.' in response.data
+    assert imported_titles(app) == ['Heat', 'Titanic']
+
+
+def test_import_reads_titles_from_csv_upload(app):
+    """Test that titles from an uploaded CSV are imported, skipping the header row."""
+    upload = (io.BytesIO(b'title\nHeat\nNo Such Movie\n'), 'movies.csv')
+    response = app.test_client().post('/users/1/import_movies', data={'titles': '', 'file': upload})
+
+    assert b'1 of 2 movies have been imported!' in response.data
+    assert b'Movie not found in OMDb.' in response.data
+    assert imported_titles(app) == ['Heat']
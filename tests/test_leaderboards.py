@@ -0,0 +1,138 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from app import create_app
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from models.leaderboard import LeaderboardChange, LeaderboardTotal
+from models.movie import Movie
+from utils.extensions import db
+
+TEST_DB = os.path.abspath("tests/test.db")
+TEST_DB_URI = f'sqlite:///{TEST_DB}'
+
+RATINGS = {
+    'Alice': {'Heat': 8, 'Alien': 6, 'Ran': 9},
+    'Bob': {'Heat': 4, 'Alien': 7, 'Titanic': 9},
+    'Carol': {'Heat': 6, 'Alien': 8, 'Titanic': 5},
+}
+
+
+@pytest.fixture
+def app():
+    """Provide an app on a fresh database holding the RATINGS collections."""
+    app = create_app(TEST_DB_URI)
+    app.extensions['data_manager'] = SQLiteDataManager()
+    app.extensions['leaderboards'].refresh_interval = 0
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        data_manager = app.extensions['data_manager']
+        for user_id, (name, ratings) in enumerate(RATINGS.items(), start=1):
+            data_manager.add_user(name)
+            for title, rating in ratings.items():
+                data_manager.add_movie(user_id, title, 'Someone', 1990, rating)
+        yield app
+
+
+@pytest.fixture
+def data_manager(app):
+    """Data manager working on the app's database."""
+    return app.extensions['data_manager']
+
+
+def totals():
+    """Stored leaderboard totals as {title: (owners, rating_count, rating_sum)}."""
+    rows = db.session.execute(
+        select(LeaderboardTotal.title, LeaderboardTotal.owners, LeaderboardTotal.rating_count,
+               LeaderboardTotal.rating_sum)
+    )
+    return {title: (owners, count, round(rating_sum, 6)) for title, owners, count, rating_sum in rows}
+
+
+def ranking(data_manager, board):
+    """(title, owners, average_rating) of a board's stored entries, in rank order."""
+    entries = data_manager.get_leaderboards()[board]['entries']
+    return [(entry['title'], entry['owners'], entry['average_rating']) for entry in entries]
+
+
+def test_refresh_ranks_collected_and_rated_titles(data_manager):
+    """Test that a refresh folds the change log and ranks by owners and by average rating."""
+    assert data_manager.refresh_leaderboards(min_ratings=2) == 9
+
+    assert db.session.scalar(select(LeaderboardChange.change_id)) is None
+    assert ranking(data_manager, 'most_collected') == [
+        ('Alien', 3, 7.0), ('Heat', 3, 6.0), ('Titanic', 2, 7.0), ('Ran', 1, 9.0)
+    ]
+    assert ranking(data_manager, 'top_rated') == [('Alien', 3, 7.0), ('Titanic', 2, 7.0), ('Heat', 3, 6.0)]
+    assert data_manager.refresh_leaderboards() == 0
+
+
+def test_incremental_refresh_matches_rebuild(data_manager):
+    """Test that updates, deletions and a removed user fold into the same totals a rebuild computes."""
+    data_manager.refresh_leaderboards()
+    version = data_manager.get_leaderboards()['most_collected']['version']
+
+    movies = {(movie.user_id, movie.title): movie.movie_id for movie in db.session.scalars(select(Movie))}
+    data_manager.update_movie(SimpleNamespace(movie_id=movies[(2, 'Heat')], title='Heat', director='Michael Mann',
+                                              year=1995, rating=9))
+    data_manager.delete_movie(movies[(1, 'Ran')], 1)
+    data_manager.add_movies(2, [
+        {'title': 'Ran', 'director': 'Akira Kurosawa', 'year': 1985, 'rating': 7},
+        {'title': 'Alien', 'director': 'Ridley Scott', 'year': 1979, 'rating': 1},
+    ])
+    data_manager.delete_user(3)
+    data_manager.refresh_leaderboards(size=2, min_ratings=1)
+    incremental = totals()
+
+    assert data_manager.get_leaderboards()['most_collected']['version'] == version + 1
+    assert ranking(data_manager, 'most_collected') == [('Alien', 2, 6.5), ('Heat', 2, 8.5)]
+    data_manager.rebuild_leaderboards()
+    assert incremental == totals() == {
+        'Heat': (2, 2, 17.0), 'Alien': (2, 2, 13.0), 'Titanic': (1, 1, 9.0), 'Ran': (1, 1, 7.0)
+    }
+
+
+def test_get_leaderboards_skips_known_versions(data_manager):
+    """Test that boards whose version the caller holds come back without entries."""
+    data_manager.refresh_leaderboards()
+    snapshots = data_manager.get_leaderboards()
+
+    unchanged = data_manager.get_leaderboards({board: snapshot['version'] for board, snapshot in snapshots.items()})
+
+    assert set(unchanged) == {'most_collected', 'top_rated'}
+    assert all(snapshot['entries'] is None for snapshot in unchanged.values())
+
+
+def test_leaderboard_endpoint_serves_snapshot_from_memory(app, data_manager):
+    """Test that the API serves the snapshot with its freshness until a refresh replaces it."""
+    client = app.test_client()
+    assert client.get('/api/v1/leaderboards/most_collected').json == {
+        'board': 'most_collected', 'computed_at': None, 'age_seconds': None, 'entries': []
+    }
+    data_manager.refresh_leaderboards()
+
+    response = client.get('/api/v1/leaderboards/top_rated?limit=1')
+
+    assert response.status_code == 200
+    assert response.json['computed_at'] is not None
+    assert response.json['age_seconds'] >= 0
+    assert response.json['entries'] == [
+        {'rank': 1, 'title': 'Alien', 'owners': 3, 'ratings': 3, 'average_rating': 7.0}
+    ]
+    data_manager.add_movie(1, 'Titanic', 'James Cameron', 1997, 10)
+    assert client.get('/api/v1/leaderboards/top_rated').json['entries'][0]['title'] == 'Alien'
+    assert client.get('/api/v1/leaderboards/unknown').status_code == 404
+
+
+def test_leaderboards_page(app, data_manager):
+    """Test that the page lists both boards."""
+    data_manager.refresh_leaderboards(min_ratings=2)
+
+    response = app.test_client().get('/leaderboards')
+
+    assert response.status_code == 200
+    assert b'Most collected' in response.data
+    assert b'Alien' in response.data and b'Titanic' in response.data
@@ -0,0 +1,258 @@
+import os
+import time
+
+import pytest
+import requests
+from sqlalchemy import select
+
+from app import create_app
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from models.lookup_job import LookupJob, LookupRequest
+from models.user import User
+from utils.extensions import db
+from utils.lookup_queue import LookupQueue
+from utils.omdb_client import CircuitOpenError, RateLimitedError
+
+TEST_DB = os.path.abspath("tests/test.db")
+TEST_DB_URI = f'sqlite:///{TEST_DB}'
+
+MOVIES = {
+    'heat': {'Title': 'Heat', 'Year': '1995', 'Director': 'Michael Mann', 'imdbRating': '8.3', 'imdbID': 'tt0113277'},
+    'breaking bad': {'Title': 'Breaking Bad', 'Year': '2008–2013', 'Director': 'N/A', 'imdbRating': '9.5',
+                     'imdbID': 'tt0903747'},
+    'obscure': {'Title': 'Obscure', 'Year': '2021', 'Director': 'Nobody', 'imdbRating': 'N/A', 'imdbID': 'tt0000001'},
+}
+
+
+class CountingFetch:
+    """Fake OMDb lookup that records every title it is asked for."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, title):
+        self.calls.append(title)
+        return MOVIES.get(' '.join(title.split()).lower())
+
+
+@pytest.fixture
+def app():
+    """Provide an app with a fresh database."""
+    app = create_app(TEST_DB_URI)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+
+
+@pytest.fixture
+def user_ids(app):
+    """Create two users and return their ids."""
+    data_manager = SQLiteDataManager()
+    data_manager.add_user('Alice')
+    data_manager.add_user('Bob')
+    return db.session.scalars(select(User.user_id).order_by(User.user_id)).all()
+
+
+def test_enqueue_returns_immediately_with_pending_status(app, user_ids):
+    """Test that enqueuing does not call OMDb."""
+    fetch = CountingFetch()
+    queue = LookupQueue(SQLiteDataManager(), fetch=fetch, workers=0)
+
+    request_id = queue.enqueue(user_ids[0], 'Heat')
+
+    assert fetch.calls == []
+    assert queue.get_request(request_id).status == 'pending'
+
+
+def test_same_title_is_looked_up_once(app, user_ids):
+    """Test that requests for the same normalized title share one upstream call."""
+    fetch = CountingFetch()
+    data_manager = SQLiteDataManager()
+    queue = LookupQueue(data_manager, fetch=fetch, workers=0)
+
+    first = queue.enqueue(user_ids[0], 'Heat')
+    second = queue.enqueue(user_ids[1], '  HEAT ')
+    queue.drain()
+
+    assert len(fetch.calls) == 1
+    assert db.session.scalar(select(db.func.count()).select_from(LookupJob)) == 1
+    for request_id, user_id in ((first, user_ids[0]), (second, user_ids[1])):
+        assert queue.get_request(request_id).status == 'done'
+        assert [movie.title for movie in data_manager.get_user_movies(user_id)] == ['Heat']
+        assert [movie.imdb_id for movie in data_manager.get_user_movies(user_id)] == ['tt0113277']
+    assert data_manager.get_omdb_title('tt0113277')['Director'] == 'Michael Mann'
+
+
+def test_unknown_title_fails_with_message(app, user_ids):
+    """Test that a title OMDb does not know marks the request as failed."""
+    queue = LookupQueue(SQLiteDataManager(), fetch=CountingFetch(), workers=0)
+
+    request_id = queue.enqueue(user_ids[0], 'No Such Movie')
+    queue.drain()
+
+    lookup = queue.get_request(request_id)
+    assert lookup.status == 'failed'
+    assert 'not found' in lookup.message
+
+
+def test_series_years_are_added(app, user_ids):
+    """Test that a lookup of a series, whose year is a range, is added to the collection."""
+    queue = LookupQueue(SQLiteDataManager(), fetch=CountingFetch(), workers=0)
+
+    request_id = queue.enqueue(user_ids[0], 'Breaking Bad')
+    queue.drain()
+
+    assert queue.get_request(request_id).status == 'done'
+
+
+def test_unrated_titles_are_added_without_rating(app, user_ids):
+    """Test that a title OMDb has no rating for is stored with no rating rather than 0."""
+    data_manager = SQLiteDataManager()
+    queue = LookupQueue(data_manager, fetch=CountingFetch(), workers=0)
+
+    queue.enqueue(user_ids[0], 'Obscure')
+    queue.drain()
+
+    assert [movie.rating for movie in data_manager.get_user_movies(user_ids[0])] == [None]
+    assert data_manager.get_all_user_stats()[0]['average_rating'] is None
+
+
+def test_failed_write_marks_request_failed(app, user_ids):
+    """Test that an unexpected error while adding the movie fails the request instead of leaving it running."""
+    class BrokenDataManager(SQLiteDataManager):
+        def add_movie(self, *args, **kwargs):
+            raise ValueError("broken")
+
+    queue = LookupQueue(BrokenDataManager(), fetch=CountingFetch(), workers=0)
+
+    request_id = queue.enqueue(user_ids[0], 'Heat')
+    queue.drain()
+
+    assert queue.get_request(request_id).status == 'failed'
+
+
+def test_pending_jobs_survive_restart(app, user_ids):
+    """Test that jobs interrupted mid-flight are picked up by a new queue."""
+    queue = LookupQueue(SQLiteDataManager(), fetch=CountingFetch(), workers=0)
+    request_id = queue.enqueue(user_ids[0], 'Heat')
+    db.session.execute(
+        db.update(LookupJob).values(status='running', updated_at=time.time() - 3600)
+    )
+    db.session.commit()
+
+    fetch = CountingFetch()
+    restarted = LookupQueue(SQLiteDataManager(), fetch=fetch, workers=0)
+    restarted.requeue_stale()
+    restarted.drain()
+
+    assert fetch.calls == ['Heat']
+    assert db.session.get(LookupRequest, request_id).status == 'done'
+
+
+def test_worker_threads_process_queue(app, user_ids):
+    """Test that background workers resolve queued lookups."""
+    data_manager = SQLiteDataManager()
+    queue = LookupQueue(data_manager, fetch=CountingFetch(), workers=2, poll_interval=0.05)
+    queue.start(app)
+    try:
+        request_id = queue.enqueue(user_ids[0], 'Heat')
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            db.session.expire_all()
+            if queue.get_request(request_id).status == 'done':
+                break
+            time.sleep(0.05)
+    finally:
+        queue.stop()
+
+    assert queue.get_request(request_id).status == 'done'
+
+
+class FailingFetch(CountingFetch):
+    """Fake OMDb lookup that raises `errors` in turn before answering normally."""
+
+    def __init__(self, *errors):
+        super().__init__()
+        self.errors = list(errors)
+
+    def __call__(self, title):
+        if self.errors:
+            self.calls.append(title)
+            raise self.errors.pop(0)
+        return super().__call__(title)
+
+
+def test_done_jobs_expire(app, user_ids):
+    """Test that a title looked up longer ago than done_ttl is looked up again."""
+    fetch = CountingFetch()
+    queue = LookupQueue(SQLiteDataManager(), fetch=fetch, workers=0, done_ttl=3600)
+    queue.enqueue(user_ids[0], 'Heat')
+    queue.drain()
+
+    queue.enqueue(user_ids[1], 'Heat')
+    queue.drain()
+    assert fetch.calls == ['Heat']
+
+    db.session.execute(db.update(LookupJob).values(updated_at=time.time() - 7200))
+    db.session.commit()
+    request_id = queue.enqueue(user_ids[1], 'Heat')
+    queue.drain()
+
+    assert fetch.calls == ['Heat', 'Heat']
+    assert queue.get_request(request_id).status == 'failed'
+    assert 'already in the collection' in queue.get_request(request_id).message
+
+
+@pytest.mark.parametrize('error', [RateLimitedError("quota used up"), CircuitOpenError("circuit open")])
+def test_quota_and_circuit_failures_are_retried(app, user_ids, error):
+    """Test that a lookup skipped by the quota or the circuit breaker waits and is retried, not failed."""
+    fetch = FailingFetch(error)
+    queue = LookupQueue(SQLiteDataManager(), fetch=fetch, workers=0, retry_after=60)
+
+    request_id = queue.enqueue(user_ids[0], 'Heat')
+    queue.drain()
+
+    job = db.session.scalars(select(LookupJob)).one()
+    assert job.status == 'retry'
+    assert 'not found' not in job.error
+    assert queue.get_request(request_id).status == 'pending'
+    queue.drain()
+    assert fetch.calls == ['Heat']
+
+    job.updated_at = time.time() - 60
+    db.session.commit()
+    queue.drain()
+
+    assert fetch.calls == ['Heat', 'Heat']
+    assert queue.get_request(request_id).status == 'done'
+
+
+def test_unreachable_omdb_is_not_reported_as_not_found(app, user_ids):
+    """Test that a timeout fails the lookup with its own message."""
+    queue = LookupQueue(SQLiteDataManager(), fetch=FailingFetch(requests.exceptions.Timeout("timed out")), workers=0)
+
+    request_id = queue.enqueue(user_ids[0], 'Heat')
+    queue.drain()
+
+    lookup = queue.get_request(request_id)
+    assert lookup.status == 'failed'
+    assert 'could not be reached' in lookup.message
+
+
+def test_purge_removes_old_finished_lookups(app, user_ids):
+    """Test that finished requests and jobs older than done_ttl are deleted and everything else is kept."""
+    queue = LookupQueue(SQLiteDataManager(), fetch=CountingFetch(), workers=0, done_ttl=3600)
+    old = queue.enqueue(user_ids[0], 'Heat')
+    queue.enqueue(user_ids[0], 'No Such Movie')
+    queue.drain()
+    db.session.execute(db.update(LookupJob).values(updated_at=time.time() - 7200))
+    db.session.execute(db.update(LookupRequest).values(updated_at=time.time() - 7200))
+    db.session.commit()
+    pending = queue.enqueue(user_ids[1], 'Breaking Bad')
+
+    assert queue.purge() == 4
+
+    assert db.session.get(LookupRequest, old) is None
+    assert [job.title for job in db.session.scalars(select(LookupJob))] == ['Breaking Bad']
+    assert queue.get_request(pending).status == 'pending'
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+from sqlalchemy import select
+
+from app import create_app
+from models.user import User
+from utils import metrics
+from utils.extensions import db
+
+TEST_DB = os.path.abspath("tests/test.db")
+TEST_DB_URI = f'sqlite:///{TEST_DB}'
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Provide a test client for an instrumented app with two DB-backed routes."""
+    app = create_app(TEST_DB_URI)
+    app.config['PROFILING_ENABLED'] = True
+    app.config['PROFILE_DIR'] = str(tmp_path)
+
+    @app.route('/probe/<int:n>')
+    def probe(n):
+        for _ in range(n):
+            db.session.scalars(select(User)).all()
+        return 'ok'
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app.test_client()
+
+
+def test_registry_renders_prometheus_text():
+    """Test the text exposition format of counters and histograms."""
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter('jobs_total', 'Jobs run.', ('kind',))
+    histogram = registry.histogram('job_seconds', 'Job time.', buckets=(0.1, 1))
+    counter.inc(kind='a')
+    counter.inc(2, kind='a')
+    histogram.observe(0.5)
+
+    text = registry.render()
+    assert '# TYPE jobs_total counter' in text
+    assert 'jobs_total{kind="a"} 3' in text
+    assert 'job_seconds_bucket{le="0.1"} 0' in text
+    assert 'job_seconds_bucket{le="1"} 1' in text
+    assert 'job_seconds_bucket{le="+Inf"} 1' in text
+    assert 'job_seconds_count 1' in text
+
+
+def test_requests_record_route_latency_and_sql_count(client):
+    """Test that each request reports its SQL statement count and route latency."""
+    before = metrics.http_request_seconds.count(method='GET', route='/probe/<int:n>', status='200')
+
+    response = client.get('/probe/3')
+
+    assert response.headers['X-SQL-Queries'] == '3'
+    after = metrics.http_request_seconds.count(method='GET', route='/probe/<int:n>', status='200')
+    assert after == before + 1
+
+
+def test_metrics_endpoint_exposes_histograms(client):
+    """Test that /metrics serves the collected metrics."""
+    client.get('/probe/1')
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/probe/<int:n>"' in response.text
+    assert 'sql_queries_per_request_count{route="/probe/<int:n>"}' in response.text
+
+
+def test_profile_header_writes_report(client, tmp_path):
+    """Test that X-Profile runs the request under cProfile."""
+    response = client.get('/probe/2', headers={'X-Profile': '1'})
+
+    report_id = response.headers['X-Profile-Report']
+    assert os.sep not in report_id and str(tmp_path) not in report_id
+    assert 'function calls' in (tmp_path / f'{report_id}.txt').read_text()
+    assert (tmp_path / f'{report_id}.prof').exists()
+
+
+def test_requests_without_header_are_not_profiled(client):
+    """Test that profiling is opt-in per request."""
+    response = client.get('/probe/1')
+    assert 'X-Profile-Report' not in response.headers
+
+
+def test_profile_header_is_ignored_unless_enabled(client, tmp_path):
+    """Test that clients cannot trigger profiling when PROFILING_ENABLED is off."""
+    client.application.config['PROFILING_ENABLED'] = False
+    response = client.get('/probe/1', headers={'X-Profile': '1'})
+
+    assert 'X-Profile-Report' not in response.headers
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,106 @@
+import sqlite3
+import time
+
+import pytest
+
+from utils import omdb_api
+from utils.omdb_cache import OMDbCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Provide a fresh on-disk cache for the OMDb helper."""
+    cache = OMDbCache(path=str(tmp_path / 'omdb_cache.db'))
+    monkeypatch.setattr(omdb_api, 'omdb_cache', cache)
+    return cache
+
+
+def test_repeated_title_makes_no_extra_network_calls(fake_omdb, cache):
+    """Test that a cached title is served without calling OMDb again."""
+    for _ in range(5):
+        data = omdb_api.fetch_movie_details('Titanic')
+        assert data['Title'] == 'Titanic'
+
+    assert fake_omdb.request_count == 1
+    assert cache.stats()['hits'] == 4
+    assert cache.stats()['misses'] == 1
+
+
+def test_title_normalization_shares_cache_entry(fake_omdb, cache):
+    """Test that case and whitespace variants hit the same entry."""
+    omdb_api.fetch_movie_details('Inception')
+    omdb_api.fetch_movie_details('  inception ')
+    omdb_api.fetch_movie_details('INCEPTION')
+
+    assert fake_omdb.request_count == 1
+
+
+def test_not_found_is_cached(fake_omdb, cache):
+    """Test that 'Movie not found' results are cached too."""
+    assert omdb_api.fetch_movie_details('No Such Movie') is None
+    assert omdb_api.fetch_movie_details('No Such Movie') is None
+
+    assert fake_omdb.request_count == 1
+
+
+def test_negative_entries_expire_first(tmp_path):
+    """Test that not-found entries use the shorter TTL."""
+    cache = OMDbCache(path=str(tmp_path / 'cache.db'), ttl=60, negative_ttl=0.05)
+    cache.set('Titanic', {'Title': 'Titanic'})
+    cache.set_not_found('Nothing')
+    time.sleep(0.1)
+
+    assert cache.get('Titanic') == {'Title': 'Titanic'}
+    assert cache.get('Nothing') is OMDbCache.MISS
+
+
+def test_disk_store_survives_restart(tmp_path, fake_omdb, monkeypatch):
+    """Test that a new cache instance reads entries written by an old one."""
+    path = str(tmp_path / 'omdb_cache.db')
+    monkeypatch.setattr(omdb_api, 'omdb_cache', OMDbCache(path=path))
+    omdb_api.fetch_movie_details('Heat')
+
+    monkeypatch.setattr(omdb_api, 'omdb_cache', OMDbCache(path=path))
+    assert omdb_api.fetch_movie_details('Heat')['Director'] == 'Michael Mann'
+    assert fake_omdb.request_count == 1
+
+
+def test_lru_evicts_oldest_entries(tmp_path):
+    """Test that the in-process LRU stays bounded and counts evictions."""
+    cache = OMDbCache(path=None, max_entries=2)
+    cache.set('a', {'Title': 'a'})
+    cache.set('b', {'Title': 'b'})
+    cache.get('a')
+    cache.set('c', {'Title': 'c'})
+
+    assert cache.stats()['evictions'] == 1
+    assert cache.get('b') is OMDbCache.MISS
+    assert cache.get('a') == {'Title': 'a'}
+
+
+def test_purge_deletes_expired_rows_from_disk(tmp_path):
+    """Test that expired entries are removed from the on-disk store, not just skipped on read."""
+    path = tmp_path / 'cache.db'
+    cache = OMDbCache(path=str(path), ttl=60, negative_ttl=0.05)
+    cache.set('Titanic', {'Title': 'Titanic'})
+    cache.set_not_found('Nothing')
+    time.sleep(0.1)
+
+    assert cache.purge() == 1
+    with sqlite3.connect(path) as conn:
+        assert [key for key, in conn.execute("SELECT key FROM omdb_cache")] == ['titanic']
+    conn.close()
+    assert cache.stats()['size'] == 1
+
+
+def test_writes_purge_expired_rows_periodically(tmp_path):
+    """Test that a write past the purge interval deletes expired rows."""
+    path = tmp_path / 'cache.db'
+    cache = OMDbCache(path=str(path), negative_ttl=0.05, purge_interval=0.05)
+    cache.set_not_found('Nothing')
+    time.sleep(0.1)
+    cache.set('Titanic', {'Title': 'Titanic'})
+
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM omdb_cache").fetchone() == (1,)
+    conn.close()
@@ -0,0 +1,105 @@
+import time
+
+import pytest
+import requests
+
+from utils import omdb_api
+from utils.omdb_cache import OMDbCache
+from utils.omdb_client import CircuitBreaker, CircuitOpenError, OMDbClient
+
+
+@pytest.fixture
+def client(fake_omdb):
+    """Provide an OMDb client talking to the fake server without real sleeps."""
+    client = OMDbClient(api_key='key', base_url=fake_omdb.url, sleep=lambda seconds: None)
+    yield client
+    client.close()
+
+
+def test_get_movie_returns_payload(client):
+    """Test that a known title returns the OMDb payload."""
+    data = client.get_movie('Titanic')
+    assert data['Director'] == 'James Cameron'
+
+
+def test_get_movie_unknown_title_returns_none(client):
+    """Test that an unknown title returns None."""
+    assert client.get_movie('No Such Movie') is None
+
+
+def test_query_parameters_are_encoded(client, fake_omdb):
+    """Test that titles with special characters reach OMDb intact."""
+    client.get_movie('Fast & Furious #7?')
+    params = fake_omdb.requests[-1]
+    assert params['t'] == ['Fast & Furious #7?']
+    assert params['apikey'] == ['key']
+
+
+def test_retries_on_server_errors(client, fake_omdb):
+    """Test that 429/5xx responses are retried until one succeeds."""
+    fake_omdb.status_queue = [503, 429]
+    assert client.get_movie('Heat')['Title'] == 'Heat'
+    assert fake_omdb.request_count == 3
+
+
+def test_gives_up_after_max_retries(client, fake_omdb):
+    """Test that persistent server errors raise after the retry budget."""
+    fake_omdb.status_queue = [500] * 10
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get_movie('Heat')
+    assert fake_omdb.request_count == client.max_retries + 1
+
+
+def test_backoff_is_bounded_and_jittered():
+    """Test that backoff delays stay within the exponential envelope."""
+    client = OMDbClient(backoff_base=0.1, backoff_max=1.0)
+    delays = [client.backoff(3) for _ in range(50)]
+    assert all(0 <= delay <= 0.8 for delay in delays)
+    assert len(set(delays)) > 1
+    assert client.backoff(10) <= 1.0
+    client.close()
+
+
+def test_open_circuit_fails_fast(fake_omdb):
+    """Test that an open circuit rejects calls without touching the network."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    client = OMDbClient(base_url=fake_omdb.url, max_retries=0, breaker=breaker)
+    fake_omdb.status_queue = [500, 500]
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.get_movie('Heat')
+
+    start = time.perf_counter()
+    with pytest.raises(CircuitOpenError):
+        client.get_movie('Heat')
+    assert time.perf_counter() - start < 0.05
+    assert fake_omdb.request_count == 2
+    client.close()
+
+
+def test_circuit_half_opens_after_timeout():
+    """Test that a successful trial call closes the circuit again."""
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+    now[0] = 11
+    assert breaker.state == 'half-open'
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+
+def test_fetch_many_movie_details(fake_omdb, monkeypatch):
+    """Test that several titles are resolved concurrently in one call."""
+    monkeypatch.setattr(omdb_api, 'omdb_cache', OMDbCache(path=None))
+    results = omdb_api.fetch_many_movie_details(['Titanic', 'Heat', 'Unknown', 'Titanic'])
+
+    assert results['Titanic']['Title'] == 'Titanic'
+    assert results['Heat']['Title'] == 'Heat'
+    assert results['Unknown'] is None
+    assert fake_omdb.request_count == 3
+
@@ -0,0 +1,179 @@
+import multiprocessing
+import os
+
+import pytest
+import requests
+
+from app import create_app
+from tests.fake_omdb import FakeOMDbServer
+from utils import omdb_api
+from utils.omdb_client import CircuitBreaker, CircuitOpenError, OMDbClient, RateLimitedError
+from utils.omdb_quota import OMDbQuota
+
+TEST_DB = os.path.abspath("tests/test.db")
+TEST_DB_URI = f'sqlite:///{TEST_DB}'
+
+
+class FakeClock:
+    """Clock for the quota whose sleep advances time instead of waiting."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.slept = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        self.slept += seconds
+
+
+def make_quota(tmp_path, clock=None, **options):
+    clock = clock or FakeClock()
+    return OMDbQuota(path=str(tmp_path / 'quota.db'), clock=clock, sleep=clock.sleep, **options)
+
+
+def lookup_many(path, url, calls, priority):
+    """Run in a separate process: look a title up `calls` times through a shared quota."""
+    quota = OMDbQuota(path=path, rate=10, burst=5, daily_limit=30)
+    client = OMDbClient(base_url=url, max_retries=0, governor=quota)
+    found = limited = 0
+    for _ in range(calls):
+        try:
+            client.get_movie('Heat', priority=priority)
+            found += 1
+        except RateLimitedError:
+            limited += 1
+    client.close()
+    return found, limited
+
+
+def test_bucket_refills_at_rate(tmp_path):
+    """Test that a drained bucket tells callers how long to wait for the next token."""
+    clock = FakeClock()
+    quota = make_quota(tmp_path, clock, rate=2, burst=2)
+
+    assert quota.try_acquire() == 0
+    assert quota.try_acquire() == 0
+    assert quota.try_acquire() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert quota.try_acquire() == 0
+
+
+def test_daily_share_keeps_quota_for_interactive(tmp_path):
+    """Test that bulk lookups stop at their share of the day and interactive ones get the rest."""
+    quota = make_quota(tmp_path, rate=100, burst=100, daily_limit=10)
+
+    assert all(quota.acquire('bulk') for _ in range(9))
+    assert not quota.acquire('bulk')
+    assert quota.clock.slept == 0
+    assert quota.acquire('interactive')
+    assert not quota.acquire('interactive')
+    assert quota.remaining()['daily'] == 0
+    assert quota.stats()['denied'] == {'interactive': 1, 'bulk': 1, 'background': 0}
+
+
+def test_lower_priority_yields_to_waiting_interactive(tmp_path):
+    """Test that a bulk lookup leaves the next token to an interactive lookup that is waiting."""
+    clock = FakeClock()
+    quota = make_quota(tmp_path, clock, rate=1, burst=1)
+    assert quota.try_acquire('interactive') == 0
+    assert quota.try_acquire('interactive', waiting=True) > 0
+
+    clock.now += 1
+    assert quota.try_acquire('bulk') > 0
+    assert quota.try_acquire('interactive') == 0
+
+
+def test_acquire_waits_a_bounded_time(tmp_path):
+    """Test that a caller queues for a token but gives up after its maximum wait."""
+    quota = make_quota(tmp_path, rate=0.1, burst=1)
+    assert quota.acquire()
+
+    assert not quota.acquire(max_wait=2)
+    assert quota.clock.slept == pytest.approx(2)
+    assert quota.acquire(max_wait=10)
+
+
+def test_upstream_limit_stops_every_caller(tmp_path):
+    """Test that a 'Request limit reached!' answer from OMDb uses up the shared daily quota."""
+    server = FakeOMDbServer(daily_limit=2).start()
+    quota = OMDbQuota(path=str(tmp_path / 'quota.db'), rate=100, burst=100, daily_limit=100)
+    client = OMDbClient(base_url=server.url, max_retries=0, governor=quota)
+
+    client.get_movie('Heat')
+    client.get_movie('Heat')
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get_movie('Heat')
+    with pytest.raises(RateLimitedError):
+        client.get_movie('Heat')
+
+    assert server.request_count == 3
+    assert quota.remaining()['daily'] == 0
+    client.close()
+    server.stop()
+
+
+def test_open_circuit_spends_no_quota(tmp_path):
+    """Test that calls short-circuited by an open breaker take no token and do not wait."""
+    quota = make_quota(tmp_path, rate=1, burst=5, daily_limit=10)
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    client = OMDbClient(base_url='http://omdb.invalid/', breaker=breaker, governor=quota)
+    before = quota.remaining()
+
+    for _ in range(3):
+        with pytest.raises(CircuitOpenError):
+            client.get_movie('Heat')
+
+    assert quota.remaining() == before
+    assert quota.stats()['granted'] == {'interactive': 0, 'bulk': 0, 'background': 0}
+    assert quota.clock.slept == 0
+    client.close()
+
+
+def test_denied_trial_call_keeps_circuit_usable(tmp_path):
+    """Test that a half-open trial call refused by the quota does not block the next trial."""
+    clock = FakeClock()
+    quota = make_quota(tmp_path, rate=100, burst=100, daily_limit=10)
+    quota.exhaust()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+    clock.now += 5
+    client = OMDbClient(base_url='http://omdb.invalid/', breaker=breaker, governor=quota)
+
+    with pytest.raises(RateLimitedError):
+        client.get_movie('Heat')
+
+    breaker.before_call()
+    assert breaker.state == 'half-open'
+    client.close()
+
+
+def test_processes_share_the_quota(tmp_path):
+    """Test that worker processes together stay within the rate and daily limits OMDb enforces."""
+    server = FakeOMDbServer(rate_limit=20).start()
+    path = str(tmp_path / 'quota.db')
+    OMDbQuota(path=path, rate=10, burst=5, daily_limit=30)
+
+    with multiprocessing.get_context('spawn').Pool(4) as pool:
+        results = pool.starmap(lookup_many, [(path, server.url, 15, 'interactive')] * 4)
+    server.stop()
+
+    assert sum(found for found, _ in results) == 30
+    assert sum(limited for _, limited in results) == 30
+    assert server.request_count == 30
+    assert server.rejected == 0
+
+
+def test_quota_metrics(tmp_path, monkeypatch):
+    """Test that /metrics reports the calls left in the shared quota."""
+    quota = make_quota(tmp_path, rate=1, burst=5, daily_limit=10)
+    monkeypatch.setattr(omdb_api, 'omdb_quota', quota)
+    quota.acquire('bulk')
+
+    text = create_app(TEST_DB_URI).test_client().get('/metrics').get_data(as_text=True)
+
+    assert 'omdb_quota_remaining{limit="daily"} 9' in text
+    assert 'omdb_quota_calls{priority="bulk",result="granted"} 1' in text
@@ -0,0 +1,143 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+from sqlalchemy import select
+
+from app import POSTER_MAX_AGE, create_app
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from models.omdb_title import OMDbTitle
+from utils.extensions import db
+from utils.posters import THUMBNAIL_SIZE, PosterWorker
+
+TEST_DB = os.path.abspath("tests/test.db")
+TEST_DB_URI = f'sqlite:///{TEST_DB}'
+
+HEAT = {'Title': 'Heat', 'imdbID': 'tt0113277', 'Poster': 'https://posters.example/heat.jpg', 'Plot': 'A heist.'}
+NO_POSTER = {'Title': 'Obscure', 'imdbID': 'tt0000001', 'Poster': 'N/A'}
+
+
+def poster_bytes(size=(300, 445)):
+    """A full-size PNG poster like the ones OMDb links to."""
+    output = io.BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(output, 'PNG')
+    return output.getvalue()
+
+
+class FakeDownload:
+    """Poster download stand-in that records the URLs it fetches."""
+
+    def __init__(self, fail=False):
+        self.urls = []
+        self.fail = fail
+
+    def __call__(self, url):
+        self.urls.append(url)
+        if self.fail:
+            raise OSError("connection refused")
+        return poster_bytes()
+
+
+@pytest.fixture
+def data_manager():
+    """Provide a data manager on a fresh database."""
+    app = create_app(TEST_DB_URI)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield SQLiteDataManager()
+
+
+def thumbnail_status(imdb_id):
+    return db.session.scalar(select(OMDbTitle.thumbnail_status).where(OMDbTitle.imdb_id == imdb_id))
+
+
+def test_save_omdb_titles_stores_each_film_once(data_manager):
+    """Test that a title saved by several lookups is stored once and shared by every owner."""
+    data_manager.add_user('Alice')
+    data_manager.add_user('Bob')
+    data_manager.save_omdb_titles([HEAT])
+    data_manager.save_omdb_titles([HEAT, None, {'Title': 'No id'}])
+    data_manager.add_movie(1, 'Heat', 'Michael Mann', 1995, 8.3, imdb_id='tt0113277')
+    data_manager.add_movies(2, [{'title': 'Heat', 'director': 'Michael Mann', 'year': 1995, 'rating': 8.3, 'imdb_id': 'tt0113277'}])
+
+    assert db.session.scalars(select(OMDbTitle.imdb_id)).all() == ['tt0113277']
+    assert data_manager.get_omdb_title('tt0113277')['Plot'] == 'A heist.'
+    assert data_manager.get_omdb_title('tt9999999') is None
+    movies = data_manager.get_user_movies(1) + data_manager.get_user_movies(2)
+    assert {movie.omdb.title for movie in movies} == {'Heat'}
+
+
+def test_poster_worker_stores_thumbnails_once(data_manager, tmp_path):
+    """Test that the worker downloads each poster once and skips titles without one."""
+    data_manager.save_omdb_titles([HEAT, NO_POSTER])
+    fetch = FakeDownload()
+    worker = PosterWorker(str(tmp_path), fetch=fetch)
+
+    assert worker.run_once() == 1
+    assert worker.run_once() == 0
+
+    assert fetch.urls == ['https://posters.example/heat.jpg']
+    with Image.open(tmp_path / 'tt0113277.jpg') as thumbnail:
+        assert thumbnail.format == 'JPEG'
+        assert thumbnail.width <= THUMBNAIL_SIZE[0] and thumbnail.height <= THUMBNAIL_SIZE[1]
+    assert thumbnail_status('tt0113277') == 'done'
+    assert thumbnail_status('tt0000001') == 'none'
+
+
+def test_poster_worker_marks_failed_downloads(data_manager, tmp_path):
+    """Test that a poster that cannot be downloaded is marked failed and not retried."""
+    data_manager.save_omdb_titles([HEAT])
+    worker = PosterWorker(str(tmp_path), fetch=FakeDownload(fail=True))
+
+    worker.run_once()
+
+    assert thumbnail_status('tt0113277') == 'failed'
+    assert not (tmp_path / 'tt0113277.jpg').exists()
+    assert worker.run_once() == 0
+
+
+def test_poster_worker_marks_undecodable_posters_failed(data_manager, tmp_path):
+    """Test that a download that is not an image is marked failed instead of stored as is."""
+    data_manager.save_omdb_titles([HEAT])
+    worker = PosterWorker(str(tmp_path), fetch=lambda url: b'<html>Not found</html>')
+
+    worker.run_once()
+
+    assert thumbnail_status('tt0113277') == 'failed'
+    assert not (tmp_path / 'tt0113277.jpg').exists()
+
+
+def test_refreshed_poster_url_queues_a_new_thumbnail(data_manager, tmp_path):
+    """Test that a refetch with a new poster URL stores it and resets the thumbnail to pending."""
+    data_manager.save_omdb_titles([HEAT])
+    worker = PosterWorker(str(tmp_path), fetch=FakeDownload())
+    worker.run_once()
+
+    data_manager.save_omdb_titles([HEAT])
+    assert thumbnail_status('tt0113277') == 'done'
+
+    data_manager.save_omdb_titles([{**HEAT, 'Poster': 'https://posters.example/heat-4k.jpg'}])
+    poster_url = db.session.scalar(select(OMDbTitle.poster_url).where(OMDbTitle.imdb_id == 'tt0113277'))
+    assert poster_url == 'https://posters.example/heat-4k.jpg'
+    assert thumbnail_status('tt0113277') == 'pending'
+
+    data_manager.save_omdb_titles([{**HEAT, 'Poster': 'N/A'}])
+    assert thumbnail_status('tt0113277') == 'none'
+
+
+def test_poster_route_sends_far_future_cache_headers(tmp_path):
+    """Test that thumbnails are served with a one-year immutable cache lifetime."""
+    (tmp_path / 'tt0113277.jpg').write_bytes(b'poster-bytes')
+    app = create_app(TEST_DB_URI)
+    app.config['POSTER_DIR'] = str(tmp_path)
+    client = app.test_client()
+
+    response = client.get('/posters/tt0113277.jpg')
+
+    assert response.data == b'poster-bytes'
+    assert response.cache_control.max_age == POSTER_MAX_AGE
+    assert response.cache_control.immutable
+    assert client.get('/posters/tt0000001.jpg').status_code == 404
+    assert client.get('/posters/..%2Fsecret.jpg').status_code == 404
@@ -0,0 +1,129 @@
+import math
+import os
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from app import create_app
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from models.movie import Movie
+from models.title_similarity import StaleTitle, TitleNeighbour
+from utils.extensions import db
+
+TEST_DB = os.path.abspath("tests/test.db")
+TEST_DB_URI = f'sqlite:///{TEST_DB}'
+
+RATINGS = {
+    'Alice': {'Heat': 8, 'Alien': 6},
+    'Bob': {'Heat': 4, 'Alien': 3, 'Titanic': 9},
+    'Carol': {'Heat': 5, 'Titanic': 5},
+}
+
+
+@pytest.fixture
+def app():
+    """Provide an app on a fresh database holding the RATINGS collections."""
+    app = create_app(TEST_DB_URI)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        data_manager = SQLiteDataManager()
+        for user_id, (name, ratings) in enumerate(RATINGS.items(), start=1):
+            data_manager.add_user(name)
+            for title, rating in ratings.items():
+                data_manager.add_movie(user_id, title, 'Someone', 1990, rating)
+        yield app
+
+
+@pytest.fixture
+def data_manager(app):
+    """Data manager working on the app's database."""
+    return SQLiteDataManager()
+
+
+def neighbours():
+    """Stored neighbour lists as {(title, neighbour): (score, support)}."""
+    rows = db.session.execute(
+        select(TitleNeighbour.title, TitleNeighbour.neighbour, TitleNeighbour.score, TitleNeighbour.support)
+    )
+    return {(title, neighbour): (score, support) for title, neighbour, score, support in rows}
+
+
+def test_rebuild_computes_cosine_similarity(data_manager):
+    """Test that neighbours hold the cosine of co-rated titles and skip pairs with one co-rater."""
+    data_manager.rebuild_recommendations()
+
+    stored = neighbours()
+    heat_alien = (8 * 6 + 4 * 3) / math.sqrt((8 ** 2 + 4 ** 2 + 5 ** 2) * (6 ** 2 + 3 ** 2))
+    heat_titanic = (4 * 9 + 5 * 5) / math.sqrt((8 ** 2 + 4 ** 2 + 5 ** 2) * (9 ** 2 + 5 ** 2))
+    assert set(stored) == {('Heat', 'Alien'), ('Alien', 'Heat'), ('Heat', 'Titanic'), ('Titanic', 'Heat')}
+    assert math.isclose(stored[('Heat', 'Alien')][0], heat_alien)
+    assert math.isclose(stored[('Titanic', 'Heat')][0], heat_titanic)
+    assert stored[('Heat', 'Titanic')][1] == 2
+
+
+def test_incremental_refresh_matches_rebuild(data_manager):
+    """Test that refreshing stale titles and a sweep after writes give the same lists as a full rebuild."""
+    data_manager.rebuild_recommendations()
+    data_manager.add_user('Dave')
+    data_manager.add_movies(4, [
+        {'title': 'Alien', 'director': 'Ridley Scott', 'year': 1979, 'rating': 7},
+        {'title': 'Titanic', 'director': 'James Cameron', 'year': 1997, 'rating': 2},
+    ])
+    titanic = db.session.scalars(select(Movie).filter_by(user_id=2, title='Titanic')).one()
+    data_manager.update_movie(SimpleNamespace(
+        movie_id=titanic.movie_id, title='Titanic', director='James Cameron', year=1997, rating=1
+    ))
+    heat = db.session.scalars(select(Movie).filter_by(user_id=3, title='Heat')).one()
+    data_manager.delete_movie(heat.movie_id, 3)
+
+    while data_manager.refresh_recommendations(batch_size=2):
+        pass
+    assert db.session.scalar(select(StaleTitle.title)) is None
+    swept = data_manager.sweep_recommendations(batch_size=2)
+    while swept is not None:
+        swept = data_manager.sweep_recommendations(swept, batch_size=2)
+    refreshed = neighbours()
+    data_manager.rebuild_recommendations()
+
+    rebuilt = neighbours()
+    assert set(refreshed) == set(rebuilt)
+    for key, (score, support) in rebuilt.items():
+        assert math.isclose(refreshed[key][0], score)
+        assert refreshed[key][1] == support
+
+
+def test_write_marks_changed_and_listing_titles_only(data_manager):
+    """Test that a new rating marks its title and the titles listing it, not the user's whole collection."""
+    data_manager.rebuild_recommendations()
+    data_manager.add_movie(1, 'Ran', 'Akira Kurosawa', 1985, 9)
+    data_manager.update_movie(SimpleNamespace(
+        movie_id=db.session.scalars(select(Movie).filter_by(user_id=2, title='Alien')).one().movie_id,
+        title='Alien', director='Ridley Scott', year=1979, rating=4
+    ))
+
+    assert set(db.session.scalars(select(StaleTitle.title))) == {'Ran', 'Alien', 'Heat'}
+
+
+def test_recommendations_skip_owned_titles(data_manager):
+    """Test that a user is recommended similar titles they do not own, with the title that led there."""
+    data_manager.rebuild_recommendations()
+    data_manager.add_user('Dave')
+    data_manager.add_movie(4, 'Heat', 'Michael Mann', 1995, 9)
+
+    recommended = data_manager.get_recommendations(4)
+
+    assert [item['title'] for item in recommended] == ['Alien', 'Titanic']
+    assert {item['because'] for item in recommended} == {'Heat'}
+    assert [(item['title'], item['because']) for item in data_manager.get_recommendations(1)] == [('Titanic', 'Heat')]
+
+
+def test_recommendations_route(app, data_manager):
+    """Test the recommendations page and its JSON counterpart."""
+    data_manager.rebuild_recommendations()
+    client = app.test_client()
+
+    assert b'Titanic' in client.get('/users/1/recommendations').data
+    assert client.get('/api/v1/users/1/recommendations').get_json()['recommendations'][0]['title'] == 'Titanic'
+    assert client.get('/users/99/recommendations').status_code == 404
@@ -0,0 +1,109 @@
+import pytest
+from sqlalchemy import text
+
+from app import create_app
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from utils.extensions import db
+from utils.replicas import ReplicaRouter, sync_sqlite_replicas
+
+
+def make_app(tmp_path, replicas=2):
+    """Build an app with a primary, `replicas` replica files and routes to read and add users."""
+    app = create_app(
+        f"sqlite:///{tmp_path / 'primary.db'}",
+        replica_urls=[f"sqlite:///{tmp_path / f'replica{index}.db'}" for index in range(replicas)]
+    )
+    app.secret_key = 'test'
+    data_manager = SQLiteDataManager()
+
+    @app.route('/names')
+    def names():
+        return ','.join(user.name for user in data_manager.get_all_users())
+
+    @app.route('/names/<name>', methods=['POST'])
+    def add_name(name):
+        data_manager.add_user(name)
+        return 'ok'
+
+    with app.app_context():
+        db.create_all()
+        data_manager.add_user('Alice')
+    sync_sqlite_replicas(app)
+    return app, data_manager
+
+
+def mark_replica(app, key, name):
+    """Add a user that only exists on one replica, to tell which database served a read."""
+    with app.app_context():
+        with db.engines[key].begin() as connection:
+            connection.execute(text("INSERT INTO users (name) VALUES (:name)"), {'name': name})
+
+
+def test_reads_go_to_replicas_round_robin(tmp_path):
+    """Check that consecutive reads alternate between the replicas."""
+    app, _ = make_app(tmp_path)
+    mark_replica(app, 'replica0', 'Replica0')
+    mark_replica(app, 'replica1', 'Replica1')
+    client = app.test_client()
+
+    seen = [client.get('/names').get_data(as_text=True) for _ in range(4)]
+
+    assert seen == ['Alice,Replica0', 'Alice,Replica1', 'Alice,Replica0', 'Alice,Replica1']
+
+
+def test_writes_go_to_primary(tmp_path):
+    """Check that writes land on the primary and not on the replicas."""
+    app, data_manager = make_app(tmp_path)
+
+    app.test_client().post('/names/Written')
+
+    with app.app_context():
+        for key in (None, 'replica0', 'replica1'):
+            with db.engines[key].connect() as connection:
+                names = connection.execute(text("SELECT name FROM users")).scalars().all()
+            assert ('Written' in names) == (key is None)
+
+
+def test_read_your_writes_after_a_write(tmp_path):
+    """Check that a client reads from the primary after writing, until the sticky window ends."""
+    app, _ = make_app(tmp_path)
+    writer = app.test_client()
+    reader = app.test_client()
+
+    writer.post('/names/Written')
+
+    assert writer.get('/names').get_data(as_text=True) == 'Alice,Written'
+    assert reader.get('/names').get_data(as_text=True) == 'Alice'
+
+    app.extensions['replica_router'].sticky_seconds = 0
+    writer.post('/names/Later')
+    assert writer.get('/names').get_data(as_text=True) == 'Alice'
+
+
+def test_sync_brings_replicas_up_to_date(tmp_path):
+    """Check that the replication stand-in copies new rows to every replica."""
+    app, _ = make_app(tmp_path)
+    app.test_client().post('/names/Written')
+
+    sync_sqlite_replicas(app)
+
+    assert app.test_client().get('/names').get_data(as_text=True) == 'Alice,Written'
+
+
+def test_least_latency_policy_prefers_fastest_replica():
+    """Check that the least-latency policy picks the replica with the lowest average."""
+    router = ReplicaRouter(['replica0', 'replica1'], policy='least_latency')
+    router.record_latency('replica0', 0.010)
+    router.record_latency('replica1', 0.002)
+
+    assert router.pick() == 'replica1'
+
+    for _ in range(20):
+        router.record_latency('replica1', 0.050)
+    assert router.pick() == 'replica0'
+
+
+def test_unknown_policy_raises():
+    """Check that an unknown routing policy is rejected."""
+    with pytest.raises(ValueError):
+        ReplicaRouter(['replica0'], policy='random')
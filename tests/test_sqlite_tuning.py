@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import text
+
+from app import create_app
+from utils.extensions import db
+from utils.sqlite_tuning import engine_options, optimize
+
+
+def pragma(name):
+    """Read a pragma value through a pooled connection."""
+    return db.session.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_performance_profile_applies_pragmas(tmp_path):
+    """Test that the performance profile tunes every connection."""
+    app = create_app(f"sqlite:///{tmp_path / 'perf.db'}", db_profile='performance')
+    with app.app_context():
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1
+        assert pragma('busy_timeout') == 10000
+        assert pragma('cache_size') == -64000
+        assert pragma('temp_store') == 2
+        assert db.engine.pool.size() == 10
+
+
+def test_default_profile_keeps_sqlite_defaults(tmp_path):
+    """Test that the default profile leaves SQLite's tuning alone but still enforces foreign keys."""
+    app = create_app(f"sqlite:///{tmp_path / 'plain.db'}", db_profile='default')
+    with app.app_context():
+        assert pragma('journal_mode') == 'delete'
+        assert pragma('synchronous') == 2
+        assert pragma('foreign_keys') == 1
+
+
+def test_unknown_profile_raises():
+    """Test that an unknown profile name is rejected."""
+    with pytest.raises(ValueError):
+        engine_options('turbo', 'sqlite:///x.db')
+
+
+def test_memory_db_skips_pool_sizing():
+    """Test that in-memory databases do not get queue pool options."""
+    options = engine_options('performance', 'sqlite://')
+    assert 'pool_size' not in options
+
+
+def test_optimize_runs(tmp_path):
+    """Test that PRAGMA optimize can be run on the engine."""
+    app = create_app(f"sqlite:///{tmp_path / 'opt.db'}")
+    with app.app_context():
+        db.create_all()
+        optimize(db.engine)
+
+
+def test_performance_profile_locks_less_under_concurrent_writers():
+    """Test that concurrent writer processes hit 'database is locked' less often with the performance profile."""
+    from benchmarks.bench_sqlite_profile import run
+
+    default = run('default', processes=4, writes=60)
+    performance = run('performance', processes=4, writes=60)
+    assert default['locked %'] > 0
+    assert performance['locked %'] < default['locked %']
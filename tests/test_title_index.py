@@ -0,0 +1,134 @@
+import gzip
+import os
+
+import pytest
+
+from app import create_app
+from data_managers.data_manager_sqlite import SQLiteDataManager
+from utils import omdb_api
+from utils.extensions import db
+from utils.omdb_cache import OMDbCache
+from utils.title_index import build_title_index, TitleIndex
+
+TEST_DB_URI = f"sqlite:///{os.path.abspath('tests/test.db')}"
+
+BASICS = [
+    "tconst\ttitleType\tprimaryTitle\toriginalTitle\tisAdult\tstartYear\tendYear\truntimeMinutes\tgenres",
+    "tt0120338\tmovie\tTitanic\tTitanic\t0\t1997\t\\N\t194\tDrama,Romance",
+    "tt0020640\tmovie\tTitanic\tTitanic\t0\t1929\t\\N\t80\tDrama",
+    "tt1375666\tmovie\tInception\tInception\t0\t2010\t\\N\t148\tAction,Sci-Fi",
+    "tt0113277\tmovie\tHeat\tHeat\t0\t1995\t\\N\t170\tCrime",
+    "tt0583459\ttvEpisode\tPilot\tPilot\t0\t1994\t\\N\t45\tComedy",
+    "tt9999999\ttvMovie\tThe  Lonely   Film\tThe Lonely Film\t0\t\\N\t\\N\t\\N\t\\N",
+]
+RATINGS = [
+    "tconst\taverageRating\tnumVotes",
+    "tt0120338\t7.9\t1300000",
+    "tt0020640\t6.1\t700",
+    "tt1375666\t8.8\t2600000",
+    "tt0583459\t8.0\t5000",
+]
+CREW = [
+    "tconst\tdirectors\twriters",
+    "tt0120338\tnm0000116\tnm0000116",
+    "tt1375666\tnm0634240\tnm0634240",
+    "tt0113277\tnm0000520,nm0634240\tnm0000520",
+    "tt0583459\tnm0000001\t\\N",
+]
+NAMES = [
+    "nconst\tprimaryName\tbirthYear\tdeathYear\tprimaryProfession\tknownForTitles",
+    "nm0000116\tJames Cameron\t1954\t\\N\tdirector\ttt0120338",
+    "nm0634240\tChristopher Nolan\t1970\t\\N\tdirector\ttt1375666",
+    "nm0000520\tMichael Mann\t1943\t\\N\tdirector\ttt0113277",
+    "nm0000001\tFred Astaire\t1899\t1987\tactor\ttt0050419",
+]
+
+
+def write_dump(path, lines):
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    return str(path)
+
+
+@pytest.fixture
+def dumps(tmp_path):
+    """The four IMDb dataset dumps, gzipped as they are published."""
+    return {
+        name: write_dump(tmp_path / f"{name}.tsv.gz", lines)
+        for name, lines in (('basics', BASICS), ('ratings', RATINGS), ('crew', CREW), ('names', NAMES))
+    }
+
+
+@pytest.fixture
+def index(dumps, tmp_path):
+    """A title index built from the dumps in batches of two rows."""
+    path = str(tmp_path / 'title_index.bin')
+    build_title_index(dumps['basics'], dumps['ratings'], dumps['crew'], dumps['names'], path, chunk_size=2)
+    index = TitleIndex(path)
+    yield index
+    index.close()
+
+
+def test_index_answers_movie_titles(index):
+    """Test that lookups ignore case and spacing and return OMDb-shaped movie data."""
+    assert len(index) == 4
+    assert index.get('  the lonely FILM ') == {
+        'Title': 'The  Lonely   Film', 'Year': 'N/A', 'Director': 'N/A', 'imdbRating': 'N/A',
+        'imdbID': 'tt9999999', 'Response': 'True',
+    }
+    assert index.get('HEAT')['Director'] == 'Michael Mann, Christopher Nolan'
+    assert index.get('Inception')['imdbRating'] == '8.8'
+    assert index.get('Pilot') is None
+    assert index.get('Avatar') is None
+    assert index.stats() == {'hits': 3, 'misses': 2, 'size': 4}
+
+
+def test_index_keeps_most_voted_of_same_titles(index):
+    """Test that a remake sharing a title is shadowed by the more popular film."""
+    assert index.get('titanic') == {
+        'Title': 'Titanic', 'Year': '1997', 'Director': 'James Cameron', 'imdbRating': '7.9',
+        'imdbID': 'tt0120338', 'Response': 'True',
+    }
+
+
+def test_fetch_consults_index_before_omdb(fake_omdb, index, tmp_path, monkeypatch):
+    """Test that indexed titles make no OMDb call and other titles still reach OMDb."""
+    monkeypatch.setattr(omdb_api, 'title_index', index)
+    monkeypatch.setattr(omdb_api, 'omdb_cache', OMDbCache(path=str(tmp_path / 'omdb_cache.db')))
+    fake_omdb.movies['memento'] = {'Title': 'Memento', 'Year': '2000', 'Director': 'Christopher Nolan',
+                                   'imdbRating': '8.4'}
+
+    assert omdb_api.fetch_movie_details('Inception')['imdbID'] == 'tt1375666'
+    assert fake_omdb.request_count == 0
+    assert omdb_api.fetch_movie_details('Memento')['Title'] == 'Memento'
+    assert fake_omdb.request_count == 1
+
+
+def test_index_payload_does_not_replace_omdb_payload(index):
+    """Test that a film stored from OMDb keeps its full payload when it is added again from the index."""
+    omdb_payload = {'Title': 'Heat', 'imdbID': 'tt0113277', 'Poster': 'https://posters.example/heat.jpg',
+                    'Plot': 'A heist.'}
+    with create_app(TEST_DB_URI).app_context():
+        db.drop_all()
+        db.create_all()
+        data_manager = SQLiteDataManager()
+        data_manager.save_omdb_titles([omdb_payload])
+        data_manager.save_omdb_titles([index.get('Heat'), index.get('Inception')])
+
+        assert data_manager.get_omdb_title('tt0113277') == omdb_payload
+        assert data_manager.get_omdb_title('tt1375666')['Title'] == 'Inception'
+
+
+def test_build_title_index_command(dumps, tmp_path):
+    """Test that `flask build-title-index` writes an index without director names when name.basics is left out."""
+    output = tmp_path / 'cli_index.bin'
+    runner = create_app(f"sqlite:///{tmp_path / 'app.db'}").test_cli_runner()
+
+    result = runner.invoke(args=['build-title-index', '--basics', dumps['basics'], '--ratings', dumps['ratings'],
+                                 '--crew', dumps['crew'], '--output', str(output)])
+
+    assert result.exit_code == 0, result.output
+    assert 'Indexed 4 titles' in result.output
+    index = TitleIndex(str(output))
+    assert index.get('Heat')['Director'] == 'N/A'
+    index.close()
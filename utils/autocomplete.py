@@ -0,0 +1,296 @@
+import heapq
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+
+from utils.omdb_cache import OMDbCache
+
+# Sorts after every character a title can contain, so [prefix, prefix + END) spans the prefix's keys.
+END = '\U0010ffff'
+# Items a background build handles between two pauses, and the length of the runs it sorts.
+PAUSE_EVERY = 1024
+SORT_RUN = 4096
+
+
+def release_gil():
+    """Let other threads run; background builds call it between small steps."""
+    time.sleep(0)
+
+
+def _pausing(iterable, pause):
+    """Iterate, calling pause() every PAUSE_EVERY items; plain iteration when pause is None."""
+    if pause is None:
+        yield from iterable
+        return
+    for i, item in enumerate(iterable, 1):
+        if i % PAUSE_EVERY == 0:
+            pause()
+        yield item
+
+
+def _sorted(items, pause):
+    """
+    sorted(items). With `pause`, short runs are sorted and merged instead, so
+    no single call holds the GIL for long.
+    """
+    if pause is None:
+        return sorted(items)
+    items = list(items)
+    runs = []
+    for start in range(0, len(items), SORT_RUN):
+        runs.append(sorted(items[start:start + SORT_RUN]))
+        pause()
+    return list(_pausing(heapq.merge(*runs), pause))
+
+
+class PrefixIndex:
+    """
+    Titles sorted by their OMDbCache key, for prefix search ranked by popularity.
+    The keys of a prefix form one slice of the sorted list; a segment tree
+    over the popularity counts finds the most popular title of any slice in
+    O(log n), so the top `limit` matches cost O(limit log n) however many
+    titles share the prefix. Popularity changes update the tree in place.
+    Titles added after the build wait in a small sorted overflow list that
+    searches scan, until merge_overflow rebuilds the tree with them.
+    Writers must be serialized by the caller; searches need no lock.
+    Builds in a background thread pass `pause` (e.g. release_gil), called
+    every few thousand items so requests are not held up by the GIL.
+    """
+
+    def __init__(self, titles=(), overflow_limit=1000, pause=None):
+        self.overflow_limit = overflow_limit
+        merged = {}
+        for title, count in _pausing(titles, pause):
+            key = OMDbCache.normalize(title)
+            if not key:
+                continue
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = [title, count]
+            else:
+                entry[1] += count
+        keys = _sorted(merged, pause)
+        titles = [merged[key][0] for key in _pausing(keys, pause)]
+        counts = [merged[key][1] for key in _pausing(keys, pause)]
+        self._state = self._build(keys, titles, counts, pause)
+
+    @staticmethod
+    def _build(keys, titles, counts, pause=None):
+        """
+        The state searches read in one go: keys, titles, counts, the tree and
+        its leaf offset, and an empty overflow ({key: [title, count]} and its
+        sorted keys). Tree nodes hold the position of their most popular leaf;
+        padding leaves point at a sentinel count past the last title.
+        """
+        size = 1
+        while size < len(keys):
+            size *= 2
+        counts = array('I', counts)
+        counts.append(0)
+        tree = array('i', [0]) * size
+        tree.extend(range(len(keys)))
+        tree.extend([len(keys)] * (size - len(keys)))
+        level = size
+        while level > 1:
+            children = tree[level:2 * level]
+            tree[level // 2:level] = array('i', [
+                right if counts[right] > counts[left] else left
+                for left, right in _pausing(zip(children[::2], children[1::2]), pause)
+            ])
+            level //= 2
+        return keys, titles, counts, tree, size, {}, []
+
+    def __len__(self):
+        return len(self._state[0]) + len(self._state[6])
+
+    def nbytes(self):
+        """Approximate memory held by the tree: its lists, arrays and every key and title string."""
+        keys, titles, counts, tree = self._state[:4]
+        return (sum(sys.getsizeof(container) for container in (keys, titles, counts, tree))
+                + sum(map(sys.getsizeof, keys)) + sum(map(sys.getsizeof, titles)))
+
+    def overflowing(self):
+        """True when the overflow list has outgrown `overflow_limit` and should be merged."""
+        return len(self._state[6]) > self.overflow_limit
+
+    def add(self, title, count=1):
+        """Count `count` more users owning a title, adding the title if it is new."""
+        key = OMDbCache.normalize(title)
+        if not key:
+            return
+        keys, _, counts, tree, size, overflow, overflow_keys = self._state
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            counts[position] += count
+            node = (position + size) // 2
+            while node:
+                left, right = tree[2 * node], tree[2 * node + 1]
+                tree[node] = right if counts[right] > counts[left] else left
+                node //= 2
+        elif key in overflow:
+            overflow[key][1] += count
+        else:
+            overflow[key] = [title, count]
+            insort(overflow_keys, key)
+
+    def merge_overflow(self, pause=None):
+        """Rebuild the tree with the overflow titles; searches use the old state until it is swapped in."""
+        keys, titles, counts, _, _, overflow, overflow_keys = self._state
+        additions = sorted((key, *overflow[key]) for key in overflow_keys)
+        merged = list(_pausing(heapq.merge(zip(keys, titles, counts), additions), pause))
+        columns = [[row[column] for row in _pausing(merged, pause)] for column in range(3)]
+        self._state = self._build(*columns, pause)
+
+    def search(self, prefix, limit=10):
+        """The `limit` most popular titles starting with `prefix`, as (title, popularity) pairs."""
+        key = OMDbCache.normalize(prefix)
+        if not key or limit < 1:
+            return []
+        keys, titles, counts, tree, size, overflow, overflow_keys = self._state
+
+        def most_popular(lo, hi):
+            """Position of the most popular title in keys[lo:hi], the first one on ties."""
+            best = -1
+            lo += size
+            hi += size
+            while lo < hi:
+                if lo & 1:
+                    best = _better(counts, best, tree[lo])
+                    lo += 1
+                if hi & 1:
+                    hi -= 1
+                    best = _better(counts, best, tree[hi])
+                lo //= 2
+                hi //= 2
+            return best
+
+        matches = []
+        ranges = []
+        lo, hi = bisect_left(keys, key), bisect_left(keys, key + END)
+        if lo < hi:
+            best = most_popular(lo, hi)
+            ranges.append((-counts[best], best, lo, hi))
+        while ranges and len(matches) < limit:
+            negative_count, best, lo, hi = heapq.heappop(ranges)
+            matches.append((-negative_count, keys[best], titles[best]))
+            for part_lo, part_hi in ((lo, best), (best + 1, hi)):
+                if part_lo < part_hi:
+                    part_best = most_popular(part_lo, part_hi)
+                    heapq.heappush(ranges, (-counts[part_best], part_best, part_lo, part_hi))
+
+        start, stop = bisect_left(overflow_keys, key), bisect_left(overflow_keys, key + END)
+        for overflow_key in overflow_keys[start:stop]:
+            title, count = overflow[overflow_key]
+            matches.append((count, overflow_key, title))
+        matches.sort(key=lambda match: (-match[0], match[1]))
+        return [(title, count) for count, _, title in matches[:limit]]
+
+
+def _better(counts, a, b):
+    """The more popular of two positions; the earlier one, so the alphabetically first title, on ties."""
+    if a < 0:
+        return b
+    if counts[b] > counts[a] or (counts[b] == counts[a] and b < a):
+        return b
+    return a
+
+
+class TitleAutocomplete:
+    """
+    Title suggestions for the add-movie form, from a PrefixIndex of every
+    title in the movies table (ranked by how many users own it), in
+    omdb_titles and in the OMDb cache. The index is loaded on first use; after
+    that, movies added since the last check, by any worker process, are
+    counted in at most every `refresh_interval` seconds. Deleted movies and
+    users and edited titles only leave the counts when the index is loaded
+    again, every `rebuild_interval` seconds. Reloads and merges of a full
+    overflow list run in background threads while requests keep searching the
+    current index; a reloaded index is swapped in when it is complete.
+    `load` must therefore work outside the request that passed it.
+    """
+
+    def __init__(self, refresh_interval=1.0, cached_titles=None, overflow_limit=1000, rebuild_interval=300.0):
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.cached_titles = cached_titles
+        self.overflow_limit = overflow_limit
+        self.index = None
+        self.last_movie_id = None
+        self._checked_at = 0.0
+        self._loaded_at = 0.0
+        self._rebuild = None
+        self._lock = threading.Lock()
+
+    def due(self):
+        """True when the index has to be loaded or checked for new movies."""
+        return self.index is None or time.monotonic() - self._checked_at >= self.refresh_interval
+
+    def refresh(self, load):
+        """
+        Load the index, or count in the movies added since the last refresh and
+        start a background reload when one is due.
+        `load(after_movie_id)` is the data manager's get_title_popularity.
+        """
+        if not self._lock.acquire(blocking=self.index is None):
+            return
+        try:
+            if not self.due():
+                return
+            now = time.monotonic()
+            if self.index is None:
+                self.index, self.last_movie_id = self._build(load)
+                self._loaded_at = now
+            else:
+                if now - self._loaded_at >= self.rebuild_interval and self._rebuild is None:
+                    self._rebuild = threading.Thread(
+                        target=self._reload, args=(load,), name='autocomplete-rebuild', daemon=True
+                    )
+                    self._rebuild.start()
+                titles, last_movie_id = load(self.last_movie_id)
+                for title, count in titles:
+                    self.index.add(title, count)
+                self.last_movie_id = last_movie_id
+            self._checked_at = now
+            if self.index.overflowing():
+                threading.Thread(target=self._merge, name='autocomplete-merge', daemon=True).start()
+        finally:
+            self._lock.release()
+
+    def join(self, timeout=None):
+        """Wait for a background reload to finish."""
+        rebuild = self._rebuild
+        if rebuild is not None:
+            rebuild.join(timeout)
+
+    def _build(self, load, pause=None):
+        """A new PrefixIndex of every known title, and the highest movie ID it counts."""
+        titles, last_movie_id = load(None)
+        cached = self.cached_titles() if self.cached_titles else []
+        titles = list(titles) + [(title, 0) for title in cached]
+        return PrefixIndex(titles, self.overflow_limit, pause), last_movie_id
+
+    def _reload(self, load):
+        try:
+            index, last_movie_id = self._build(load, release_gil)
+        except Exception as e:
+            print(f"Error reloading autocomplete index: {e}")
+            index = None
+        with self._lock:
+            if index is not None:
+                # Movies added while building are counted in by the next refresh.
+                self.index, self.last_movie_id = index, last_movie_id
+                self._checked_at = 0.0
+            self._loaded_at = time.monotonic()
+            self._rebuild = None
+
+    def _merge(self):
+        with self._lock:
+            self.index.merge_overflow(release_gil)
+
+    def search(self, prefix, limit=10):
+        """Suggestions for a prefix as [{'title': ..., 'popularity': ...}], most popular first."""
+        if self.index is None:
+            return []
+        return [{'title': title, 'popularity': count} for title, count in self.index.search(prefix, limit)]
@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCacheBackend:
+    """
+    In-process LRU cache with optional per-entry TTL.
+    Generation counters are kept outside the LRU so they are never evicted.
+    Entries are local to one process; use RedisCacheBackend to share them
+    between workers.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (value, None if ttl is None else time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def get_counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+class RedisCacheBackend:
+    """
+    Cache backend for any Redis-compatible client (get/set/delete/incr).
+    Values are stored as JSON so every worker can read them.
+    """
+
+    def __init__(self, client, prefix='moviweb:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def incr(self, key):
+        return int(self.client.incr(self.prefix + key))
+
+    def get_counter(self, key):
+        raw = self.client.get(self.prefix + key)
+        return 0 if raw is None else int(raw)
+
+    @classmethod
+    def from_url(cls, url, prefix='moviweb:'):
+        """Connect with redis-py. The redis package is only needed for this backend."""
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The redis package is required for CACHE_BACKEND=redis.") from e
+        return cls(redis.Redis.from_url(url), prefix=prefix)
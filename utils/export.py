@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+import zlib
+
+from flask import Response, request, stream_with_context
+
+EXPORT_FIELDS = ('movie_id', 'title', 'director', 'year', 'rating')
+CHUNK_SIZE = 64 * 1024
+
+
+def csv_chunks(rows, fields=EXPORT_FIELDS, chunk_size=CHUNK_SIZE):
+    """Encode rows as CSV with a header line, yielding text chunks of about chunk_size characters."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def ndjson_chunks(rows, fields=EXPORT_FIELDS, chunk_size=CHUNK_SIZE):
+    """Encode rows as one JSON object per line, yielding text chunks of about chunk_size characters."""
+    lines = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(fields, row)), ensure_ascii=False) + '\n'
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(lines)
+            lines = []
+            size = 0
+    yield ''.join(lines)
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress a stream of text chunks into a gzip stream."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', csv_chunks),
+    'ndjson': ('application/x-ndjson', ndjson_chunks),
+}
+
+
+def export_response(rows, fmt, filename):
+    """
+    Stream rows as a CSV or NDJSON download.
+    The body is produced while it is sent, so memory use does not depend on
+    the number of rows. It is gzip-compressed when the client accepts gzip,
+    unless the request has ?gzip=0.
+    """
+    mimetype, encode = EXPORT_FORMATS[fmt]
+    chunks = encode(rows)
+    headers = {
+        'Content-Disposition': f'attachment; filename="{filename}.{fmt}"',
+        'Vary': 'Accept-Encoding'
+    }
+    if request.accept_encodings['gzip'] and request.args.get('gzip') != '0':
+        chunks = gzip_chunks(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
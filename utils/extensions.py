@@ -1,3 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from utils.replicas import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
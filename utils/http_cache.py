@@ -0,0 +1,46 @@
+import hashlib
+from datetime import datetime, timezone
+
+from flask import make_response, request, session
+
+
+def make_etag(*parts):
+    """Strong ETag value derived from everything a rendered page depends on."""
+    return hashlib.sha1('\x1f'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def conditional_page(etag, updated_at, render, cache=None):
+    """
+    Answer a GET for a page identified by `etag`.
+    Returns 304 without rendering when the client already has this version,
+    serves the HTML from `cache` when another client rendered it, and only
+    calls render() otherwise. Pages with pending flash messages are rendered
+    fresh and not cached, since they differ per visit.
+    """
+    if session.get('_flashes'):
+        return make_response(render())
+
+    last_modified = datetime.fromtimestamp(updated_at, timezone.utc) if updated_at else None
+    if _not_modified(etag, last_modified):
+        response = make_response('', 304)
+    else:
+        html = cache.get(etag) if cache is not None else None
+        if html is None:
+            html = render()
+            if cache is not None:
+                cache.set(etag, html)
+        response = make_response(html)
+
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
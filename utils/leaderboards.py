@@ -0,0 +1,92 @@
+import threading
+import time
+
+from data_managers.leaderboards import LEADERBOARD_SIZE, MIN_RATINGS
+from utils.extensions import db
+
+
+class LeaderboardRefresher:
+    """
+    Background thread folding the leaderboard change log into the title totals
+    and re-ranking the snapshots every `interval` seconds. Writes only append
+    to the log, so a burst of imports costs one refresh.
+    """
+
+    def __init__(self, app, data_manager, interval=60.0, size=LEADERBOARD_SIZE, min_ratings=MIN_RATINGS):
+        self.app = app
+        self.data_manager = data_manager
+        self.interval = interval
+        self.size = size
+        self.min_ratings = min_ratings
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name='leaderboards', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        with self.app.app_context():
+            while not self._stopping.is_set():
+                try:
+                    self.data_manager.refresh_leaderboards(size=self.size, min_ratings=self.min_ratings)
+                except Exception as e:
+                    print(f"Error refreshing leaderboards: {e}")
+                finally:
+                    db.session.remove()
+                self._stopping.wait(self.interval)
+
+
+class LeaderboardCache:
+    """
+    The leaderboard snapshots held in memory for the leaderboard pages.
+    At most every `refresh_interval` seconds the snapshot versions are read
+    back, and only boards a refresh has re-ranked since, in any process, are
+    loaded again. Requests never wait for a check once the boards are loaded.
+    """
+
+    def __init__(self, refresh_interval=5.0):
+        self.refresh_interval = refresh_interval
+        self.boards = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def due(self):
+        """True when the boards have to be loaded or checked for a newer snapshot."""
+        return self.boards is None or time.monotonic() - self._checked_at >= self.refresh_interval
+
+    def refresh(self, load):
+        """Reload changed boards. `load(versions)` is the data manager's get_leaderboards."""
+        if not self._lock.acquire(blocking=self.boards is None):
+            return
+        try:
+            if not self.due():
+                return
+            boards = self.boards or {}
+            snapshots = load({board: snapshot['version'] for board, snapshot in boards.items()})
+            for board, snapshot in snapshots.items():
+                if snapshot['entries'] is None:
+                    snapshot['entries'] = boards[board]['entries']
+            self.boards = snapshots
+            self._checked_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def get(self, board):
+        """{'computed_at', 'entries'} of a board; computed_at is None before the first refresh."""
+        snapshot = (self.boards or {}).get(board)
+        if snapshot is None:
+            return {'computed_at': None, 'entries': []}
+        return snapshot
+
+    def ages(self):
+        """Seconds since each board was last brought up to date."""
+        now = time.time()
+        return {board: now - snapshot['computed_at'] for board, snapshot in (self.boards or {}).items()}
@@ -0,0 +1,277 @@
+import json
+import threading
+import time
+
+from sqlalchemy import delete, exists, or_, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from models.lookup_job import LookupJob, LookupRequest
+from models.user import User
+from utils.extensions import db
+from utils.omdb_api import movie_fields
+from utils.omdb_cache import OMDbCache
+
+
+class LookupQueue:
+    """
+    Persistent queue of OMDb lookups processed by background worker threads.
+    Jobs are stored in the application database, so pending lookups survive a
+    restart. Requests for the same normalized title share one job, so one
+    upstream call serves every user who asked for that film, until the job is
+    older than `done_ttl` and the title is looked up again. Lookups skipped
+    because the OMDb quota is used up or the circuit is open are retried
+    after `retry_after` seconds. Workers delete finished requests and jobs
+    older than `done_ttl` every `purge_interval` seconds.
+    """
+
+    def __init__(self, data_manager, fetch, workers=2, poll_interval=1.0, batch_size=50,
+                 stale_after=300, done_ttl=86400, retry_after=60, purge_interval=3600):
+        self.data_manager = data_manager
+        self.fetch = fetch
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.stale_after = stale_after
+        self.done_ttl = done_ttl
+        self.retry_after = retry_after
+        self.purge_interval = purge_interval
+        self._purged_at = 0.0
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self, app):
+        """Requeue work interrupted by a restart and start the worker threads."""
+        if self._threads:
+            return
+        with app.app_context():
+            self.requeue_stale()
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, args=(app,), name=f"lookup-worker-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=5):
+        """Ask the worker threads to finish and wait for them."""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def requeue_stale(self):
+        """Put jobs and requests stuck in 'running' for longer than `stale_after` back to pending."""
+        cutoff = time.time() - self.stale_after
+        for model in (LookupJob, LookupRequest):
+            db.session.execute(
+                update(model)
+                .where(model.status == 'running', model.updated_at < cutoff)
+                .values(status='pending')
+            )
+        db.session.commit()
+
+    def enqueue(self, user_id, title):
+        """Queue a lookup of `title` for a user and return the request id."""
+        key = OMDbCache.normalize(title)
+        now = time.time()
+        for _ in range(2):
+            try:
+                job = db.session.scalars(select(LookupJob).where(LookupJob.title_key == key)).first()
+                if job is None:
+                    job = LookupJob(title_key=key, title=title, status='pending', updated_at=now)
+                    db.session.add(job)
+                elif job.status == 'failed' or (job.status == 'done' and job.updated_at < now - self.done_ttl):
+                    job.status = 'pending'
+                    job.updated_at = now
+                lookup = LookupRequest(
+                    job=job, user_id=int(user_id), title=title, status='pending',
+                    created_at=now, updated_at=now
+                )
+                db.session.add(lookup)
+                db.session.commit()
+                break
+            except IntegrityError:
+                db.session.rollback()
+        else:
+            raise RuntimeError(f"Could not queue lookup for '{title}'.")
+        self._wakeup.set()
+        return lookup.request_id
+
+    def get_request(self, request_id):
+        """Retrieve a lookup request by its ID."""
+        return db.session.get(LookupRequest, request_id)
+
+    def recent_for_user(self, user_id, since=3600, limit=10):
+        """Retrieve a user's most recent lookup requests."""
+        stmt = (
+            select(LookupRequest)
+            .where(LookupRequest.user_id == user_id, LookupRequest.created_at >= time.time() - since)
+            .order_by(LookupRequest.request_id.desc())
+            .limit(limit)
+        )
+        try:
+            return db.session.scalars(stmt).all()
+        except SQLAlchemyError as e:
+            print(f"Error retrieving lookups: {e}")
+            return []
+
+    def purge(self):
+        """
+        Delete finished requests and finished jobs not updated for `done_ttl`
+        seconds; jobs still referenced by a request are kept. Returns how many
+        rows were deleted.
+        """
+        cutoff = time.time() - self.done_ttl
+        finished = ('done', 'failed')
+        try:
+            removed = db.session.execute(
+                delete(LookupRequest)
+                .where(LookupRequest.status.in_(finished), LookupRequest.updated_at < cutoff)
+            ).rowcount
+            referenced = exists().where(LookupRequest.job_id == LookupJob.job_id)
+            removed += db.session.execute(
+                delete(LookupJob)
+                .where(LookupJob.status.in_(finished), LookupJob.updated_at < cutoff, ~referenced)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            print(f"Error purging lookups: {e}")
+            return 0
+        return removed
+
+    def run_once(self):
+        """Resolve one pending job and apply finished lookups. Returns True if work was done."""
+        job_id = self._claim_job()
+        if job_id is not None:
+            self._resolve(job_id)
+        applied = self._apply_requests()
+        return job_id is not None or applied > 0
+
+    def drain(self):
+        """Process queued work in the calling thread until nothing is left."""
+        while self.run_once():
+            pass
+
+    def _run(self, app):
+        """Worker loop: process jobs until stopped, sleeping when idle."""
+        with app.app_context():
+            while not self._stopping.is_set():
+                try:
+                    if time.time() - self._purged_at >= self.purge_interval:
+                        self._purged_at = time.time()
+                        self.purge()
+                    busy = self.run_once()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Lookup worker error: {e}")
+                    busy = False
+                finally:
+                    db.session.remove()
+                if not busy:
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+
+    def _claim(self, model, key, row_id, statuses=('pending',)):
+        """Atomically move a row from one of `statuses` to running. Returns True if this worker won it."""
+        result = db.session.execute(
+            update(model)
+            .where(key == row_id, model.status.in_(statuses))
+            .values(status='running', updated_at=time.time())
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    def _claim_job(self):
+        """Claim the oldest pending job, or job whose retry is due, if any."""
+        ready = or_(
+            LookupJob.status == 'pending',
+            (LookupJob.status == 'retry') & (LookupJob.updated_at <= time.time() - self.retry_after)
+        )
+        stmt = select(LookupJob.job_id).where(ready).order_by(LookupJob.job_id)
+        for job_id in db.session.scalars(stmt.limit(self.workers + 1)).all():
+            if self._claim(LookupJob, LookupJob.job_id, job_id, statuses=('pending', 'retry')):
+                return job_id
+        return None
+
+    def _resolve(self, job_id):
+        """
+        Call OMDb for a claimed job and store the outcome. A lookup skipped by
+        the quota or the circuit breaker is left to retry; one OMDb could not
+        answer fails with its own message rather than 'not found'.
+        """
+        from utils.omdb_client import CircuitOpenError, RateLimitedError
+
+        job = db.session.get(LookupJob, job_id)
+        error = None
+        try:
+            movie_data = self.fetch(job.title)
+        except (RateLimitedError, CircuitOpenError) as e:
+            print(f"Lookup of '{job.title}' postponed: {e}")
+            job.status = 'retry'
+            job.error = "OMDb is not taking lookups right now, retrying shortly."
+            job.updated_at = time.time()
+            db.session.commit()
+            return
+        except Exception as e:
+            movie_data = None
+            error = f"OMDb could not be reached to look up '{job.title}'. Please try again later."
+            print(f"Error looking up '{job.title}': {e}")
+        if movie_data:
+            try:
+                self.data_manager.save_omdb_titles([movie_data])
+            except Exception:
+                # Still add the movie, just without a link to a title row that was not saved.
+                movie_data = dict(movie_data, imdbID=None)
+        job.updated_at = time.time()
+        if movie_data:
+            job.status = 'done'
+            job.payload = json.dumps(movie_data)
+            job.error = None
+        else:
+            job.status = 'failed'
+            job.error = error or f"Movie '{job.title}' not found in OMDb."
+        db.session.commit()
+
+    def _apply_requests(self):
+        """Add finished lookups to the requesting users' collections."""
+        stmt = (
+            select(LookupRequest.request_id)
+            .join(LookupJob)
+            .where(LookupRequest.status == 'pending', LookupJob.status.in_(('done', 'failed')))
+            .order_by(LookupRequest.request_id)
+            .limit(self.batch_size)
+        )
+        applied = 0
+        for request_id in db.session.scalars(stmt).all():
+            if not self._claim(LookupRequest, LookupRequest.request_id, request_id):
+                continue
+            lookup = db.session.get(LookupRequest, request_id)
+            status, message = self._apply(lookup)
+            lookup.status = status
+            lookup.message = message
+            lookup.updated_at = time.time()
+            db.session.commit()
+            applied += 1
+        return applied
+
+    def _apply(self, lookup):
+        """Write one finished lookup through the data manager. Returns (status, message)."""
+        job = lookup.job
+        if job.status == 'failed':
+            return 'failed', job.error
+        if db.session.get(User, lookup.user_id) is None:
+            return 'failed', "User no longer exists."
+        fields = movie_fields(json.loads(job.payload))
+        try:
+            movie_id = self.data_manager.add_movie(user_id=lookup.user_id, **fields)
+        except Exception as e:
+            print(f"Error adding looked up movie '{fields['title']}': {e}")
+            return 'failed', f"Movie '{fields['title']}' could not be added."
+        if movie_id is None:
+            return 'failed', f"Movie '{fields['title']}' is already in the collection."
+        return 'done', f"Movie '{fields['title']}' has been added!"
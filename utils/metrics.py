@@ -0,0 +1,257 @@
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import uuid
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return '{' + pairs + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple((name, labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple((name, labels[name]) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Cumulative histogram with labels, rendered as Prometheus buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple((name, labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            counts = [c + (value <= bound) for c, bound in zip(counts, self.buckets)]
+            self._values[key] = (counts, total + value, count + 1)
+
+    def count(self, **labels):
+        key = tuple((name, labels[name]) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, (None, 0.0, 0))[2]
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    samples.append((f"{self.name}_bucket", key + (('le', _format_value(bound)),), bucket_count))
+                samples.append((f"{self.name}_bucket", key + (('le', '+Inf'),), count))
+                samples.append((f"{self.name}_sum", key, total))
+                samples.append((f"{self.name}_count", key, count))
+        return samples
+
+
+class Gauge:
+    """Value read from a callback at scrape time."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, callback):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def samples(self):
+        """The callback returns a number or a list of (labels dict, value) pairs."""
+        try:
+            result = self.callback()
+        except Exception as e:
+            print(f"Error collecting metric {self.name}: {e}")
+            return []
+        if isinstance(result, (int, float)):
+            return [(self.name, (), result)]
+        return [(self.name, tuple(sorted(labels.items())), value) for labels, value in result]
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, callback):
+        with self._lock:
+            self._metrics[name] = Gauge(name, documentation, callback)
+            return self._metrics[name]
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+http_request_seconds = registry.histogram(
+    'http_request_duration_seconds', 'Request latency by route.', ('method', 'route', 'status')
+)
+sql_queries_per_request = registry.histogram(
+    'sql_queries_per_request', 'SQL statements executed per request.', ('route',), QUERY_COUNT_BUCKETS
+)
+sql_seconds_per_request = registry.histogram(
+    'sql_seconds_per_request', 'Time spent in SQL per request.', ('route',)
+)
+sql_queries_total = registry.counter('sql_queries_total', 'SQL statements executed.')
+omdb_request_seconds = registry.histogram(
+    'omdb_request_duration_seconds', 'OMDb API call latency by outcome.', ('outcome',)
+)
+
+
+def _route():
+    """Label for the current request: the URL rule, not the concrete path."""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def instrument_engine(engine):
+    """Count and time every SQL statement run on an engine."""
+    if getattr(engine, '_metrics_instrumented', False):
+        return
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        sql_queries_total.inc()
+        if has_request_context() and 'sql_count' in g:
+            g.sql_count += 1
+            g.sql_seconds += elapsed
+
+    engine._metrics_instrumented = True
+
+
+def init_app(app, engine, profile_dir=None):
+    """
+    Record per-route latency and SQL usage, and serve them at /metrics.
+    When PROFILING_ENABLED is set, a request carrying an X-Profile header is
+    run under cProfile and its report is written to `profile_dir`, or to the
+    PROFILE_DIR config value. The response names the report by id only, so
+    clients never see server paths.
+    """
+    instrument_engine(engine)
+
+    @app.before_request
+    def start_request_metrics():
+        g.request_start = time.perf_counter()
+        g.sql_count = 0
+        g.sql_seconds = 0.0
+        if app.config.get('PROFILING_ENABLED') and request.headers.get('X-Profile'):
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'request_start' not in g:
+            return response
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            directory = profile_dir or app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+            response.headers['X-Profile-Report'] = _write_profile(profiler, directory)
+        route = _route()
+        http_request_seconds.observe(
+            time.perf_counter() - g.request_start,
+            method=request.method, route=route, status=str(response.status_code)
+        )
+        sql_queries_per_request.observe(g.sql_count, route=route)
+        sql_seconds_per_request.observe(g.sql_seconds, route=route)
+        response.headers['X-SQL-Queries'] = str(g.sql_count)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        """Expose collected metrics in the Prometheus text format."""
+        return registry.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+def _write_profile(profiler, profile_dir):
+    """
+    Dump a cProfile run as <id>.prof and a readable top-40 report as <id>.txt
+    in `profile_dir`. Returns the report id.
+    """
+    os.makedirs(profile_dir, exist_ok=True)
+    report_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint or 'unmatched'}-{uuid.uuid4().hex[:8]}"
+    base = os.path.join(profile_dir, report_id)
+    profiler.dump_stats(base + '.prof')
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(40)
+    with open(base + '.txt', 'w') as f:
+        f.write(report.getvalue())
+    return report_id
@@ -1,26 +1,158 @@
-import requests
-import dotenv
+import functools
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+from utils.omdb_cache import OMDbCache, DEFAULT_CACHE_PATH
+from utils.omdb_quota import DEFAULT_QUOTA_PATH, OMDbQuota
+from utils.metrics import omdb_request_seconds
+from utils.title_index import DEFAULT_INDEX_PATH, TitleIndex
 
-dotenv.load_dotenv()
-API_KEY = os.getenv('API_KEY')
+IMPORT_WORKERS = int(os.getenv('OMDB_IMPORT_WORKERS', 8))
 
-def fetch_movie_details(movie_title):
+# Built on first use, so importing this module neither opens the cache file
+# nor imports requests. Tests replace them with monkeypatch.
+omdb_cache = None
+omdb_client = None
+omdb_quota = None
+title_index = None
+_init_lock = threading.RLock()
+
+
+def get_omdb_cache():
+    """The shared OMDb response cache, configured from the environment on first use."""
+    global omdb_cache
+    with _init_lock:
+        if omdb_cache is None:
+            omdb_cache = OMDbCache(
+                path=os.getenv('OMDB_CACHE_PATH', DEFAULT_CACHE_PATH),
+                ttl=int(os.getenv('OMDB_CACHE_TTL', 86400)),
+                negative_ttl=int(os.getenv('OMDB_CACHE_NEGATIVE_TTL', 3600)),
+                max_entries=int(os.getenv('OMDB_CACHE_SIZE', 1024)),
+                purge_interval=int(os.getenv('OMDB_CACHE_PURGE_INTERVAL', 3600))
+            )
+        return omdb_cache
+
+
+def get_omdb_quota():
+    """
+    The OMDb call quota shared by every worker process, configured from the
+    environment on first use. None when OMDB_RATE_LIMIT is 0.
+    """
+    global omdb_quota
+    with _init_lock:
+        if omdb_quota is None and float(os.getenv('OMDB_RATE_LIMIT', 5)) > 0:
+            omdb_quota = OMDbQuota(
+                path=os.getenv('OMDB_QUOTA_PATH', DEFAULT_QUOTA_PATH),
+                rate=float(os.getenv('OMDB_RATE_LIMIT', 5)),
+                burst=int(os.getenv('OMDB_BURST', 10)),
+                daily_limit=int(os.getenv('OMDB_DAILY_LIMIT', 1000))
+            )
+        return omdb_quota
+
+
+def get_title_index():
+    """
+    The offline title index at TITLE_INDEX_PATH, opened on first use.
+    None when no index has been built there or TITLE_INDEX_PATH is empty.
+    """
+    global title_index
+    with _init_lock:
+        if title_index is None:
+            path = os.getenv('TITLE_INDEX_PATH', DEFAULT_INDEX_PATH)
+            if path and os.path.exists(path):
+                title_index = TitleIndex(path)
+        return title_index
+
+
+def get_omdb_client():
+    """The shared OMDb client, configured from the environment on first use."""
+    global omdb_client
+    with _init_lock:
+        if omdb_client is None:
+            from utils.omdb_client import OMDbClient
+            omdb_client = OMDbClient(
+                api_key=os.getenv('API_KEY'),
+                base_url=os.getenv('OMDB_API_URL', 'http://www.omdbapi.com/'),
+                pool_size=int(os.getenv('OMDB_POOL_SIZE', 20)),
+                max_retries=int(os.getenv('OMDB_MAX_RETRIES', 2)),
+                governor=get_omdb_quota()
+            )
+        return omdb_client
+
+
+def fetch_movie_details(movie_title, priority='interactive', raise_errors=False):
     """
     Loads movie data from OMDb API using the movie title.
     Returns dictionary with movie data or None if error.
+    Titles in the offline title index are answered from it without calling
+    OMDb. Results, including 'not found', are served from the cache when possible.
+    `priority` is the quota class of the call: 'interactive', 'bulk' or 'background'.
+    With `raise_errors`, a failed call raises its RequestException instead of
+    returning None, so callers can tell it from a title OMDb does not know.
     """
-    api_url = f"http://www.omdbapi.com/?apikey={API_KEY}&t={movie_title}"
+    import requests
+
+    index = get_title_index()
+    if index is not None:
+        data = index.get(movie_title)
+        if data is not None:
+            return data
+
+    cache = get_omdb_cache()
+    cached = cache.get(movie_title)
+    if cached is not OMDbCache.MISS:
+        return cached
+
+    start = time.perf_counter()
     try:
-        response = requests.get(api_url, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-        if data["Response"] == "True":
+        data = get_omdb_client().get_movie(movie_title, priority=priority)
+        if data:
+            omdb_request_seconds.observe(time.perf_counter() - start, outcome='found')
+            cache.set(movie_title, data)
             return data
         else:
+            omdb_request_seconds.observe(time.perf_counter() - start, outcome='not_found')
             print("Movie not found!")
+            cache.set_not_found(movie_title)
             return None
     except requests.exceptions.RequestException as e:
+        omdb_request_seconds.observe(time.perf_counter() - start, outcome='error')
+        if raise_errors:
+            raise
         print("Connection error:", e)
         return None
+
+
+def movie_fields(movie_data):
+    """
+    Map an OMDb payload to the fields stored for a movie.
+    Unrated titles ('N/A') get no rating, so they stay out of averages and sort last.
+    """
+    try:
+        rating = float(movie_data.get('imdbRating'))
+    except (TypeError, ValueError):
+        rating = None
+    return {
+        'title': movie_data.get('Title'),
+        'year': movie_data.get('Year') or "",
+        'director': movie_data.get('Director') or "",
+        'rating': rating,
+        'imdb_id': movie_data.get('imdbID')
+    }
+
+
+def fetch_many_movie_details(movie_titles, max_workers=None, priority='bulk'):
+    """
+    Loads movie data for several titles concurrently with a bounded thread pool.
+    Returns a dictionary mapping each title to its movie data or None.
+    Calls use the 'bulk' quota class, so they yield to interactive lookups.
+    """
+    titles = list(dict.fromkeys(movie_titles))
+    if not titles:
+        return {}
+    workers = min(max_workers or IMPORT_WORKERS, len(titles))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        fetch = functools.partial(fetch_movie_details, priority=priority)
+        return dict(zip(titles, executor.map(fetch, titles)))
@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+import httpx
+import requests
+
+from utils.omdb_api import get_omdb_cache, get_title_index
+from utils.omdb_cache import OMDbCache
+from utils.omdb_client import (
+    CircuitBreaker, OMDbClient, RateLimitedError, RETRY_STATUSES, _limit_reached, _retry_after
+)
+from utils.metrics import omdb_request_seconds
+
+
+class AsyncOMDbClient:
+    """
+    asyncio counterpart of OMDbClient on a pooled httpx.AsyncClient.
+    Same retries, backoff, circuit breaker and shared quota, but waiting for
+    OMDb, for a backoff or for a quota token suspends the coroutine, so one
+    event loop keeps many slow lookups in flight without a thread for each.
+    The client belongs to the event loop it is first used on.
+    """
+
+    backoff = OMDbClient.backoff
+
+    def __init__(self, api_key=None, base_url='http://www.omdbapi.com/', timeout=(3.05, 5),
+                 pool_size=100, max_retries=2, backoff_base=0.2, backoff_max=2.0,
+                 breaker=None, governor=None, sleep=asyncio.sleep):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.governor = governor
+        self.sleep = sleep
+        connect_timeout, read_timeout = timeout
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def get_movie(self, title, priority='interactive'):
+        """
+        Look a movie up by title.
+        Returns the OMDb payload, or None if OMDb does not know the title.
+        Raises httpx.HTTPError if OMDb cannot be reached, and RateLimitedError
+        if the quota has no call left for `priority`.
+        """
+        data = await self.request({'t': title}, priority=priority)
+        if data.get('Response') == 'True':
+            return data
+        return None
+
+    async def request(self, params, priority='interactive'):
+        """Send a query to OMDb with retries and return the decoded JSON."""
+        params = dict(params, apikey=self.api_key)
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                granted = self.governor is None or await self.governor.acquire_async(priority)
+            except BaseException:
+                self.breaker.cancel_call()
+                raise
+            if not granted:
+                self.breaker.cancel_call()
+                raise RateLimitedError(f"OMDb quota exhausted for {priority} lookups, skipping request.")
+            try:
+                response = await self.client.get(self.base_url, params=params)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                await self.sleep(self.backoff(attempt))
+                attempt += 1
+                continue
+            except httpx.HTTPError:
+                self.breaker.record_failure()
+                raise
+
+            if response.status_code in RETRY_STATUSES:
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    response.raise_for_status()
+                await self.sleep(self.backoff(attempt, _retry_after(response)))
+                attempt += 1
+                continue
+
+            if response.status_code == 401 and self.governor is not None and _limit_reached(response):
+                await asyncio.to_thread(self.governor.exhaust)
+            self.breaker.record_success()
+            response.raise_for_status()
+            return response.json()
+
+
+async def fetch_movie_details_async(client, movie_title, priority='interactive'):
+    """
+    fetch_movie_details for asyncio code, looking titles up with an AsyncOMDbClient.
+    Shares the title index and the response cache of the sync mode; the
+    index is memory-mapped and searched in microseconds, while the cache's
+    SQLite file is read and written in a worker thread so the event loop
+    never blocks on disk.
+    """
+    index = get_title_index()
+    if index is not None:
+        data = index.get(movie_title)
+        if data is not None:
+            return data
+
+    cache = get_omdb_cache()
+    cached = await asyncio.to_thread(cache.get, movie_title)
+    if cached is not OMDbCache.MISS:
+        return cached
+
+    start = time.perf_counter()
+    try:
+        data = await client.get_movie(movie_title, priority=priority)
+        if data:
+            omdb_request_seconds.observe(time.perf_counter() - start, outcome='found')
+            await asyncio.to_thread(cache.set, movie_title, data)
+            return data
+        else:
+            omdb_request_seconds.observe(time.perf_counter() - start, outcome='not_found')
+            print("Movie not found!")
+            await asyncio.to_thread(cache.set_not_found, movie_title)
+            return None
+    except (httpx.HTTPError, requests.exceptions.RequestException) as e:
+        omdb_request_seconds.observe(time.perf_counter() - start, outcome='error')
+        print("Connection error:", e)
+        return None
+
+
+async def fetch_many_movie_details_async(client, movie_titles, priority='bulk'):
+    """Look several titles up at once; returns a dictionary mapping each title to its movie data or None."""
+    titles = list(dict.fromkeys(movie_titles))
+    results = await asyncio.gather(*(fetch_movie_details_async(client, title, priority) for title in titles))
+    return dict(zip(titles, results))
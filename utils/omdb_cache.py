@@ -0,0 +1,194 @@
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_PATH = os.path.join(BASE_DIR, 'instance', 'omdb_cache.db')
+
+
+class OMDbCache:
+    """
+    Two-level cache for OMDb responses.
+    An in-process LRU sits in front of a SQLite table on disk, so lookups
+    survive restarts and are shared between worker processes.
+    'Movie not found' results are cached as well, with a shorter TTL.
+    Expired rows are deleted from disk every `purge_interval` seconds on write.
+    """
+
+    MISS = object()
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=86400, negative_ttl=3600, max_entries=1024,
+                 purge_interval=3600):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.purge_interval = purge_interval
+        self._purged_at = time.time()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._init_db()
+
+    @staticmethod
+    def normalize(title):
+        """Return the cache key for a movie title."""
+        return ' '.join((title or '').split()).lower()
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Open a connection to the on-disk store, commit on success and always close it."""
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        """Create the cache table if it does not exist yet."""
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS omdb_cache ("
+                "key TEXT PRIMARY KEY, payload TEXT, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, title):
+        """
+        Return the cached payload for a title.
+        None means a cached 'not found', OMDbCache.MISS means no valid entry.
+        """
+        key = self.normalize(title)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                payload, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return payload
+                del self._entries[key]
+
+        row = self._load(key, now)
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return self.MISS
+            payload, expires_at = row
+            self._remember(key, payload, expires_at)
+            self.hits += 1
+            return payload
+
+    def set(self, title, payload):
+        """Cache an OMDb payload for a title."""
+        self._store(title, payload, self.ttl)
+
+    def set_not_found(self, title):
+        """Cache a 'not found' result for a title."""
+        self._store(title, None, self.negative_ttl)
+
+    def clear(self):
+        """Drop all entries from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+        if self.path is not None:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM omdb_cache")
+
+    def purge(self):
+        """Delete expired entries from memory and disk. Returns how many rows were removed from disk."""
+        now = time.time()
+        with self._lock:
+            self._purged_at = now
+            for key in [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]:
+                del self._entries[key]
+        if self.path is None:
+            return 0
+        try:
+            with self._connect() as conn:
+                return conn.execute("DELETE FROM omdb_cache WHERE expires_at <= ?", (now,)).rowcount
+        except sqlite3.Error as e:
+            print(f"Error purging OMDb cache: {e}")
+            return 0
+
+    def titles(self):
+        """Titles of the movies found by the cached, non-expired lookups."""
+        now = time.time()
+        if self.path is None:
+            with self._lock:
+                payloads = [payload for payload, expires_at in self._entries.values() if payload and expires_at > now]
+        else:
+            try:
+                with self._connect() as conn:
+                    payloads = [json.loads(payload) for payload, in conn.execute(
+                        "SELECT payload FROM omdb_cache WHERE payload IS NOT NULL AND expires_at > ?", (now,)
+                    )]
+            except sqlite3.Error as e:
+                print(f"Error reading OMDb cache: {e}")
+                return []
+        return [payload['Title'] for payload in payloads if payload.get('Title')]
+
+    def stats(self):
+        """Return hit/miss/eviction counters and the current LRU size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+            }
+
+    def _store(self, title, payload, ttl):
+        """Write an entry to both cache levels."""
+        key = self.normalize(title)
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, payload, expires_at)
+        if self.path is None:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO omdb_cache (key, payload, expires_at) VALUES (?, ?, ?)",
+                    (key, None if payload is None else json.dumps(payload), expires_at)
+                )
+        except sqlite3.Error as e:
+            print(f"Error writing OMDb cache: {e}")
+        if self.purge_interval and time.time() - self._purged_at >= self.purge_interval:
+            self.purge()
+
+    def _load(self, key, now):
+        """Read a non-expired entry from the on-disk store."""
+        if self.path is None:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT payload, expires_at FROM omdb_cache WHERE key = ? AND expires_at > ?",
+                    (key, now)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading OMDb cache: {e}")
+            return None
+        if row is None:
+            return None
+        payload, expires_at = row
+        return (None if payload is None else json.loads(payload)), expires_at
+
+    def _remember(self, key, payload, expires_at):
+        """Insert into the LRU, evicting the oldest entries. Caller holds the lock."""
+        self._entries[key] = (payload, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
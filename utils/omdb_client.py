@@ -0,0 +1,175 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+LIMIT_REACHED = 'Request limit reached!'
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised when OMDb is considered down and calls are short-circuited."""
+
+
+class RateLimitedError(requests.exceptions.RequestException):
+    """Raised when the shared OMDb quota has no call left for this request."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing service for a while.
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail immediately. Once `reset_timeout` seconds have passed a single trial
+    call is let through; success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call must not go through."""
+        with self._lock:
+            state = self._state()
+            if state == 'open' or (state == 'half-open' and self._trial_running):
+                raise CircuitOpenError("OMDb circuit is open, skipping request.")
+            if state == 'half-open':
+                self._trial_running = True
+
+    def cancel_call(self):
+        """Give back a call let through by before_call that was never made."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self._trial_running = False
+
+
+class OMDbClient:
+    """
+    Reusable OMDb API client.
+    Keeps a pooled keep-alive session, retries 429/5xx responses with jittered
+    exponential backoff and short-circuits calls while OMDb is down. With a
+    `governor` (an OMDbQuota) every HTTP attempt the circuit lets through takes
+    a token from the quota shared by all worker processes.
+    """
+
+    def __init__(self, api_key=None, base_url='http://www.omdbapi.com/', timeout=(3.05, 5),
+                 pool_size=20, max_retries=2, backoff_base=0.2, backoff_max=2.0,
+                 breaker=None, governor=None, sleep=time.sleep):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.governor = governor
+        self.sleep = sleep
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def close(self):
+        self.session.close()
+
+    def backoff(self, attempt, retry_after=None):
+        """Return the delay before retry number `attempt` (full jitter)."""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get_movie(self, title, priority='interactive'):
+        """
+        Look a movie up by title.
+        Returns the OMDb payload, or None if OMDb does not know the title.
+        Raises requests.exceptions.RequestException if OMDb cannot be reached,
+        and RateLimitedError if the quota has no call left for `priority`.
+        """
+        data = self.request({'t': title}, priority=priority)
+        if data.get('Response') == 'True':
+            return data
+        return None
+
+    def request(self, params, priority='interactive'):
+        """Send a query to OMDb with retries and return the decoded JSON."""
+        params = dict(params, apikey=self.api_key)
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            if self.governor is not None and not self.governor.acquire(priority):
+                self.breaker.cancel_call()
+                raise RateLimitedError(f"OMDb quota exhausted for {priority} lookups, skipping request.")
+            try:
+                response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            except requests.exceptions.ConnectionError:
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                self.sleep(self.backoff(attempt))
+                attempt += 1
+                continue
+            except requests.exceptions.RequestException:
+                self.breaker.record_failure()
+                raise
+
+            if response.status_code in RETRY_STATUSES:
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    response.raise_for_status()
+                self.sleep(self.backoff(attempt, _retry_after(response)))
+                attempt += 1
+                continue
+
+            if response.status_code == 401 and self.governor is not None and _limit_reached(response):
+                # OMDb counts calls from outside this app too; stop every worker for today.
+                self.governor.exhaust()
+            self.breaker.record_success()
+            response.raise_for_status()
+            return response.json()
+
+
+def _retry_after(response):
+    """Return the Retry-After header in seconds, if it is a number."""
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _limit_reached(response):
+    """Whether an OMDb error response says the API key's daily limit is used up."""
+    try:
+        return response.json().get('Error') == LIMIT_REACHED
+    except ValueError:
+        return False
@@ -0,0 +1,198 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+from utils.omdb_cache import BASE_DIR
+
+DEFAULT_QUOTA_PATH = os.path.join(BASE_DIR, 'instance', 'omdb_quota.db')
+
+# Lower numbers win. Each class may only spend its share of the daily quota,
+# so bulk imports and background jobs leave the rest for interactive adds.
+PRIORITIES = {'interactive': 0, 'bulk': 1, 'background': 2}
+DAILY_SHARES = {'interactive': 1.0, 'bulk': 0.9, 'background': 0.75}
+MAX_WAITS = {'interactive': 10.0, 'bulk': 30.0, 'background': 60.0}
+
+# How long a waiting caller keeps lower priorities away from the bucket after
+# its last attempt.
+WAITING_TTL = 0.5
+
+
+class OMDbQuota:
+    """
+    Token bucket limiting OMDb calls across threads and worker processes.
+    The bucket lives in a SQLite file shared by every process using the same
+    path: it refills at `rate` tokens per second up to `burst`, and at most
+    `daily_limit` calls are let through per UTC day (0 means no daily limit).
+    Callers name a priority class; when a call cannot go through, the caller
+    waits up to that class's bounded wait, and while a higher class is waiting
+    lower classes hold back so it gets the next token.
+    """
+
+    def __init__(self, path=DEFAULT_QUOTA_PATH, rate=5.0, burst=10, daily_limit=1000,
+                 daily_shares=None, max_waits=None, clock=time.time, sleep=time.sleep):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.daily_limit = daily_limit
+        self.daily_shares = dict(DAILY_SHARES, **(daily_shares or {}))
+        self.max_waits = dict(MAX_WAITS, **(max_waits or {}))
+        self.clock = clock
+        self.sleep = sleep
+        self.granted = {name: 0 for name in PRIORITIES}
+        self.denied = {name: 0 for name in PRIORITIES}
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self):
+        """Open a connection to the shared bucket, in autocommit mode so BEGIN IMMEDIATE is explicit."""
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def _init_db(self):
+        """Create the bucket table and its single row if they do not exist yet."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS omdb_quota ("
+                "id INTEGER PRIMARY KEY CHECK (id = 1), tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+                "day INTEGER NOT NULL, day_count INTEGER NOT NULL, "
+                "waiting_priority INTEGER, waiting_until REAL NOT NULL DEFAULT 0)"
+            )
+            now = self.clock()
+            conn.execute(
+                "INSERT OR IGNORE INTO omdb_quota (id, tokens, updated_at, day, day_count) VALUES (1, ?, ?, ?, 0)",
+                (float(self.burst), now, _day(now))
+            )
+        finally:
+            conn.close()
+
+    def try_acquire(self, priority='interactive', waiting=False):
+        """
+        Take one token for a call of the given priority class.
+        Returns 0 when the call may go ahead, otherwise the number of seconds
+        to wait before trying again (None when today's share is used up).
+        `waiting` records that the caller will retry, so lower classes yield.
+        """
+        rank = PRIORITIES[priority]
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            tokens, updated_at, day, day_count, waiting_priority, waiting_until = conn.execute(
+                "SELECT tokens, updated_at, day, day_count, waiting_priority, waiting_until "
+                "FROM omdb_quota WHERE id = 1"
+            ).fetchone()
+            now = self.clock()
+            tokens = min(float(self.burst), tokens + max(now - updated_at, 0.0) * self.rate)
+            if _day(now) != day:
+                day, day_count = _day(now), 0
+            if waiting_until <= now:
+                waiting_priority = None
+
+            if self.daily_limit and day_count >= self.daily_limit * self.daily_shares[priority]:
+                wait = None
+            elif waiting_priority is not None and waiting_priority < rank:
+                wait = max(waiting_until - now, 0.01)
+            elif tokens >= 1:
+                tokens -= 1
+                day_count += 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / self.rate if self.rate > 0 else None
+            if wait and waiting and (waiting_priority is None or rank <= waiting_priority):
+                until = now + wait + WAITING_TTL
+                waiting_until = max(waiting_until, until) if waiting_priority == rank else until
+                waiting_priority = rank
+
+            conn.execute(
+                "UPDATE omdb_quota SET tokens = ?, updated_at = ?, day = ?, day_count = ?, "
+                "waiting_priority = ?, waiting_until = ? WHERE id = 1",
+                (tokens, now, day, day_count, waiting_priority, waiting_until)
+            )
+            conn.execute("COMMIT")
+            return wait
+        finally:
+            conn.close()
+
+    def acquire(self, priority='interactive', max_wait=None):
+        """
+        Wait until a call of the given priority class may go ahead.
+        Gives up after `max_wait` seconds (the class default when None), or at
+        once when the class has used up today's share. Returns True if a
+        token was taken.
+        """
+        max_wait = self.max_waits[priority] if max_wait is None else max_wait
+        deadline = self.clock() + max_wait
+        while True:
+            wait = self.try_acquire(priority, waiting=max_wait > 0)
+            if wait == 0:
+                self._count(self.granted, priority)
+                return True
+            remaining = deadline - self.clock()
+            if wait is None or remaining <= 0:
+                self._count(self.denied, priority)
+                return False
+            self.sleep(min(wait, remaining))
+
+    async def acquire_async(self, priority='interactive', max_wait=None):
+        """
+        acquire() for asyncio code: the shared bucket is updated in a worker
+        thread and the wait for a token suspends the coroutine, not the loop.
+        """
+        max_wait = self.max_waits[priority] if max_wait is None else max_wait
+        deadline = self.clock() + max_wait
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, priority, max_wait > 0)
+            if wait == 0:
+                self._count(self.granted, priority)
+                return True
+            remaining = deadline - self.clock()
+            if wait is None or remaining <= 0:
+                self._count(self.denied, priority)
+                return False
+            await asyncio.sleep(min(wait, remaining))
+
+    def exhaust(self):
+        """Mark today's quota as used up, e.g. after OMDb itself refused a call."""
+        conn = self._connect()
+        try:
+            now = self.clock()
+            conn.execute(
+                "UPDATE omdb_quota SET day = ?, day_count = MAX(day_count, ?) WHERE id = 1",
+                (_day(now), self.daily_limit)
+            )
+        finally:
+            conn.close()
+
+    def remaining(self):
+        """Tokens currently in the bucket and calls left today (None without a daily limit)."""
+        conn = self._connect()
+        try:
+            tokens, updated_at, day, day_count = conn.execute(
+                "SELECT tokens, updated_at, day, day_count FROM omdb_quota WHERE id = 1"
+            ).fetchone()
+        finally:
+            conn.close()
+        now = self.clock()
+        tokens = min(float(self.burst), tokens + max(now - updated_at, 0.0) * self.rate)
+        if _day(now) != day:
+            day_count = 0
+        return {
+            'burst': tokens,
+            'daily': max(self.daily_limit - day_count, 0) if self.daily_limit else None
+        }
+
+    def stats(self):
+        """Calls granted and denied by this process, per priority class."""
+        with self._lock:
+            return {'granted': dict(self.granted), 'denied': dict(self.denied)}
+
+    def _count(self, counts, priority):
+        with self._lock:
+            counts[priority] += 1
+
+
+def _day(timestamp):
+    """Number of the UTC day a Unix timestamp falls on."""
+    return int(timestamp // 86400)
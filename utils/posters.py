@@ -0,0 +1,132 @@
+import io
+import os
+import re
+import threading
+
+from sqlalchemy import select, update
+
+from models.omdb_title import OMDbTitle
+from utils.extensions import db
+
+THUMBNAIL_SIZE = (120, 180)
+IMDB_ID = re.compile(r'^tt\d+$')
+
+
+def thumbnail_name(imdb_id):
+    """File name of a title's thumbnail in the poster directory."""
+    return f"{imdb_id}.jpg"
+
+
+def make_thumbnail(data, size=THUMBNAIL_SIZE):
+    """Shrink poster image bytes to fit in `size` and return them as JPEG."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert('RGB')
+        image.thumbnail(size)
+        output = io.BytesIO()
+        image.save(output, 'JPEG', quality=85, optimize=True)
+        return output.getvalue()
+
+
+def download(url, timeout=(3.05, 10)):
+    """Fetch a poster image and return its bytes."""
+    import requests
+
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.content
+
+
+class PosterWorker:
+    """
+    Background thread storing poster thumbnails of OMDb titles on local disk.
+    Picks titles whose thumbnail is pending, downloads the poster once per
+    film (not per user), resizes it and writes it to `directory` under the
+    title's imdbID.
+    """
+
+    def __init__(self, directory, fetch=download, interval=5.0, batch_size=20, size=THUMBNAIL_SIZE):
+        self.directory = directory
+        self.fetch = fetch
+        self.interval = interval
+        self.batch_size = batch_size
+        self.size = size
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self, app):
+        if self._thread is None and self.interval > 0:
+            with app.app_context():
+                db.session.execute(
+                    update(OMDbTitle).where(OMDbTitle.thumbnail_status == 'running').values(thumbnail_status='pending')
+                )
+                db.session.commit()
+            self._thread = threading.Thread(target=self._run, args=(app,), name='poster-worker', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run_once(self):
+        """Create the thumbnails of one batch of pending titles. Returns how many were processed."""
+        stmt = (
+            select(OMDbTitle.imdb_id, OMDbTitle.poster_url)
+            .where(OMDbTitle.thumbnail_status == 'pending')
+            .limit(self.batch_size)
+        )
+        processed = 0
+        for imdb_id, poster_url in db.session.execute(stmt).all():
+            if not self._claim(imdb_id):
+                continue
+            status = self._store(imdb_id, poster_url)
+            db.session.execute(
+                update(OMDbTitle).where(OMDbTitle.imdb_id == imdb_id).values(thumbnail_status=status)
+            )
+            db.session.commit()
+            processed += 1
+        return processed
+
+    def _claim(self, imdb_id):
+        """Atomically move a title from pending to running. Returns True if this worker won it."""
+        result = db.session.execute(
+            update(OMDbTitle)
+            .where(OMDbTitle.imdb_id == imdb_id, OMDbTitle.thumbnail_status == 'pending')
+            .values(thumbnail_status='running')
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    def _store(self, imdb_id, poster_url):
+        """Download, resize and save one poster. Returns the new thumbnail status."""
+        if not IMDB_ID.match(imdb_id) or not poster_url:
+            return 'none'
+        try:
+            thumbnail = make_thumbnail(self.fetch(poster_url), self.size)
+        except Exception as e:
+            print(f"Error creating thumbnail for {imdb_id}: {e}")
+            return 'failed'
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, thumbnail_name(imdb_id))
+        partial = f"{path}.{threading.get_ident()}.tmp"
+        with open(partial, 'wb') as file:
+            file.write(thumbnail)
+        os.replace(partial, path)
+        return 'done'
+
+    def _run(self, app):
+        with app.app_context():
+            while not self._stopping.is_set():
+                try:
+                    busy = self.run_once()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Poster worker error: {e}")
+                    busy = 0
+                finally:
+                    db.session.remove()
+                if not busy:
+                    self._stopping.wait(self.interval)
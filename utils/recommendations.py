@@ -0,0 +1,48 @@
+import threading
+
+from utils.extensions import db
+
+
+class RecommendationRefresher:
+    """
+    Background thread recomputing the neighbour lists of stale titles.
+    Writes only mark titles stale; this thread catches up in batches, so a
+    title rated by many users in a burst is recomputed once. When no title is
+    stale it sweeps one batch of all titles per interval, picking up the
+    similarities writes do not mark (see apply_rating_changes).
+    """
+
+    def __init__(self, app, data_manager, interval=10.0, batch_size=100):
+        self.app = app
+        self.data_manager = data_manager
+        self.interval = interval
+        self.batch_size = batch_size
+        self._swept = None
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name='recommendations', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        with self.app.app_context():
+            while not self._stopping.is_set():
+                try:
+                    refreshed = self.data_manager.refresh_recommendations(self.batch_size)
+                    if not refreshed:
+                        self._swept = self.data_manager.sweep_recommendations(self._swept, self.batch_size)
+                except Exception as e:
+                    print(f"Error refreshing recommendations: {e}")
+                    refreshed = 0
+                finally:
+                    db.session.remove()
+                if refreshed < self.batch_size:
+                    self._stopping.wait(self.interval)
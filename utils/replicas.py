@@ -0,0 +1,224 @@
+import functools
+import inspect
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, has_app_context, has_request_context, session as http_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+REPLICA_POLICIES = ('round_robin', 'least_latency')
+STICKY_KEY = '_primary_until'
+
+
+def replica_binds(urls):
+    """SQLALCHEMY_BINDS entries ('replica0', 'replica1', ...) for a list of replica URLs."""
+    return {f"replica{index}": url for index, url in enumerate(urls)}
+
+
+class ReplicaRouter:
+    """
+    Picks the replica engine for each read and keeps read-your-writes.
+    After a session commits a write, reads from that HTTP session (or thread,
+    outside requests) go to the primary for `sticky_seconds`, so a redirect
+    after a POST never shows a replica that has not caught up yet.
+    """
+
+    def __init__(self, bind_keys, policy='round_robin', sticky_seconds=5.0, alpha=0.2):
+        if policy not in REPLICA_POLICIES:
+            raise ValueError(f"Unknown replica policy '{policy}'.")
+        self.bind_keys = list(bind_keys)
+        self.policy = policy
+        self.sticky_seconds = sticky_seconds
+        self.alpha = alpha
+        self.latencies = {key: 0.0 for key in self.bind_keys}
+        self._cycle = itertools.cycle(self.bind_keys)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def watch(self, key, engine):
+        """Track a moving average of statement latency on a replica engine."""
+        @event.listens_for(engine, 'before_cursor_execute')
+        def start_timer(conn, cursor, statement, parameters, context, executemany):
+            conn.info['replica_query_start'] = time.perf_counter()
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def record_latency(conn, cursor, statement, parameters, context, executemany):
+            start = conn.info.pop('replica_query_start', None)
+            if start is not None:
+                self.record_latency(key, time.perf_counter() - start)
+
+    def record_latency(self, key, seconds):
+        with self._lock:
+            previous = self.latencies[key]
+            self.latencies[key] = seconds if not previous else previous + self.alpha * (seconds - previous)
+
+    def pick(self):
+        """Bind key of the replica to read from next."""
+        with self._lock:
+            if self.policy == 'least_latency':
+                return min(self.bind_keys, key=self.latencies.__getitem__)
+            return next(self._cycle)
+
+    def mark_write(self):
+        """Send this session's reads to the primary for the next `sticky_seconds`."""
+        until = time.time() + self.sticky_seconds
+        if has_request_context():
+            if current_app.secret_key:
+                http_session[STICKY_KEY] = until
+        else:
+            self._local.primary_until = until
+
+    def is_sticky(self):
+        """Whether reads must go to the primary because of a recent write."""
+        if has_request_context():
+            until = http_session.get(STICKY_KEY, 0) if current_app.secret_key else 0
+        else:
+            until = getattr(self._local, 'primary_until', 0)
+        return time.time() < until
+
+
+def current_router():
+    """The app's ReplicaRouter, or None when no replicas are configured."""
+    return current_app.extensions.get('replica_router') if has_app_context() else None
+
+
+class RoutingSession(Session):
+    """Session that sends reads marked with read_from_replica() to a replica engine."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('replica_reads') and not self._flushing:
+            router = current_router()
+            if router is not None and not router.is_sticky():
+                return self._db.engines[router.pick()]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _flushed(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(session):
+    if session.info.pop('wrote', False):
+        router = current_router()
+        if router is not None:
+            router.mark_write()
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _rolled_back(session):
+    session.info.pop('wrote', None)
+
+
+@contextmanager
+def read_from_replica():
+    """
+    Route the reads of db.session inside the block to a replica.
+    Does nothing outside a Flask app context, e.g. in the asyncio serving mode.
+    """
+    if not has_app_context():
+        yield
+        return
+    session = current_app.extensions['sqlalchemy'].session
+    previous = session.info.get('replica_reads', False)
+    session.info['replica_reads'] = True
+    try:
+        yield
+    finally:
+        session.info['replica_reads'] = previous
+
+
+def replica_read(func):
+    """Decorator for data manager read methods that may be served by a replica."""
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            with read_from_replica():
+                yield from func(*args, **kwargs)
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with read_from_replica():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def sqlite_path(engine):
+    """Filesystem path of a file-backed SQLite engine."""
+    return make_url(str(engine.url)).database
+
+
+def sync_sqlite_replicas(app):
+    """
+    Copy the primary SQLite database into every replica file.
+    A local stand-in for replication: each replica is refreshed with SQLite's
+    online backup API, which copies a consistent snapshot while the primary
+    keeps serving reads and writes.
+    """
+    router = app.extensions.get('replica_router')
+    if router is None:
+        return
+    with app.app_context():
+        engines = app.extensions['sqlalchemy'].engines
+        primary = sqlite_path(engines[None])
+        for key in router.bind_keys:
+            source = sqlite3.connect(primary)
+            target = sqlite3.connect(sqlite_path(engines[key]), timeout=10)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+
+
+class ReplicaSyncer:
+    """Background thread running sync_sqlite_replicas every `interval` seconds."""
+
+    def __init__(self, app, interval=1.0):
+        self.app = app
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name='replica-sync', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                sync_sqlite_replicas(self.app)
+            except Exception as e:
+                print(f"Error syncing replicas: {e}")
+
+
+def init_replicas(app, replica_urls):
+    """Register replica URLs as SQLALCHEMY_BINDS and attach a router; call before db.init_app."""
+    app.config['SQLALCHEMY_BINDS'] = replica_binds(replica_urls)
+    app.extensions['replica_router'] = ReplicaRouter(
+        app.config['SQLALCHEMY_BINDS'],
+        policy=os.getenv('REPLICA_POLICY', 'round_robin'),
+        sticky_seconds=float(os.getenv('REPLICA_STICKY_SECONDS', 5))
+    )
+    return app.extensions['replica_router']
@@ -0,0 +1,106 @@
+import threading
+
+from sqlalchemy import event, text
+
+PROFILES = {
+    'default': {
+        'pragmas': {},
+        'engine_options': {},
+    },
+    'performance': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 10000,
+            'cache_size': -64000,
+            'mmap_size': 268435456,
+            'temp_store': 'MEMORY',
+        },
+        'engine_options': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_timeout': 30,
+            'pool_pre_ping': True,
+            'connect_args': {'timeout': 10},
+        },
+    },
+}
+
+# Not tuning: ON DELETE CASCADE and the other foreign key actions only run
+# when SQLite enforces foreign keys, which is off by default per connection.
+REQUIRED_PRAGMAS = {'foreign_keys': 'ON'}
+
+
+def is_sqlite(uri):
+    """Check whether a database URI points to SQLite."""
+    return uri.startswith('sqlite')
+
+
+def is_memory_db(uri):
+    """Check whether a SQLite URI is an in-memory database."""
+    return uri in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in uri
+
+
+def engine_options(profile, uri):
+    """Return SQLALCHEMY_ENGINE_OPTIONS for a profile and database URI."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown database profile '{profile}'.")
+    options = dict(PROFILES[profile]['engine_options'])
+    if is_memory_db(uri):
+        for key in ('pool_size', 'max_overflow', 'pool_timeout'):
+            options.pop(key, None)
+    return options
+
+
+def apply_pragmas(engine, profile):
+    """Run the profile's pragmas, and those every profile needs, on every new connection of an engine."""
+    pragmas = dict(REQUIRED_PRAGMAS, **PROFILES[profile]['pragmas'])
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def optimize(engine):
+    """Run PRAGMA optimize so SQLite refreshes statistics for the query planner."""
+    if engine.dialect.name != 'sqlite':
+        return
+    with engine.connect() as connection:
+        connection.execute(text("PRAGMA optimize"))
+
+
+class PeriodicOptimizer:
+    """Background thread running PRAGMA optimize every `interval` seconds."""
+
+    def __init__(self, app, engine_getter, interval=3600):
+        self.app = app
+        self.engine_getter = engine_getter
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name='sqlite-optimizer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    optimize(self.engine_getter())
+            except Exception as e:
+                print(f"Error optimizing database: {e}")
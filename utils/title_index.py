@@ -0,0 +1,260 @@
+import gzip
+import itertools
+import mmap
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+from array import array
+
+from utils.omdb_cache import BASE_DIR, OMDbCache
+
+DEFAULT_INDEX_PATH = os.path.join(BASE_DIR, 'instance', 'title_index.bin')
+MAGIC = b'MWTI'
+VERSION = 1
+# Title types of title.basics that OMDb's title search can return as movies.
+MOVIE_TYPES = ('movie', 'tvMovie')
+
+HEADER = struct.Struct('<4sHHQ')
+SECTION = struct.Struct('<QQ')
+# Sections of the index file in order, with the array typecode of their items.
+# Keys and texts are UTF-8 blobs addressed by the offset arrays (count + 1
+# entries each), the other sections hold one value per title.
+SECTIONS = (
+    ('key_offsets', 'Q'),
+    ('keys', 'B'),
+    ('text_offsets', 'Q'),
+    ('texts', 'B'),
+    ('years', 'H'),
+    ('ratings', 'B'),
+    ('imdb_ids', 'I'),
+)
+
+
+class TitleIndex:
+    """
+    Read-only, memory-mapped index of the titles of the IMDb dataset dumps.
+    Titles are stored sorted by their OMDbCache key next to columnar arrays
+    of year, rating (in tenths), IMDb ID and a "title\\tdirectors" text, so a
+    lookup is a binary search over the mapped file: no load step, and worker
+    processes share the pages through the OS page cache. Files are written in
+    the machine's byte order by build_title_index.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {VERSION} title index.")
+        self._view = memoryview(self._mmap)
+        self._starts = {}
+        self._columns = {}
+        for i, (name, typecode) in enumerate(SECTIONS):
+            offset, length = SECTION.unpack_from(self._mmap, HEADER.size + i * SECTION.size)
+            self._starts[name] = offset
+            self._columns[name] = self._view[offset:offset + length].cast(typecode)
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        """Release the mapping."""
+        for column in self._columns.values():
+            column.release()
+        self._view.release()
+        self._mmap.close()
+
+    def find(self, title):
+        """Position of a title in the index, or None when it is not listed."""
+        key = OMDbCache.normalize(title).encode('utf-8')
+        offsets, data, base = self._columns['key_offsets'], self._mmap, self._starts['keys']
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if data[base + offsets[mid]:base + offsets[mid + 1]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and data[base + offsets[lo]:base + offsets[lo + 1]] == key:
+            return lo
+        return None
+
+    def get(self, title):
+        """
+        The movie data of a title in the shape of an OMDb payload, or None.
+        Only the fields the dumps provide are set; missing values are 'N/A'.
+        """
+        row = self.find(title)
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        offsets, base = self._columns['text_offsets'], self._starts['texts']
+        text = self._mmap[base + offsets[row]:base + offsets[row + 1]].decode('utf-8')
+        display_title, director = text.split('\t')
+        year = self._columns['years'][row]
+        rating = self._columns['ratings'][row]
+        return {
+            'Title': display_title,
+            'Year': str(year) if year else 'N/A',
+            'Director': director or 'N/A',
+            'imdbRating': f"{rating / 10:.1f}" if rating else 'N/A',
+            'imdbID': f"tt{self._columns['imdb_ids'][row]:07d}",
+            'Response': 'True',
+        }
+
+    def stats(self):
+        """Lookup counters of this process and the number of indexed titles."""
+        return {'hits': self.hits, 'misses': self.misses, 'size': self.count}
+
+
+def read_tsv(path):
+    """Yield the fields of each data row of an IMDb TSV dump, plain or gzipped. '\\N' becomes None."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', newline='\n') as f:
+        next(f, None)
+        for line in f:
+            yield [None if field == '\\N' else field for field in line.rstrip('\n').split('\t')]
+
+
+def _load(conn, sql, rows, chunk_size):
+    """Insert rows into the staging database `chunk_size` at a time."""
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        conn.executemany(sql, chunk)
+
+
+def _stage(conn, basics, ratings, crew, names, chunk_size):
+    """Stream the dumps into staging tables, keeping only movies and the rows that describe them."""
+    conn.executescript("""
+        CREATE TABLE titles (tconst TEXT PRIMARY KEY, key TEXT NOT NULL, title TEXT NOT NULL, year INTEGER)
+            WITHOUT ROWID;
+        CREATE TABLE ratings (tconst TEXT PRIMARY KEY, rating REAL, votes INTEGER) WITHOUT ROWID;
+        CREATE TABLE directors (tconst TEXT, ordinal INTEGER, nconst TEXT, PRIMARY KEY (tconst, ordinal))
+            WITHOUT ROWID;
+        CREATE INDEX directors_nconst ON directors (nconst);
+        CREATE TABLE names (nconst TEXT PRIMARY KEY, name TEXT) WITHOUT ROWID;
+    """)
+    _load(conn, "INSERT OR IGNORE INTO titles VALUES (?, ?, ?, ?)", (
+        (row[0], OMDbCache.normalize(row[2]), row[2], int(row[5]) if row[5] else None)
+        for row in read_tsv(basics) if row[1] in MOVIE_TYPES and row[2]
+    ), chunk_size)
+    _load(
+        conn,
+        "INSERT INTO ratings SELECT ?1, ?2, ?3 WHERE EXISTS (SELECT 1 FROM titles WHERE tconst = ?1)",
+        ((row[0], float(row[1]), int(row[2])) for row in read_tsv(ratings)),
+        chunk_size
+    )
+    _load(
+        conn,
+        "INSERT INTO directors SELECT ?1, ?2, ?3 WHERE EXISTS (SELECT 1 FROM titles WHERE tconst = ?1)",
+        ((row[0], ordinal, nconst)
+         for row in read_tsv(crew) if row[1]
+         for ordinal, nconst in enumerate(row[1].split(','))),
+        chunk_size
+    )
+    if names:
+        _load(
+            conn,
+            "INSERT INTO names SELECT ?1, ?2 WHERE EXISTS (SELECT 1 FROM directors WHERE nconst = ?1)",
+            ((row[0], row[1]) for row in read_tsv(names)),
+            chunk_size
+        )
+    conn.commit()
+
+
+def _write_sections(conn, tmp, chunk_size):
+    """
+    Write each section of the index to its own file in `tmp`, streaming the
+    titles in key order. Of titles sharing a key, the most voted one is kept,
+    as OMDb's title search returns the most popular match.
+    """
+    files = {name: open(os.path.join(tmp, name), 'wb') for name, _ in SECTIONS}
+    buffers = {name: array(typecode) for name, typecode in SECTIONS if name not in ('keys', 'texts')}
+    sizes = {'keys': 0, 'texts': 0}
+    buffers['key_offsets'].append(0)
+    buffers['text_offsets'].append(0)
+    count = 0
+    previous = None
+    rows = conn.execute("""
+        SELECT t.key, t.title, t.year, r.rating, t.tconst,
+               (SELECT group_concat(name, ', ') FROM (
+                    SELECT n.name FROM directors d JOIN names n ON n.nconst = d.nconst
+                    WHERE d.tconst = t.tconst ORDER BY d.ordinal))
+        FROM titles t LEFT JOIN ratings r ON r.tconst = t.tconst
+        ORDER BY t.key, coalesce(r.votes, 0) DESC, t.tconst
+    """)
+    try:
+        for key, title, year, rating, tconst, directors in rows:
+            if key == previous:
+                continue
+            previous = key
+            for name, value in (('keys', key.encode('utf-8')),
+                                ('texts', f"{title}\t{directors or ''}".replace('\n', ' ').encode('utf-8'))):
+                files[name].write(value)
+                sizes[name] += len(value)
+            buffers['key_offsets'].append(sizes['keys'])
+            buffers['text_offsets'].append(sizes['texts'])
+            buffers['years'].append(year if year and 0 < year < 65536 else 0)
+            buffers['ratings'].append(round(rating * 10) if rating else 0)
+            buffers['imdb_ids'].append(int(tconst[2:]))
+            count += 1
+            if count % chunk_size == 0:
+                for name, buffer in buffers.items():
+                    buffer.tofile(files[name])
+                    del buffer[:]
+        for name, buffer in buffers.items():
+            buffer.tofile(files[name])
+    finally:
+        for f in files.values():
+            f.close()
+    return count
+
+
+def build_title_index(basics, ratings, crew, names=None, output=DEFAULT_INDEX_PATH, chunk_size=50000):
+    """
+    Build a TitleIndex file from the IMDb dataset dumps (title.basics,
+    title.ratings, title.crew and, for director names, name.basics; plain or
+    .gz). The dumps are streamed `chunk_size` rows at a time into a scratch
+    SQLite database next to `output`, which does the joins and the sort on
+    disk; memory use levels off once its 32 MB page cache is full. The new
+    file replaces `output` atomically. Returns the number of indexed titles.
+    """
+    directory = os.path.dirname(os.path.abspath(output))
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, 'staging.db'))
+        try:
+            conn.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF; "
+                               "PRAGMA temp_store = FILE; PRAGMA cache_size = -32768;")
+            _stage(conn, basics, ratings, crew, names, chunk_size)
+            count = _write_sections(conn, tmp, chunk_size)
+        finally:
+            conn.close()
+
+        partial = os.path.join(tmp, 'title_index.bin')
+        with open(partial, 'wb') as out:
+            out.write(HEADER.pack(MAGIC, VERSION, 0, count))
+            offset = HEADER.size + len(SECTIONS) * SECTION.size
+            table = []
+            for name, _ in SECTIONS:
+                offset += -offset % 8
+                length = os.path.getsize(os.path.join(tmp, name))
+                table.append((offset, length))
+                offset += length
+            for entry in table:
+                out.write(SECTION.pack(*entry))
+            for (name, _), (offset, _) in zip(SECTIONS, table):
+                out.write(b'\0' * (offset - out.tell()))
+                with open(os.path.join(tmp, name), 'rb') as section:
+                    shutil.copyfileobj(section, out)
+        os.replace(partial, output)
+    return count